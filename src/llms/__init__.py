@@ -9,12 +9,31 @@ from typing import Optional
 from .base import LLMBase
 from .openai_llm import OpenAILLM
 from .glm_llm import GlmLLM
+from .client_pool import (
+    PooledClient,
+    clear_client_pool,
+    get_openai_client,
+    get_pooled_client,
+    pool_stats,
+    run_on_llm_loop,
+)
+from .response_cache import cache_stats, clear_response_cache, prune_response_cache, reset_cache_stats
 
 __all__ = [
     "LLMBase",
     "OpenAILLM",
     "GlmLLM",
     "create_llm_client",
+    "PooledClient",
+    "get_openai_client",
+    "get_pooled_client",
+    "run_on_llm_loop",
+    "pool_stats",
+    "clear_client_pool",
+    "cache_stats",
+    "reset_cache_stats",
+    "clear_response_cache",
+    "prune_response_cache",
 ]
 
 
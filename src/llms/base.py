@@ -8,6 +8,8 @@ integration with different language model backends.
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional, Union
 
+from . import response_cache
+
 
 class LLMBase(ABC):
     """
@@ -17,6 +19,10 @@ class LLMBase(ABC):
     enabling seamless switching between different providers (OpenAI, GLM, etc.).
     """
 
+    # Provider name and endpoint, part of the response-cache key
+    provider: str = ""
+    base_url: Optional[str] = None
+
     def __init__(self, config: Optional[Union[Dict, Any]] = None):
         """
         Initialize the LLM base class.
@@ -49,10 +55,36 @@ class LLMBase(ABC):
             Dict containing:
                 - content (str): The response content
                 - raw_response (Any): Raw response from the provider
+                  (None when served from the response cache)
                 - usage (Dict, optional): Token usage information
+                - cached (bool): True when served from the response cache
         """
         pass
 
+    def _complete(self, params: Dict[str, Any], use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Run one chat completion through the on-disk response cache.
+
+        Args:
+            params: Full request parameters (model, messages, sampling parameters)
+            use_cache: False skips the lookup (the fresh response is still stored)
+
+        Returns:
+            Dict in the ``chat_completions_create`` format
+        """
+        request = dict(params)
+        key = response_cache.request_key(request.pop("model"), request.pop("messages"),
+                                         provider=self.provider, base_url=self.base_url, **request)
+        hit = response_cache.lookup(key, use_cache)
+        if hit is not None:
+            return {"content": hit["content"], "raw_response": None, "usage": hit.get("usage"), "cached": True}
+
+        response = self.client.create(**params)
+        content = response.choices[0].message.content
+        usage = response_cache.usage_dict(response)
+        response_cache.store(key, content, usage, params["model"])
+        return {"content": content, "raw_response": response, "usage": usage, "cached": False}
+
     @abstractmethod
     def supports_vision(self) -> bool:
         """
@@ -97,7 +129,8 @@ class LLMBase(ABC):
         model: Optional[str] = None,
         max_tokens: int = 9600,
         temperature: float = 0.3,
-        additional_images: Optional[List[Dict]] = None
+        additional_images: Optional[List[Dict]] = None,
+        use_cache: bool = True
     ) -> Dict[str, Any]:
         """
         High-level method to chat with an image using the LLM.
@@ -114,6 +147,7 @@ class LLMBase(ABC):
             max_tokens: Maximum tokens in the response
             temperature: Sampling temperature
             additional_images: Optional list of additional images
+            use_cache: False bypasses the response cache lookup
 
         Returns:
             Dict with response content and metadata
@@ -131,7 +165,8 @@ class LLMBase(ABC):
             messages=messages,
             model=model,
             max_tokens=max_tokens,
-            temperature=temperature
+            temperature=temperature,
+            use_cache=use_cache
         )
 
     def _validate_messages(self, messages: List[Dict[str, str]]) -> None:
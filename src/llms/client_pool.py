@@ -0,0 +1,186 @@
+"""
+Process-wide pool of LLM clients for galaxy morphology MCP server.
+
+Every VLM/LLM caller (``openai_analysis``, ``analyze_image``, ``OpenAILLM``,
+``GlmLLM``) obtains its client here instead of constructing one per call.
+Clients are keyed on (provider, base_url, api key, model) and kept for the
+life of the process, so HTTP connections (and their TLS sessions) stay alive
+between analyses.
+
+OpenAI-compatible endpoints use ``AsyncOpenAI`` on a single background event
+loop owned by this module: async callers ``await PooledClient.acreate``; sync
+callers use ``PooledClient.create`` (or :func:`run_on_llm_loop`), which submits
+to that loop instead of spinning up a new loop or thread pool per call. A
+per-client semaphore bounds the number of in-flight requests.
+
+Providers without an async SDK (ZhipuAI) are pooled as sync clients, bounded
+by a thread semaphore.
+
+Environment:
+    LLM_MAX_CONCURRENCY: in-flight requests per pooled client (default 8)
+    LLM_KEEPALIVE_S: idle keep-alive expiry of pooled connections (default 120)
+"""
+
+import asyncio
+import hashlib
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+DEFAULT_TIMEOUT = 360.0
+
+
+def max_concurrency() -> int:
+    try:
+        return max(1, int(os.environ.get("LLM_MAX_CONCURRENCY", "8")))
+    except ValueError:
+        return 8
+
+
+def keepalive_seconds() -> float:
+    try:
+        return float(os.environ.get("LLM_KEEPALIVE_S", "120"))
+    except ValueError:
+        return 120.0
+
+
+# ── shared event loop ─────────────────────────────────────────────────────────
+
+_LOOP_LOCK = threading.Lock()
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_LOOP_THREAD: Optional[threading.Thread] = None
+
+
+def llm_loop() -> asyncio.AbstractEventLoop:
+    """The background event loop all pooled async clients live on (started on first use)."""
+    global _LOOP, _LOOP_THREAD
+    with _LOOP_LOCK:
+        if _LOOP is None or _LOOP.is_closed():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="llm-client-loop", daemon=True)
+            thread.start()
+            _LOOP, _LOOP_THREAD = loop, thread
+        return _LOOP
+
+
+def run_on_llm_loop(coro, timeout: Optional[float] = None):
+    """Run ``coro`` on the shared LLM loop and block until it finishes.
+
+    Safe to call from sync code and from threads running their own event loop
+    (e.g. the MCP server). Must not be called from the LLM loop itself.
+    """
+    loop = llm_loop()
+    if threading.current_thread() is _LOOP_THREAD:
+        coro.close()
+        raise RuntimeError("run_on_llm_loop() called from the LLM loop; await the coroutine instead")
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+    try:
+        return future.result(timeout)
+    except BaseException:
+        future.cancel()
+        raise
+
+
+# ── pooled clients ────────────────────────────────────────────────────────────
+
+@dataclass
+class PooledClient:
+    """A shared provider client plus its concurrency limit."""
+
+    key: tuple
+    client: Any
+    is_async: bool
+    limit: int
+    _sync_sem: threading.BoundedSemaphore = field(init=False, repr=False)
+    _async_sem: Optional[asyncio.Semaphore] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        self._sync_sem = threading.BoundedSemaphore(self.limit)
+
+    async def acreate(self, **params) -> Any:
+        """``chat.completions.create`` on the shared loop (await from LLM-loop coroutines)."""
+        if not self.is_async:
+            return await asyncio.get_running_loop().run_in_executor(None, lambda: self.create(**params))
+        if self._async_sem is None:
+            self._async_sem = asyncio.Semaphore(self.limit)
+        async with self._async_sem:
+            return await self.client.chat.completions.create(**params)
+
+    def create(self, **params) -> Any:
+        """Blocking ``chat.completions.create``."""
+        if self.is_async:
+            return run_on_llm_loop(self.acreate(**params))
+        with self._sync_sem:
+            return self.client.chat.completions.create(**params)
+
+
+_POOL_LOCK = threading.Lock()
+_POOL: dict[tuple, PooledClient] = {}
+
+
+def _pool_key(provider: str, api_key: str, base_url: Optional[str], model: Optional[str]) -> tuple:
+    # API key hashed so it never appears in reprs / logs
+    return (provider, base_url or "", hashlib.sha256((api_key or "").encode()).hexdigest()[:16], model or "")
+
+
+def _new_async_openai(api_key: str, base_url: Optional[str], timeout: float, limit: int):
+    import httpx
+    from openai import AsyncOpenAI
+
+    http_client = httpx.AsyncClient(
+        timeout=timeout,
+        limits=httpx.Limits(max_connections=limit, max_keepalive_connections=limit,
+                            keepalive_expiry=keepalive_seconds()),
+    )
+    kwargs: dict = {"api_key": api_key, "timeout": timeout, "http_client": http_client}
+    if base_url:
+        kwargs["base_url"] = base_url
+    return AsyncOpenAI(**kwargs)
+
+
+def get_pooled_client(
+    provider: str,
+    api_key: str,
+    base_url: Optional[str] = None,
+    model: Optional[str] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    factory: Optional[Callable[[], Any]] = None,
+) -> PooledClient:
+    """Return the process-wide client for (provider, base_url, api_key, model), creating it once.
+
+    ``provider="openai"`` builds an ``AsyncOpenAI`` with a keep-alive connection pool.
+    Other providers must pass ``factory`` returning a (sync) client exposing
+    ``chat.completions.create``.
+    """
+    key = _pool_key(provider, api_key, base_url, model)
+    with _POOL_LOCK:
+        pooled = _POOL.get(key)
+        if pooled is not None:
+            return pooled
+        limit = max_concurrency()
+        if factory is None:
+            if provider != "openai":
+                raise ValueError(f"provider {provider!r} needs a client factory")
+            pooled = PooledClient(key, _new_async_openai(api_key, base_url, timeout, limit), True, limit)
+        else:
+            pooled = PooledClient(key, factory(), False, limit)
+        _POOL[key] = pooled
+        return pooled
+
+
+def get_openai_client(api_key: str, base_url: Optional[str] = None, model: Optional[str] = None,
+                      timeout: float = DEFAULT_TIMEOUT) -> PooledClient:
+    return get_pooled_client("openai", api_key, base_url, model, timeout)
+
+
+def pool_stats() -> dict:
+    with _POOL_LOCK:
+        return {"clients": len(_POOL),
+                "keys": [{"provider": k[0], "base_url": k[1], "model": k[3]} for k in _POOL]}
+
+
+def clear_client_pool() -> None:
+    """Drop all pooled clients (their connections close when garbage-collected)."""
+    with _POOL_LOCK:
+        _POOL.clear()
@@ -14,6 +14,7 @@ except ImportError:
     ZhipuAI = None
 
 from .base import LLMBase
+from .client_pool import get_pooled_client
 
 
 class GlmLLM(LLMBase):
@@ -24,6 +25,8 @@ class GlmLLM(LLMBase):
     for vision tasks through the GLM-4V series models.
     """
 
+    provider = "glm"
+
     def __init__(self, config: Optional[Dict] = None):
         """
         Initialize GLM LLM provider.
@@ -57,20 +60,25 @@ class GlmLLM(LLMBase):
         if not base_url:
             base_url = os.getenv("ZAI_BASE_URL")
 
-        # Initialize ZhipuAI client
-        self.client = ZhipuAI(api_key=api_key, base_url=base_url)
-
         # Default model - GLM-4V for vision capabilities
         self.default_model = (
             self.config.get("model") if self.config else None
         ) or os.getenv("GLM_MODEL", "glm-4.6v")
 
+        # Shared ZhipuAI client from the process-wide pool (sync SDK, thread-bounded)
+        self.base_url = base_url
+        self.client = get_pooled_client(
+            "glm", api_key, base_url, self.default_model,
+            factory=lambda: ZhipuAI(api_key=api_key, base_url=base_url),
+        )
+
     def chat_completions_create(
         self,
         messages: List[Dict[str, str]],
         model: Optional[str] = None,
         max_tokens: int = 9600,
         temperature: float = 0.7,
+        use_cache: bool = True,
         **kwargs
     ) -> Dict[str, Any]:
         """
@@ -81,6 +89,7 @@ class GlmLLM(LLMBase):
             model: Model name to use (default: self.default_model)
             max_tokens: Maximum tokens in the response
             temperature: Sampling temperature
+            use_cache: False bypasses the response cache lookup
             **kwargs: Additional GLM parameters
 
         Returns:
@@ -103,26 +112,8 @@ class GlmLLM(LLMBase):
         # Add any additional parameters
         params.update(kwargs)
 
-        # Call ZhipuAI API
-        response = self.client.chat.completions.create(**params)
-
-        # Extract response content
-        content = response.choices[0].message.content
-
-        # Extract usage info if available
-        usage = None
-        if hasattr(response, "usage") and response.usage:
-            usage = {
-                "prompt_tokens": response.usage.prompt_tokens,
-                "completion_tokens": response.usage.completion_tokens,
-                "total_tokens": response.usage.total_tokens,
-            }
-
-        return {
-            "content": content,
-            "raw_response": response,
-            "usage": usage,
-        }
+        # Call ZhipuAI API through the response cache
+        return self._complete(params, use_cache=use_cache)
 
     def supports_vision(self) -> bool:
         """
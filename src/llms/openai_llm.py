@@ -8,9 +8,8 @@ supporting both text and multimodal models.
 import os
 from typing import Any, Dict, List, Optional
 
-from openai import OpenAI
-
 from .base import LLMBase
+from .client_pool import get_openai_client
 
 
 class OpenAILLM(LLMBase):
@@ -21,6 +20,8 @@ class OpenAILLM(LLMBase):
     for vision tasks.
     """
 
+    provider = "openai"
+
     def __init__(self, config: Optional[Dict] = None):
         """
         Initialize OpenAI LLM provider.
@@ -49,23 +50,22 @@ class OpenAILLM(LLMBase):
         if not base_url:
             base_url = os.getenv("OPENAI_BASE_URL")
 
-        # Initialize OpenAI client (120s timeout for VLM image analysis)
-        if base_url:
-            self.client = OpenAI(api_key=api_key, base_url=base_url, timeout=360.0)
-        else:
-            self.client = OpenAI(api_key=api_key, timeout=360.0)
-
         # Default model
         self.default_model = (
             self.config.get("model") if self.config else None
         ) or os.getenv("OPENAI_MODEL", "gpt-4o")
 
+        # Shared keep-alive client from the process-wide pool (360s timeout for VLM image analysis)
+        self.base_url = base_url
+        self.client = get_openai_client(api_key, base_url, self.default_model, timeout=360.0)
+
     def chat_completions_create(
         self,
         messages: List[Dict[str, str]],
         model: Optional[str] = None,
         max_tokens: int = 9600,
         temperature: float = 0.7,
+        use_cache: bool = True,
         **kwargs
     ) -> Dict[str, Any]:
         """
@@ -76,6 +76,7 @@ class OpenAILLM(LLMBase):
             model: Model name to use (default: self.default_model)
             max_tokens: Maximum tokens in the response
             temperature: Sampling temperature
+            use_cache: False bypasses the response cache lookup
             **kwargs: Additional OpenAI parameters
 
         Returns:
@@ -98,26 +99,8 @@ class OpenAILLM(LLMBase):
         # Add any additional parameters
         params.update(kwargs)
 
-        # Call OpenAI API
-        response = self.client.chat.completions.create(**params)
-
-        # Extract response content
-        content = response.choices[0].message.content
-
-        # Extract usage info if available
-        usage = None
-        if hasattr(response, "usage") and response.usage:
-            usage = {
-                "prompt_tokens": response.usage.prompt_tokens,
-                "completion_tokens": response.usage.completion_tokens,
-                "total_tokens": response.usage.total_tokens,
-            }
-
-        return {
-            "content": content,
-            "raw_response": response,
-            "usage": usage,
-        }
+        # Call OpenAI API through the response cache
+        return self._complete(params, use_cache=use_cache)
 
     def supports_vision(self) -> bool:
         """
@@ -0,0 +1,237 @@
+"""
+Content-addressed on-disk cache of LLM / VLM chat completions.
+
+Identical requests recur constantly (the same comparison PNG and prompt after a
+restart, repeated ``view_original_image`` calls, the same round pair in
+``best_round_registry.run_round_comparison``). ``openai_analysis`` and the
+``llms`` clients (hence ``analyze_image.call_vlm_api``) consult this cache
+before calling the API.
+
+The key is the sha256 of a canonical JSON document made of the provider, the
+endpoint ``base_url``, the model, the messages (every inline ``data:`` image replaced by the sha256 of its decoded
+bytes) and all sampling parameters (temperature, max_tokens, ...). Entries are
+small JSON files ``<dir>/<key[:2]>/<key>.json`` holding the content and usage,
+written atomically.
+
+Environment:
+    LLM_CACHE: "0" disables the cache entirely (default "1")
+    LLM_CACHE_DIR: cache directory (default ~/.cache/galaxy_morphology_mcp/llm_responses)
+    LLM_CACHE_TTL_S: entry lifetime in seconds, 0 = never expire (default 30 days)
+    LLM_CACHE_PRUNE_INTERVAL_S: how often ``store`` sweeps expired entries (default 1 day)
+
+Callers pass ``use_cache=False`` to bypass the lookup for one request; the fresh
+response still replaces the stored entry. Expired entries are deleted by
+:func:`prune_response_cache`, which ``store`` runs at most once per prune interval.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Optional
+
+DEFAULT_TTL_S = 30 * 24 * 3600
+DEFAULT_PRUNE_INTERVAL_S = 24 * 3600
+_PRUNE_MARKER = ".last_prune"
+
+_STATS_LOCK = threading.Lock()
+_STATS = {"hits": 0, "misses": 0, "expired": 0, "bypassed": 0, "stores": 0}
+
+
+def cache_enabled() -> bool:
+    return os.environ.get("LLM_CACHE", "1") == "1"
+
+
+def cache_dir() -> str:
+    return os.environ.get("LLM_CACHE_DIR") or os.path.join(
+        os.path.expanduser("~"), ".cache", "galaxy_morphology_mcp", "llm_responses")
+
+
+def cache_ttl() -> float:
+    try:
+        return float(os.environ.get("LLM_CACHE_TTL_S", str(DEFAULT_TTL_S)))
+    except ValueError:
+        return float(DEFAULT_TTL_S)
+
+
+def prune_interval() -> float:
+    try:
+        return float(os.environ.get("LLM_CACHE_PRUNE_INTERVAL_S", str(DEFAULT_PRUNE_INTERVAL_S)))
+    except ValueError:
+        return float(DEFAULT_PRUNE_INTERVAL_S)
+
+
+def _count(name: str) -> None:
+    with _STATS_LOCK:
+        _STATS[name] += 1
+
+
+def cache_stats() -> dict:
+    """Process-wide hit/miss counters plus the hit rate over lookups."""
+    with _STATS_LOCK:
+        stats = dict(_STATS)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else None
+    return stats
+
+
+def reset_cache_stats() -> None:
+    with _STATS_LOCK:
+        for name in _STATS:
+            _STATS[name] = 0
+
+
+def _image_digest(url: str) -> str:
+    header, _, payload = url.partition(",")
+    data = base64.b64decode(payload) if header.endswith(";base64") else payload.encode()
+    return "sha256:" + hashlib.sha256(data).hexdigest()
+
+
+def _normalize(value: Any) -> Any:
+    """Replace inline data-URL images by the hash of their bytes; recurse into lists / dicts."""
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, str) and value.startswith("data:") and "," in value[:200]:
+        return _image_digest(value)
+    return value
+
+
+def request_key(model: str, messages: list, *, provider: str = "", base_url: Optional[str] = None,
+                **params: Any) -> str:
+    """Cache key of one chat-completions request (provider + endpoint + model + messages + sampling parameters)."""
+    doc = {"provider": provider, "base_url": base_url or "", "model": model, "messages": _normalize(messages),
+           "params": {k: params[k] for k in sorted(params) if params[k] is not None}}
+    canonical = json.dumps(doc, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _entry_path(key: str) -> str:
+    return os.path.join(cache_dir(), key[:2], f"{key}.json")
+
+
+def lookup(key: str, use_cache: bool = True) -> Optional[dict]:
+    """Stored ``{"content", "usage", "model", "created"}`` for ``key``, or None (miss / expired / bypassed)."""
+    if not cache_enabled():
+        return None
+    if not use_cache:
+        _count("bypassed")
+        return None
+    path = _entry_path(key)
+    try:
+        with open(path, encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        _count("misses")
+        return None
+    ttl = cache_ttl()
+    if ttl > 0 and time.time() - float(entry.get("created", 0)) > ttl:
+        _count("expired")
+        _count("misses")
+        return None
+    _count("hits")
+    return entry
+
+
+def store(key: str, content: Optional[str], usage: Optional[dict] = None, model: Optional[str] = None) -> None:
+    """Write one response (empty content is never cached). Failures only log."""
+    if not cache_enabled() or not content:
+        return
+    path = _entry_path(key)
+    entry = {"content": content, "usage": usage, "model": model, "created": time.time()}
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".resp_", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        _count("stores")
+    except OSError as e:
+        print(f"[response_cache] failed to store {key[:12]}: {e}")
+    _maybe_prune()
+
+
+def prune_response_cache(max_age_s: Optional[float] = None) -> int:
+    """Delete entries older than ``max_age_s`` (default: the TTL); returns the number removed.
+
+    Age is taken from the file mtime (entries are written once, atomically).
+    With a TTL of 0 (never expire) nothing is removed unless ``max_age_s`` is given.
+    """
+    max_age = cache_ttl() if max_age_s is None else max_age_s
+    if max_age <= 0:
+        return 0
+    cutoff = time.time() - max_age
+    removed = 0
+    for dirpath, _, files in os.walk(cache_dir()):
+        for name in files:
+            if not (name.endswith(".json") or name.endswith(".tmp")):
+                continue
+            path = os.path.join(dirpath, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.unlink(path)
+                    removed += name.endswith(".json")
+            except OSError:
+                continue
+    return removed
+
+
+def _maybe_prune() -> None:
+    """Run :func:`prune_response_cache` when the last sweep (any process) is older than the interval."""
+    marker = os.path.join(cache_dir(), _PRUNE_MARKER)
+    try:
+        if time.time() - os.path.getmtime(marker) < prune_interval():
+            return
+    except OSError:
+        pass
+    try:
+        with open(marker, "w"):
+            pass
+        removed = prune_response_cache()
+    except OSError as e:
+        print(f"[response_cache] prune failed: {e}")
+        return
+    if removed:
+        print(f"[response_cache] pruned {removed} expired entries")
+
+
+def cached_prompt_tokens(response: Any) -> int:
+    """Prompt tokens the provider served from its prefix cache (``prompt_tokens_details.cached_tokens``)."""
+    details = getattr(getattr(response, "usage", None), "prompt_tokens_details", None)
+    if isinstance(details, dict):
+        return int(details.get("cached_tokens") or 0)
+    return int(getattr(details, "cached_tokens", 0) or 0)
+
+
+def usage_dict(response: Any) -> Optional[dict]:
+    """Token usage of an SDK response as a plain dict (None when absent)."""
+    usage = getattr(response, "usage", None)
+    if not usage:
+        return None
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        "total_tokens": getattr(usage, "total_tokens", 0) or 0,
+        "cached_tokens": cached_prompt_tokens(response),
+    }
+
+
+def clear_response_cache() -> int:
+    """Delete all cached responses; returns the number of entries removed."""
+    removed = 0
+    root = cache_dir()
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            if name.endswith(".json"):
+                os.unlink(os.path.join(dirpath, name))
+                removed += 1
+    return removed
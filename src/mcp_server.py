@@ -14,9 +14,14 @@ import importlib.util
 from typing import Any
 from mcp.server import FastMCP
 from mcp.server.transport_security import TransportSecuritySettings
+from tools.archive import list_archived_rounds
 from tools.modify_lyric import check_lyric_file
-from tools.parse_lyric import pixel2arcsec_offset
+from tools.validate_configs import validate_config_tree
+from tools.runtime_model import estimate_fit_runtime
+from tools.psf_prep import prepare_psf
+from tools.parse_lyric import pixel2arcsec_offset, pixel2arcsec_offset_batch
 from tools.run_galfit import run_galfit
+from tools.fit_region import propose_fit_region
 from tools.run_galfits import run_galfits, run_galfits_image_fitting, run_galfits_sed_fitting, run_galfits_image_sed_fitting
 
 from tools.residual_analysis import component_analysis, analyze_multiband_components
@@ -28,7 +33,7 @@ from tools.bar_lopsidedness_detection import (
 )
 from tools.view_original_image import view_original_image
 from tools.render_original import render_original
-from tools.pix2radec import pix2radec, re_arcsec2pix
+from tools.pix2radec import pix2radec, re_arcsec2pix, pix2radec_batch, re_arcsec2pix_batch
 from tools.prompt import workflow_galfit, workflow_galfits
 from starlette.responses import Response, JSONResponse
 from dotenv import load_dotenv
@@ -52,6 +57,7 @@ def _register_tools_and_prompts():
         app.add_tool(component_analysis)
         app.add_prompt(workflow_galfit)
         app.add_tool(detect_bar_lopsidedness)
+        app.add_tool(propose_fit_region)
         logger.info("Registered GALFIT tools (GALFIT_BIN is set)")
 
     if has_galfits:
@@ -65,6 +71,9 @@ def _register_tools_and_prompts():
         app.add_tool(pix2radec)
         app.add_tool(re_arcsec2pix)        
         app.add_tool(pixel2arcsec_offset)
+        app.add_tool(pix2radec_batch)
+        app.add_tool(re_arcsec2pix_batch)
+        app.add_tool(pixel2arcsec_offset_batch)
         app.add_prompt(workflow_galfits)
         logger.info("Registered GalfitS tools (GALFITS_BIN is set)")
 
@@ -73,6 +82,10 @@ def _register_tools_and_prompts():
     app.add_tool(render_original)  
     app.add_tool(fourier_mode_analysis)
     app.add_tool(detect_bar_lopsidedness_from_isophote_tables)
+    app.add_tool(list_archived_rounds)
+    app.add_tool(validate_config_tree)
+    app.add_tool(estimate_fit_runtime)
+    app.add_tool(prepare_psf)
 
     if not has_galfit and not has_galfits:
         logger.warning(
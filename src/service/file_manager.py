@@ -6,42 +6,25 @@ from pathlib import Path
 import requests
 import zipfile
 
+from src.tools.lyric_document import load_lyric
+
 def extract_fits_paths_from_lyric(lyric_path):
     image_paths = []
     sigma_paths = []
     psf_paths = []
     mask_paths = []
-    image_pattern = re.compile(r'^I[a-z]1\) \[(.+?\.fits)')
-    sigma_pattern = re.compile(r'^I[a-z]3\) \[(.+?\.fits)')
-    psf_pattern = re.compile(r'^I[a-z]4\) \[(.+?\.fits)')
-    mask_pattern = re.compile(r'^I[a-z]6\) \[(.+?\.fits)')
-
-    with open(lyric_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            match = image_pattern.match(line.strip())
-            if match:
-                path = match.group(1)
-                if not os.path.isabs(path): # TODO: It should be tested against OSS paths in the future
-                    path = os.path.join(os.path.dirname(lyric_path), path)
-                image_paths.append(path)
-            match = sigma_pattern.match(line.strip())
-            if match:                
-                path = match.group(1)    
-                if not os.path.isabs(path):
-                    path = os.path.join(os.path.dirname(lyric_path), path)
-                sigma_paths.append(path)
-            match = psf_pattern.match(line.strip())
-            if match:
-                path = match.group(1)    
-                if not os.path.isabs(path):
-                    path = os.path.join(os.path.dirname(lyric_path), path)
-                psf_paths.append(path)
-            match = mask_pattern.match(line.strip())
-            if match:
-                path = match.group(1)    
-                if not os.path.isabs(path):
-                    path = os.path.join(os.path.dirname(lyric_path), path)
-                mask_paths.append(path)    
+    targets = {1: image_paths, 3: sigma_paths, 4: psf_paths, 6: mask_paths}
+    fits_pattern = re.compile(r'^\[(.+?\.fits)')
+
+    for line in load_lyric(lyric_path).entries():
+        if line.family != 'I' or len(line.label or '') != 1 or line.index not in targets:
+            continue
+        match = fits_pattern.match(line.value_str)
+        if match:
+            path = match.group(1)
+            if not os.path.isabs(path): # TODO: It should be tested against OSS paths in the future
+                path = os.path.join(os.path.dirname(lyric_path), path)
+            targets[line.index].append(path)
 
     return image_paths, sigma_paths, psf_paths, mask_paths
 
@@ -139,44 +122,25 @@ class GalfitsFileManager:
         new_sigma_dir = new_sigma_dir or fits_files_dir
         new_mask_dir = new_mask_dir or fits_files_dir
 
-        with open(lyric_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-
-        new_lines = []
-        #pattern = re.compile(r'^(I[a-z][1346])\) \[(.+?)([^/]+?\.fits)(.*)\]')
-        pattern = re.compile(r'^(I[a-z][1346])\) \[(.+?)([^/]+?\.fits)\s*,\s*([0-9]*)\]')
+        doc = load_lyric(lyric_file).copy()
+        pattern = re.compile(r'^\[(.+?)([^/]+?\.fits)\s*,\s*([0-9]*)\]')
+        new_dirs = {1: new_img_dir, 3: new_sigma_dir, 4: new_psf_dir, 6: new_mask_dir}
 
-
-        for line in lines:
-            match = pattern.match(line.strip())
-            if not match:
-                new_lines.append(line)
+        for line in list(doc.entries()):
+            if line.family != 'I' or len(line.label or '') != 1 or line.index not in new_dirs:
                 continue
-
-            key = match.group(1)    # 例如 Ia1, Ib3
-            prefix = match.group(2) # 旧路径前半部分
-            fits_name = match.group(3) # 文件名 f115w.fits
-            suffix = match.group(4)   # 后面的 ,0 等
-
-            num = int(re.search(r'\d+', key).group())
-            if num not in {1, 3, 4, 6}:
-                new_lines.append(line)
+            match = pattern.match(line.value_str)
+            if not match:
                 continue
 
-            if num == 1:
-                new_path = Path(new_img_dir) / fits_name
-            elif num == 3:
-                new_path = Path(new_sigma_dir) / fits_name
-            elif num == 4:
-                new_path = Path(new_psf_dir) / fits_name
-            else:
-                new_path = Path(new_mask_dir) / fits_name
+            key = line.key          # 例如 Ia1, Ib3
+            fits_name = match.group(2) # 文件名 f115w.fits
+            suffix = match.group(3)   # 后面的 ,0 等
 
-            new_line = f"{key}) [{new_path},{suffix}]\n"
-            new_lines.append(new_line)
+            new_path = Path(new_dirs[line.index]) / fits_name
+            doc.set(key, f"[{new_path},{suffix}]")
 
-        with open(lyric_file, 'w', encoding='utf-8') as f:
-            f.writelines(new_lines)
+        doc.save(lyric_file)
     
     def add_pre_hook(self, callable_func, **kwargs):
         self.pre_hooks.append({"func": callable_func, "args": kwargs})
@@ -109,7 +109,8 @@ def call_vlm_api(
     model: Optional[str] = None,
     max_tokens: int = 9600,
     temperature: float = 0.3,
-    additional_images: Optional[list[dict[str, str]]] = None
+    additional_images: Optional[list[dict[str, str]]] = None,
+    use_cache: bool = True
 ) -> tuple[Optional[str], Optional[str]]:
     """
     Call the LLM multimodal API with an image and additional content.
@@ -123,6 +124,7 @@ def call_vlm_api(
         max_tokens (int): Maximum tokens in the response. Default is 9600.
         temperature (float): Sampling temperature. Lower values produce more deterministic responses. Default is 0.3.
         additional_images (Optional[list[dict[str, str]]]): List of additional images to include. Each dict should have 'base64' and 'description' keys.
+        use_cache (bool): If False, skip the on-disk response cache lookup (the fresh response is still stored). Default is True.
 
     Returns:
         tuple[Optional[str], Optional[str]]:
@@ -140,7 +142,8 @@ def call_vlm_api(
                 model=model,
                 max_tokens=max_tokens,
                 temperature=temperature,
-                additional_images=additional_images
+                additional_images=additional_images,
+                use_cache=use_cache
             )
 
             analysis = result.get("content")
@@ -0,0 +1,462 @@
+"""archive — 拟合轮次归档工具（run_galfit 的 archives/<ts>.<md5>、run_galfits 的 output/<ts>_<base>）。
+
+长会话中每轮都会留下整套全精度多扩展 FITS（data/model/residual/subcomps），
+磁盘很快被未压缩的 float 数组占满。``compress_fits_for_archive`` 把归档中的
+FITS 就地改写为 tile-compressed（``CompImageHDU``）：
+
+- ``ARCHIVE_FITS_COMPRESSION``：``off``（默认，保持原样）| ``lossless`` | ``quantized``。
+- ``lossless``：float 用 GZIP_2 + ``quantize_level=0``（逐位无损），整数用 RICE_1。
+- ``quantized``：model / residual / subcomp 等派生 HDU 用 RICE_1 量化
+  （``ARCHIVE_FITS_QLEVEL``，默认 16，即噪声 σ/16 的量化步长）；原始数据 HDU
+  （GALFIT ``OBJECT`` 含 ``[``）及调用方指定的 ``keep_lossless`` HDU 仍无损。
+
+主 HDU（PrimaryHDU）按 FITS 标准不能压缩，为保持 HDU 编号不变原样保留。
+压缩 HDU 的 header（含 ``OBJECT`` 与拟合参数关键字）与 HDU 顺序不变，
+``astropy.io.fits`` / ``fits_io`` 的读取方对其透明。
+
+去重对象库（``ARCHIVE_DEDUP``，默认开启）：归档 blob 按 sha256 存入项目级
+``.objects/<前两位>/<sha256>``（run_galfit 为 ``archives/.objects``，run_galfits 为
+``output/.objects``），轮次目录中的归档副本是指向对象的硬链接。默认只对确会逐轮
+重复的归档输入（run_galfit 归档的 feedme / constraint / galfit.NN）去重；输出 FITS
+带时间戳等 header，极少逐字节相同，``ARCHIVE_DEDUP_OUTPUTS=1`` 时才并入对象库。
+仍在使用的工作配置（如 GalfitS 工作目录中的 lyric）始终是普通复制，不与对象库共享 inode。
+对象（及所有指向它的链接）被设为只读，原地改写会报错而不是悄悄改坏其它轮次；
+``gc_object_store`` 删除只剩对象库自身一个链接（``st_nlink == 1``）的对象，删掉某轮
+目录后下次归档即可回收空间。文件摘要按 inode+mtime+size 记忆。跨文件系统等无法建
+链接时退回普通复制。
+
+轮次索引（``ARCHIVE_INDEX``，默认开启）：每轮归档时向星系主目录下的
+``.archive_index.jsonl`` 追加一条记录（工具、轮次目录、文件路径、chi2_nu、BIC、
+成分列表、时间戳）。``list_rounds`` 只读取该索引（按文件偏移增量读取新追加的行），
+列出 / 过滤 / 排序轮次无需遍历 ``archives/*`` 或 ``output/*``。
+"""
+
+import fnmatch
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Annotated, Any
+
+import numpy as np
+from astropy.io import fits
+
+from .atomic_io import match_target_mode
+
+COMPRESSION_MODES = ("off", "lossless", "quantized")
+
+
+def archive_compression_mode() -> str:
+    mode = os.environ.get("ARCHIVE_FITS_COMPRESSION", "off").strip().lower()
+    return mode if mode in COMPRESSION_MODES else "off"
+
+
+def _quantize_level() -> float:
+    try:
+        return float(os.environ.get("ARCHIVE_FITS_QLEVEL", "16"))
+    except ValueError:
+        return 16.0
+
+
+def _compressed_hdu(hdu, lossy: bool, quantize_level: float):
+    data = hdu.data
+    header = hdu.header.copy()
+    if not np.issubdtype(data.dtype, np.floating):
+        return fits.CompImageHDU(data, header=header, compression_type="RICE_1")
+    if lossy:
+        return fits.CompImageHDU(data, header=header, compression_type="RICE_1",
+                                 quantize_level=quantize_level,
+                                 quantize_method=1)  # SUBTRACTIVE_DITHER_1
+    return fits.CompImageHDU(data, header=header, compression_type="GZIP_2",
+                             quantize_level=0.0)
+
+
+def compress_fits_for_archive(path: str, mode: str | None = None,
+                              quantize_level: float | None = None,
+                              keep_lossless: tuple[int, ...] = ()) -> dict | None:
+    """把归档中的 FITS 就地改写为 tile-compressed，返回压缩统计。
+
+    Args:
+        path: 归档目录中的 FITS 文件。
+        mode: ``off`` / ``lossless`` / ``quantized``；None 时读 ``ARCHIVE_FITS_COMPRESSION``。
+        quantize_level: 量化级别；None 时读 ``ARCHIVE_FITS_QLEVEL``。
+        keep_lossless: quantized 模式下仍须无损的 HDU 编号（如 GalfitS 结果中的
+            原图/sigma/mask）。
+
+    Returns:
+        dict: file / mode / bytes_in / bytes_out / ratio / seconds；mode 为 off、
+        文件不存在或改写失败时返回 None（原文件保持不变）。
+    """
+    mode = mode or archive_compression_mode()
+    if mode == "off" or not path or not os.path.exists(path):
+        return None
+    qlevel = _quantize_level() if quantize_level is None else quantize_level
+
+    t0 = time.perf_counter()
+    bytes_in = os.path.getsize(path)
+    tmp = None
+    try:
+        out = fits.HDUList()
+        with fits.open(path) as hdul:
+            for idx, hdu in enumerate(hdul):
+                if (isinstance(hdu, fits.PrimaryHDU) or isinstance(hdu, fits.CompImageHDU)
+                        or not isinstance(hdu, fits.ImageHDU) or hdu.data is None):
+                    out.append(hdu.copy())
+                    continue
+                is_original = "[" in str(hdu.header.get("OBJECT", ""))
+                lossy = (mode == "quantized" and not is_original and idx not in keep_lossless)
+                out.append(_compressed_hdu(hdu, lossy, qlevel))
+            fd, tmp = tempfile.mkstemp(prefix=".archive.", suffix=".fits",
+                                       dir=os.path.dirname(os.path.abspath(path)))
+            os.close(fd)
+            out.writeto(tmp, overwrite=True)
+        match_target_mode(tmp, path)
+        os.replace(tmp, path)
+    except Exception as e:  # noqa: BLE001
+        print(f"[archive] compression failed for {path}, keeping original: {e}")
+        if tmp and os.path.exists(tmp):
+            os.remove(tmp)
+        return None
+
+    bytes_out = os.path.getsize(path)
+    return {
+        "file": path,
+        "mode": mode,
+        "bytes_in": bytes_in,
+        "bytes_out": bytes_out,
+        "ratio": round(bytes_in / bytes_out, 3) if bytes_out else None,
+        "seconds": round(time.perf_counter() - t0, 3),
+    }
+
+
+def summarize_compression(stats: list[dict | None]) -> dict | None:
+    """合并多个文件的压缩统计（总字节数、总体压缩比、总耗时）。"""
+    stats = [s for s in stats if s]
+    if not stats:
+        return None
+    bytes_in = sum(s["bytes_in"] for s in stats)
+    bytes_out = sum(s["bytes_out"] for s in stats)
+    return {
+        "mode": stats[0]["mode"],
+        "files": [s["file"] for s in stats],
+        "bytes_in": bytes_in,
+        "bytes_out": bytes_out,
+        "ratio": round(bytes_in / bytes_out, 3) if bytes_out else None,
+        "seconds": round(sum(s["seconds"] for s in stats), 3),
+    }
+
+
+# ── content-addressed object store ────────────────────────────────────────────
+
+OBJECT_STORE_DIRNAME = ".objects"
+DEDUP_PATTERNS = ("*.fits",)    # ARCHIVE_DEDUP_OUTPUTS=1 时并入对象库的归档输出
+
+_DIGEST_LOCK = threading.Lock()
+_DIGESTS: dict[tuple[int, int, int, int], str] = {}   # (dev, ino, mtime_ns, size) -> sha256
+
+
+def archive_dedup_enabled() -> bool:
+    return os.environ.get("ARCHIVE_DEDUP", "1") == "1"
+
+
+def archive_dedup_outputs_enabled() -> bool:
+    return archive_dedup_enabled() and os.environ.get("ARCHIVE_DEDUP_OUTPUTS", "0") == "1"
+
+
+def object_store_dir(run_parent: str) -> str:
+    """项目级对象库目录（位于各轮目录的父目录下）。"""
+    return os.path.join(run_parent, OBJECT_STORE_DIRNAME)
+
+
+def file_digest(path: str) -> str:
+    """文件内容 sha256，按 inode+mtime+size 记忆（同一 inode 的硬链接共享结果）。"""
+    st = os.stat(path)
+    key = (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+    with _DIGEST_LOCK:
+        digest = _DIGESTS.get(key)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        with _DIGEST_LOCK:
+            _DIGESTS[key] = digest
+    return digest
+
+
+def _object_path(store_dir: str, digest: str) -> str:
+    return os.path.join(store_dir, digest[:2], digest)
+
+
+def _link_atomic(src: str, dst: str) -> None:
+    """在 dst 处原子地放置指向 src 的硬链接（覆盖已有文件）。"""
+    tmp = os.path.join(os.path.dirname(dst), f".link.{os.getpid()}.{os.path.basename(dst)}")
+    if os.path.lexists(tmp):
+        os.remove(tmp)
+    os.link(src, tmp)
+    os.replace(tmp, dst)
+
+
+def _make_read_only(path: str) -> None:
+    """去掉写权限（作用于 inode，即对象与所有指向它的链接）。"""
+    mode = os.stat(path).st_mode & 0o777
+    if mode & 0o222:
+        os.chmod(path, mode & ~0o222)
+
+
+def store_file(path: str, store_dir: str) -> dict | None:
+    """把归档中的文件并入对象库：已有相同内容则替换为指向对象的硬链接。
+
+    对象（及其所有链接）被设为只读。只应用于归档副本，不可用于仍在使用的工作文件。
+
+    Returns:
+        dict: digest / bytes / reused；失败（跨设备等）时返回 None，文件保持不变。
+    """
+    try:
+        digest = file_digest(path)
+        obj = _object_path(store_dir, digest)
+        size = os.path.getsize(path)
+        if os.path.exists(obj):
+            if os.path.samefile(obj, path):
+                return {"digest": digest, "bytes": size, "reused": False}
+            _link_atomic(obj, path)
+            return {"digest": digest, "bytes": size, "reused": True}
+        os.makedirs(os.path.dirname(obj), exist_ok=True)
+        _link_atomic(path, obj)
+        _make_read_only(obj)
+        return {"digest": digest, "bytes": size, "reused": False}
+    except OSError as e:
+        print(f"[archive] dedup skipped for {path}: {e}")
+        return None
+
+
+def archive_copy(src: str, dest_dir: str, store_dir: str) -> str:
+    """``shutil.copy`` 的去重版本：内容已在对象库中时只建硬链接，不复制数据。
+
+    目标须是归档副本（只读共享）；仍会被编辑的工作配置请用普通 ``shutil.copy``。
+    """
+    dest = os.path.join(dest_dir, os.path.basename(src))
+    if not archive_dedup_enabled():
+        shutil.copy(src, dest)
+        return dest
+    try:
+        obj = _object_path(store_dir, file_digest(src))
+        if os.path.exists(obj):
+            _link_atomic(obj, dest)
+            return dest
+    except OSError as e:
+        print(f"[archive] dedup lookup failed for {src}: {e}")
+    shutil.copy(src, dest)
+    store_file(dest, store_dir)
+    return dest
+
+
+def dedupe_run_dir(run_dir: str, store_dir: str, patterns=DEDUP_PATTERNS) -> dict | None:
+    """把轮次目录中匹配 ``patterns`` 的文件并入对象库，返回去重统计。"""
+    if not archive_dedup_enabled() or not os.path.isdir(run_dir):
+        return None
+    files = reused = bytes_reused = 0
+    for name in sorted(os.listdir(run_dir)):
+        path = os.path.join(run_dir, name)
+        if not os.path.isfile(path) or not any(fnmatch.fnmatch(name, p) for p in patterns):
+            continue
+        res = store_file(path, store_dir)
+        if res is None:
+            continue
+        files += 1
+        if res["reused"]:
+            reused += 1
+            bytes_reused += res["bytes"]
+    return {"files": files, "reused": reused, "bytes_reused": bytes_reused}
+
+
+def gc_object_store(store_dir: str) -> dict | None:
+    """删除不再被任何轮次目录引用的对象（硬链接计数为 1），返回回收统计。"""
+    if not os.path.isdir(store_dir):
+        return None
+    removed = bytes_freed = 0
+    for dirpath, _, names in os.walk(store_dir):
+        for name in names:
+            path = os.path.join(dirpath, name)
+            try:
+                st = os.lstat(path)
+                if st.st_nlink == 1:
+                    os.remove(path)
+                    removed += 1
+                    bytes_freed += st.st_size
+            except OSError as e:
+                print(f"[archive] gc skipped {path}: {e}")
+        if dirpath != store_dir and not os.listdir(dirpath):
+            try:
+                os.rmdir(dirpath)
+            except OSError:
+                pass
+    return {"removed": removed, "bytes_freed": bytes_freed}
+
+
+# ── per-galaxy round index ────────────────────────────────────────────────────
+
+INDEX_SCHEMA_VERSION = 1
+ARCHIVE_INDEX_FILENAME = ".archive_index.jsonl"
+_INDEX_SORT_KEYS = ("created_at", "chi2_nu", "bic", "round_label")
+
+_INDEX_LOCK = threading.Lock()
+_INDEX_CACHE: dict[str, tuple[int, int, list[dict]]] = {}   # path -> (ino, offset, records)
+
+
+def archive_index_enabled() -> bool:
+    return os.environ.get("ARCHIVE_INDEX", "1") == "1"
+
+
+def archive_index_path(galaxy_dir: str) -> str:
+    return os.path.join(galaxy_dir, ARCHIVE_INDEX_FILENAME)
+
+
+def record_round(
+    galaxy_dir: str,
+    tool: str,
+    run_dir: str,
+    files: dict | None = None,
+    chi2_nu: float | None = None,
+    bic: float | None = None,
+    components: list | None = None,
+    status: str = "success",
+    metadata: dict | None = None,
+) -> dict | None:
+    """向星系的轮次索引追加一条记录（best-effort，失败只打印日志）。
+
+    Args:
+        galaxy_dir: 星系主目录（``archives`` / ``output`` 的父目录）。
+        tool: ``galfit`` / ``galfits``。
+        run_dir: 本轮归档目录。
+        files: 角色 -> 路径（config / summary / image / fits ...），None 值会被丢弃。
+        chi2_nu, bic: 本轮指标。
+        components: 成分列表（``{"type": ...}``，GalfitS 另含 ``name``）。
+        status: ``success`` / ``failure``。
+        metadata: 附加字段（如 ``psf_trim``），原样并入记录。
+
+    Returns:
+        dict: 写入的记录；索引关闭或写入失败时返回 None。
+    """
+    if not archive_index_enabled() or not galaxy_dir:
+        return None
+    run_dir = os.path.abspath(run_dir)
+    record = {
+        "schema_version": INDEX_SCHEMA_VERSION,
+        "tool": tool,
+        "round_label": os.path.basename(run_dir),
+        "run_dir": run_dir,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "status": status,
+        "chi2_nu": chi2_nu,
+        "bic": bic,
+        "components": components or [],
+        "files": {k: os.path.abspath(v) for k, v in (files or {}).items() if v},
+    }
+    if metadata:
+        record.update(metadata)
+    path = archive_index_path(galaxy_dir)
+    line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+    try:
+        os.makedirs(galaxy_dir, exist_ok=True)
+        with _INDEX_LOCK:
+            # 单次 O_APPEND 写入：并发进程追加的整行不会交错
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+    except OSError as e:
+        print(f"[archive] index append failed for {path}: {e}")
+        return None
+    return record
+
+
+def load_round_index(galaxy_dir: str) -> list[dict]:
+    """读取星系的全部轮次记录（按追加顺序）。
+
+    索引只追加，因此按文件偏移增量解析：同一进程内重复调用只读取新追加的行；
+    文件被替换（inode 变化）或截短时整体重读。末尾未写完的半行留到下次再读。
+    """
+    path = archive_index_path(galaxy_dir)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return []
+    with _INDEX_LOCK:
+        ino, offset, records = _INDEX_CACHE.get(path, (st.st_ino, 0, []))
+        if ino != st.st_ino or st.st_size < offset:
+            offset, records = 0, []
+        if st.st_size > offset:
+            records = list(records)
+            with open(path, "rb") as f:
+                f.seek(offset)
+                chunk = f.read(st.st_size - offset)
+            end = chunk.rfind(b"\n") + 1
+            for raw in chunk[:end].splitlines():
+                try:
+                    rec = json.loads(raw)
+                except ValueError:
+                    continue
+                if isinstance(rec, dict) and rec.get("schema_version") == INDEX_SCHEMA_VERSION:
+                    records.append(rec)
+            offset += end
+        _INDEX_CACHE[path] = (st.st_ino, offset, records)
+        return list(records)
+
+
+def list_rounds(
+    galaxy_dir: str,
+    tool: str | None = None,
+    status: str | None = "success",
+    max_chi2_nu: float | None = None,
+    sort_by: str = "created_at",
+    descending: bool = False,
+    limit: int | None = None,
+) -> list[dict]:
+    """从轮次索引列出 / 过滤 / 排序轮次，不遍历文件系统。
+
+    ``sort_by`` 取 created_at / chi2_nu / bic / round_label；该字段缺失的记录总排在最后。
+    """
+    if sort_by not in _INDEX_SORT_KEYS:
+        raise ValueError(f"sort_by must be one of {_INDEX_SORT_KEYS}, got {sort_by!r}")
+    rounds = [
+        r for r in load_round_index(galaxy_dir)
+        if (tool is None or r.get("tool") == tool)
+        and (status is None or r.get("status") == status)
+        and (max_chi2_nu is None or (r.get("chi2_nu") is not None and r["chi2_nu"] <= max_chi2_nu))
+    ]
+    present = [r for r in rounds if r.get(sort_by) is not None]
+    missing = [r for r in rounds if r.get(sort_by) is None]
+    present.sort(key=lambda r: r[sort_by], reverse=descending)
+    rounds = present + missing
+    return rounds[:limit] if limit else rounds
+
+
+def list_archived_rounds(
+    galaxy_dir: Annotated[str, "Galaxy main directory (the parent of archives/ or output/)"],
+    tool: Annotated[str | None, "Only rounds of this tool: 'galfit' or 'galfits' (None = all)"] = None,
+    sort_by: Annotated[str, "Sort key: created_at | chi2_nu | bic | round_label"] = "created_at",
+    descending: Annotated[bool, "Sort descending (e.g. latest first with created_at)"] = False,
+    limit: Annotated[int | None, "Return at most this many rounds"] = None,
+    max_chi2_nu: Annotated[float | None, "Only rounds with reduced chi2 <= this value"] = None,
+    include_failed: Annotated[bool, "Also list rounds whose fit failed"] = False,
+) -> Annotated[dict[str, Any], "status dict with the matching round records"]:
+    """
+    List archived fitting rounds of a galaxy from its append-only round index
+    (paths, chi2_nu, BIC, components, timestamps), without scanning the archive
+    directories.
+    """
+    try:
+        rounds = list_rounds(galaxy_dir, tool=tool, status=None if include_failed else "success",
+                             max_chi2_nu=max_chi2_nu, sort_by=sort_by,
+                             descending=descending, limit=limit)
+    except ValueError as e:
+        return {"status": "failure", "error": str(e)}
+    return {"status": "success", "index_file": archive_index_path(galaxy_dir),
+            "count": len(rounds), "rounds": rounds}
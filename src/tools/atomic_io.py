@@ -0,0 +1,74 @@
+"""atomic_io — 原子写（``tempfile.mkstemp`` + ``os.replace``）时保留目标文件的权限位。
+
+``mkstemp`` 创建的临时文件权限是 0600；直接 ``os.replace`` 会把用户原本 0644（或组可写）
+的配置、PSF、归档 FITS 悄悄改成只有属主可读。``match_target_mode`` 在替换前把临时文件
+的权限设为目标文件现有的权限；目标不存在时取 ``0o644 & ~umask``，与普通 ``open(..., "w")``
+新建文件一致。
+
+umask 不在运行时读写：``os.umask`` 只能"设置并返回旧值"，临时改动会波及同一进程中
+其他线程此刻新建的文件。Linux 上从 ``/proc/self/status`` 的 ``Umask:`` 行读取当前值，
+其他平台使用导入时读取的一次快照。
+
+``write_text_atomic`` 是配置文本（feedme 变体等）的通用原子写入口。
+"""
+
+import os
+import stat
+import tempfile
+
+
+def _umask_from_proc() -> int | None:
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _umask_snapshot() -> int:
+    """导入时读取一次（模块导入期间尚未启动写文件的工作线程）。"""
+    umask = _umask_from_proc()
+    if umask is None:
+        umask = os.umask(0o022)
+        os.umask(umask)
+    return umask
+
+
+_IMPORT_UMASK = _umask_snapshot()
+
+
+def current_umask() -> int:
+    """Process umask without touching it: ``/proc/self/status`` on Linux, else the import-time value."""
+    umask = _umask_from_proc()
+    return _IMPORT_UMASK if umask is None else umask
+
+
+def default_file_mode() -> int:
+    """Mode a plain ``open(path, "w")`` would give a new file under the current umask."""
+    return 0o644 & ~current_umask()
+
+
+def match_target_mode(tmp: str, path: str) -> None:
+    """Give ``tmp`` the permission bits of ``path`` (or the default new-file mode) before ``os.replace``."""
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = default_file_mode()
+    os.chmod(tmp, mode)
+
+
+def write_text_atomic(path: str, text: str) -> None:
+    """Write ``text`` to ``path`` via a temp file in the same directory + ``os.replace``, keeping its mode."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=".cfg_", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+        match_target_mode(tmp, path)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
@@ -21,6 +21,8 @@ from photutils.isophote import Ellipse, EllipseGeometry
 from scipy.signal import find_peaks
 from scipy.stats import linregress
 
+from .image_moments import positive_moments
+
 import warnings
 warnings.filterwarnings('ignore', category=UserWarning)
 
@@ -109,21 +111,16 @@ def determine_center(image, mask=None):
     ny, nx = image.shape
     img_cx, img_cy = (nx - 1) / 2.0, (ny - 1) / 2.0
 
-    positive = image > 0
-    if mask is not None:
-        positive &= ~mask
-
-    if not np.any(positive):
+    mom = positive_moments(image, mask)
+    if mom["n"] == 0:
         return img_cx, img_cy
 
-    values = np.where(positive, image, 0)
-    total = values.sum()
+    total = mom["total"]
     if total <= 0:
         return img_cx, img_cy
 
-    yy, xx = np.indices(image.shape)
-    cx = (xx * values).sum() / total
-    cy = (yy * values).sum() / total
+    cx = mom["sx"] / total
+    cy = mom["sy"] / total
 
     offset = np.sqrt((cx - img_cx)**2 + (cy - img_cy)**2)
     if offset > CENTER_OFFSET_MAX:
@@ -136,26 +133,18 @@ def get_initial_params(image, mask=None):
     ny, nx = image.shape
     cx, cy = determine_center(image, mask)
 
-    positive = image > 0
-    if mask is not None:
-        positive &= ~mask
-
-    if np.sum(positive) < 10:
+    # 二阶矩按行块流式累加, 峰值内存 ~ MOMENT_BLOCK_ROWS 行
+    mom = positive_moments(image, mask, center=(cx, cy))
+    if mom["n"] < 10:
         return cx, cy, 0.2, 0.0, max(3, min(nx, ny) // 6)
 
-    values = np.where(positive, image, 0)
-    total = values.sum()
+    total = mom["total"]
     if total <= 0:
         return cx, cy, 0.2, 0.0, max(3, min(nx, ny) // 6)
 
-    yy, xx = np.indices(image.shape)
-    dx = xx - cx
-    dy = yy - cy
-    w = values / total
-
-    x2 = np.sum(w * dx * dx)
-    y2 = np.sum(w * dy * dy)
-    xy = np.sum(w * dx * dy)
+    x2 = mom["sxx"] / total
+    y2 = mom["syy"] / total
+    xy = mom["sxy"] / total
 
     theta = 0.5 * np.arctan2(2 * xy, x2 - y2)
     Ixx = x2 * np.cos(theta)**2 + 2 * xy * np.cos(theta) * np.sin(theta) + y2 * np.sin(theta)**2
@@ -15,7 +15,6 @@ from typing import Annotated, Any, Literal, Optional
 
 import numpy as np
 import pandas as pd
-from astropy.io import fits
 
 # 核心算法 (自包含, 迁移自管线包, 见 bar_lopsidedness_core.py)
 from .bar_lopsidedness_core import (
@@ -24,6 +23,7 @@ from .bar_lopsidedness_core import (
     analyze_dolfi_a1,
     analyze_center_offset_v2,
 )
+from .fits_io import fits_image_shape, read_fits_region
 from .parse_lyric import (
     extract_fits_metadata, 
     parse_image_infos_from_lyric, 
@@ -83,20 +83,33 @@ def _round(v: Any, ndigits: int) -> Any:
 def _read_image_and_mask(
     image_path: str,
     mask_path: Optional[str],
+    region: Optional[tuple[int, int, int, int]] = None,
+    *,
+    one_indexed_inclusive: bool = True,
 ) -> tuple[np.ndarray, Optional[np.ndarray]]:
-    """Read science image and optional bad-pixel mask.
+    """Read science image and optional bad-pixel mask, cropped to ``region``.
 
     The pipeline convention is mask > 0 means bad pixel. Non-finite image pixels
-    are always folded into the mask before fitting.
+    are always folded into the mask before fitting. Only the fitting region is
+    read from disk (memmap / section decode, see ``fits_io.read_fits_region``).
+    ``parse_feedme`` returns GALFIT H) bounds as 1-indexed inclusive pixel
+    coordinates; ``parse_lyric`` returns 0-indexed, exclusive Python slice
+    bounds (``one_indexed_inclusive=False``).
     """
-    image = fits.getdata(image_path).astype(np.float64)
+    image_shape = fits_image_shape(image_path)
+    image = np.array(
+        read_fits_region(image_path, region, one_indexed_inclusive=one_indexed_inclusive),
+        dtype=np.float64,
+    )
     nonfinite = ~np.isfinite(image)
     if mask_path and os.path.exists(mask_path):
-        raw_mask = np.asarray(fits.getdata(mask_path)) > 0
-        if raw_mask.shape != image.shape:
+        mask_shape = fits_image_shape(mask_path)
+        if mask_shape != image_shape:
             raise ValueError(
-                f"Mask shape {raw_mask.shape} does not match image shape {image.shape}"
+                f"Mask shape {mask_shape} does not match image shape {image_shape}"
             )
+        raw_mask = np.asarray(read_fits_region(
+            mask_path, region, one_indexed_inclusive=one_indexed_inclusive)) > 0
         mask = raw_mask | nonfinite
     elif nonfinite.any():
         mask = nonfinite
@@ -105,41 +118,6 @@ def _read_image_and_mask(
     return image, mask
 
 
-def _apply_fit_region(
-    image: np.ndarray,
-    mask: Optional[np.ndarray],
-    region: Optional[tuple[int, int, int, int]],
-    *,
-    one_indexed_inclusive: bool,
-) -> tuple[np.ndarray, Optional[np.ndarray]]:
-    """Crop image/mask to a GALFIT fitting region.
-
-    ``parse_feedme`` returns GALFIT H) bounds as 1-indexed inclusive pixel
-    coordinates. ``parse_lyric`` returns 0-indexed, exclusive Python slice
-    bounds. This helper normalizes both forms before isophote fitting.
-    """
-    if region is None:
-        return image, mask
-
-    xmin, xmax, ymin, ymax = [int(v) for v in region]
-    if one_indexed_inclusive:
-        x0, x1 = xmin - 1, xmax
-        y0, y1 = ymin - 1, ymax
-    else:
-        x0, x1 = xmin, xmax
-        y0, y1 = ymin, ymax
-
-    ny, nx = image.shape
-    x0, x1 = max(0, x0), min(nx, x1)
-    y0, y1 = max(0, y0), min(ny, y1)
-    if x0 >= x1 or y0 >= y1:
-        raise ValueError(f"Invalid fitting region after clipping: {region}")
-
-    cropped_image = np.ascontiguousarray(image[y0:y1, x0:x1])
-    cropped_mask = None if mask is None else np.ascontiguousarray(mask[y0:y1, x0:x1])
-    return cropped_image, cropped_mask
-
-
 def _empty_bar_result(reason: str) -> dict[str, Any]:
     return {
         'bar_detected': False, 'classification': '', 'e_max': np.nan,
@@ -277,9 +255,8 @@ def detect_bar_lopsidedness(
     # original pipeline fits already-prepared cutouts; running on a full
     # feedme image without this crop changes the Step 2/3 profiles directly.
     try:
-        image, mask = _read_image_and_mask(image_path, mask_path)
-        image, mask = _apply_fit_region(
-            image, mask, paths.get("fit_region"), one_indexed_inclusive=True
+        image, mask = _read_image_and_mask(
+            image_path, mask_path, paths.get("fit_region"), one_indexed_inclusive=True
         )
     except Exception as e:
         return {"status": "failure", "error": f"Failed to load/crop image: {e}"}
@@ -340,9 +317,8 @@ def detect_galfits_bar_lopsidedness(
         _shape, _pixsc, _x0, _y0, _delta_ang, _wcs = extract_fits_metadata(
             image_path, ra=region_info.ra, dec=region_info.dec)
         try:
-            image, mask = _read_image_and_mask(image_path, mask_path)
-            image, mask = _apply_fit_region(
-                image, mask, info.fitting_region, one_indexed_inclusive=False
+            image, mask = _read_image_and_mask(
+                image_path, mask_path, info.fitting_region, one_indexed_inclusive=False
             )
         except Exception as e:
             results.append({"band": info.band, "error": f"Failed to load/crop image: {e}"})
@@ -14,8 +14,13 @@ post-resume call would ``INITIALIZED`` from scratch and lose the whole compariso
 history. Persistence is best-effort (a failed write/load never blocks the fit) and can
 be disabled with ``BEST_ROUND_PERSIST=0`` (then the registry reverts to pure in-memory,
 legacy behavior).
+
+The comparison is independent of the main component analysis until its conclusion is
+needed, so callers start it with ``start_best_round_update`` (a background worker) and
+join the returned future later. ``BEST_ROUND_CONCURRENT=0`` runs it inline instead.
 """
 
+import concurrent.futures
 import json
 import os
 import re
@@ -31,6 +36,8 @@ from .parse_lyric import parse_region_info_from_lyric
 
 _LOCK = threading.Lock()
 _REGISTRY: dict[str, "BestRoundEntry"] = {}
+_EXECUTOR: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
 
 # Directories under which per-round run dirs live.
 #   single-band (S4G/GALFIT): <galaxy>/archives/<hash>/
@@ -450,9 +457,12 @@ def run_round_comparison(
     best: BestRoundEntry,
     current_image: str,
     current_summary: Optional[str],
+    use_cache: bool = True,
 ) -> tuple[str, Optional[str], Optional[str]]:
     """Ask the VLM to compare the historical best vs the current round.
 
+    ``use_cache=False`` bypasses the response cache lookup (the fresh verdict is still stored).
+
     Returns ``(verdict, comparison_text, error)`` where ``verdict`` is one of
     ``CURRENT_BETTER`` / ``HISTORICAL_BETTER`` / ``EQUAL`` / ``UNKNOWN``.
     """
@@ -489,6 +499,7 @@ def run_round_comparison(
         deferred_system=False,
         reference_blocks=reference_blocks,
         reference_intro=_COMPARISON_INTRO,
+        use_cache=use_cache,
     )
     if err:
         return "UNKNOWN", text, err
@@ -608,6 +619,7 @@ def update_best_round_for_call(
     image_path: str,
     summary_path: Optional[str],
     lyric_file: Optional[str] = None,
+    use_cache: bool = True,
 ) -> Optional[dict]:
     """Maintain the best-round slot for the galaxy behind ``image_path``.
 
@@ -643,7 +655,7 @@ def update_best_round_for_call(
                       best_round=best.round_number)
         return result
 
-    verdict, text, err = run_round_comparison(best, image_path, summary_path)
+    verdict, text, err = run_round_comparison(best, image_path, summary_path, use_cache=use_cache)
     result["verdict"] = verdict
     if verbose:
         result["comparison_text"] = text
@@ -689,6 +701,37 @@ def update_best_round_for_call(
     return result
 
 
+def _executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="best-round")
+        return _EXECUTOR
+
+
+def start_best_round_update(
+    image_path: str,
+    summary_path: Optional[str],
+    lyric_file: Optional[str] = None,
+    use_cache: bool = True,
+) -> "concurrent.futures.Future[Optional[dict]]":
+    """Run ``update_best_round_for_call`` in the background and return its future.
+
+    With ``BEST_ROUND_CONCURRENT=0`` the update runs inline and an already-completed
+    future is returned, so callers have a single code path either way.
+    """
+    if os.environ.get("BEST_ROUND_CONCURRENT", "1") == "1":
+        return _executor().submit(update_best_round_for_call, image_path, summary_path, lyric_file,
+                                  use_cache=use_cache)
+    future: concurrent.futures.Future = concurrent.futures.Future()
+    try:
+        future.set_result(update_best_round_for_call(image_path, summary_path, lyric_file,
+                                                     use_cache=use_cache))
+    except Exception as e:  # re-raised by future.result(), as the inline call would
+        future.set_exception(e)
+    return future
+
+
 def attach_analysis_to_best(image_path: str, analysis_md: Optional[str]) -> None:
     """If ``image_path`` is the recorded best round for its galaxy, store its analysis text."""
     if not image_path or analysis_md is None:
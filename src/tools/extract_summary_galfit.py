@@ -3,39 +3,110 @@
 import os
 import re
 import math
+import threading
 from pyparsing import Any
 
+from .parse_feedme import load_feedme
+
+# ── incremental fit.log index ────────────────────────────────────────────────
+# GALFIT 每次运行都向工作目录的 fit.log 追加一个以 "-----" 分隔的运行块，长会话中
+# 文件无限增长。索引记录每个运行块的字节区间与 "Init. par. file" 键，按文件偏移
+# 增量扫描新追加的字节；取最近（或第 N 个）运行块只需读取该块本身。
+
+_FITLOG_LOCK = threading.Lock()
+_FITLOG_INDEX: dict[str, dict] = {}   # path -> {ino, offset, open_start, blocks}
+
+
+def _is_fit_log_separator(line: bytes) -> bool:
+    stripped = line.strip()
+    return len(stripped) > 20 and stripped == b"-" * len(stripped)
+
+
+def _fit_log_block_key(raw: bytes) -> str | None:
+    for line in raw.decode("utf-8", errors="replace").splitlines():
+        if line.strip().startswith('Init. par. file :'):
+            return os.path.basename(line.split('Init. par. file :')[-1].strip())
+    return None
+
+
+def index_fit_log(log_file_path: str) -> list[dict]:
+    """返回 fit.log 中已闭合运行块的索引：``[{"start", "end", "key"}, ...]``（按追加顺序）。
+
+    只扫描上次调用之后新追加的完整行；文件被替换（inode 变化）或截短时整体重建。
+    与 ``extract_galfit_fit_log`` 一致，末尾尚未以分隔线闭合的块不计入；仅含空行的块跳过。
+    """
+    path = os.path.abspath(log_file_path)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return []
+    with _FITLOG_LOCK:
+        state = _FITLOG_INDEX.get(path)
+        if state is None or state["ino"] != st.st_ino or st.st_size < state["offset"]:
+            state = {"ino": st.st_ino, "offset": 0, "open_start": 0, "blocks": []}
+        if st.st_size > state["offset"]:
+            with open(path, "rb") as f:
+                f.seek(state["offset"])
+                chunk = f.read(st.st_size - state["offset"])
+            complete = chunk.rfind(b"\n") + 1
+            base = pos = state["offset"]
+            blocks = list(state["blocks"])
+            open_start = state["open_start"]
+            for line in chunk[:complete].splitlines(keepends=True):
+                if _is_fit_log_separator(line):
+                    if pos > open_start:
+                        if open_start >= base:
+                            raw = chunk[open_start - base:pos - base]
+                        else:  # 块起点在上次扫描范围内，补读该块
+                            with open(path, "rb") as f:
+                                f.seek(open_start)
+                                raw = f.read(pos - open_start)
+                        if raw.strip():
+                            blocks.append({"start": open_start, "end": pos,
+                                           "key": _fit_log_block_key(raw)})
+                    open_start = pos + len(line)
+                pos += len(line)
+            state = {"ino": st.st_ino, "offset": pos, "open_start": open_start, "blocks": blocks}
+        _FITLOG_INDEX[path] = state
+        return list(state["blocks"])
+
+
+def _read_fit_log_block(log_file_path: str, block: dict) -> str:
+    with open(log_file_path, "rb") as f:
+        f.seek(block["start"])
+        raw = f.read(block["end"] - block["start"])
+    lines = raw.replace(b"\r\n", b"\n").decode("utf-8", errors="replace").split("\n")
+    return "\n".join(l for l in lines if l.strip() != "")
+
+
+def fit_log_block(log_file_path: str, n: int = -1, key: str | None = None) -> str | None:
+    """读取第 ``n`` 个运行块（默认最近一次）；给定 ``key`` 时取该 Init. par. file 最近的块。
+
+    只读取目标块的字节区间（O(块大小)），块不存在时返回 None。
+    """
+    blocks = index_fit_log(log_file_path)
+    if key is not None:
+        key = os.path.basename(key)
+        blocks = [b for b in blocks if b["key"] == key]
+        n = -1
+    try:
+        block = blocks[n]
+    except IndexError:
+        return None
+    try:
+        return _read_fit_log_block(log_file_path, block)
+    except OSError:
+        return None
+
+
 def extract_galfit_fit_log(log_file_path):
+    """全部运行块：Init. par. file 基名 -> 块文本（同名取最近一次）。"""
     fit_result_dict = {}
-    def is_separator(line):
-        stripped_line = line.strip()
-        return stripped_line and all(c == '-' for c in stripped_line) and len(stripped_line) > 20
-            
     try:
-        with open(log_file_path, 'r', encoding='utf-8') as f:
-            lines = [line.rstrip('\n') for line in f.readlines()]  
-                
-        current_fit = []  
-        for line in lines:
-            if is_separator(line):
-                if current_fit:
-                    clean_fit = [l for l in current_fit if l.strip() != ''] 
-                    if clean_fit:
-                        fit_text = '\n'.join(clean_fit)  
-                        fit_key = None
-                        for l in clean_fit:
-                            if l.strip().startswith('Init. par. file :'):
-                                full_path = l.split('Init. par. file :')[-1].strip()
-                                fit_key = os.path.basename(full_path)
-                                break
-                        if fit_key is not None:
-                            fit_result_dict[fit_key] = fit_text
-                current_fit = []
-            else:
-                current_fit.append(line)
-                    
+        for block in index_fit_log(log_file_path):
+            if block["key"] is not None:
+                fit_result_dict[block["key"]] = _read_fit_log_block(log_file_path, block)
         return fit_result_dict
-
     except:
         return {}
 
@@ -79,6 +150,7 @@ def parse_fit_log(fits_dir: str) -> dict[str, Any]:
     """Parse GALFIT fit.log file to extract final parameters and statistics.
 
     The fit.log file contains the final optimized parameters with uncertainties.
+    Only the most recent run block is parsed (located through ``index_fit_log``).
     Format example:
         sersic    : (  199.86,   200.61)   26.25      2.79    0.50    0.30     5.26
                    (    0.12,     0.20)    0.06      0.31    0.48    0.09     5.78
@@ -95,8 +167,11 @@ def parse_fit_log(fits_dir: str) -> dict[str, Any]:
         return result
 
     try:
-        with open(fit_log_path, 'r') as f:
-            content = f.read()
+        # 只解析最近一次运行块；没有分隔线的日志退回整文件
+        content = fit_log_block(fit_log_path)
+        if content is None:
+            with open(fit_log_path, 'r') as f:
+                content = f.read()
 
         lines = content.split('\n')
         i = 0
@@ -473,8 +548,7 @@ def extract_summary_from_galfit(fits_file: str, config_file: str | None = None,
         md_lines.append("## Init. par. file Content")
         md_lines.append("")
         if config_file:
-            with open(config_file) as f: 
-                md_lines.append(f.read())
+            md_lines.append(load_feedme(config_file).text)
 
         # Constraint file content
         if constraint_file and os.path.exists(constraint_file):
@@ -491,9 +565,8 @@ def extract_summary_from_galfit(fits_file: str, config_file: str | None = None,
 
         fit_log_path = os.path.join(os.path.dirname(config_file) if config_file else ".", "fit.log")    
         if os.path.exists(fit_log_path):
-            fit_log = extract_galfit_fit_log(fit_log_path)
-            fit_result = fit_log.get(os.path.abspath(config_file), None) or \
-                fit_log.get(config_file, None) or fit_log.get(os.path.basename(config_file), None)
+            # 按字节偏移索引只读取该 feedme 最近一次运行块，不再整文件扫描
+            fit_result = fit_log_block(fit_log_path, key=config_file) if config_file else None
 
             if fit_result:
                 md_lines.append("## Fit log Content")
@@ -0,0 +1,195 @@
+"""fit_region — 由星系等照度范围与 PSF 能量半径自动收紧 GALFIT 的 H) 拟合区与 I) 卷积盒。
+
+GALFIT 的耗时随 H) 拟合区像素数与 I) 卷积盒面积增长，而 agent 常把二者留成整幅 cutout
+与过大的卷积盒。``propose_fit_region``：
+
+- 以第一个组件的中心为圆心，在掩膜内、去天光后求方位平均面亮度轮廓，取首次低于
+  ``ISOPHOTE_SIGMA`` × 天光噪声（sigma-clipped std）的半径为等照度半径 R_iso；
+  半宽取 ``max(REGION_ISO_FACTOR × R_iso, REGION_REFF_FACTOR × R_e,obs, MIN_HALF_PX)``
+  （R_e,obs 为 ``run_galfit.observed_reff``），并保证覆盖所有组件中心；
+- I) 卷积盒边长取 ``2 × (max(R_iso, CONV_REFF_FACTOR × R_e,obs) + r_EE) + 1``，r_EE 为 PSF
+  包含 ``psf_ee`` 能量的半径，且不超过拟合区；
+- 预测加速比：``runtime_model`` 已有足够历史时用其代价模型，否则用
+  ``像素数 + 卷积面积 × log2(卷积面积)`` 的代价代理；
+- ``write_variant=True`` 时经 ``FeedmeDocument.to_text`` 只替换 H) / I) 两行，写出
+  ``<名称>_fast.feedme``（与原 feedme 同目录，相对路径保持有效）。
+"""
+
+import math
+import os
+import re
+from typing import Annotated, Any, Optional
+
+import numpy as np
+from astropy.stats import sigma_clipped_stats
+
+from .atomic_io import write_text_atomic
+from .fits_io import read_fits_array
+from .parse_feedme import load_feedme
+from .runtime_model import estimate_runtime, galfit_job_features
+
+ISOPHOTE_SIGMA = 1.0        # 等照度阈值：方位平均面亮度 < 1σ 天光噪声
+REGION_ISO_FACTOR = 1.5
+REGION_REFF_FACTOR = 5.0
+CONV_REFF_FACTOR = 3.0
+MIN_HALF_PX = 20
+DEFAULT_PSF_EE = 0.995
+_EXT_RE = re.compile(r"^(.*?)\[(\d+)\]$")
+
+
+def _split_ext(path: str) -> tuple[str, Optional[int]]:
+    m = _EXT_RE.match(path)
+    return (m.group(1), int(m.group(2))) if m else (path, None)
+
+
+def _growth_curve(values: np.ndarray, radii: np.ndarray, bin_width: float = 0.5):
+    idx = (radii / bin_width).astype(np.intp)
+    flux = np.bincount(idx, weights=values)
+    counts = np.bincount(idx)
+    edges = np.arange(flux.size + 1, dtype=np.float64) * bin_width
+    return flux, counts, edges
+
+
+def encircled_energy_radius(psf: np.ndarray, fraction: float = DEFAULT_PSF_EE) -> float:
+    """Radius [pix] around the PSF peak enclosing ``fraction`` of its total flux."""
+    psf = np.nan_to_num(np.asarray(psf, dtype=np.float64))
+    ny, nx = psf.shape
+    iyc, ixc = np.unravel_index(np.argmax(psf), psf.shape)
+    dx2 = (np.arange(nx, dtype=np.float64) - ixc) ** 2
+    dy2 = (np.arange(ny, dtype=np.float64) - iyc) ** 2
+    radii = np.sqrt(dy2[:, None] + dx2[None, :]).ravel()
+    flux, _, edges = _growth_curve(psf.ravel(), radii)
+    cum = np.concatenate(([0.0], np.cumsum(flux)))
+    total = cum[-1]
+    if not np.isfinite(total) or total <= 0:
+        return float(math.hypot(nx, ny) / 2)
+    # 单调化：噪声造成的负值环不应让半径提前命中
+    cum = np.maximum.accumulate(cum)
+    return float(np.interp(fraction * total, cum, edges))
+
+
+def isophotal_radius(data: np.ndarray, mask: np.ndarray, ixc: float, iyc: float,
+                     sky: float, noise: float, n_sigma: float = ISOPHOTE_SIGMA) -> float:
+    """First radius [pix] where the azimuthally averaged sky-subtracted profile drops below ``n_sigma × noise``."""
+    good = np.isfinite(data) & (mask == 0)
+    ny, nx = data.shape
+    dx2 = (np.arange(nx, dtype=np.float64) - ixc) ** 2
+    dy2 = (np.arange(ny, dtype=np.float64) - iyc) ** 2
+    radii = np.sqrt(dy2[:, None] + dx2[None, :])[good]
+    flux, counts, edges = _growth_curve(data[good] - sky, radii, bin_width=1.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        profile = flux / counts
+    below = np.flatnonzero((counts > 0) & (profile < n_sigma * noise))
+    return float(edges[below[0]]) if below.size else float(edges[-1])
+
+
+def _cost_proxy(features: dict) -> float:
+    conv = max(float(features.get("conv_pixels") or 0), 1.0)
+    return float(features.get("pixels") or 0) + conv * max(math.log2(conv), 1.0)
+
+
+def _predicted_speedup(current: dict, proposed: dict) -> tuple[float, str]:
+    before, after = estimate_runtime("galfit", current), estimate_runtime("galfit", proposed)
+    if before["source"] == "model" and after["eta_s"]:
+        return before["eta_s"] / after["eta_s"], "runtime_model"
+    return _cost_proxy(current) / max(_cost_proxy(proposed), 1.0), "pixel_cost_proxy"
+
+
+def propose_fit_region(
+    config_file: Annotated[str, "path to the GALFIT feedme configuration file"],
+    psf_ee: Annotated[float, "encircled-energy fraction of the PSF that the convolution box must contain"] = DEFAULT_PSF_EE,
+    write_variant: Annotated[bool, "write a cost-reduced feedme variant with the proposed H) and I)"] = False,
+    output_file: Annotated[Optional[str], "path of the variant feedme (default <name>_fast.feedme next to config)"] = None,
+) -> dict[str, Any]:
+    """Propose a tight H) fit region and I) convolution box for a GALFIT feedme and report the predicted speed-up.
+
+    The region follows the galaxy's isophotal extent (sky-noise threshold, mask
+    applied) and observed half-light radius; the convolution box adds the PSF's
+    encircled-energy radius. Optionally writes a variant feedme changing only H) and I).
+    """
+    from .run_galfit import observed_reff
+
+    if not config_file or not os.path.isfile(config_file):
+        return {"status": "failure", "error": f"Config file not found: {config_file}"}
+    doc = load_feedme(config_file)
+    paths = doc.paths
+    if not paths["input"]:
+        return {"status": "failure", "error": "A) input image is missing"}
+    if not doc.components:
+        return {"status": "failure", "error": "no fit components (only sky or none)"}
+
+    image_path, image_ext = _split_ext(paths["input"])
+    try:
+        data = np.asarray(read_fits_array(image_path, image_ext), dtype=np.float64)
+    except Exception as e:  # noqa: BLE001
+        return {"status": "failure", "error": f"cannot read input image {paths['input']}: {e}"}
+    ny, nx = data.shape[-2:]
+    mask = np.zeros((ny, nx), dtype=np.int32)
+    if paths["mask"] and os.path.isfile(_split_ext(paths["mask"])[0]):
+        mask_path, mask_ext = _split_ext(paths["mask"])
+        m = read_fits_array(mask_path, mask_ext)
+        if m is not None and m.shape[-2:] == (ny, nx):
+            mask = (np.asarray(m) != 0).astype(np.int32)
+
+    good = np.isfinite(data) & (mask == 0)
+    if int(good.sum()) < 50:
+        return {"status": "failure", "error": "too few unmasked pixels to measure the galaxy extent"}
+    _, sky, noise = (float(v) for v in sigma_clipped_stats(data[good]))
+
+    main = doc.components[0]
+    ixc, iyc = main["x"] - 1.0, main["y"] - 1.0     # feedme 1-indexed -> 0-indexed
+    reff = observed_reff(data, mask, ixc, iyc)
+    r_iso = isophotal_radius(data, mask, ixc, iyc, sky, noise)
+    half = max(REGION_ISO_FACTOR * r_iso, REGION_REFF_FACTOR * reff, MIN_HALF_PX)
+
+    x0, x1 = main["x"] - half, main["x"] + half
+    y0, y1 = main["y"] - half, main["y"] + half
+    for comp in doc.components[1:]:
+        pad = max(2.0 * float(comp.get("re") or 0.0), MIN_HALF_PX / 2)
+        x0, x1 = min(x0, comp["x"] - pad), max(x1, comp["x"] + pad)
+        y0, y1 = min(y0, comp["y"] - pad), max(y1, comp["y"] + pad)
+    region = (max(1, int(math.floor(x0))), min(nx, int(math.ceil(x1))),
+              max(1, int(math.floor(y0))), min(ny, int(math.ceil(y1))))
+    width, height = region[1] - region[0] + 1, region[3] - region[2] + 1
+
+    r_ee, psf_shape = None, None
+    if paths["psf"] and os.path.isfile(_split_ext(paths["psf"])[0]):
+        psf_path, psf_ext = _split_ext(paths["psf"])
+        psf = read_fits_array(psf_path, psf_ext)
+        psf_shape = list(psf.shape[-2:])
+        r_ee = encircled_energy_radius(psf, psf_ee)
+    light = max(r_iso, CONV_REFF_FACTOR * reff)
+    side = 2 * int(math.ceil(light + (r_ee or 0.0))) + 1
+    conv_box = (min(side, width), min(side, height))
+
+    current = galfit_job_features(config_file)
+    proposed = {**current, "pixels": width * height, "conv_pixels": conv_box[0] * conv_box[1]}
+    speedup, basis = _predicted_speedup(current, proposed)
+
+    result = {
+        "status": "success",
+        "current": {"fit_region": list(paths["fit_region"]) if paths["fit_region"] else [1, nx, 1, ny],
+                    "conv_box": [int(v) for v in doc.header.get("I", "").split()[:2] if v.isdigit()],
+                    "pixels": current["pixels"] or nx * ny, "conv_pixels": current["conv_pixels"]},
+        "proposed": {"fit_region": list(region), "conv_box": list(conv_box),
+                     "pixels": proposed["pixels"], "conv_pixels": proposed["conv_pixels"]},
+        "measurements": {"center": [main["x"], main["y"]], "reff_obs": round(reff, 3),
+                         "isophotal_radius": round(r_iso, 3), "sky": sky, "sky_noise": noise,
+                         "psf_ee": psf_ee, "psf_ee_radius": None if r_ee is None else round(r_ee, 3),
+                         "psf_shape": psf_shape},
+        "predicted_speedup": round(speedup, 2),
+        "speedup_basis": basis,
+    }
+
+    if write_variant:
+        if not output_file:
+            stem = os.path.splitext(os.path.abspath(config_file))[0]
+            output_file = f"{stem}_fast.feedme"
+        overrides = {"H": "{} {} {} {}".format(*region), "I": f"{conv_box[0]} {conv_box[1]}"}
+        missing = [k for k in overrides if k not in doc.header]
+        if missing:
+            return {**result, "status": "failure",
+                    "error": f"Header key(s) {', '.join(k + ')' for k in missing)} not present in {config_file}"}
+        write_text_atomic(output_file, doc.to_text(overrides))
+        result["variant_file"] = output_file
+    return result
@@ -0,0 +1,434 @@
+"""fits_io — 只读取拟合区域（H) 区）的 FITS 加载工具。
+
+feedme 的 H) 区往往只占大视场/mosaic 的一小块，而 ``fits.getdata`` 会把整幅
+science / sigma / mask 读入内存后再裁剪。``read_fits_region`` 改为：
+
+- 未压缩且无 BSCALE/BZERO 缩放的图像：``memmap=True`` 打开，只有 H) 区真正被访问
+  的页才会从磁盘读入；
+- tile-compressed (``CompImageHDU``) 或带缩放的图像：走 ``hdu.section``，
+  只解码与该区域相交的 tile / 行。
+
+读出的区域与整幅数组进入同一个 LRU 缓存（键含区域窗口），重复读取不再访问磁盘。
+
+区域约定与 ``parse_feedme`` 一致：默认 ``(xmin, xmax, ymin, ymax)`` 为 1-indexed
+闭区间；``one_indexed_inclusive=False`` 时按 ``parse_lyric`` 的 0-indexed 半开区间。
+
+``fits_metadata`` / ``fits_wcs`` 只读 header 获取形状、像素尺度与 WCS，并按
+path+mtime+size 建索引：进程内缓存之外，还追加写入用户缓存目录下的 JSONL 索引
+``FITS_META_FILE``（默认 ``~/.cache/galaxy_morphology_mcp/fits_meta.jsonl``，不写入数据
+目录），重启后的重复调用只需 ``os.stat``，不再打开 FITS 文件。每条只记录形状、像素尺度
+与 WCS 相关关键字（不存整份 header）；写入为单行追加（进程池并发安全），读取按偏移
+增量进行，冗余行过多时压缩。持久化为 best-effort，可用 ``FITS_META_PERSIST=0`` 关闭。
+
+``read_fits_array`` 是整幅解码的进程级 LRU 缓存（按字节数上限淘汰），同一
+迭代中 render / comparison / sb_profile / bar 工具对同一 science、mask、sigma
+的重复读取只解码一次；``fits_cache_stats`` 给出命中率。调用方已打开文件时传入
+``hdul=``，未命中时直接从该 HDUList 解码，不再为每个 HDU 重新打开文件。
+
+``IMAGE_PRECISION``（``float64`` 默认 | ``float32``）是渲染管线的图像精度：float32
+模式下 ``as_image`` 把 science / model / residual / sigma / subcomp 数组转为原生
+float32，mask 与 RGBA 叠加层等派生缓冲也按 ``image_dtype()`` 分配；总通量、
+增长曲线、1D 轮廓均值等累加量仍以 float64 计算。
+"""
+
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from astropy.io import fits
+from astropy.wcs import WCS
+
+from .atomic_io import match_target_mode
+
+
+def _image_hdu(hdul, ext=None):
+    """与 ``fits.getdata`` 相同的 HDU 选择：未指定 ext 时取首个含数据的 HDU。"""
+    if ext is not None:
+        return hdul[ext]
+    for hdu in hdul:
+        if hdu.is_image and len(hdu.shape) > 0:
+            return hdu
+    raise IndexError("No image data found in FITS file")
+
+
+def _is_scaled(hdu) -> bool:
+    header = hdu.header
+    return (header.get("BSCALE", 1) != 1) or (header.get("BZERO", 0) != 0)
+
+
+def region_slices(region, shape, one_indexed_inclusive=True):
+    """把拟合区域换算成裁剪到图像边界内的 (y0, y1, x0, x1) 0-indexed 半开区间。"""
+    xmin, xmax, ymin, ymax = [int(v) for v in region]
+    if one_indexed_inclusive:
+        x0, x1, y0, y1 = xmin - 1, xmax, ymin - 1, ymax
+    else:
+        x0, x1, y0, y1 = xmin, xmax, ymin, ymax
+    ny, nx = shape[-2:]
+    x0, x1 = max(0, x0), min(nx, x1)
+    y0, y1 = max(0, y0), min(ny, y1)
+    if x0 >= x1 or y0 >= y1:
+        raise ValueError(f"Invalid fitting region after clipping: {region}")
+    return y0, y1, x0, x1
+
+
+def fits_image_shape(path: str, ext=None) -> tuple[int, ...]:
+    """只读 header 得到图像形状 (ny, nx)，经 ``fits_metadata`` 索引。"""
+    if ext is not None:
+        return tuple(fits_metadata(path, ext)["shape"])
+    shape = tuple(fits_metadata(path, 0)["shape"])
+    if shape:
+        return shape
+    # 主 HDU 无数据（如 tile-compressed 图像）：与 fits.getdata 一样找首个含数据的 HDU
+    with fits.open(path, memmap=True) as hdul:
+        return tuple(_image_hdu(hdul, None).shape)
+
+
+def _window(shape, region, one_indexed_inclusive, target_shape):
+    """拟合区域对应的 (y0, y1, x0, x1)；None 表示取整幅图。"""
+    if target_shape is not None and tuple(shape) == tuple(target_shape):
+        return None
+    if region is None:
+        if target_shape is None:
+            return None
+        y0, x0 = (shape[0] - target_shape[0]) // 2, (shape[1] - target_shape[1]) // 2
+        return y0, y0 + target_shape[0], x0, x0 + target_shape[1]
+    y0, y1, x0, x1 = region_slices(region, shape, one_indexed_inclusive)
+    if target_shape is not None and (y1 - y0, x1 - x0) != tuple(target_shape):
+        y0, x0 = (shape[0] - target_shape[0]) // 2, (shape[1] - target_shape[1]) // 2
+        y1, x1 = y0 + target_shape[0], x0 + target_shape[1]
+    return y0, y1, x0, x1
+
+
+def read_fits_region(path: str, region=None, ext=None, *,
+                     one_indexed_inclusive: bool = True,
+                     target_shape: tuple[int, ...] | None = None) -> np.ndarray:
+    """读取 FITS 图像的拟合区域，不把整幅图解码进内存。
+
+    Args:
+        path: FITS 文件路径。
+        region: (xmin, xmax, ymin, ymax)；None 表示整幅图。
+        ext: HDU 编号；None 时与 ``fits.getdata`` 一样取首个含数据的 HDU。
+        one_indexed_inclusive: region 是否为 GALFIT H) 的 1-indexed 闭区间。
+        target_shape: 期望输出形状（如 GALFIT 输出块的形状）。整幅图已是该形状时
+            不再裁剪；region 裁出的形状不符（或 region 为 None）时回落为居中裁剪。
+
+    Returns:
+        区域数据（与 ``read_fits_array`` 一样只读，需要修改时自行 ``.copy()``）。
+        整幅图已在数组缓存中时返回其切片；需要整幅图时经 ``read_fits_array``
+        解码；否则只读取该区域（memmap / section）并以区域为键入缓存。
+    """
+    full_key = _cache_key(path, ext)
+    cached = _cache_get(full_key, count_miss=False)
+    if cached is not None:
+        win = _window(cached.shape, region, one_indexed_inclusive, target_shape)
+        return cached if win is None else cached[win[0]:win[1], win[2]:win[3]]
+
+    with fits.open(path, memmap=True) as hdul:
+        hdu = _image_hdu(hdul, ext)
+        win = _window(tuple(hdu.shape), region, one_indexed_inclusive, target_shape)
+        if win is None:
+            return read_fits_array(path, ext, hdul=hdul)
+        key = full_key + (win,)
+        arr = _cache_get(key)
+        if arr is not None:
+            return arr
+        y0, y1, x0, x1 = win
+        if isinstance(hdu, fits.CompImageHDU) or _is_scaled(hdu):
+            arr = np.array(hdu.section[y0:y1, x0:x1])
+        else:
+            arr = np.array(hdu.data[y0:y1, x0:x1])
+    arr.setflags(write=False)
+    return _cache_put(key, arr)
+
+
+# ── process-wide LRU cache of decoded arrays ──────────────────────────────────
+
+_CACHE_LOCK = threading.Lock()
+_ARRAY_CACHE: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+_CACHE_STATS = {"hits": 0, "misses": 0, "evictions": 0, "bytes": 0}
+
+
+def _cache_max_bytes() -> int:
+    """缓存容量上限 [bytes]，``FITS_CACHE_MAX_MB``（默认 1024 MB，0 = 关闭缓存）。"""
+    try:
+        return int(float(os.environ.get("FITS_CACHE_MAX_MB", "1024")) * 1024 * 1024)
+    except ValueError:
+        return 1024 * 1024 * 1024
+
+
+def _cache_key(path: str, ext) -> tuple:
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    return path, ext, st.st_mtime_ns, st.st_size
+
+
+def _cache_get(key: tuple, count_miss: bool = True) -> np.ndarray | None:
+    """命中时返回缓存数组并计入 hits；``count_miss=False`` 时未命中不计数（探查用）。"""
+    with _CACHE_LOCK:
+        arr = _ARRAY_CACHE.get(key)
+        if arr is not None:
+            _ARRAY_CACHE.move_to_end(key)
+            _CACHE_STATS["hits"] += 1
+        elif count_miss:
+            _CACHE_STATS["misses"] += 1
+        return arr
+
+
+def _cache_put(key: tuple, arr: np.ndarray) -> np.ndarray:
+    """放入只读数组（超过容量上限的不缓存）并按 LRU 淘汰；返回缓存中的数组。"""
+    max_bytes = _cache_max_bytes()
+    if arr.nbytes > max_bytes:
+        return arr
+    with _CACHE_LOCK:
+        # 同一路径 / HDU 的旧版本（mtime/size 已变）先行剔除
+        for stale in [k for k in _ARRAY_CACHE if k[:2] == key[:2] and k[2:4] != key[2:4]]:
+            _CACHE_STATS["bytes"] -= _ARRAY_CACHE.pop(stale).nbytes
+        if key not in _ARRAY_CACHE:
+            _ARRAY_CACHE[key] = arr
+            _CACHE_STATS["bytes"] += arr.nbytes
+        while _CACHE_STATS["bytes"] > max_bytes and _ARRAY_CACHE:
+            _, old = _ARRAY_CACHE.popitem(last=False)
+            _CACHE_STATS["bytes"] -= old.nbytes
+            _CACHE_STATS["evictions"] += 1
+        return _ARRAY_CACHE[key]
+
+
+def read_fits_array(path: str, ext=None, hdul=None) -> np.ndarray:
+    """整幅解码 FITS 图像数据，经进程级 LRU 缓存复用。
+
+    缓存按 (path, HDU, mtime, size) 索引、按字节数上限淘汰（``FITS_CACHE_MAX_MB``）；
+    文件被改写后 mtime/size 变化，旧条目自然失效。返回的数组为只读
+    （``writeable=False``），需要原地修改的调用方须自行 ``.copy()``；指定的 HDU
+    无数据时返回 None。调用方已打开 ``path`` 时传入 ``hdul``，未命中时直接从中
+    解码而不重新打开文件。
+    """
+    key = _cache_key(path, ext)
+    arr = _cache_get(key)
+    if arr is not None:
+        return arr
+
+    if hdul is None:
+        with fits.open(path) as own:
+            data = _image_hdu(own, ext).data
+            arr = None if data is None else np.array(data)
+    else:
+        data = _image_hdu(hdul, ext).data
+        arr = None if data is None else np.array(data)
+    if arr is None:
+        return None
+    arr.setflags(write=False)
+    return _cache_put(key, arr)
+
+
+def fits_cache_stats() -> dict:
+    """数组缓存命中统计：hits / misses / evictions / hit_rate / entries / bytes / max_bytes。"""
+    with _CACHE_LOCK:
+        stats = dict(_CACHE_STATS)
+        stats["entries"] = len(_ARRAY_CACHE)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    stats["max_bytes"] = _cache_max_bytes()
+    return stats
+
+
+def clear_fits_cache() -> None:
+    """清空数组缓存并重置统计。"""
+    with _CACHE_LOCK:
+        _ARRAY_CACHE.clear()
+        _CACHE_STATS.update(hits=0, misses=0, evictions=0, bytes=0)
+
+
+# ── header-only metadata index ────────────────────────────────────────────────
+
+META_SCHEMA_VERSION = 2
+META_COMPACT_MIN_LINES = 2000
+# WCS 相关关键字（含备用 WCS 后缀字母与 SIP 畸变系数）；其余 header 卡片不入索引
+_WCS_KEY_RE = re.compile(
+    r"^(WCSAXES|CTYPE\d|CRVAL\d|CRPIX\d|CDELT\d|CUNIT\d|CROTA\d|CD\d_\d|PC\d_\d|PV\d_\d+|PS\d_\d+"
+    r"|LONPOLE|LATPOLE|RADESYS|RADECSYS|EQUINOX|EPOCH|MJD-OBS|DATE-OBS|NAXIS\d?"
+    r"|A_ORDER|B_ORDER|AP_ORDER|BP_ORDER|A_\d+_\d+|B_\d+_\d+|AP_\d+_\d+|BP_\d+_\d+)[A-Z]?$")
+
+_META_LOCK = threading.Lock()
+_META: dict[tuple[str, int], dict] = {}     # (abspath, ext) -> entry
+_WCS: dict[tuple[str, int, int, int], WCS] = {}
+# 持久化索引的增量读取状态：已读到的字节偏移、行数与条目
+_INDEX = {"path": None, "offset": 0, "lines": 0, "entries": {}}
+
+
+def _meta_persistence_enabled() -> bool:
+    return os.environ.get("FITS_META_PERSIST", "1") == "1"
+
+
+def _meta_index_file() -> str:
+    return os.environ.get("FITS_META_FILE") or os.path.join(
+        os.path.expanduser("~"), ".cache", "galaxy_morphology_mcp", "fits_meta.jsonl")
+
+
+def _header_pixscale(header) -> float | None:
+    """由 CD / CDELT(+PC) 关键字计算 x 轴像素尺度 [arcsec/pix]。
+
+    与 ``proj_plane_pixel_scales(WCS(header))[0]`` 等价；关键字缺失时返回 None。
+    """
+    if "CD1_1" in header:
+        return float(np.hypot(header["CD1_1"], header.get("CD2_1", 0.0)) * 3600.)
+    if "CDELT1" in header:
+        m11 = header["CDELT1"] * header.get("PC1_1", 1.0)
+        m21 = header.get("CDELT2", 1.0) * header.get("PC2_1", 0.0)
+        return float(np.hypot(m11, m21) * 3600.)
+    return None
+
+
+def _wcs_cards(header) -> str:
+    """header 中 WCS 相关卡片的文本（``fits.Header.fromstring`` 可还原）。"""
+    wcs_header = fits.Header([card for card in header.cards if _WCS_KEY_RE.match(card.keyword)])
+    return wcs_header.tostring()
+
+
+def _read_header_meta(path: str, ext: int) -> dict:
+    with fits.open(path) as hdul:
+        header = hdul[ext].header
+        naxis = [header.get(f"NAXIS{i}", 0) for i in range(header.get("NAXIS", 0), 0, -1)]
+        wcs_str = _wcs_cards(header)
+    pixsc = _header_pixscale(header)
+    if pixsc is None and naxis:
+        try:
+            from astropy.wcs.utils import proj_plane_pixel_scales
+            pixsc = float(proj_plane_pixel_scales(WCS(header))[0] * 3600.)
+        except Exception:
+            pixsc = None
+    return {"shape": [int(n) for n in naxis], "pixscale": pixsc, "wcs": wcs_str}
+
+
+def _write_compacted(index_file: str, entries: dict) -> None:
+    fd, tmp = tempfile.mkstemp(prefix=".fits_meta.", suffix=".tmp", dir=os.path.dirname(index_file))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for entry in entries.values():
+                f.write(json.dumps(entry) + "\n")
+        match_target_mode(tmp, index_file)
+        os.replace(tmp, index_file)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def _index_entries() -> dict:
+    """持久化索引（调用方持有 ``_META_LOCK``）：只读取上次之后新追加的行。"""
+    index_file = _meta_index_file()
+    if _INDEX["path"] != index_file:
+        _INDEX.update(path=index_file, offset=0, lines=0, entries={})
+    try:
+        size = os.path.getsize(index_file)
+    except OSError:
+        return _INDEX["entries"]
+    if size < _INDEX["offset"]:          # 被其他进程压缩过：从头重读
+        _INDEX.update(offset=0, lines=0, entries={})
+    if size == _INDEX["offset"]:
+        return _INDEX["entries"]
+    try:
+        with open(index_file, "rb") as f:
+            f.seek(_INDEX["offset"])
+            chunk = f.read()
+    except OSError as e:
+        print(f"[fits_meta] load failed for {index_file}: {e}")
+        return _INDEX["entries"]
+    complete = chunk[:chunk.rfind(b"\n") + 1]     # 末尾未写完的行留到下次
+    for line in complete.splitlines():
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        if entry.get("schema_version") == META_SCHEMA_VERSION and "key" in entry:
+            _INDEX["entries"][entry["key"]] = entry
+        _INDEX["lines"] += 1
+    _INDEX["offset"] += len(complete)
+    if _INDEX["lines"] > max(META_COMPACT_MIN_LINES, 2 * len(_INDEX["entries"])):
+        try:
+            _write_compacted(index_file, _INDEX["entries"])
+            _INDEX.update(offset=os.path.getsize(index_file), lines=len(_INDEX["entries"]))
+        except OSError as e:
+            print(f"[fits_meta] compaction failed for {index_file}: {e}")
+    return _INDEX["entries"]
+
+
+def _append_index_entry(entry: dict) -> None:
+    """Best-effort 单行追加（O_APPEND，多进程并发写不会互相覆盖）。"""
+    index_file = _meta_index_file()
+    try:
+        os.makedirs(os.path.dirname(index_file), exist_ok=True)
+        with open(index_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        print(f"[fits_meta] persist failed for {index_file}: {e}")
+
+
+def fits_metadata(path: str, ext: int = 0) -> dict:
+    """只读 header 的 FITS 元数据（形状、像素尺度、WCS 关键字），按 path+mtime+size 缓存。
+
+    Returns:
+        dict: shape (ny, nx)、pixscale [arcsec/pix，无 WCS 时为 None]、wcs_header
+        （仅含 WCS 相关关键字的 ``fits.Header``）、以及用于失效判断的 mtime_ns / size。
+    """
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    stamp = {"ext": ext, "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+    with _META_LOCK:
+        entry = _META.get((path, ext))
+    if entry is None or entry["mtime_ns"] != st.st_mtime_ns or entry["size"] != st.st_size:
+        key = f"{path}[{ext}]"
+        raw = None
+        if _meta_persistence_enabled():
+            with _META_LOCK:
+                raw = _index_entries().get(key)
+        if raw is None or any(raw.get(k) != v for k, v in stamp.items()):
+            raw = {"schema_version": META_SCHEMA_VERSION, "key": key, **stamp, **_read_header_meta(path, ext)}
+            if _meta_persistence_enabled():
+                _append_index_entry(raw)
+        entry = {**stamp, "shape": tuple(raw["shape"]), "pixscale": raw["pixscale"],
+                 "wcs_header": fits.Header.fromstring(raw["wcs"])}
+        with _META_LOCK:
+            _META[(path, ext)] = entry
+    return entry
+
+
+def fits_wcs(path: str, ext: int = 0) -> WCS:
+    """由缓存的 header 构造 WCS（同一 path+mtime+size 只构造一次，不打开 FITS）。"""
+    meta = fits_metadata(path, ext)
+    key = (os.path.abspath(path), ext, meta["mtime_ns"], meta["size"])
+    with _META_LOCK:
+        wcs = _WCS.get(key)
+    if wcs is None:
+        wcs = WCS(meta["wcs_header"])
+        with _META_LOCK:
+            for stale in [k for k in _WCS if k[:2] == key[:2]]:
+                del _WCS[stale]
+            _WCS[key] = wcs
+    return wcs
+
+
+# ── pipeline precision ────────────────────────────────────────────────────────
+
+IMAGE_PRECISIONS = ("float64", "float32")
+
+
+def image_precision() -> str:
+    value = os.environ.get("IMAGE_PRECISION", "float64").strip().lower()
+    return value if value in IMAGE_PRECISIONS else "float64"
+
+
+def image_dtype() -> type:
+    """渲染管线中新分配图像缓冲（mask、叠加层、subcomp）的 dtype。"""
+    return np.float32 if image_precision() == "float32" else np.float64
+
+
+def as_image(data):
+    """float32 模式下把图像转为原生字节序 float32（已是则不复制）；float64 模式原样返回。"""
+    if data is None or image_precision() != "float32":
+        return data
+    return np.asarray(data, dtype=np.float32)
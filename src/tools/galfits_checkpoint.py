@@ -0,0 +1,266 @@
+"""galfits_checkpoint — 分段运行 GalfitS 并在运行目录里保存检查点，超时 / 重启后可续跑。
+
+GalfitS 以外部 CLI 方式运行，优化器内部状态（Adam 动量等）无法从外部读取。
+可持久化的是参数向量：每段运行结束时 GalfitS 写出的 ``.gssummary``，下一段通过
+``--readsummary`` 读回。因此这里把 ``--num_steps N`` 拆成若干段（每段
+``checkpoint_every`` 步），每段结束后把 GalfitS 写出的 ``<workplace>/<R1 目标名>.gssummary``
+原子地复制到
+``<workplace>/checkpoint/`` 并更新 ``checkpoint/state.json``::
+
+    {"config_sha256": ..., "steps_done": 400, "total_steps": 1000,
+     "summary": "<workplace>/checkpoint/gal.gssummary", "complete": false,
+     "updated_at": "2026-10-19T12:00:00"}
+
+``resume=True`` 时若找到与当前配置（sha256）匹配、尚未完成的检查点，就从该 summary
+继续剩余步数。
+
+分段本身就会改变拟合：不论是否续跑，每个分段边界都是一次全新的 GalfitS 进程，
+Adam 动量与学习率调度（若有）从头开始，数据读入与 JAX 编译（trace）也在每段重复一次。
+因此开启分段后的优化轨迹与一次跑完 ``--num_steps`` 不同（结果可能不同），并多出
+每段的启动开销；分段是用可续跑换取这两点的可选项，段长宜取得较大。
+
+未指定 ``checkpoint_every`` 时读取环境变量 ``GALFITS_CHECKPOINT_STEPS``；都没有时（默认）
+整次运行只调用一次 GalfitS，命令行与以前完全相同。
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from glob import glob
+from typing import Optional
+
+from .atomic_io import match_target_mode
+
+CHECKPOINT_DIRNAME = "checkpoint"
+STATE_FILENAME = "state.json"
+
+
+@dataclass
+class CheckpointedRun:
+    """Outcome of :func:`run_checkpointed`; quacks like ``CompletedProcess`` for callers."""
+    returncode: int
+    stdout: str = ""
+    stderr: str = ""
+    timed_out: bool = False
+    chunks: int = 0
+    steps_done: int = 0
+    total_steps: Optional[int] = None
+    resumed_from: Optional[int] = None
+    commands: list = field(default_factory=list)
+
+    def info(self) -> dict:
+        return {
+            "chunks": self.chunks,
+            "steps_done": self.steps_done,
+            "total_steps": self.total_steps,
+            "resumed_from": self.resumed_from,
+        }
+
+
+def checkpoint_every_default() -> Optional[int]:
+    value = os.environ.get("GALFITS_CHECKPOINT_STEPS", "").strip()
+    return int(value) if value.isdigit() and int(value) > 0 else None
+
+
+def config_digest(config_file: str) -> str:
+    with open(config_file, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def checkpoint_dir(workplace: str) -> str:
+    return os.path.join(workplace, CHECKPOINT_DIRNAME)
+
+
+def load_checkpoint(workplace: str) -> Optional[dict]:
+    """Return the checkpoint state of ``workplace`` or None if absent / unreadable."""
+    path = os.path.join(checkpoint_dir(workplace), STATE_FILENAME)
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if state.get("summary") and not os.path.isfile(state["summary"]):
+        return None
+    return state
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp_")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        match_target_mode(tmp, path)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def save_checkpoint(workplace: str, summary_file: Optional[str], digest: str,
+                    steps_done: int, total_steps: Optional[int], complete: bool) -> dict:
+    """Copy ``summary_file`` into the checkpoint dir and write ``state.json`` (both atomically)."""
+    ckpt_dir = checkpoint_dir(workplace)
+    os.makedirs(ckpt_dir, exist_ok=True)
+    saved = None
+    if summary_file and os.path.isfile(summary_file):
+        saved = os.path.join(ckpt_dir, os.path.basename(summary_file))
+        with open(summary_file, "rb") as f:
+            _atomic_write(saved, f.read())
+    state = {
+        "config_sha256": digest,
+        "steps_done": steps_done,
+        "total_steps": total_steps,
+        "summary": saved,
+        "complete": complete,
+        "updated_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    _atomic_write(os.path.join(ckpt_dir, STATE_FILENAME),
+                  json.dumps(state, indent=2).encode("utf-8"))
+    return state
+
+
+def find_resumable_workplace(galaxy_dir: str, config_file: str) -> Optional[str]:
+    """Newest ``output/*_<basename>*`` run dir holding an unfinished checkpoint for this config."""
+    digest = config_digest(config_file)
+    basename = os.path.splitext(os.path.basename(config_file))[0]
+    candidates = []
+    for state_path in glob(os.path.join(galaxy_dir, "output", f"*_{basename}*",
+                                        CHECKPOINT_DIRNAME, STATE_FILENAME)):
+        workplace = os.path.dirname(os.path.dirname(state_path))
+        state = load_checkpoint(workplace)
+        if state and not state.get("complete") and state.get("config_sha256") == digest:
+            candidates.append((state.get("updated_at", ""), workplace))
+    return max(candidates)[1] if candidates else None
+
+
+def _split_option(cmd: list[str], option: str) -> tuple[list[str], Optional[str]]:
+    """Remove ``option VALUE`` / ``option=VALUE`` from ``cmd``; return (rest, last value)."""
+    rest, value, i = [], None, 0
+    while i < len(cmd):
+        arg = cmd[i]
+        if arg == option and i + 1 < len(cmd):
+            value = cmd[i + 1]
+            i += 2
+            continue
+        if arg.startswith(option + "="):
+            value = arg.split("=", 1)[1]
+        else:
+            rest.append(arg)
+        i += 1
+    return rest, value
+
+
+def _expected_summary(config_file: str, workplace: str) -> Optional[str]:
+    """``<workplace>/<targ>.gssummary`` written by GalfitS for the R1) target, if present."""
+    from .lyric_document import load_lyric
+
+    try:
+        targ = load_lyric(config_file).get("R1")
+    except Exception as e:  # noqa: BLE001
+        print(f"[galfits_checkpoint] cannot read target name from {config_file}: {e}")
+        return None
+    if not targ:
+        return None
+    path = os.path.join(workplace, f"{targ}.gssummary")
+    return path if os.path.isfile(path) else None
+
+
+def run_checkpointed(
+    cmd: list[str],
+    config_file: str,
+    workplace: str,
+    cwd: str,
+    timeout_sec: float,
+    checkpoint_every: Optional[int] = None,
+    resume: bool = False,
+) -> CheckpointedRun:
+    """Run GalfitS ``cmd`` in chunks of ``checkpoint_every`` steps, checkpointing after each.
+
+    ``timeout_sec`` is the budget for the whole run, shared across chunks. On
+    timeout the last completed chunk's checkpoint stays on disk for a later
+    ``resume=True`` call. ``FileNotFoundError`` from the executable propagates.
+    Every chunk is a fresh GalfitS process (optimizer state, LR schedule, data
+    load and JAX trace start over), so a chunked run does not reproduce the
+    single-process trajectory; see the module docstring.
+    """
+    checkpoint_every = checkpoint_every or checkpoint_every_default()
+    digest = config_digest(config_file)
+
+    state = load_checkpoint(workplace) if resume else None
+    if state and state.get("config_sha256") != digest:
+        print(f"[galfits_checkpoint] ignoring checkpoint in {workplace}: config changed")
+        state = None
+
+    base_cmd, steps_arg = _split_option(cmd, "--num_steps")
+    total = int(steps_arg) if steps_arg and steps_arg.isdigit() else None
+    run = CheckpointedRun(returncode=0, total_steps=total)
+
+    if state and state.get("complete"):
+        print(f"[galfits_checkpoint] checkpoint in {workplace} is complete, nothing to rerun")
+        run.steps_done = state.get("steps_done", 0)
+        run.resumed_from = run.steps_done
+        return run
+
+    if not state and not checkpoint_every:
+        # 不分段、无检查点：保持原来的单次调用
+        proc = subprocess.run(cmd, capture_output=True, text=True, check=False,
+                              timeout=timeout_sec, cwd=cwd)
+        run.returncode, run.stdout, run.stderr = proc.returncode, proc.stdout or "", proc.stderr or ""
+        run.chunks, run.steps_done, run.commands = 1, total or 0, [cmd]
+        return run
+
+    # 每段自己决定 --readsummary：首段用调用方给的（或检查点的）summary，之后用上一段的
+    base_cmd, summary = _split_option(base_cmd, "--readsummary")
+    if state:
+        summary = state.get("summary") or summary
+        run.steps_done = run.resumed_from = int(state.get("steps_done") or 0)
+        print(f"[galfits_checkpoint] resuming {workplace} from step {run.steps_done}")
+
+    deadline = time.monotonic() + timeout_sec
+    while True:
+        step_cmd = list(base_cmd)
+        if summary:
+            step_cmd += ["--readsummary", summary]
+        n_steps = None
+        if total is not None:
+            n_steps = total - run.steps_done
+            if checkpoint_every:
+                n_steps = min(n_steps, checkpoint_every)
+            step_cmd += ["--num_steps", str(n_steps)]
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            run.timed_out = True
+            break
+        run.commands.append(step_cmd)
+        try:
+            proc = subprocess.run(step_cmd, capture_output=True, text=True, check=False,
+                                  timeout=remaining, cwd=cwd)
+        except subprocess.TimeoutExpired as e:
+            run.stdout += e.stdout.decode() if isinstance(e.stdout, bytes) else (e.stdout or "")
+            run.stderr += e.stderr.decode() if isinstance(e.stderr, bytes) else (e.stderr or "")
+            run.timed_out = True
+            break
+        run.chunks += 1
+        run.stdout += proc.stdout or ""
+        run.stderr += proc.stderr or ""
+        run.returncode = proc.returncode
+        if proc.returncode != 0:
+            break
+
+        run.steps_done += n_steps or 0
+        complete = total is None or run.steps_done >= total
+        saved = save_checkpoint(workplace, _expected_summary(config_file, workplace), digest,
+                                run.steps_done, total, complete)
+        summary = saved["summary"] or summary
+        if complete:
+            break
+        print(f"[galfits_checkpoint] checkpoint at step {run.steps_done}/{total}")
+    return run
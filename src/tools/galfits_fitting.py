@@ -5,13 +5,19 @@ from typing import Annotated, Optional, List
 import glob
 import numpy as np
 from galfits import gsutils
-from astropy.io import ascii
 from astropy.io import fits
 from astropy.wcs import WCS
 from astropy.cosmology import Planck18 as cosmo
 from pathlib import Path
 import re
 import subprocess
+from contextlib import contextmanager
+
+from .galfits_checkpoint import run_checkpointed
+from .galfits_session import get_fitter_session
+from .gssummary import load_gssummary, parse_gssummary_text
+from .lyric_document import load_lyric, parse_lyric_text
+from .runtime_model import RuntimeRecorder, galfits_job_features
 
 __all__ = ["ImageFitting", "PureSEDFitting", "ImageSEDFitting"]
 
@@ -30,77 +36,65 @@ MAG_ZERO_POINTS = [
 BANDS_ZEROPOINTS = {band: zp for band, zp in zip (ALL_BANDS, MAG_ZERO_POINTS)}
 
 
-def load_gs_model(config_lyric, workplace, prior_path = None,): 
-    
-    '''
-    load galfits model from gssummary.
+@contextmanager
+def loaded_gs_model(config_lyric, workplace, prior_path=None):
     '''
+    load galfits model from gssummary; yields (Myfitter, targ) with the session lock held.
 
-    Myfitter, targ, fs = gsutils.read_config_file(config = config_lyric
-            , workplace=workplace, priorpath=prior_path, )
-
-    summary_file = workplace + "/{0}.gssummary".format(targ)
-    if os.path.isfile(summary_file):
-        smfile = ascii.read(summary_file)
+    The fitter is shared per process (generate_subcomps / calculate_profile_fluxes reuse it),
+    so all reads of its parameters / model images must happen inside this block.
+    '''
+    session = get_fitter_session(config_lyric, workplace, prior_path)
+    summary_file = workplace + "/{0}.gssummary".format(session.targ)
+    with session.using_summary(summary_file) as Myfitter:
+        yield Myfitter, session.targ
 
-        ## fill value
-        for loopx in range(len(smfile)):
-            # TODO(FIXME?): skip nan values and names not existed in Myfitter.lmParameters
-            name, best_value = smfile['pname'][loopx], smfile['best_value'][loopx]
-            if np.isnan(best_value) or name not in Myfitter.lmParameters:
-                continue
-            Myfitter.lmParameters[name].value = best_value 
 
-        Myfitter.loose_fix_pars()
-        Myfitter.cal_model_image()
+def load_gs_model(config_lyric, workplace, prior_path = None,): 
     
-    return Myfitter, targ
+    '''
+    load galfits model from gssummary.
+
+    Returns the shared fitter without holding its lock: only for single-threaded use.
+    Concurrent callers should use ``loaded_gs_model`` instead.
+    '''
+    with loaded_gs_model(config_lyric, workplace, prior_path) as (Myfitter, targ):
+        return Myfitter, targ
 
 def extract_redshift(config_lyric):
     """Extract the redshift value from the R3) line in a lyric config file."""
-    pattern = re.compile(r'^R3\)\s*(-?\d+\.?\d*)', re.MULTILINE)
-    with open(config_lyric, 'r', encoding='utf-8') as f:
-        text = f.read()
-    match = pattern.search(text)
-    if not match:
+    z = load_lyric(config_lyric).get("R3")
+    if isinstance(z, bool) or not isinstance(z, (int, float)):
         raise ValueError(f"R3) redshift not found in {config_lyric}")
-    return float(match.group(1))
+    return float(z)
 
 def extract_band_fits_pairs(config_lyric):
-    pattern1 = re.compile(r'^I([a-z])1\)\s*(.+)', re.IGNORECASE)  # Match Ix1)
-    pattern2 = re.compile(r'^I([a-z])2\)\s*(.+)', re.IGNORECASE)  # Match Ix2)
-
     config_dir = os.path.dirname(os.path.abspath(config_lyric))
     band_fits_pairs = {}
     temp = {}
 
-    with open(config_lyric, 'r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith('#'):
-                continue
-
-            match1 = pattern1.match(line)
-            if match1:
-                img_label = match1.group(1)  # a, b, c...
-                fits_file = match1.group(2).strip()
-                # Resolve relative paths against config file directory
-                fits_path = fits_file.strip("[]").split(",")[0].strip()
-                if not os.path.isabs(fits_path):
-                    abs_path = os.path.normpath(os.path.join(config_dir, fits_path))
-                    fits_file_resolved = fits_file.replace(fits_path, abs_path)
-                else:
-                    fits_file_resolved = fits_file
-                temp[img_label] = {'1': fits_file_resolved}
-                continue
-
-            match2 = pattern2.match(line)
-            if match2:
-                img_label = match2.group(1)
-                band = match2.group(2).strip()
-                if img_label in temp:
-                    temp[img_label]['2'] = band
-                    band_fits_pairs[band] = (img_label, temp[img_label]['1'])
+    for line in load_lyric(config_lyric).entries():
+        if line.family != 'I' or len(line.label or '') != 1 or not line.value_str:
+            continue
+
+        if line.index == 1:  # Match Ix1)
+            img_label = line.label  # a, b, c...
+            fits_file = line.value_str
+            # Resolve relative paths against config file directory
+            fits_path = fits_file.strip("[]").split(",")[0].strip()
+            if not os.path.isabs(fits_path):
+                abs_path = os.path.normpath(os.path.join(config_dir, fits_path))
+                fits_file_resolved = fits_file.replace(fits_path, abs_path)
+            else:
+                fits_file_resolved = fits_file
+            temp[img_label] = {'1': fits_file_resolved}
+
+        elif line.index == 2:  # Match Ix2)
+            img_label = line.label
+            band = line.value_str
+            if img_label in temp:
+                temp[img_label]['2'] = band
+                band_fits_pairs[band] = (img_label, temp[img_label]['1'])
 
     return band_fits_pairs
 
@@ -117,7 +111,12 @@ def calculate_profile_fluxes(config_lyric, workplace, prior_path=None):
     '''
 
     fluxes = {} # path: model_name/profile_name/band -> (flux, flux_error)
-    Myfitter, _ = load_gs_model(config_lyric=config_lyric, workplace=workplace, prior_path=prior_path)
+    with loaded_gs_model(config_lyric=config_lyric, workplace=workplace, prior_path=prior_path) as (Myfitter, _):
+        _collect_profile_fluxes(Myfitter, fluxes)
+    return fluxes
+
+
+def _collect_profile_fluxes(Myfitter, fluxes):
     bands = Myfitter.GSdata.allbands ## some sources lack some bands' images
 
     for model in Myfitter.model_list:
@@ -139,8 +138,6 @@ def calculate_profile_fluxes(config_lyric, workplace, prior_path=None):
 
                 fluxes[model.name][profile_name][band] = (flux_mJy, flux_mJy * 0.1)
 
-    return fluxes
-
 def generate_pure_sed_fitting_lyric(*, profile_name, mock_profile_root, bands, band_fits_pairs, z_fit, ebv=0.1):
     original_fits = band_fits_pairs[bands[0]][1].strip("[]").split(",")[0].strip() # can any of these bands be used ?
     header = fits.getheader(original_fits) 
@@ -312,31 +309,45 @@ def do_pure_sed_fitting(
 def ImageFitting(
     lyric_file: Annotated[str, "Path to the galfits config file (.lyric)"], 
     workplace: Annotated[str, "Path to the galfits workplace where gssummary can be found"],
-    args: Annotated[Optional[str|List[str]], "Additional command line arguments for galfits fitting. It can be a single string or a list of strings."] = None
+    args: Annotated[Optional[str|List[str]], "Additional command line arguments for galfits fitting. It can be a single string or a list of strings."] = None,
+    resume: Annotated[bool, "Continue from the checkpoint in workplace left by an interrupted run"] = False,
+    checkpoint_every: Annotated[Optional[int], "Opt-in: run in chunks of N optimizer steps, checkpointing each (needs --num_steps in args). Each chunk restarts GalfitS (optimizer state and LR schedule reset, data load and JAX trace repeat), so the fit differs from an unchunked run"] = None,
+    timeout_sec: Annotated[Optional[int], "Timeout in seconds; default is estimated from past runs (1800 s without history)"] = None,
 ) -> Annotated[dict, "A dict containing the status and content of the galfits fitting result. The status can be 'success' or 'error', and the content provides detailed information about the result or error message."]:
     args = args or []
     if isinstance(args, str):
         args = [args]
     command = ["python", "-m", "galfits.galfitS", "--config", f'{lyric_file}', '--workplace', f'{workplace}'] + args
+    runtime = RuntimeRecorder("galfits", galfits_job_features(lyric_file, args), timeout=timeout_sec,
+                              default_timeout=1800, config_file=lyric_file)
     try:
-        cpi = subprocess.run(
+        run = run_checkpointed(
             command,
+            config_file=lyric_file,
+            workplace=workplace,
             cwd=os.path.dirname(lyric_file),
-            capture_output=True,
-            text=True,
-            check=True,
-            timeout=1800,  # 30 minute timeout
+            timeout_sec=runtime.timeout_s,
+            checkpoint_every=checkpoint_every,
+            resume=resume,
         )
+        runtime.done("timeout" if run.timed_out else "success" if run.returncode == 0 else "failure")
+        if run.timed_out:
+            return {
+                "status": "error",
+                "message": f"run galfits timedout after step {run.steps_done}; rerun with resume=True to continue",
+                "checkpoint": run.info(),
+            }
+        if run.returncode != 0:
+            return {
+                "status": "error",
+                "message": f"run galfits failed for {lyric_file}: {run.stderr}"
+            }
         return {
             "status": "success",
             "message": f"run galfits successfully for {lyric_file}"
         }
-    except subprocess.CalledProcessError as e:
-        return {
-            "status": "error",
-            "message": f"run galfits failed for {lyric_file}: {e.stderr}"
-        }
-    except TimeoutError as e:
+    except subprocess.TimeoutExpired as e:
+        runtime.done("timeout")
         return {
             "status": "error",
             "message": f"run galfits timedout: {e}"
@@ -410,32 +421,19 @@ def parse_gssummary(gssummary_file: str, profile_name: str) -> dict:
         ValueError: If required parameters are missing or values are invalid numbers.
     """
     results = {}
+    required_parameters = set([p.format(profile_name=profile_name) for p in REQUIRED_PARAMETERS])
 
-    # Read content from file or use input directly as text
+    # Read content from file (shared memoized parse) or use input directly as text
     if os.path.isfile(gssummary_file):
-        with open(gssummary_file, encoding="utf-8") as f:
-            text = f.read()
+        summary = load_gssummary(gssummary_file)
     else:
-        text = gssummary_file
+        summary = parse_gssummary_text(gssummary_file)
 
-    for line in text.splitlines():
-        line = line.strip()
-        # Skip empty lines and comment lines
-        if not line or line.startswith("#"):
-            continue
-
-        # Safe split to avoid crashes from malformed lines
-        parts = line.split(maxsplit=2)
-        if len(parts) < 2:
-            continue
-
-        pname, best_value = parts[0], parts[1]
-        required_parameters = set([p.format(profile_name=profile_name) for p in REQUIRED_PARAMETERS]) 
-        if pname in required_parameters:
-            try:
-                results[pname] = float(best_value)
-            except (ValueError, TypeError):
-                raise ValueError(f"Invalid numeric value for parameter {pname}: {best_value}")
+    for row in summary.params:
+        if row.name in required_parameters:
+            if row.value is None:
+                raise ValueError(f"Invalid numeric value for parameter {row.name}: {row.raw}")
+            results[row.name] = row.value
 
     # Check for missing required parameters
     missing_params = required_parameters - results.keys()
@@ -541,8 +539,8 @@ def update_lyric_with_gssummaries(
         - content: Detailed result or error message
     """
     try:
-        with open(lyric_file, encoding="utf-8") as f:
-            lyric_content = f.read()
+        lyric_doc = load_lyric(lyric_file)
+        lyric_content = lyric_doc.to_text()
 
         if mock_root is None:
             mock_root = Path(os.path.dirname(lyric_file)) / f"{Path(lyric_file).stem}_mock"
@@ -552,7 +550,9 @@ def update_lyric_with_gssummaries(
         gssummary_files = glob.glob(f"{mock_root}**/*.gssummary", recursive=True)    
         for gssummary_file in gssummary_files:
             profile_name = Path(os.path.basename(gssummary_file)).stem
-            label = search_profile_label_by_name(lyric_content, profile_name)
+            label = lyric_doc.label_of("P", profile_name)
+            if label is None:
+                raise ValueError(f"profile: {profile_name} not found!")
             summary_data = parse_gssummary(gssummary_file, profile_name)
 
             # Apply all value replacements
@@ -562,13 +562,16 @@ def update_lyric_with_gssummaries(
             lyric_content = replace_single_value("Px14", label, lyric_content, summary_data[f"logM_{profile_name}"])
             lyric_content = replace_single_value("Px11", label, lyric_content, summary_data[f"{profile_name}_Z_value"])
 
+        new_lyric_file = new_lyric_file if new_lyric_file else lyric_file
+        updated = parse_lyric_text(lyric_content, new_lyric_file)
+
         # Force Ix15) to 1 for all bands (Ia15, Ib15, Ic15, ...) to enable SED usage
-        lyric_content = re.sub(r'(I[a-z]15\)\s*)\d+', r'\g<1>1', lyric_content)
+        for label in updated.labels("I"):
+            if f"I{label}15" in updated:
+                updated.set(f"I{label}15", 1)
 
         # Write updated content back to file
-        new_lyric_file = new_lyric_file if new_lyric_file else lyric_file
-        with open(new_lyric_file, "w", encoding="utf-8") as f:
-            f.write(lyric_content)
+        updated.save(new_lyric_file)
 
         return {
             "status": "success",
@@ -0,0 +1,161 @@
+"""galfits_session — 进程内共享的 GalfitS fitter 会话缓存。
+
+``gsutils.read_config_file`` 会重新读取每个波段的图像 / PSF / mask 并重新 trace JAX
+函数，是后处理里最贵的一步。``generate_subcomps``、``galfits_fitting.load_gs_model`` 与
+``calculate_profile_fluxes`` 过去对同一次运行各自重建一遍 fitter。
+
+``get_fitter_session`` 以 (lyric 路径, mtime, size, workplace, prior) 加上 lyric 引用的
+全部输入文件（``Ix1/Ix3/Ix4/Ix6)``）的 (mtime, size) 为键缓存 :class:`FitterSession`；
+任何一项变化都会重建。``FitterSession.apply_summary`` 把 .gssummary 最优值写回参数，
+同一份 summary（path+mtime+size）只应用一次，换 summary 前先恢复初始参数值。
+
+fitter 实例在调用方之间共享（连同其已编译的 JAX 函数）：应用 summary 与读取参数 /
+模型必须在同一次持锁期间完成，否则另一线程可能在中途换上别的 summary。用
+``with session.using_summary(path) as fitter:`` 或自行持有 ``session.lock``。
+设置 ``GALFITS_SESSION_CACHE=0`` 可关闭缓存，每次都新建 fitter。
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import numpy as np
+
+from .gssummary import load_gssummary
+from .lyric_document import load_lyric
+
+# fitter 持有全部波段图像与编译后的函数，占用内存大：只保留少量会话
+FITTER_SESSION_CACHE_SIZE = 4
+
+_LYRIC_INPUT_INDICES = (1, 3, 4, 6)   # image, sigma, psf, mask
+_NO_IMAGE = {"", "noimg", "none"}
+
+
+def session_cache_enabled() -> bool:
+    return os.environ.get("GALFITS_SESSION_CACHE", "1") == "1"
+
+
+def _stamp(path: Optional[str]) -> Optional[tuple]:
+    if not path:
+        return None
+    path = os.path.abspath(path)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return (path, None, None)
+    return (path, st.st_mtime_ns, st.st_size)
+
+
+def lyric_input_files(lyric_file: str) -> list[str]:
+    """Absolute paths of the image/sigma/PSF/mask files referenced by a lyric file."""
+    config_dir = os.path.dirname(os.path.abspath(lyric_file))
+    paths = []
+    for line in load_lyric(lyric_file).entries():
+        if line.family != "I" or not line.label or line.index not in _LYRIC_INPUT_INDICES:
+            continue
+        path = line.value_str.strip("[]").split(",")[0].strip()
+        if path.lower() in _NO_IMAGE:
+            continue
+        paths.append(path if os.path.isabs(path) else os.path.normpath(os.path.join(config_dir, path)))
+    return sorted(set(paths))
+
+
+def session_key(lyric_file: str, workplace: str, prior_path: Optional[str] = None) -> tuple:
+    return (
+        _stamp(lyric_file),
+        os.path.abspath(workplace),
+        _stamp(prior_path),
+        tuple(_stamp(p) for p in lyric_input_files(lyric_file)),
+    )
+
+
+@dataclass
+class FitterSession:
+    key: tuple
+    fitter: Any
+    targ: Any
+    fs: Any
+    initial_values: dict[str, float] = field(default_factory=dict)
+    summary_stamp: Optional[tuple] = None
+    # 每个波段 PSF 在补零卷积尺寸下的 rFFT（generate_subcomps 批量渲染用）
+    psf_ffts: dict = field(default_factory=dict, repr=False)
+    lock: threading.RLock = field(default_factory=threading.RLock, repr=False)
+
+    def apply_summary(self, gssummary_file: Optional[str]) -> bool:
+        """Load best-fit values from ``gssummary_file`` (skip nan / unknown names) and rebuild the model.
+
+        Returns True if a summary is applied. Re-applying the same summary file
+        version is a no-op; switching summaries first restores the initial values.
+        """
+        stamp = _stamp(gssummary_file) if gssummary_file and os.path.isfile(gssummary_file) else None
+        with self.lock:
+            if stamp == self.summary_stamp:
+                return stamp is not None
+            fitter = self.fitter
+            if self.summary_stamp is not None:
+                for name, value in self.initial_values.items():
+                    fitter.lmParameters[name].value = value
+            if stamp is not None:
+                for row in load_gssummary(gssummary_file).fit_rows():
+                    name, best_value = row.name, row.value
+                    if np.isnan(best_value) or name not in fitter.lmParameters:
+                        continue
+                    fitter.lmParameters[name].value = best_value
+            fitter.loose_fix_pars()
+            fitter.cal_model_image()
+            self.summary_stamp = stamp
+            return stamp is not None
+
+    @contextmanager
+    def using_summary(self, gssummary_file: Optional[str]):
+        """Hold ``lock`` with ``gssummary_file`` applied for the whole block; yields the fitter."""
+        with self.lock:
+            self.apply_summary(gssummary_file)
+            yield self.fitter
+
+
+_SESSIONS_LOCK = threading.Lock()
+_SESSIONS: "OrderedDict[tuple, FitterSession]" = OrderedDict()
+
+
+def _build_session(key, lyric_file, workplace, prior_path) -> FitterSession:
+    # Lazy import: gsutils pulls in the GalfitS package (JAX, reproject).
+    from galfits import gsutils
+
+    print(f"[galfits_session] building fitter for {lyric_file}")
+    fitter, targ, fs = gsutils.read_config_file(config=lyric_file, workplace=workplace, priorpath=prior_path)
+    initial = {name: p.value for name, p in fitter.lmParameters.items()}
+    return FitterSession(key=key, fitter=fitter, targ=targ, fs=fs, initial_values=initial)
+
+
+def get_fitter_session(lyric_file: str, workplace: str, prior_path: Optional[str] = None) -> FitterSession:
+    """Return the shared fitter session for ``lyric_file`` / ``workplace``, building it on first use."""
+    key = session_key(lyric_file, workplace, prior_path)
+    if not session_cache_enabled():
+        return _build_session(key, lyric_file, workplace, prior_path)
+
+    with _SESSIONS_LOCK:
+        session = _SESSIONS.get(key)
+        if session is not None:
+            _SESSIONS.move_to_end(key)
+            return session
+
+    session = _build_session(key, lyric_file, workplace, prior_path)
+    with _SESSIONS_LOCK:
+        # 并发构建时保留先到的那一个，保证调用方共享同一个实例
+        session = _SESSIONS.setdefault(key, session)
+        _SESSIONS.move_to_end(key)
+        # 同一 lyric/workplace 的旧版本会话（输入已变化）不会再命中，直接淘汰
+        for stale in [k for k in _SESSIONS if k != key and k[0][0] == key[0][0] and k[1] == key[1]]:
+            del _SESSIONS[stale]
+        while len(_SESSIONS) > FITTER_SESSION_CACHE_SIZE:
+            _SESSIONS.popitem(last=False)
+    return session
+
+
+def clear_fitter_sessions() -> None:
+    with _SESSIONS_LOCK:
+        _SESSIONS.clear()
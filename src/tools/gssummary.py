@@ -0,0 +1,213 @@
+"""gssummary — GalfitS ``.gssummary`` 的统一结构化解析（按 path+mtime+size 记忆）。
+
+同一份 summary 过去在 ``run_galfits._parse_gssummary``、``parse_lyric.parse_gssummary``
+/ ``extract_component_attributes``（每个波段一次）、``generate_subcomps`` 与
+``galfits_fitting`` 中各自用正则或 ``ascii.read`` 重复解析。``load_gssummary`` 只
+解析一次，得到：
+
+- 统计量：``reduced_chisq`` / ``bic`` / ``per_band_chisq``；
+- 参数行 :class:`GSParam`（名称、最优值、误差列、所在段 free/fixed），保持文件顺序；
+- 派生视图：``values``（名称 -> 最优值）、``component_names``、``component_params``、
+  ``mag``（按波段取 ``Mag_<comp>_<band>``）。
+
+一次多波段对比图（``generate_subcomps`` + 各波段 ``extract_component_attributes``）
+因此对每个 summary 只解析一次。返回的对象在缓存中共享，调用方不得修改。
+"""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+GSSUMMARY_CACHE_SIZE = 64
+
+# 组件参数的已知后缀（与 extract_component_attributes 的组件识别一致）
+COMPONENT_SUFFIXES = frozenset({
+    'xcen', 'ycen', 'Re', 'n', 'ang', 'axrat',
+    'Rout', 'alpha', 'beta', 'rs', 'hs',
+    'r0', 'sig', 'r_in', 'r_out',
+    'width', 'alpha_rc', 'theta_out', 'm', 'am',
+    'theta_m', 'i_arm',
+})
+
+_REDUCED_CHISQ_RE = re.compile(r"reduced\s+chi.*?[:\s]+([\d.]+)", re.IGNORECASE)
+_BIC_RE = re.compile(r"BIC\s*[:\s]+([\d.eE+-]+)", re.IGNORECASE)
+_BAND_CHISQ_RE = re.compile(r"(band\s*\w+|f\d+w)\s*.*?(?:reduced\s+)?chi.*?[:\s]+([\d.]+)", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class GSParam:
+    """One parameter row of a .gssummary table."""
+
+    name: str
+    raw: str                                   # best-value column as written
+    value: Optional[float]                     # None when not numeric (nan stays nan)
+    errors: tuple[float, ...] = ()             # remaining numeric columns (uncertainties)
+    section: Optional[str] = None              # "free" / "fixed" / None (no section marker)
+
+
+@dataclass(frozen=True)
+class GSSummary:
+    path: Optional[str]
+    config_file: Optional[str]
+    reduced_chisq: Optional[float]
+    bic: Optional[float]
+    per_band_chisq: dict[str, float]
+    params: tuple[GSParam, ...]
+    columns: tuple[str, ...] = ()              # header row (e.g. pname best_value ...) if present
+    values: dict[str, float] = field(default_factory=dict)
+
+    def fit_rows(self) -> list[GSParam]:
+        """``ascii.read`` 等价的最优值行：有 free 段时只取 free 段，否则取全部数值行。"""
+        rows = [p for p in self.params if p.value is not None]
+        if any(p.section == "free" for p in rows):
+            rows = [p for p in rows if p.section == "free"]
+        return rows
+
+    @property
+    def component_names(self) -> list[str]:
+        names = set()
+        for key in self.values:
+            if key.startswith('logM_'):
+                names.add(key[5:])
+            else:
+                for suf in COMPONENT_SUFFIXES:
+                    if key.endswith('_' + suf):
+                        prefix = key[:-(len(suf) + 1)]
+                        if prefix:
+                            names.add(prefix)
+                        break
+        return sorted(names)
+
+    def component_params(self, name: str) -> dict[str, float]:
+        """``<name>_<suffix>`` 参数（后缀 -> 值）。"""
+        prefix = name + '_'
+        return {k[len(prefix):]: v for k, v in self.values.items() if k.startswith(prefix)}
+
+    def errors(self, name: str) -> tuple[float, ...]:
+        for p in reversed(self.params):
+            if p.name == name:
+                return p.errors
+        return ()
+
+    def mag(self, component: str, band: Optional[str] = None) -> Optional[float]:
+        """组件星等：给定 band 时取 ``Mag_<comp>_<band>``，否则取首个 ``Mag_<comp>_*``。"""
+        for key, val in self.values.items():
+            if band is not None:
+                if key == f'Mag_{component}_{band}':
+                    return float(val)
+            elif key.startswith(f'Mag_{component}_'):
+                return float(val)
+        return None
+
+
+def _to_float(s: str) -> Optional[float]:
+    try:
+        return float(s)
+    except ValueError:
+        return None
+
+
+def parse_gssummary_text(text: str, path: Optional[str] = None) -> GSSummary:
+    """把 .gssummary 文本解析为 :class:`GSSummary`（不做缓存）。"""
+    config_file = None
+    section = None
+    columns: tuple[str, ...] = ()
+    params: list[GSParam] = []
+
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('#'):
+            if line.startswith('# config file:'):
+                config_file = line.split(':', 1)[1].strip()
+            elif line.startswith('# free parameters'):
+                section = "free"
+            elif line.startswith('# fixed parameters'):
+                section = "fixed"
+            elif line.startswith('#########################################'):
+                section = None
+            elif 'pname' in line and not columns:
+                columns = tuple(line.lstrip('#').split())
+            continue
+
+        parts = line.split()
+        if len(parts) < 2:
+            continue
+        if parts[0] == 'pname':
+            columns = columns or tuple(parts)
+            continue
+        errors = tuple(v for v in (_to_float(x) for x in parts[2:]) if v is not None)
+        params.append(GSParam(name=parts[0], raw=parts[1], value=_to_float(parts[1]),
+                              errors=errors, section=section))
+
+    reduced_chisq = bic = None
+    m = _REDUCED_CHISQ_RE.search(text)
+    if m:
+        reduced_chisq = _to_float(m.group(1))
+    m = _BIC_RE.search(text)
+    if m:
+        bic = _to_float(m.group(1))
+    per_band_chisq: dict[str, float] = {}
+    for m in _BAND_CHISQ_RE.finditer(text):
+        value = _to_float(m.group(2))
+        if value is not None:
+            per_band_chisq[m.group(1).strip()] = value
+
+    values = {p.name: p.value for p in params if p.value is not None}
+    return GSSummary(
+        path=os.path.abspath(path) if path else None,
+        config_file=config_file,
+        reduced_chisq=reduced_chisq,
+        bic=bic,
+        per_band_chisq=per_band_chisq,
+        params=tuple(params),
+        columns=columns,
+        values=values,
+    )
+
+
+_CACHE_LOCK = threading.Lock()
+_SUMMARY_CACHE: "OrderedDict[str, tuple[tuple[int, int], GSSummary]]" = OrderedDict()
+
+
+def load_gssummary(path: str) -> GSSummary:
+    """解析 ``path`` 一次；mtime/size 不变时后续调用直接返回缓存对象。"""
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _CACHE_LOCK:
+        hit = _SUMMARY_CACHE.get(path)
+        if hit is not None and hit[0] == stamp:
+            _SUMMARY_CACHE.move_to_end(path)
+            return hit[1]
+
+    with open(path, encoding="utf-8", errors="replace") as f:
+        summary = parse_gssummary_text(f.read(), path)
+    with _CACHE_LOCK:
+        _SUMMARY_CACHE[path] = (stamp, summary)
+        _SUMMARY_CACHE.move_to_end(path)
+        while len(_SUMMARY_CACHE) > GSSUMMARY_CACHE_SIZE:
+            _SUMMARY_CACHE.popitem(last=False)
+    return summary
+
+
+def clear_gssummary_cache() -> None:
+    with _CACHE_LOCK:
+        _SUMMARY_CACHE.clear()
+
+
+def summary_stats(path: Optional[str]) -> dict[str, Any]:
+    """``run_galfits`` 返回值使用的统计字典（文件不存在时为空 dict）。"""
+    if not path or not os.path.exists(path):
+        return {}
+    summary = load_gssummary(path)
+    return {
+        "reduced_chisq": summary.reduced_chisq,
+        "bic": summary.bic,
+        "per_band_chisq": dict(summary.per_band_chisq),
+        "parameters": dict(summary.values),
+    }
@@ -0,0 +1,274 @@
+"""lyric_document — GalfitS ``.lyric`` 配置的共享文档模型（按 path+mtime+size 记忆）。
+
+``parse_lyric``、``modify_lyric``/``check_lyric_file``、``galfits_fitting`` 与
+``GalfitsFileManager`` 过去各自逐行重新切分同一份 lyric。``load_lyric`` 只切分一次，
+得到 :class:`LyricDocument`：
+
+- 每一行保留原文（注释、空行、缩进、换行符），``to_text()`` 无损还原；
+- 键行分解为 family / label / index（``Ia14`` -> ``('I', 'a', 14)``），值按
+  ``ast.literal_eval`` 惰性解析，失败时回退为原始字符串（与 galfits
+  ``parse_config_file`` 一致）；
+- 按段（R/I/S/A/N/P/G/F）与组件 label 的查询：``get`` / ``raw`` / ``labels`` / ``block``；
+- 就地编辑 ``set`` / ``delete``：只替换值本身，行前缀与行内注释原样保留，``save`` 原子写回。
+
+本模块只依赖标准库，``check_lyric_file`` 等轻量校验不会因此引入 astropy/jax。
+缓存中的文档是共享只读的，编辑前先 ``copy()``（行对象不可变，复制只是浅拷贝列表）。
+"""
+
+import ast
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Iterator, Optional
+
+from .atomic_io import match_target_mode
+
+LYRIC_CACHE_SIZE = 128
+
+_KEY_DECOMP_RE = re.compile(r'^([A-Z])([A-Za-z]*)(\d+)$')
+_UNSET = object()
+
+
+class LyricLine:
+    """One physical line of a lyric file.
+
+    ``key`` is the text before ``)`` (e.g. ``"Ia1"``) for key/value lines, ``None``
+    for blank/comment-only lines. ``family``/``label``/``index`` are ``None`` when
+    the key is malformed. ``has_separator`` is False for non-blank lines missing ``)``.
+    """
+
+    __slots__ = ("raw", "key", "family", "label", "index",
+                 "value_str", "has_separator", "_span", "_value")
+
+    def __init__(self, raw: str):
+        self.raw = raw
+        self.key = self.family = self.label = self.index = None
+        self.value_str = ""
+        self.has_separator = True
+        self._span = None
+        self._value = _UNSET
+
+        body = raw.rstrip("\r\n")
+        # mirror galfits.gsutils.parse_config_file: drop inline comment + strip
+        code = body.split('#', 1)[0]
+        stripped = code.strip()
+        if not stripped:
+            return
+        if ')' not in stripped:
+            self.has_separator = False
+            return
+
+        close = code.index(')')
+        self.key = code[:close].strip()
+        rest = code[close + 1:]
+        start = close + 1 + (len(rest) - len(rest.lstrip()))
+        self.value_str = rest.strip()
+        self._span = (start, start + len(self.value_str))
+
+        m = _KEY_DECOMP_RE.match(self.key)
+        if m:
+            self.family, self.label, self.index = m.group(1), m.group(2), int(m.group(3))
+
+    @property
+    def is_blank(self) -> bool:
+        return self.key is None and self.has_separator
+
+    @property
+    def value(self) -> Any:
+        """Literal value (``ast.literal_eval``), falling back to the raw string."""
+        if self._value is _UNSET:
+            try:
+                self._value = ast.literal_eval(self.value_str)
+            except (ValueError, SyntaxError):
+                self._value = self.value_str
+        return self._value
+
+    def with_value(self, value_str: str) -> "LyricLine":
+        """New line with the value replaced; key prefix and inline comment are kept."""
+        body = self.raw.rstrip("\r\n")
+        newline = self.raw[len(body):]
+        start, end = self._span
+        prefix = body[:start]
+        if not prefix[-1:].isspace():
+            prefix += " "
+        return LyricLine(prefix + value_str + body[end:] + newline)
+
+    def __repr__(self) -> str:
+        return f"LyricLine({self.raw.rstrip()!r})"
+
+
+def _format_value(value: Any) -> str:
+    return value if isinstance(value, str) else str(value)
+
+
+def _norm_key(key: str) -> str:
+    return key[:-1] if key.endswith(')') else key
+
+
+class LyricDocument:
+    """Parsed lyric file; ``to_text()`` reproduces the source byte-for-byte until edited."""
+
+    def __init__(self, lines: list[LyricLine], path: Optional[str] = None, read_only: bool = False):
+        self.path = path
+        self.lines = lines
+        self._read_only = read_only
+
+    # ---- 查询 ----
+    def entries(self) -> Iterator[LyricLine]:
+        """Key/value lines in file order (including malformed keys)."""
+        return (ln for ln in self.lines if ln.key is not None)
+
+    def find(self, key: str) -> Optional[LyricLine]:
+        """Last line carrying ``key`` (``"Ia1"`` or ``"Ia1)"``); later duplicates win, as in galfits."""
+        key = _norm_key(key)
+        for ln in reversed(self.lines):
+            if ln.key == key:
+                return ln
+        return None
+
+    def __contains__(self, key: str) -> bool:
+        return self.find(key) is not None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        ln = self.find(key)
+        return ln.value if ln is not None else default
+
+    def raw(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        ln = self.find(key)
+        return ln.value_str if ln is not None else default
+
+    def labels(self, family: str) -> list[str]:
+        """Component labels of a repeatable section in order of first appearance."""
+        seen: list[str] = []
+        for ln in self.entries():
+            if ln.family == family and ln.label and ln.label not in seen:
+                seen.append(ln.label)
+        return seen
+
+    def block(self, family: str, label: str = "") -> dict[int, LyricLine]:
+        """``{index: line}`` for one section block (``block('R')``, ``block('P', 'b')``)."""
+        return {ln.index: ln for ln in self.entries()
+                if ln.family == family and ln.label == label}
+
+    def label_of(self, family: str, name: str) -> Optional[str]:
+        """Label whose ``{family}{label}1)`` name is ``name`` (e.g. profile name -> ``'b'``)."""
+        for ln in self.entries():
+            if ln.family == family and ln.index == 1 and ln.label:
+                tokens = ln.value_str.split()
+                if tokens and tokens[0] == name:
+                    return ln.label
+        return None
+
+    # ---- 编辑 ----
+    def _check_writable(self) -> None:
+        if self._read_only:
+            raise RuntimeError("cached LyricDocument is shared and read-only; call copy() before editing")
+
+    def copy(self) -> "LyricDocument":
+        return LyricDocument(list(self.lines), path=self.path)
+
+    def set(self, key: str, value: Any) -> None:
+        """Replace the value of every ``key`` line in place, or insert a new line.
+
+        ``value`` is written verbatim when it is a string, else as ``str(value)``.
+        New keys go after the last line of the same block (then the same family,
+        then the end of the file).
+        """
+        self._check_writable()
+        key = _norm_key(key)
+        text = _format_value(value)
+        hits = [i for i, ln in enumerate(self.lines) if ln.key == key]
+        if hits:
+            for i in hits:
+                self.lines[i] = self.lines[i].with_value(text)
+            return
+
+        new = LyricLine(f"{key}) {text}\n")
+        block_pos = family_pos = None
+        for i, ln in enumerate(self.lines):
+            if ln.family is not None and ln.family == new.family:
+                family_pos = i
+                if ln.label == new.label:
+                    block_pos = i
+        pos = block_pos if block_pos is not None else family_pos
+        if pos is None:
+            pos = len(self.lines) - 1
+        if pos >= 0 and not self.lines[pos].raw.endswith("\n"):
+            self.lines[pos] = LyricLine(self.lines[pos].raw + "\n")
+        self.lines.insert(pos + 1, new)
+
+    def delete(self, key: str) -> int:
+        """Remove every ``key`` line; returns the number removed."""
+        self._check_writable()
+        key = _norm_key(key)
+        before = len(self.lines)
+        self.lines = [ln for ln in self.lines if ln.key != key]
+        return before - len(self.lines)
+
+    # ---- 序列化 ----
+    def to_text(self) -> str:
+        return "".join(ln.raw for ln in self.lines)
+
+    def save(self, path: Optional[str] = None) -> str:
+        """Atomically write ``to_text()`` to ``path`` (default: the source path), keeping its permissions."""
+        path = path or self.path
+        if not path:
+            raise ValueError("LyricDocument has no path; pass one to save()")
+        dirname = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=dirname, prefix=".lyric_", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+                f.write(self.to_text())
+            match_target_mode(tmp, path)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        return path
+
+
+def parse_lyric_text(text: str, path: Optional[str] = None) -> LyricDocument:
+    """Tokenize lyric ``text`` into a (writable) :class:`LyricDocument` without caching."""
+    lines = [LyricLine(raw) for raw in text.splitlines(keepends=True)]
+    return LyricDocument(lines, path=os.path.abspath(path) if path else None)
+
+
+_CACHE_LOCK = threading.Lock()
+_LYRIC_CACHE: "OrderedDict[str, tuple[tuple[int, int], LyricDocument]]" = OrderedDict()
+
+
+def load_lyric(path: str) -> LyricDocument:
+    """解析 ``path`` 一次；mtime/size 不变时返回同一个只读文档。"""
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _CACHE_LOCK:
+        hit = _LYRIC_CACHE.get(path)
+        if hit is not None and hit[0] == stamp:
+            _LYRIC_CACHE.move_to_end(path)
+            return hit[1]
+
+    with open(path, encoding="utf-8", newline="") as f:
+        doc = parse_lyric_text(f.read(), path)
+    doc._read_only = True
+    with _CACHE_LOCK:
+        _LYRIC_CACHE[path] = (stamp, doc)
+        _LYRIC_CACHE.move_to_end(path)
+        while len(_LYRIC_CACHE) > LYRIC_CACHE_SIZE:
+            _LYRIC_CACHE.popitem(last=False)
+    return doc
+
+
+def load_lyric_or_text(path_or_text: str) -> LyricDocument:
+    """``load_lyric`` for existing files, otherwise treat the argument as lyric text."""
+    if os.path.isfile(path_or_text):
+        return load_lyric(path_or_text)
+    return parse_lyric_text(path_or_text)
+
+
+def clear_lyric_cache() -> None:
+    with _CACHE_LOCK:
+        _LYRIC_CACHE.clear()
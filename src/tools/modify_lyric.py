@@ -1,10 +1,10 @@
-import ast
 import os
 import re
 
 from typing import Annotated
 
 from tools.analyze_image import create_vlm_client
+from tools.lyric_document import LyricLine, load_lyric, parse_lyric_text
 
 
 TUPLE_SPECIFICATION = """
@@ -168,16 +168,13 @@ Ga6) []                             # Narrow emission lines
 Ga7) 1                              # Number of narrow line components
 """
 
-TASK = """
-### The original configuration (filename: {original_lyric_file})
-```
-{original_configuration}
-```
+# Static instructions and hints go into the system message, byte-identical across
+# calls, so providers can serve them from their prefix cache; the per-call
+# configuration and instruction come last, in the user message.
+SYSTEM_CONTEXT = """
+You modify GalfitS .lyric configuration files according to an instruction.
 
-### Instructions 
-#### How to modify
-{instruction}
-#### How to output
+### How to output
 The new content should be wrapped as follows, to ensure it can be directly saved as a .lyric file. Only provide the new content without any additional explanation or text.:
 ```lyric
 <new content>
@@ -189,6 +186,17 @@ The new content should be wrapped as follows, to ensure it can be directly saved
 
 #### 5-tuple parameter specification
 {tuple_specification}
+""".format(lyric_template=LYRIC_TEMPLATE, tuple_specification=TUPLE_SPECIFICATION)
+
+TASK = """
+### The original configuration (filename: {original_lyric_file})
+```
+{original_configuration}
+```
+
+### Instructions 
+#### How to modify
+{instruction}
 """
 
 def modify_lyric(
@@ -215,8 +223,8 @@ def modify_lyric(
         }
 
     try :
-        with open(original_lyric_file) as f:
-            original_config = f.read()    
+        original_doc = load_lyric(original_lyric_file)
+        original_config = original_doc.to_text()
     except Exception as e:
         return {
             "status": "failure",
@@ -227,11 +235,13 @@ def modify_lyric(
         original_lyric_file=original_lyric_file,
         original_configuration=original_config,
         instruction=instruction,
-        lyric_template=LYRIC_TEMPLATE,
-        tuple_specification=TUPLE_SPECIFICATION,
     )    
 
     messages = [ 
+        {
+            "role": "system",
+            "content": SYSTEM_CONTEXT,
+        },
         {
             "role": "user", 
             "content": task,
@@ -243,6 +253,11 @@ def modify_lyric(
         max_tokens=10240    
     )
 
+    usage = result.get("usage") if isinstance(result, dict) else None
+    if usage:
+        print(f"[modify_lyric] prompt tokens {usage.get('prompt_tokens')} "
+              f"(prefix-cached {usage.get('cached_tokens', 0)}), completion {usage.get('completion_tokens')}")
+
     if isinstance(result, dict) and "content" in result:
         # extract content between ```lyric and ``` by regex
         content = result["content"]
@@ -254,21 +269,16 @@ def modify_lyric(
             # image paths, band, sigma, psf, mask, magzp, sky, shift, use-SED)
             # and must not drift between iterations -- a previous run silently
             # rewrote I*14 shift values, breaking the band alignment.
-            locked_re = re.compile(r'^(R\d+|I[A-Za-z]\d+)\)\s*.*$', re.MULTILINE)
-            orig_lines = {}
-            for m in locked_re.finditer(original_config):
-                key = re.match(r'(R\d+|I[A-Za-z]\d+)\)', m.group(0)).group(1)
-                orig_lines[key] = m.group(0)
-
-            def _restore_locked(m):
-                key = re.match(r'(R\d+|I[A-Za-z]\d+)\)', m.group(0)).group(1)
-                return orig_lines.get(key, m.group(0))
-
-            if orig_lines:
-                new_content = locked_re.sub(_restore_locked, new_content)
+            new_doc = parse_lyric_text(new_content, new_lyric_file)
+            for i, ln in enumerate(new_doc.lines):
+                if ln.family not in ('R', 'I'):
+                    continue
+                orig = original_doc.find(ln.key)
+                if orig is not None:
+                    newline = ln.raw[len(ln.raw.rstrip("\r\n")):]
+                    new_doc.lines[i] = LyricLine(orig.raw.rstrip("\r\n") + newline)
             try:
-                with open(new_lyric_file, 'w') as f:
-                    f.write(new_content)
+                new_doc.save(new_lyric_file)
 
                 return {"status": "success", "message": f"New lyric file saved to {new_lyric_file}"}    
             except Exception as e:
@@ -394,8 +404,7 @@ def check_lyric_file(lyric_file: Annotated[str, "path to the lyric file"]) -> di
                 "message": f"{lyric_file} is an invalid lyric file. Error: file does not exist"}
 
     try:
-        with open(lyric_file, 'r') as f:
-            lines = f.readlines()
+        doc = load_lyric(lyric_file)
     except OSError as e:
         return {"status": "failure",
                 "message": f"{lyric_file} is an invalid lyric file. Error: cannot read file ({e})"}
@@ -405,43 +414,30 @@ def check_lyric_file(lyric_file: Annotated[str, "path to the lyric file"]) -> di
     key_lines = {}
     errors = []
     sections = {}
-    # decompose key into family (one uppercase letter), label letters, index.
-    # e.g. 'R1' -> ('R', '', 1), 'Ia15' -> ('I', 'a', 15), 'Pc14' -> ('P', 'c', 14)
-    key_decomp_re = re.compile(r'^([A-Z])([A-Za-z]*)(\d+)$')
     # for each labelled family, the label of the component whose block is
     # currently "open" (i.e. the most recent {family}{label}1 declaration)
     current_label = {}
 
-    for lineno, raw in enumerate(lines, start=1):
-        # mirror galfits.gsutils.parse_config_file: drop inline comment + strip
-        line = raw.split('#', 1)[0].strip()
-        if not line:
+    # lines are tokenized once by the shared LyricDocument: key decomposed into
+    # family (one uppercase letter), label letters, index -- e.g. 'Ia15' ->
+    # ('I', 'a', 15) -- and values literal-evaluated with a raw-string fallback,
+    # mirroring galfits.gsutils.parse_config_file.
+    for lineno, ln in enumerate(doc.lines, start=1):
+        if ln.is_blank:
             continue
 
-        if ')' not in line:
-            errors.append(f"Line {lineno}: missing ')' separator: {raw.strip()!r}")
+        if not ln.has_separator:
+            errors.append(f"Line {lineno}: missing ')' separator: {ln.raw.strip()!r}")
             continue
 
-        key_part, _, value_part = line.partition(')')
-        key_part = key_part.strip()
-        value_str = value_part.strip()
-
-        dm = key_decomp_re.match(key_part)
-        if not dm:
-            errors.append(f"Line {lineno}: malformed key {key_part!r}")
+        if ln.family is None:
+            errors.append(f"Line {lineno}: malformed key {ln.key!r}")
             continue
 
-        family, label, index = dm.group(1), dm.group(2), int(dm.group(3))
-
-        # mirror parse_config_file: try literal eval, fall back to raw string.
-        # ast.literal_eval is used instead of eval for safety; the lyric format
-        # only ever contains literals so behaviour is equivalent.
-        try:
-            value = ast.literal_eval(value_str)
-        except (ValueError, SyntaxError):
-            value = value_str
+        family, label, index = ln.family, ln.label, ln.index
+        value = ln.value
 
-        key = key_part + ')'
+        key = ln.key + ')'
         key_counts[key] = key_counts.get(key, 0) + 1
         config_data[key] = value
         key_lines[key] = lineno
@@ -4,6 +4,19 @@ OpenAI SDK analysis backend with multi-turn conversation support.
 Uses the OpenAI chat completions API (compatible with Gemini and other
 models via base_url). Sends focused prompts sequentially, maintaining
 conversation history across turns.
+
+The client comes from the process-wide ``llms.client_pool`` (one keep-alive
+``AsyncOpenAI`` per base_url/key/model, bounded by ``LLM_MAX_CONCURRENCY``);
+all turns run on the pool's shared event loop. Every turn first consults the
+content-addressed ``llms.response_cache`` (image bytes + prompt + model +
+sampling parameters), so replays of an identical analysis cost nothing.
+
+Message layout favours provider-side prefix caching: the system prompt and the
+static turn-1 instruction text come first, the per-call images (references,
+then the target) last, so successive analyses share a byte-identical prefix.
+``VLM_STATIC_PREFIX=0`` restores the legacy image-first turn-1 layout.
+Cached prompt tokens (``usage.prompt_tokens_details.cached_tokens``) are
+reported per turn.
 """
 
 import os
@@ -11,9 +24,16 @@ import time
 import base64
 import asyncio
 import uuid
-from typing import Optional
+from typing import Callable, Optional, Union
 import dotenv
 
+try:
+    from ..llms import response_cache
+    from ..llms.client_pool import get_openai_client, run_on_llm_loop
+except ImportError:
+    from llms import response_cache
+    from llms.client_pool import get_openai_client, run_on_llm_loop
+
 dotenv.load_dotenv()
 
 API_TIMEOUT = 600  # 10 minutes total
@@ -28,18 +48,12 @@ def _get_config() -> tuple[str, str, Optional[str]]:
 
 
 def _run_async(coro):
-    """Run an async coroutine safely from a potentially async MCP server context."""
-    try:
-        loop = asyncio.get_running_loop()
-    except RuntimeError:
-        loop = None
+    """Run an async coroutine on the shared LLM loop (safe from a running MCP server loop)."""
+    return run_on_llm_loop(coro)
+
 
-    if loop and loop.is_running():
-        import concurrent.futures
-        with concurrent.futures.ThreadPoolExecutor() as pool:
-            return pool.submit(asyncio.run, coro).result()
-    else:
-        return asyncio.run(coro)
+def _static_prefix() -> bool:
+    return os.environ.get("VLM_STATIC_PREFIX", "1") == "1"
 
 
 def _image_content_block(image_path: str) -> dict:
@@ -53,27 +67,29 @@ def _image_content_block(image_path: str) -> dict:
 
 
 def _build_image_message(text: str, image_path: str) -> dict:
-    """Build a user message with inline image + text (OpenAI vision format)."""
-    return {
-        "role": "user",
-        "content": [
-            _image_content_block(image_path),
-            {"type": "text", "text": text},
-        ],
-    }
+    """Build a user message with inline image + text (OpenAI vision format).
+
+    Text (static instructions) first, image last unless ``VLM_STATIC_PREFIX=0``.
+    """
+    content = [{"type": "text", "text": text}, _image_content_block(image_path)]
+    if not _static_prefix():
+        content.reverse()
+    return {"role": "user", "content": content}
 
 
 def _build_interleaved_image_message(text: str, image_path: str,
                                      reference_blocks: list[dict] | None = None,
                                      reference_intro: str | None = None) -> dict:
-    """Turn-1 message: optional reference Few-shot images + captions, then the
-    target image, then the prompt text — linearly interleaved (one image per
-    feature), matching the visual-RAG design doc.
+    """Turn-1 message: the prompt text, then optional reference Few-shot images
+    + captions, then the target image — linearly interleaved (one image per
+    feature), matching the visual-RAG design doc. The static prompt text leads
+    so it extends the cacheable prefix; ``VLM_STATIC_PREFIX=0`` puts it last.
 
     Each reference block is ``{"image": <path>, "caption": <str>}``. With no
     reference blocks this is identical to :func:`_build_image_message`.
     """
-    content: list[dict] = []
+    static_first = _static_prefix()
+    content: list[dict] = [{"type": "text", "text": text}] if static_first else []
     if reference_blocks:
         if reference_intro:
             content.append({"type": "text", "text": reference_intro})
@@ -83,7 +99,8 @@ def _build_interleaved_image_message(text: str, image_path: str,
             if cap:
                 content.append({"type": "text", "text": cap})
     content.append(_image_content_block(image_path))
-    content.append({"type": "text", "text": text})
+    if not static_first:
+        content.append({"type": "text", "text": text})
     return {"role": "user", "content": content}
 
 
@@ -93,12 +110,15 @@ class _UsageAccumulator:
     def __init__(self):
         self.prompt_tokens = 0
         self.completion_tokens = 0
+        self.cached_tokens = 0      # prompt tokens served from the provider's prefix cache
         self.turns = 0
+        self.cached_turns = 0       # turns served from the local response cache
 
     def add(self, response):
         if response.usage:
             self.prompt_tokens += response.usage.prompt_tokens or 0
             self.completion_tokens += response.usage.completion_tokens or 0
+            self.cached_tokens += response_cache.cached_prompt_tokens(response)
             self.turns += 1
 
     @property
@@ -106,25 +126,32 @@ class _UsageAccumulator:
         return self.prompt_tokens + self.completion_tokens
 
     def summary(self) -> str:
-        if self.turns == 0:
+        if self.turns == 0 and self.cached_turns == 0:
             return ""
-        return f"[Token usage] prompts={self.prompt_tokens}, completions={self.completion_tokens}, total={self.total_tokens} ({self.turns} turns)"
-
+        cached = f", {self.cached_turns} cached" if self.cached_turns else ""
+        return (f"[Token usage] prompts={self.prompt_tokens} (prefix-cached {self.cached_tokens}), "
+                f"completions={self.completion_tokens}, total={self.total_tokens} ({self.turns} turns{cached})")
+
+
+async def _call_with_retry(client, model: str, messages: list[dict], usage: _UsageAccumulator,
+                           max_retries: int = 3, use_cache: bool = True,
+                           base_url: Optional[str] = None) -> str:
+    """Call chat completions (response cache first) with retry on transient failures."""
+    sampling = {"max_tokens": 16384, "temperature": 0.3}
+    key = response_cache.request_key(model, messages, provider="openai", base_url=base_url, **sampling)
+    hit = response_cache.lookup(key, use_cache)
+    if hit is not None:
+        usage.cached_turns += 1
+        return hit["content"]
 
-async def _call_with_retry(client, model: str, messages: list[dict], usage: _UsageAccumulator, max_retries: int = 3) -> str:
-    """Call chat completions with retry on transient failures."""
     last_error = None
     for attempt in range(1, max_retries + 1):
         try:
-            response = await asyncio.to_thread(
-                client.chat.completions.create,
-                model=model,
-                messages=messages,
-                max_tokens=16384,
-                temperature=0.3,
-            )
+            response = await client.acreate(model=model, messages=messages, **sampling)
             usage.add(response)
-            return response.choices[0].message.content
+            content = response.choices[0].message.content
+            response_cache.store(key, content, response_cache.usage_dict(response), model)
+            return content
         except Exception as e:
             last_error = e
             if attempt < max_retries:
@@ -134,13 +161,17 @@ async def _call_with_retry(client, model: str, messages: list[dict], usage: _Usa
     raise last_error
 
 
+PromptSpec = Union[str, Callable[[], str]]
+
+
 async def _query(
     system_prompt: str,
-    analysis_prompts: list[str],
+    analysis_prompts: list[PromptSpec],
     image_path: str,
     deferred_system: bool = False,
     reference_blocks: list[dict] | None = None,
     reference_intro: str | None = None,
+    use_cache: bool = True,
 ) -> tuple[str, list[dict]]:
     """Run analysis via OpenAI SDK — single or multi-turn depending on prompt count.
 
@@ -153,22 +184,21 @@ async def _query(
         reference_blocks: optional Few-shot reference images + captions prepended
             to the turn-1 message (target image stays last). None = legacy
             single-image turn-1.
-    """
-    from openai import OpenAI
+        use_cache: False skips the response cache lookup for every turn.
 
+    A prompt given as a callable is resolved (in a worker thread, so it may block
+    on other work running on this loop) only when its turn starts.
+    """
     api_key, model, base_url = _get_config()
-
-    client_kwargs: dict = {"api_key": api_key, "timeout": 360.0}
-    if base_url:
-        client_kwargs["base_url"] = base_url
-
-    client = OpenAI(**client_kwargs)
+    client = get_openai_client(api_key, base_url, model)
 
     text_parts: list[str] = []
     usage = _UsageAccumulator()
     turn_records: list[dict] = []
     messages: list[dict] = []
     for i, prompt_text in enumerate(analysis_prompts):
+        if callable(prompt_text):
+            prompt_text = await asyncio.to_thread(prompt_text)
         if not deferred_system:
             # Mode 1: system_prompt always present, full history accumulates
             if i == 0:
@@ -194,9 +224,11 @@ async def _query(
                     messages.append({"role": "assistant", "content": prev})
                 messages.append({"role": "user", "content": prompt_text})
 
-        pre_p, pre_c = usage.prompt_tokens, usage.completion_tokens
+        pre_p, pre_c, pre_k = usage.prompt_tokens, usage.completion_tokens, usage.cached_tokens
+        pre_cached = usage.cached_turns
         turn_start = time.perf_counter()
-        assistant_text = await _call_with_retry(client, model, messages, usage)
+        assistant_text = await _call_with_retry(client, model, messages, usage, use_cache=use_cache,
+                                                base_url=base_url)
         turn_dur = time.perf_counter() - turn_start
 
         inc_p = usage.prompt_tokens - pre_p
@@ -207,7 +239,9 @@ async def _query(
             "duration_s": round(turn_dur, 1),
             "prompt_tokens": inc_p,
             "completion_tokens": inc_c,
+            "cached_tokens": usage.cached_tokens - pre_k,
             "tok_per_s": round(tok_per_s, 0),
+            "cached": usage.cached_turns > pre_cached,
         })
 
         if not assistant_text:
@@ -218,7 +252,7 @@ async def _query(
             messages.append({"role": "assistant", "content": assistant_text})
         print(
             f"Turn {i+1} completed in {turn_dur:.1f}s "
-            f"(prompt+{inc_p}, completion+{inc_c}, "
+            f"(prompt+{inc_p} [cached {usage.cached_tokens - pre_k}], completion+{inc_c}, "
             f"{tok_per_s:.0f} tok/s). {usage.summary()}"
         )
     print(f"Analysis completed. Total {usage.summary()}")
@@ -227,11 +261,12 @@ async def _query(
 
 def run_openai_analysis(
     system_prompt: str,
-    analysis_prompts: list[str],
+    analysis_prompts: list[PromptSpec],
     image_path: str,
     deferred_system: bool = False,
     reference_blocks: Optional[list[dict]] = None,
     reference_intro: Optional[str] = None,
+    use_cache: bool = True,
 ) -> tuple[Optional[str], Optional[str], Optional[str], Optional[dict]]:
     """
     Run component analysis using the OpenAI SDK.
@@ -243,6 +278,9 @@ def run_openai_analysis(
     Args:
         system_prompt: System message (residual analysis expert + component spec).
         analysis_prompts: Ordered list of user prompts (1 = single-turn, >1 = multi-turn).
+            An item may be a zero-argument callable returning the prompt; it is
+            called when that turn starts, so earlier turns can run while it waits
+            on independent work (e.g. the best-round comparison).
         image_path: Path to the combined residual image file (the analysis target).
         deferred_system: If True, turn 1 runs without system_prompt; system_prompt
             is injected from turn 2 onward along with prior turn results.
@@ -250,12 +288,13 @@ def run_openai_analysis(
             to the turn-1 message (each is {"image": path, "caption": str}). The
             target image remains the last image. None keeps the legacy single-image turn.
         reference_intro: Optional explanatory text placed before the reference images.
+        use_cache: If False, bypass the response cache lookup (fresh responses are still stored).
 
     Returns:
         (analysis_text, session_id, error_message)
     """
     try:
-        from openai import OpenAI  # noqa: F401
+        from openai import AsyncOpenAI  # noqa: F401
     except ImportError:
         return None, None, "openai is not installed. Install with: pip install openai", None
 
@@ -272,13 +311,17 @@ def run_openai_analysis(
         coro = _query(system_prompt, analysis_prompts, image_path,
                       deferred_system=deferred_system,
                       reference_blocks=reference_blocks,
-                      reference_intro=reference_intro)
+                      reference_intro=reference_intro,
+                      use_cache=use_cache)
         wrapped = asyncio.wait_for(coro, timeout=API_TIMEOUT)
         wall_start = time.perf_counter()
         analysis, turn_records = _run_async(wrapped)
         wall_time = round(time.perf_counter() - wall_start, 1)
         print(f"[Timing] analyze wall time {wall_time}s")
-        timing = {"wall_time_s": wall_time, "turns": turn_records}
+        timing = {"wall_time_s": wall_time, "turns": turn_records,
+                  "cached_turns": sum(1 for t in turn_records if t["cached"]),
+                  "prompt_tokens": sum(t["prompt_tokens"] for t in turn_records),
+                  "cached_prompt_tokens": sum(t["cached_tokens"] for t in turn_records)}
 
         if not analysis or not analysis.strip():
             return None, session_id, "OpenAI API returned empty analysis", timing
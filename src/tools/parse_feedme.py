@@ -1,19 +1,78 @@
-"""Shared GALFIT feedme configuration parser."""
+"""Shared GALFIT feedme configuration parser.
 
+``load_feedme`` parses a feedme / ``galfit.NN`` parameter file once into a
+:class:`FeedmeDocument` (header keys A)–P), resolved paths, fitting region,
+components and J)/K) photometry) and memoizes it on path+mtime+size. A single
+``run_galfit`` call used to re-read the same file in ``parse_feedme``,
+``parse_components``, ``sb_profile.parse_photometry_params`` and the summary
+writer; they now all consume the cached document. ``to_text`` serializes the
+document back to feedme text (optionally with header values replaced).
+"""
+
+import copy
 import os
 import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from typing import Any
 
+DEFAULT_ZEROPOINT = 21.097
+DEFAULT_PLTSCALE = 0.750
+FEEDME_CACHE_SIZE = 128
 
-def parse_feedme(config_file: str) -> dict[str, Any]:
-    """Parse a GALFIT feedme file to extract file paths and fitting region.
+_PATH_PATTERNS = {
+    "input": r"^A\)\s*(.+?)\s*#",
+    "output": r"^B\)\s*(.+?)\s*#",
+    "sigma": r"^C\)\s*(.+?)\s*#",
+    "psf": r"^D\)\s*(.+?)\s*#",
+    "mask": r"^F\)\s*(.+?)\s*#",
+    "constraint": r"^G\)\s*(.+?)\s*#",
+}
+_FIT_REGION_RE = re.compile(r"^H\)\s*(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s*#", re.MULTILINE)
+_HEADER_LINE_RE = re.compile(r"^([A-Z])\)\s*(.*?)\s*(#.*)?$")
+_COMP_START_RE = re.compile(r"^0\)\s+(\w+)")
 
-    Resolves relative paths to absolute paths based on the feedme file location.
 
-    Returns dict with keys:
-        input, output, sigma, psf, mask, constraint (str or ""),
-        fit_region (tuple of (xmin, xmax, ymin, ymax) 1-indexed, or None).
+@dataclass(frozen=True)
+class FeedmeDocument:
+    """One parsed GALFIT parameter file (feedme or ``galfit.NN``).
+
+    Instances are shared through the ``load_feedme`` cache and must be treated as
+    read-only; the module-level helpers hand out copies of the mutable fields.
     """
+
+    path: str
+    text: str
+    header: dict[str, str]              # "A".."P" -> raw value (comment stripped)
+    paths: dict[str, Any]               # parse_feedme() result
+    components: list[dict[str, Any]]    # parse_components() result (non-sky)
+    zeropoint: float = DEFAULT_ZEROPOINT
+    pltscale: float = DEFAULT_PLTSCALE
+    _header_lines: dict[str, int] = field(default_factory=dict, repr=False, compare=False)
+
+    def to_text(self, header_overrides: dict[str, Any] | None = None) -> str:
+        """Serialize back to feedme text; ``header_overrides`` replaces A)–P) values in place.
+
+        Unchanged lines (comments, component blocks, spacing) are emitted verbatim.
+        """
+        if not header_overrides:
+            return self.text
+        lines = self.text.splitlines(keepends=True)
+        for key, value in header_overrides.items():
+            idx = self._header_lines.get(key)
+            if idx is None:
+                raise KeyError(f"Header key {key}) not present in {self.path}")
+            line = lines[idx]
+            newline = line[len(line.rstrip("\r\n")):]
+            m = _HEADER_LINE_RE.match(line.rstrip("\r\n"))
+            comment = m.group(3) if m and m.group(3) else ""
+            body = f"{key}) {value}"
+            lines[idx] = (f"{body:<24}{comment}" if comment else body) + newline
+        return "".join(lines)
+
+
+def _parse_paths(content: str, config_file: str) -> dict[str, Any]:
     paths: dict[str, Any] = {
         "input": "",
         "output": "",
@@ -23,21 +82,7 @@ def parse_feedme(config_file: str) -> dict[str, Any]:
         "constraint": "",
         "fit_region": None,
     }
-
-    config_file = os.path.abspath(config_file)
-    with open(config_file) as f:
-        content = f.read()
-
-    patterns = {
-        "input": r"^A\)\s*(.+?)\s*#",
-        "output": r"^B\)\s*(.+?)\s*#",
-        "sigma": r"^C\)\s*(.+?)\s*#",
-        "psf": r"^D\)\s*(.+?)\s*#",
-        "mask": r"^F\)\s*(.+?)\s*#",
-        "constraint": r"^G\)\s*(.+?)\s*#",
-    }
-
-    for key, pattern in patterns.items():
+    for key, pattern in _PATH_PATTERNS.items():
         match = re.search(pattern, content, re.MULTILINE)
         if match:
             value = match.group(1).strip()
@@ -48,20 +93,170 @@ def parse_feedme(config_file: str) -> dict[str, Any]:
                 paths[key] = value
 
     # Parse fitting region H) xmin xmax ymin ymax (1-indexed)
-    match_h = re.search(
-        r"^H\)\s*(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s*#", content, re.MULTILINE
-    )
+    match_h = _FIT_REGION_RE.search(content)
     if match_h:
-        paths["fit_region"] = (
-            int(match_h.group(1)),
-            int(match_h.group(2)),
-            int(match_h.group(3)),
-            int(match_h.group(4)),
-        )
-
+        paths["fit_region"] = tuple(int(match_h.group(i)) for i in range(1, 5))
     return paths
 
 
+def _parse_components(lines: list[str]) -> list[dict[str, Any]]:
+    components: list[dict[str, Any]] = []
+    current: dict[str, Any] | None = None
+
+    for line in lines:
+        line = line.strip()
+
+        # Detect component start
+        m_type = _COMP_START_RE.match(line)
+        if m_type:
+            comp_type = m_type.group(1).lower()
+            if comp_type == 'sky':
+                current = None
+                continue
+            current = {"type": comp_type, "x": 0.0, "y": 0.0, "mag": 0.0,
+                       "re": 0.0, "n": None, "ba": 1.0, "pa": 0.0}
+            components.append(current)
+            continue
+
+        if current is None:
+            continue
+
+        # Position: 1) x y ...
+        m = re.match(r'^1\)\s+([+-]?\d+\.?\d*)\s+([+-]?\d+\.?\d*)', line)
+        if m:
+            current["x"] = float(m.group(1))
+            current["y"] = float(m.group(2))
+            continue
+
+        # Magnitude: 3) mag ...
+        m = re.match(r'^3\)\s+([+-]?\d+\.?\d*e?[+-]?\d*)', line, re.IGNORECASE)
+        if m:
+            current["mag"] = float(m.group(1))
+            # For sersic/expdisk: param 3 is mag, param 4 is Re/Rs
+            # For ferrer: param 3 is mu, param 4 is R_out
+            # For edgedisk: param 3 is mu0, param 4 is h_s, param 5 is R_s
+            continue
+
+        # Re / Rs / R_out: 4) value ...
+        m = re.match(r'^4\)\s+([+-]?\d+\.?\d*e?[+-]?\d*)', line, re.IGNORECASE)
+        if m:
+            current["re"] = float(m.group(1))
+            continue
+
+        # Sersic n / Ferrer alpha / Edgedisk R_s: 5) value ...
+        m = re.match(r'^5\)\s+([+-]?\d+\.?\d*e?[+-]?\d*)', line, re.IGNORECASE)
+        if m:
+            if current["type"] == "sersic":
+                current["n"] = float(m.group(1))
+            elif current["type"] == "edgedisk":
+                current["re"] = float(m.group(1))  # R_s for edgedisk
+            continue
+
+        # Axis ratio b/a: 9) value ...
+        m = re.match(r'^9\)\s+([+-]?\d+\.?\d*(?:e[+-]?\d+)?)', line, re.IGNORECASE)
+        if m:
+            current["ba"] = float(m.group(1))
+            continue
+
+        # Position angle: 10) value ...
+        m = re.match(r'^10\)\s+([+-]?\d+\.?\d*(?:e[+-]?\d+)?)', line, re.IGNORECASE)
+        if m:
+            current["pa"] = float(m.group(1))
+            continue
+
+    return components
+
+
+def _parse_header(lines: list[str]) -> tuple[dict[str, str], dict[str, int]]:
+    """Header keys A)–P) up to the first component block (components reuse Z))."""
+    header: dict[str, str] = {}
+    header_lines: dict[str, int] = {}
+    for idx, line in enumerate(lines):
+        s = line.strip()
+        if _COMP_START_RE.match(s):
+            break
+        m = _HEADER_LINE_RE.match(s)
+        if m and m.group(1) not in header:
+            header[m.group(1)] = m.group(2)
+            header_lines[m.group(1)] = idx
+    return header, header_lines
+
+
+def _photometry(header: dict[str, str]) -> tuple[float, float]:
+    zeropoint, pltscale = DEFAULT_ZEROPOINT, DEFAULT_PLTSCALE
+    try:
+        if header.get("J"):
+            zeropoint = float(header["J"].split()[0])
+    except ValueError:
+        pass
+    try:
+        if header.get("K"):
+            pltscale = float(header["K"].split()[0])
+    except ValueError:
+        pass
+    return zeropoint, pltscale
+
+
+def parse_feedme_text(content: str, config_file: str) -> FeedmeDocument:
+    """Build a :class:`FeedmeDocument` from feedme text (relative paths resolve against ``config_file``)."""
+    config_file = os.path.abspath(config_file)
+    lines = content.splitlines()
+    header, header_lines = _parse_header(lines)
+    zeropoint, pltscale = _photometry(header)
+    return FeedmeDocument(
+        path=config_file,
+        text=content,
+        header=header,
+        paths=_parse_paths(content, config_file),
+        components=_parse_components(lines),
+        zeropoint=zeropoint,
+        pltscale=pltscale,
+        _header_lines=header_lines,
+    )
+
+
+_CACHE_LOCK = threading.Lock()
+_FEEDME_CACHE: "OrderedDict[str, tuple[tuple[int, int], FeedmeDocument]]" = OrderedDict()
+
+
+def load_feedme(config_file: str) -> FeedmeDocument:
+    """Parse ``config_file`` once; later calls return the cached document until mtime/size change."""
+    config_file = os.path.abspath(config_file)
+    st = os.stat(config_file)
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _CACHE_LOCK:
+        hit = _FEEDME_CACHE.get(config_file)
+        if hit is not None and hit[0] == stamp:
+            _FEEDME_CACHE.move_to_end(config_file)
+            return hit[1]
+
+    with open(config_file) as f:
+        doc = parse_feedme_text(f.read(), config_file)
+    with _CACHE_LOCK:
+        _FEEDME_CACHE[config_file] = (stamp, doc)
+        _FEEDME_CACHE.move_to_end(config_file)
+        while len(_FEEDME_CACHE) > FEEDME_CACHE_SIZE:
+            _FEEDME_CACHE.popitem(last=False)
+    return doc
+
+
+def clear_feedme_cache() -> None:
+    with _CACHE_LOCK:
+        _FEEDME_CACHE.clear()
+
+
+def parse_feedme(config_file: str) -> dict[str, Any]:
+    """Parse a GALFIT feedme file to extract file paths and fitting region.
+
+    Resolves relative paths to absolute paths based on the feedme file location.
+
+    Returns dict with keys:
+        input, output, sigma, psf, mask, constraint (str or ""),
+        fit_region (tuple of (xmin, xmax, ymin, ymax) 1-indexed, or None).
+    """
+    return dict(load_feedme(config_file).paths)
+
+
 def parse_components(param_file: str) -> list[dict[str, Any]]:
     """Parse galaxy model components from a GALFIT feedme or output parameter file.
 
@@ -76,69 +271,4 @@ def parse_components(param_file: str) -> list[dict[str, Any]]:
         ba (float): axis ratio b/a
         pa (float): position angle in degrees
     """
-    components: list[dict[str, Any]] = []
-    current: dict[str, Any] | None = None
-
-    with open(param_file, 'r') as f:
-        for line in f:
-            line = line.strip()
-
-            # Detect component start
-            m_type = re.match(r'^0\)\s+(\w+)', line)
-            if m_type:
-                comp_type = m_type.group(1).lower()
-                if comp_type == 'sky':
-                    current = None
-                    continue
-                current = {"type": comp_type, "x": 0.0, "y": 0.0, "mag": 0.0,
-                           "re": 0.0, "n": None, "ba": 1.0, "pa": 0.0}
-                components.append(current)
-                continue
-
-            if current is None:
-                continue
-
-            # Position: 1) x y ...
-            m = re.match(r'^1\)\s+([+-]?\d+\.?\d*)\s+([+-]?\d+\.?\d*)', line)
-            if m:
-                current["x"] = float(m.group(1))
-                current["y"] = float(m.group(2))
-                continue
-
-            # Magnitude: 3) mag ...
-            m = re.match(r'^3\)\s+([+-]?\d+\.?\d*e?[+-]?\d*)', line, re.IGNORECASE)
-            if m:
-                current["mag"] = float(m.group(1))
-                # For sersic/expdisk: param 3 is mag, param 4 is Re/Rs
-                # For ferrer: param 3 is mu, param 4 is R_out
-                # For edgedisk: param 3 is mu0, param 4 is h_s, param 5 is R_s
-                continue
-
-            # Re / Rs / R_out: 4) value ...
-            m = re.match(r'^4\)\s+([+-]?\d+\.?\d*e?[+-]?\d*)', line, re.IGNORECASE)
-            if m:
-                current["re"] = float(m.group(1))
-                continue
-
-            # Sersic n / Ferrer alpha / Edgedisk R_s: 5) value ...
-            m = re.match(r'^5\)\s+([+-]?\d+\.?\d*e?[+-]?\d*)', line, re.IGNORECASE)
-            if m:
-                if current["type"] == "sersic":
-                    current["n"] = float(m.group(1))
-                elif current["type"] == "edgedisk":
-                    current["re"] = float(m.group(1))  # R_s for edgedisk
-                continue
-
-            # Axis ratio b/a: 9) value ...
-            m = re.match(r'^9\)\s+([+-]?\d+\.?\d*(?:e[+-]?\d+)?)', line, re.IGNORECASE)
-            if m:
-                current["ba"] = float(m.group(1))
-                continue
-
-            # Position angle: 10) value ...
-            m = re.match(r'^10\)\s+([+-]?\d+\.?\d*(?:e[+-]?\d+)?)', line, re.IGNORECASE)
-            if m:
-                current["pa"] = float(m.group(1))
-                continue
-
-    return components
+    return copy.deepcopy(load_feedme(param_file).components)
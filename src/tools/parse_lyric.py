@@ -1,11 +1,13 @@
-import re
 from typing import Annotated, Any, List
-import ast
 from dataclasses import dataclass
 import os
-from astropy.io import fits, ascii
+from astropy.io import fits
 from astropy.wcs import WCS
 import numpy as np
+from .fits_io import fits_metadata, fits_wcs, image_dtype
+from .gssummary import load_gssummary
+from .galfits_session import get_fitter_session
+from .lyric_document import load_lyric, load_lyric_or_text
 try:
     import jax
     import jax.numpy as jnp
@@ -95,27 +97,13 @@ def parse_region_info_from_lyric(path_or_text: str) -> RegionInfo:
     Returns:
         A RegionInfo object.
     """
-    if os.path.isfile(path_or_text):
-        with open(path_or_text, 'r') as f:
-            content = f.read()
-    else:
-        content = path_or_text
-    lines = [line.strip() for line in content.splitlines() if line.strip() and not line.strip().startswith('#')]
-
-    pattern = re.compile(r'^R(\d+)\)\s*(.+?)\s*$')
+    doc = load_lyric_or_text(path_or_text)
 
     region = {}
-    for line in lines:
-        line = line.split('#')[0].strip()
-        match = pattern.match(line)
-        if not match:
+    for line in doc.entries():
+        if line.family != 'R' or line.label or not line.value_str:
             continue
-        index, value = match.groups()
-        try:
-            value = ast.literal_eval(value)
-        except:
-            pass
-        region[int(index)] = value
+        region[line.index] = line.value
 
     object_name = region.get(1)
     if isinstance(object_name, (list, tuple)):
@@ -151,23 +139,16 @@ def parse_image_infos_from_lyric(path_or_text: str) -> List[ImageInfo]:
     config_dir = None
     if os.path.isfile(path_or_text):
         config_dir = os.path.dirname(os.path.abspath(path_or_text))
-        with open(path_or_text, 'r') as f:
-            content = f.read()
-    else:
-        content = path_or_text
-    lines = [line.strip() for line in content.splitlines() if line.strip() and not line.strip().startswith('#')]
-
-    pattern = re.compile(r'^I([A-Za-z])(\d+)\)\s*(.+?)\s*$')
+    doc = load_lyric_or_text(path_or_text)
 
     config_groups = {}
-    for line in lines:
-        line = line.split('#')[0].strip()
-        match = pattern.match(line)
-        if not match:
+    for line in doc.entries():
+        if line.family != 'I' or len(line.label or '') != 1 or not line.value_str:
             continue
-        label, index, value = match.groups()
+        label, index = line.label, line.index
+        value = line.value_str
         try:
-            if index in ("1", "3", "4", "6"):
+            if index in (1, 3, 4, 6):
                 value = value.strip("[]").split(",")
                 if len(value) == 1:
                     value.append(0)
@@ -176,12 +157,12 @@ def parse_image_infos_from_lyric(path_or_text: str) -> List[ImageInfo]:
                 if config_dir:
                     value = _resolve_path_pair(value, config_dir)
             else:
-                value = ast.literal_eval(value)
+                value = line.value
         except:
             pass
         if label not in config_groups:
             config_groups[label] = {}
-        config_groups[label][int(index)] = value
+        config_groups[label][index] = value
 
     image_infos = []
     for label in sorted(config_groups.keys()):
@@ -189,20 +170,10 @@ def parse_image_infos_from_lyric(path_or_text: str) -> List[ImageInfo]:
         values = [group.get(i, None) for i in range(1, 16)]
         values.append(label)
         info = ImageInfo(*values)
-        with fits.open(info.image[0]) as hdul:
-            header = hdul[0].header
-            data_shape = hdul[0].data.shape
-            wcs = WCS(header)
-
-        try:
-            from astropy.wcs.utils import proj_plane_pixel_scales
-            scales = proj_plane_pixel_scales(wcs) * 3600.
-            pixsc = float(scales[0])
-        except Exception:
-            cdelt1 = abs(header.get('CDELT1')) * 3600.
-            pixsc = float(cdelt1)
-        info.pixscale = pixsc
-        y, x = fits.getdata(info.image[0]).shape
+        # header-only: NAXIS / CD / CDELT, cached on path+mtime+size
+        meta = fits_metadata(info.image[0])
+        info.pixscale = meta["pixscale"]
+        y, x = meta["shape"][-2:]
         info.fitting_region = calculate_fitting_region(x, y, info.pixscale, ix8=info.fitting_area)
 
         image_infos.append(info)
@@ -217,48 +188,8 @@ def parse_gssummary(filepath):
     """
     Parse a .gssummary file into a flat parameter dictionary.
     """
-    params = {}
-    config_file = None
-    in_free = False
-    in_fixed = False
-
-    with open(filepath, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-
-            if line.startswith('# config file:'):
-                config_file = line.split(':', 1)[1].strip()
-
-            if line.startswith('# free parameters'):
-                in_free = True
-                in_fixed = False
-                continue
-            if line.startswith('# fixed parameters'):
-                in_free = False
-                in_fixed = True
-                continue
-            if line.startswith('#########################################'):
-                in_free = False
-                in_fixed = False
-                continue
-
-            if line.startswith('#'):
-                if in_fixed and 'pname' in line:
-                    continue
-                continue
-
-            parts = line.split()
-            if len(parts) >= 2:
-                try:
-                    name = parts[0]
-                    value = float(parts[1])
-                    params[name] = value
-                except ValueError:
-                    continue
-
-    return params, config_file
+    summary = load_gssummary(filepath)
+    return dict(summary.values), summary.config_file
 
 
 def parse_component_types(config_file):
@@ -266,31 +197,24 @@ def parse_component_types(config_file):
     Extract component names and profile types from a .lyric config file.
     """
     components = {}
-    profile_key_re = re.compile(r'^P([a-z])1\)')
     current_prefix = None
     current_name = None
 
-    with open(config_file, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-
-            match_name = re.match(r'^P([a-z])1\)\s*(.*)', line)
-            if match_name:
-                current_prefix = match_name.group(1)
-                current_name = match_name.group(2).strip().split()[0]
-                continue
-
-            if current_prefix is not None:
-                match_type = re.match(
-                    r'^P{0}2\)\s*(.*)'.format(current_prefix), line)
-                if match_type:
-                    ptype = match_type.group(1).strip().split()[0]
-                    if current_name and ptype:
-                        components[current_name] = ptype
-                    current_prefix = None
-                    current_name = None
+    for line in load_lyric(config_file).entries():
+        if line.family != 'P' or len(line.label or '') != 1 or not line.value_str:
+            continue
+
+        if line.index == 1:
+            current_prefix = line.label
+            current_name = line.value_str.split()[0]
+            continue
+
+        if current_prefix is not None and line.label == current_prefix and line.index == 2:
+            ptype = line.value_str.split()[0]
+            if current_name and ptype:
+                components[current_name] = ptype
+            current_prefix = None
+            current_name = None
 
     return components
 
@@ -324,24 +248,12 @@ def extract_fits_metadata(fits_file, ra=None, dec=None):
     """
     Extract image shape, pixel scale, and reference pixel from a FITS file.
     """
-    from astropy.io import fits
-    from astropy.wcs import WCS
-
-    with fits.open(fits_file) as hdul:
-        header = hdul[0].header
-        data_shape = hdul[0].data.shape
-        wcs = WCS(header)
+    meta = fits_metadata(fits_file)
+    wcs = fits_wcs(fits_file)
 
-    ny, nx = data_shape[0], data_shape[1]
+    ny, nx = meta["shape"][0], meta["shape"][1]
     shape = (ny, nx)
-
-    try:
-        from astropy.wcs.utils import proj_plane_pixel_scales
-        scales = proj_plane_pixel_scales(wcs) * 3600.
-        pixsc = float(scales[0])
-    except Exception:
-        cdelt1 = abs(header.get('CDELT1')) * 3600.
-        pixsc = float(cdelt1)
+    pixsc = meta["pixscale"]
 
     x0 = nx / 2.
     y0 = ny / 2.
@@ -404,8 +316,9 @@ def extract_component_attributes(
     """
     from typing import Any
 
-    # 解析参数文件
-    params, summary_config_file = parse_gssummary(summary_file)
+    # 解析参数文件（共享缓存：多波段逐个调用时 summary 只解析一次）
+    summary = load_gssummary(summary_file)
+    params, summary_config_file = summary.values, summary.config_file
 
     if config_file is None and summary_config_file is not None:
         config_file = summary_config_file
@@ -437,29 +350,9 @@ def extract_component_attributes(
         except Exception:
             pass
 
-    # 提取所有组件名称
-    _known_suffixes = {
-        'xcen', 'ycen', 'Re', 'n', 'ang', 'axrat',
-        'Rout', 'alpha', 'beta', 'rs', 'hs',
-        'r0', 'sig', 'r_in', 'r_out',
-        'width', 'alpha_rc', 'theta_out', 'm', 'am',
-        'theta_m', 'i_arm',
-    }
-    comp_names = set()
-    for key in params:
-        if key.startswith('logM_'):
-            comp_names.add(key[5:])
-        else:
-            for suf in _known_suffixes:
-                if key.endswith('_' + suf):
-                    prefix = key[:-(len(suf) + 1)]
-                    if prefix:
-                        comp_names.add(prefix)
-                    break
-
     # 组装结果
     result: list[dict[str, Any]] = []
-    for comp_name in sorted(comp_names):
+    for comp_name in summary.component_names:
         p = lambda s: params.get(f'{comp_name}_{s}')
 
         # 组件类型
@@ -479,15 +372,7 @@ def extract_component_attributes(
             y_pix = y0 + ycen_arcsec / pixsc
 
         # 星等
-        mag = None
-        for key, val in params.items():
-            if band is not None:
-                if key == f'Mag_{comp_name}_{band}':
-                    mag = float(val)
-                    break
-            elif key.startswith(f'Mag_{comp_name}_'):
-                mag = float(val)
-                break
+        mag = summary.mag(comp_name, band)
 
         # 尺寸参数
         re_pix = None
@@ -657,6 +542,29 @@ def pixel2arcsec_offset(
         The "X" in ``PX3)`` and ``PX4)`` is the component's letter label
         (e.g. "a", "b", "c").
     """
+    res = pixel2arcsec_offset_batch([pix_x], [pix_y], lyric_file, band, origin=origin)
+    if isinstance(res, dict):
+        return res
+    return res[0][0], res[1][0]
+
+
+def pixel2arcsec_offset_batch(
+    pix_x: Annotated[List[float], "X pixel positions of the components (same *origin* convention as pixel2arcsec_offset)."],
+    pix_y: Annotated[List[float], "Y pixel positions of the components, same length as pix_x."],
+    lyric_file: Annotated[str, "Absolute path to the .lyric config file (must declare R2) [ra, dec])."],
+    band: Annotated[str, "Band label whose science-image WCS is used for the conversion."],
+    origin: Annotated[int, "Pixel-coordinate origin convention: 1 = FITS 1-based (default); 0 = 0-based numpy/display indices."] = 1,
+) -> tuple[list[float], list[float]] | dict[str, str]:
+    """Vectorized :func:`pixel2arcsec_offset` for many pixel positions in one band.
+
+    The galaxy-center projection and local affine coefficients are derived
+    once (WCS from the ``fits_io`` cache), then the closed-form inverse is
+    applied to all positions with numpy.
+
+    Returns:
+        ``(ra_offsets_arcsec, dec_offsets_arcsec)`` lists in input order, or an
+        ``error`` dict on failure.
+    """
     import warnings
     warnings.filterwarnings('ignore')
 
@@ -673,32 +581,32 @@ def pixel2arcsec_offset(
     if fits_file is None:
         return {"status": "error", "message": f"'{band}' not found in lyric file."}
 
-    with fits.open(fits_file) as hdul:
-        wcs = WCS(hdul[0].header)
+    wcs = fits_wcs(fits_file)
 
     ra, dec = region_info.ra, region_info.dec
 
     # Galaxy-center pixel position and local affine coefficients.
     # Always in the FITS 1-based frame, matching GalfitS img_cut
     # (GalfitS/src/galfits/images.py, lines ~1397-1409).
-    src = wcs.all_world2pix(ra, dec, 1)
-    srcXp = float(src[0])
-    srcYp = float(src[1])
+    # Center and the two sky-offset probes projected in one call.
+    px, py = wcs.all_world2pix([ra, ra + 1. / 60., ra],
+                               [dec, dec, dec + 1. / 60.], 1)
+    srcXp = float(px[0])
+    srcYp = float(py[0])
 
-    src_ra = wcs.all_world2pix(ra + 1. / 60., dec, 1)
-    src_dec = wcs.all_world2pix(ra, dec + 1. / 60., 1)
-    dxra = (float(src_ra[0]) - srcXp) / 60.
-    dyra = (float(src_ra[1]) - srcYp) / 60.
-    dxdec = (float(src_dec[0]) - srcXp) / 60.
-    dydec = (float(src_dec[1]) - srcYp) / 60.
+    dxra = (float(px[1]) - srcXp) / 60.
+    dyra = (float(py[1]) - srcYp) / 60.
+    dxdec = (float(px[2]) - srcXp) / 60.
+    dydec = (float(py[2]) - srcYp) / 60.
 
     # Convert input pixels to the 1-based FITS frame when needed.
+    pix_x_eff = np.asarray(pix_x, dtype=float).ravel()
+    pix_y_eff = np.asarray(pix_y, dtype=float).ravel()
+    if pix_x_eff.shape != pix_y_eff.shape:
+        return {"status": "error", "message": "pix_x and pix_y must have the same length."}
     if origin == 0:
-        pix_x_eff = float(pix_x) + 1.0
-        pix_y_eff = float(pix_y) + 1.0
-    else:
-        pix_x_eff = float(pix_x)
-        pix_y_eff = float(pix_y)
+        pix_x_eff = pix_x_eff + 1.0
+        pix_y_eff = pix_y_eff + 1.0
 
     # coordinates_transfer_inverse — exact inverse of GalfitS
     # coordinates_transfer (GalfitS/src/galfits/galaxy.py:211-213).
@@ -712,7 +620,7 @@ def pixel2arcsec_offset(
     dec_offset = ((pix_x_eff - srcXp) * dyra
                   - (pix_y_eff - srcYp) * dxra) / (-det)
 
-    return float(ra_offset), float(dec_offset)
+    return ra_offset.tolist(), dec_offset.tolist()
 
 # def generate_subcomps(image_info: ImageInfo, components) -> tuple[list, list] | None:
 #     """Generate individual component images via GALFIT subcomps mode (P=3).
@@ -760,21 +668,17 @@ def generate_subcomps(lyric_file, gssummary_file):
         return None
     workplace = os.path.dirname(os.path.abspath(gssummary_file))
 
-    # Lazy import: gsutils pulls in the GalfitS package (and reproject), which is
-    # only needed on the run_galfits / GalfitS path. Keeping it out of module
-    # top-level lets the run_galfit (GALFIT_BIN binary) path load without it.
-    from galfits import gsutils
+    # Shared fitter session (galfits_session): gsutils is imported lazily there, so
+    # the run_galfit (GALFIT_BIN binary) path still loads without GalfitS. The
+    # session also serves load_gs_model / calculate_profile_fluxes for this run.
+    session = get_fitter_session(lyric_file, workplace)
+    with session.using_summary(gssummary_file):
+        return _render_subcomps(session)
 
-    Myfitter, targ, fs = gsutils.read_config_file(lyric_file, workplace)
-    smfile = ascii.read(gssummary_file)
-    for loopx in range(len(smfile)):
-        name, best_value = smfile['pname'][loopx], smfile['best_value'][loopx]
-        if np.isnan(best_value) or name not in Myfitter.lmParameters:
-            continue
-        Myfitter.lmParameters[name].value = best_value
-    Myfitter.loose_fix_pars()
+
+def _render_subcomps(session):
+    Myfitter = session.fitter
     pardict = Myfitter.pardict
-    Myfitter.cal_model_image()
 
     GSdata = Myfitter.GSdata
     gmodel_list = Myfitter.gmodel_list  # galaxy models in imagefitter_phot
@@ -796,11 +700,10 @@ def generate_subcomps(lyric_file, gssummary_file):
             im = GSdata.get_image(im_idx)
             band = im.band
             sky = float(pardict['sky_{0}'.format(band)])
-            cut_image_sub = np.asarray(im.cut_image, dtype=float) - sky
-            image_model_sub = np.asarray(im.model_image, dtype=float) - sky
+            cut_image_sub = np.asarray(im.cut_image, dtype=image_dtype()) - sky
+            image_model_sub = np.asarray(im.model_image, dtype=image_dtype()) - sky
 
             # Per-band scale_and_translate params (mirror imagefitter_phot.cal_model_image:3602-3609)
-            nyl, nxl = im.cut_image.shape
             scale0 = group_transpar['pixsc'] / im.coordinates_transfer_para['pixsc']
             scale = jnp.array([scale0, scale0], dtype=jnp.float32)
             shiftx = (im.coordinates_transfer_para['x0shift']
@@ -813,21 +716,16 @@ def generate_subcomps(lyric_file, gssummary_file):
                       + 0.5)
             trans = jnp.array([shifty, shiftx], dtype=jnp.float32)
 
-            comp_images, comp_names = [], []
-            for gm, key in comp_keys:
-                logN_key = 'logNorm_{0}_{1}'.format(key, band)
-                logN = pardict[logN_key] if logN_key in pardict else -7.5 # TODO: work around with a default value if logN_key doesnot exist. will be fixed later
-                imm0 = (10.0 ** logN) * gm.mass_map[key]                # group-grid component
-                imm = jax.image.scale_and_translate(imm0, (nyl, nxl), (0, 1), scale, trans, 'cubic')
-                imm = imm / scale0 ** 2                                  # flux conservation
-                imm = jax.scipy.signal.fftconvolve(imm, im.PSF, mode='same')
-                imm = imm * im.phys_to_counts_rate
-                arr = np.asarray(imm, dtype=float)
+            if subcomp_batching_enabled():
+                comp_images = _render_band_batched(
+                    session, im_idx, im, comp_keys, pardict, band, scale0, scale, trans)
+            else:
+                comp_images = _render_band_loop(im, comp_keys, pardict, band, scale0, scale, trans)
+            for (_gm, key), arr in zip(comp_keys, comp_images):
                 assert arr.shape == cut_image_sub.shape, (
                     'shape mismatch band {} comp {}: {} vs {}'.format(
                         band, key, arr.shape, cut_image_sub.shape))
-                comp_images.append(arr)
-                comp_names.append('{}_{}'.format(gm.name, key))
+            comp_names = ['{}_{}'.format(gm.name, key) for gm, key in comp_keys]
 
             all_results[band] = dict(
                 data=cut_image_sub, model=image_model_sub,
@@ -836,6 +734,84 @@ def generate_subcomps(lyric_file, gssummary_file):
 
     return all_results
 
+
+def subcomp_batching_enabled() -> bool:
+    """``GALFITS_SUBCOMP_BATCHED=0`` 回退到逐组件渲染（调试/对照用）。"""
+    return os.environ.get("GALFITS_SUBCOMP_BATCHED", "1") == "1"
+
+
+def _comp_log_norm(pardict, key, band):
+    logN_key = 'logNorm_{0}_{1}'.format(key, band)
+    return pardict[logN_key] if logN_key in pardict else -7.5 # TODO: work around with a default value if logN_key doesnot exist. will be fixed later
+
+
+def _render_band_loop(im, comp_keys, pardict, band, scale0, scale, trans):
+    """逐组件：scale_and_translate -> fftconvolve(PSF) -> 计数率（每个组件各做一次 PSF FFT）。"""
+    nyl, nxl = im.cut_image.shape
+    comp_images = []
+    for gm, key in comp_keys:
+        imm0 = (10.0 ** _comp_log_norm(pardict, key, band)) * gm.mass_map[key]  # group-grid component
+        imm = jax.image.scale_and_translate(imm0, (nyl, nxl), (0, 1), scale, trans, 'cubic')
+        imm = imm / scale0 ** 2                                  # flux conservation
+        imm = jax.scipy.signal.fftconvolve(imm, im.PSF, mode='same')
+        imm = imm * im.phys_to_counts_rate
+        comp_images.append(np.asarray(imm, dtype=image_dtype()))
+    return comp_images
+
+
+def _conv_fft_shape(image_shape, psf_shape):
+    """线性卷积（full 尺寸）所需的补零 FFT 尺寸，取 rFFT 友好的长度。"""
+    from scipy.fft import next_fast_len
+    return tuple(next_fast_len(n + p - 1, real=True) for n, p in zip(image_shape, psf_shape))
+
+
+_RENDER_BAND_JIT = None
+
+
+def _render_band_kernel():
+    """jit 编译的单波段批量渲染：vmap(scale_and_translate) + 一次批量 rFFT / irFFT。"""
+    global _RENDER_BAND_JIT
+    if _RENDER_BAND_JIT is None:
+        from functools import partial
+
+        @partial(jax.jit, static_argnums=(5, 6, 7))
+        def render(mass, norms, scale, trans, psf_fft, out_shape, psf_shape, fft_shape):
+            resample = lambda m: jax.image.scale_and_translate(m, out_shape, (0, 1), scale, trans, 'cubic')
+            imgs = jax.vmap(resample)(mass * norms[:, None, None])
+            spec = jnp.fft.rfft2(imgs, s=fft_shape)                  # 一次前向（批量）
+            full = jnp.fft.irfft2(spec * psf_fft, s=fft_shape)       # 一次逆变换（批量）
+            # 与 fftconvolve(mode='same') 相同的居中裁剪
+            y0, x0 = (psf_shape[0] - 1) // 2, (psf_shape[1] - 1) // 2
+            return full[:, y0:y0 + out_shape[0], x0:x0 + out_shape[1]]
+
+        _RENDER_BAND_JIT = render
+    return _RENDER_BAND_JIT
+
+
+def _render_band_batched(session, im_idx, im, comp_keys, pardict, band, scale0, scale, trans):
+    """一个波段的全部组件一次渲染；PSF 的 rFFT 按补零尺寸缓存在 fitter 会话中。"""
+    if not comp_keys:
+        return []
+    out_shape = tuple(im.cut_image.shape)
+    psf = jnp.asarray(im.PSF)
+    psf_shape = tuple(psf.shape)
+    fft_shape = _conv_fft_shape(out_shape, psf_shape)
+
+    cache_key = (im_idx, psf_shape, fft_shape)
+    psf_fft = session.psf_ffts.get(cache_key)
+    if psf_fft is None:
+        psf_fft = jnp.fft.rfft2(psf, s=fft_shape)
+        session.psf_ffts[cache_key] = psf_fft
+
+    mass = jnp.stack([gm.mass_map[key] for gm, key in comp_keys])
+    # 线性算子可交换：归一化与通量守恒因子 1/scale0^2 合并为每个组件一个系数
+    norms = jnp.asarray([10.0 ** _comp_log_norm(pardict, key, band) / scale0 ** 2
+                         for _gm, key in comp_keys], dtype=mass.dtype)
+    imgs = _render_band_kernel()(mass, norms, scale, trans, psf_fft, out_shape, psf_shape, fft_shape)
+    imgs = np.asarray(imgs * im.phys_to_counts_rate, dtype=image_dtype())
+    return list(imgs)
+
+
 def TEST_parse_image_infos_from_lyric_success():
     path = "/home/jiangbo/GALFITS_examples/40/obj40.lyric"
     image_infos = parse_image_infos_from_lyric(path)
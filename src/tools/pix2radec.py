@@ -1,12 +1,13 @@
-from astropy.io import fits
-from astropy.wcs import WCS
 from astropy.coordinates import Angle
+import numpy as np
 import warnings
 import sys
 import os
 from contextlib import contextmanager
 from typing import Annotated, Tuple, Union, List
 
+from .fits_io import fits_metadata, fits_wcs
+
 
 # 定义跨平台的上下文管理器：临时屏蔽stdout/stderr输出
 @contextmanager
@@ -63,9 +64,7 @@ def pix2radec(
     try:
         # 屏蔽stdout/stderr，杜绝额外输出
         with suppress_stdout_stderr():
-            with fits.open(fits_file) as hdul:
-                header = hdul[0].header
-                wcs = WCS(header)
+            wcs = fits_wcs(fits_file)
         
         # 像素坐标转RA-DEC（度为单位）
         radec_deg = wcs.wcs_pix2world([(pix_x, pix_y)], pixel_based)[0]
@@ -103,7 +102,54 @@ def re_arcsec2pix(
         A list of floats representing the effective radius in pixel units, 
         ordered matching the input `fits_file_list`.
     """
-    from .parse_lyric import extract_fits_metadata
-    
-    pixscales = [extract_fits_metadata(fits_file)[1] for fits_file in fits_file_list]
-    return [re_as / pixscale for pixscale in pixscales]    
\ No newline at end of file
+    pixscales = [fits_metadata(fits_file)["pixscale"] for fits_file in fits_file_list]
+    return [re_as / pixscale for pixscale in pixscales]
+
+
+def pix2radec_batch(
+    pix_x: Annotated[List[float], "X pixel coordinates of all positions to convert"],
+    pix_y: Annotated[List[float], "Y pixel coordinates, same length as pix_x"],
+    fits_file: Annotated[str, "File path of the FITS image file carrying the WCS"],
+    pixel_based: Annotated[int, "Pixel coordinate system type: 1 for 1-based (astronomical standard), 0 for 0-based"] = 1
+) -> Annotated[Tuple[List[float], List[float]], "Tuple of (RA list, DEC list) in degrees"]:
+    """
+    Vectorized :func:`pix2radec`: convert many pixel positions with a single
+    ``wcs_pix2world`` call on the cached WCS of ``fits_file``.
+
+    Returns:
+        Tuple of (ra_deg_list, dec_deg_list) in input order.
+
+    Raises:
+        RuntimeError: If WCS parsing or coordinate conversion fails.
+    """
+    warnings.filterwarnings('ignore', category=UserWarning)
+    warnings.filterwarnings('ignore', category=RuntimeWarning)
+    warnings.filterwarnings('ignore', module='astropy.wcs')
+
+    try:
+        with suppress_stdout_stderr():
+            wcs = fits_wcs(fits_file)
+        xs = np.asarray(pix_x, dtype=float).ravel()
+        ys = np.asarray(pix_y, dtype=float).ravel()
+        if xs.shape != ys.shape:
+            raise ValueError("pix_x and pix_y must have the same length")
+        ra_deg, dec_deg = wcs.wcs_pix2world(xs, ys, pixel_based)
+        return ra_deg.tolist(), dec_deg.tolist()
+    except Exception as e:
+        raise RuntimeError(f"Failed to convert pixel to RA-DEC: {str(e)}")
+
+
+def re_arcsec2pix_batch(
+    re_as: Annotated[List[float], "Effective radii ($R_e$) in arcseconds, e.g. one per component"],
+    fits_file_list: Annotated[List[str], "List of FITS file paths for different bands"]
+) -> Annotated[List[List[float]], "Radii in pixels: one list per band, each ordered like re_as"]:
+    """
+    Vectorized :func:`re_arcsec2pix`: convert every radius to pixels in every
+    band in one operation (pixel scales come from the header metadata index).
+
+    Returns:
+        ``result[i][j]`` is ``re_as[j]`` in pixels of ``fits_file_list[i]``.
+    """
+    pixscales = np.array([fits_metadata(f)["pixscale"] for f in fits_file_list], dtype=float)
+    radii = np.asarray(re_as, dtype=float).ravel()
+    return (radii[None, :] / pixscales[:, None]).tolist()
\ No newline at end of file
@@ -4,12 +4,12 @@ import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 from matplotlib.patches import Ellipse
-from astropy.io import fits
 from astropy.stats import sigma_clipped_stats
 from astropy.visualization import simple_norm
 from scipy.ndimage import gaussian_filter
 from typing import Any, Annotated
 
+from .fits_io import as_image, image_dtype, read_fits_region
 from .parse_feedme import parse_feedme
 from .parse_lyric import parse_image_infos_from_lyric
 
@@ -123,7 +123,7 @@ def render_asinh_panel(ax, sci, mask, region=None, nmin=1, show_isophotes=True,
 
     # Mask overlay: semi-transparent black for masked regions
     if show_mask:
-        mask_overlay = np.zeros((*mask.shape, 4))
+        mask_overlay = np.zeros((*mask.shape, 4), dtype=image_dtype())
         mask_overlay[mask > 0] = [0, 0, 0, 1.0]
         ax.imshow(mask_overlay, origin="lower", extent=ext)
 
@@ -162,10 +162,10 @@ def render_original(
     if image_infos:
         rendered_images = {}
         for image_info in image_infos:
-            sci_full = fits.getdata(*image_info.image)
-            mask_full = np.zeros_like(sci_full, dtype=int)
+            sci_full = as_image(read_fits_region(image_info.image[0], ext=image_info.image[1]))
+            mask_full = np.zeros(sci_full.shape, dtype=int)
             if image_info.mask:
-                mask_full = fits.getdata(*image_info.mask).astype(int)
+                mask_full = read_fits_region(image_info.mask[0], ext=image_info.mask[1]).astype(int)
 
             fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(7.68, 3.84))
             info1 = render_asinh_panel(ax1, sci_full, mask_full, region=None,
@@ -206,23 +206,15 @@ def render_original(
     if not os.path.exists(params["input"]):
         return {"status": "failure", "error": f"Input image not found: {params['input']}"}
 
-    # Read full images
-    sci_full = fits.getdata(params["input"])
+    # Read only the H) section (memmap view / section decode for compressed data)
+    fit_region = params["fit_region"]
+    sci = as_image(read_fits_region(params["input"], fit_region))
 
-    mask_full = np.zeros_like(sci_full, dtype=int)
+    mask = np.zeros(sci.shape, dtype=int)
     if params["mask"] and os.path.exists(params["mask"]):
-        mask_full = fits.getdata(params["mask"]).astype(int)
-
-    # Crop to ROI
-    if params["fit_region"] is not None:
-        xmin, xmax, ymin, ymax = params["fit_region"]
-        sci = sci_full[ymin - 1:ymax, xmin - 1:xmax]
-        mask = mask_full[ymin - 1:ymax, xmin - 1:xmax]
-        region = [xmin, xmax, ymin, ymax]
-    else:
-        sci = sci_full
-        mask = mask_full
-        region = None
+        mask = read_fits_region(params["mask"], fit_region).astype(int)
+
+    region = list(fit_region) if fit_region is not None else None
 
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(7.68, 3.84))
     info1 = render_asinh_panel(ax1, sci, mask, region=region, vmax_percentile=99.5)
@@ -1,7 +1,10 @@
 
+import concurrent.futures
 import os
+import time
 import uuid
-from typing import Annotated, Any
+from functools import lru_cache
+from typing import Annotated, Any, Callable, Optional
 import dotenv
 from . import prompt
 from .analyze_image import (
@@ -35,6 +38,95 @@ def _maybe_fetch_reference_blocks(image_file: str):
     return None, None
 
 
+@lru_cache(maxsize=None)
+def _system_message(galfits: bool) -> str:
+    """残差分析的 system prompt（通用说明 + 成分规范），纯静态内容。
+
+    每次调用都返回同一个字符串，使其在各轮、各星系之间逐字节一致，构成 provider 端
+    前缀缓存可复用的前缀；随调用变化的内容（参数摘要、工作笔记、最优轮次结论）
+    只出现在之后的 user 轮次中。
+    """
+    system_message = prompt.RESIDUAL_ANALYSIS_SYSTEM_MESSAGE
+    component_spec = (prompt.get_component_specification_galfits() if galfits
+                      else prompt.get_component_specification_galfit())
+    if component_spec:
+        system_message = system_message + "\n\n" + component_spec
+    return system_message
+
+
+def best_round_join_timeout() -> float:
+    """等待最优轮次对比的总预算（秒，从对比启动时计），``BEST_ROUND_JOIN_TIMEOUT_S``，默认 300。"""
+    try:
+        return float(os.environ.get("BEST_ROUND_JOIN_TIMEOUT_S", "300"))
+    except ValueError:
+        return 300.0
+
+
+def _start_best_round(image_path: str, summary_path: Optional[str], lyric_file: Optional[str] = None,
+                      use_cache: bool = True):
+    """后台启动最优轮次对比，返回 ``(future, deadline)``；两次 join 共用同一截止时间。"""
+    future = _brr.start_best_round_update(image_path=image_path, summary_path=summary_path,
+                                          lyric_file=lyric_file, use_cache=use_cache)
+    return future, time.monotonic() + best_round_join_timeout()
+
+
+def _join_best_round(future, deadline: float) -> Optional[dict]:
+    """等待并发进行的最优轮次对比结束（最多到 ``deadline``）。
+
+    超时返回 PENDING（对比仍在后台进行，结论稍后写入登记），异常返回 ERROR；
+    两种情况都不丢弃已完成的成分分析。
+    """
+    try:
+        return future.result(timeout=max(deadline - time.monotonic(), 0.0))
+    except concurrent.futures.TimeoutError:
+        print("[best_round] comparison still running, continuing without its conclusion")
+        return {"status": "PENDING", "best_round": None, "best_round_label": None,
+                "verdict": None, "comparison_text": None}
+    except Exception as e:  # noqa: BLE001
+        print(f"[best_round] comparison failed: {e}")
+        return {"status": "ERROR", "best_round": None, "best_round_label": None,
+                "verdict": None, "comparison_text": None}
+
+
+def _attach_analysis(best_future, best_info: Optional[dict], image_path: str, analysis: str) -> None:
+    """把分析文本挂到最优轮次登记上。
+
+    对比已完成时立即挂接；PENDING 时在对比结束的回调中挂接（此刻登记里该轮还不是最优，
+    立即挂接会落空）；ERROR 或追踪关闭（None）时跳过。
+    """
+    if best_info is None or best_info.get("status") == "ERROR":
+        return
+    if best_info.get("status") != "PENDING":
+        _brr.attach_analysis_to_best(image_path, analysis)
+        return
+
+    def _attach_when_done(future) -> None:
+        try:
+            info = future.result()
+        except Exception as e:  # noqa: BLE001
+            print(f"[best_round] comparison failed, analysis not attached: {e}")
+            return
+        if info is not None and info.get("status") != "ERROR":
+            _brr.attach_analysis_to_best(image_path, analysis)
+
+    best_future.add_done_callback(_attach_when_done)
+
+
+def _turn2_builder(best_future, deadline: float, summary_content: str, custom_instructions: str,
+                   phase_reason: str) -> Callable[[], str]:
+    """turn-2 提示词的延迟构造：在 turn-2 开始时才等待最优轮次对比并并入其退步结论。
+
+    等待受 ``deadline`` 限制，不会耗尽分析轮次自身的 API 超时；到时仍未完成则不带结论继续。
+    """
+    def build() -> str:
+        instructions = custom_instructions
+        best_info = _join_best_round(best_future, deadline)
+        if best_info and best_info.get("comparison_conclusion"):
+            instructions += "\n\n" + best_info["comparison_conclusion"]
+        return prompt.get_phase_parameter_review(summary_content, instructions) + "\n\n" + phase_reason
+    return build
+
+
 def _galaxy_dir_of(path: str) -> str:
     """从某个输出文件路径向上定位星系主目录（首个含 output/ 子目录的祖先）。"""
     p = os.path.dirname(os.path.abspath(path))
@@ -64,7 +156,8 @@ def _persist_timing(ref_path: str, timing: dict) -> None:
         for t in timing.get("turns", []):
             lines.append(
                 f"- turn{t['turn']}: {t['duration_s']}s "
-                f"(prompt={t['prompt_tokens']}, completion={t['completion_tokens']}, "
+                f"(prompt={t['prompt_tokens']}, cached={t.get('cached_tokens', 0)}, "
+                f"completion={t['completion_tokens']}, "
                 f"{t['tok_per_s']} tok/s)"
             )
         with open(tlog, "a", encoding="utf-8") as f:
@@ -79,6 +172,7 @@ def analyze_multiband_components(
     comparison_file: Annotated[str, "Path to the comparison image file [png file] containing the original image, model image, 2D residual image, and 1D surface brightness profile residual plot"],
     working_note_file: Annotated[str, "File path of the working_note.md to track iterative fitting progress"] = "",
     custom_instructions: Annotated[str, "Context for this round of analysis: must include (1) scientific objective of this fitting task  (2) file path of `working_note.md`"] = "",
+    use_cache: Annotated[bool, "Reuse cached VLM responses for identical requests; False forces fresh calls"] = True,
 ):
     # Validate input files
     if not os.path.exists(lyric_file):
@@ -105,17 +199,12 @@ def analyze_multiband_components(
     if not summary_content:
         return {"status": "failure", "error": f"Failed to read summary file: {summary_file}"}
 
-    # Build system message from templates
-    system_message = prompt.RESIDUAL_ANALYSIS_SYSTEM_MESSAGE
+    # Build system message from templates (static, shared prefix)
+    system_message = _system_message(galfits=True)
 
     # Maintain best-round memory for this galaxy (visual-primary VLM comparison).
-    _best_info = _brr.update_best_round_for_call(
-        image_path=comparison_file, summary_path=summary_file, lyric_file=lyric_file)
-
-    component_spec = prompt.get_component_specification_galfits()
-
-    if component_spec:
-        system_message = system_message + "\n\n" + component_spec
+    # Runs concurrently with the component analysis below; joined before turn 2 / at the end.
+    _best_future, _best_deadline = _start_best_round(comparison_file, summary_file, lyric_file, use_cache)
 
     # ── Dispatch to the chosen analysis backend ──────────────────────
     analysis_mode = os.environ.get("ANALYSIS_MODE", "vlm").lower()
@@ -210,13 +299,10 @@ def analyze_multiband_components(
 
         # Soft "best-round regression" reference (only present when the comparison
         # judged the current round worse than the historical best). Fed into turn-2
-        # (parameter review / reasoning), never turn-1 visual extraction.
-        if _best_info and _best_info.get("comparison_conclusion"):
-            custom_instructions += "\n\n" + _best_info["comparison_conclusion"]
-        phase_param = prompt.get_phase_parameter_review(summary_content, custom_instructions)
-        turn2 = phase_param + "\n\n" + phase_reason
-
-        prompts_list = [turn1, turn2, turn3]
+        # (parameter review / reasoning), never turn-1 visual extraction — so turn 1
+        # runs while the comparison is still in flight and turn 2 waits for it.
+        prompts_list = [turn1, _turn2_builder(_best_future, _best_deadline, summary_content,
+                                              custom_instructions, phase_reason), turn3]
         deferred_system = os.environ.get("VLM_DEFERRED_SYSTEM", "0") == "1"
         ref_blocks, ref_intro = _maybe_fetch_reference_blocks(comparison_file)
         try:
@@ -227,6 +313,7 @@ def analyze_multiband_components(
                 deferred_system=deferred_system,
                 reference_blocks=ref_blocks,
                 reference_intro=ref_intro,
+                use_cache=use_cache,
             )
         finally:
             from . import visualrag_client as _vrag
@@ -243,6 +330,7 @@ def analyze_multiband_components(
 
     # analysis is guaranteed to be str when error is None
     assert analysis is not None, "Analysis should not be None when error is None"
+    _best_info = _join_best_round(_best_future, _best_deadline)
 
     # Save analysis
     base_name = os.path.splitext(os.path.basename(comparison_file))[0]
@@ -258,8 +346,7 @@ def analyze_multiband_components(
         print(f"Warning: Failed to save analysis to file: {e}")
         output_file = None
 
-    if _best_info is not None:
-        _brr.attach_analysis_to_best(comparison_file, analysis)
+    _attach_analysis(_best_future, _best_info, comparison_file, analysis)
 
     require = '''
 - 必须严格落实【调整决策】中的要求，基于上一轮的拟合结果的基础上调整初始参数。
@@ -292,6 +379,7 @@ def component_analysis(
     summary_file: Annotated[str, "Path to the optimization summary file containing detailed fitting information"],
     working_note_file: Annotated[str, "File path of the working_note.md to track iterative fitting progress"] = "",
     custom_instructions: Annotated[str, "Context for this round of analysis: must include scientific objective of this fitting task"] = "",
+    use_cache: Annotated[bool, "Reuse cached VLM responses for identical requests; False forces fresh calls"] = True,
 ) -> dict[str, Any]:
     """
     Analyze galaxy fitting results to determine component composition and parameter adjustments.
@@ -305,6 +393,7 @@ def component_analysis(
         summary_file (str): Path to the optimization summary file containing detailed fitting information
         working_note_file (str): File path of the working_note.md to track iterative fitting progress
         custom_instructions (str): Context for this round of analysis: must include (1) scientific objective of this fitting task
+        use_cache (bool): If False, bypass the VLM response cache (fresh responses are still stored). Default is True.
 
         summary_file (str): Path to the optimization summary file containing:
                           - Fitted parameter values and their uncertainties
@@ -331,16 +420,11 @@ def component_analysis(
         return {"status": "failure", "error": f"Failed to read summary file: {summary_file}"}
 
     # Maintain best-round memory for this galaxy (visual-primary VLM comparison).
-    _best_info = _brr.update_best_round_for_call(
-        image_path=image_file, summary_path=summary_file, lyric_file=None)
+    # Runs concurrently with the component analysis below; joined before turn 2 / at the end.
+    _best_future, _best_deadline = _start_best_round(image_file, summary_file, use_cache=use_cache)
 
-    # Build system message from templates
-    system_message = prompt.RESIDUAL_ANALYSIS_SYSTEM_MESSAGE
-
-    component_spec = prompt.get_component_specification_galfit()
-
-    if component_spec:
-        system_message = system_message + "\n\n" + component_spec
+    # Build system message from templates (static, shared prefix)
+    system_message = _system_message(galfits=False)
 
     # ── Dispatch to the chosen analysis backend ──────────────────────
     analysis_mode = os.environ.get("ANALYSIS_MODE", "vlm").lower()
@@ -435,13 +519,10 @@ def component_analysis(
 
         # Soft "best-round regression" reference (only present when the comparison
         # judged the current round worse than the historical best). Fed into turn-2
-        # (parameter review / reasoning), never turn-1 visual extraction.
-        if _best_info and _best_info.get("comparison_conclusion"):
-            custom_instructions += "\n\n" + _best_info["comparison_conclusion"]
-        phase_param = prompt.get_phase_parameter_review(summary_content, custom_instructions)
-        turn2 = phase_param + "\n\n" + phase_reason
-
-        prompts_list = [turn1, turn2, turn3]
+        # (parameter review / reasoning), never turn-1 visual extraction — so turn 1
+        # runs while the comparison is still in flight and turn 2 waits for it.
+        prompts_list = [turn1, _turn2_builder(_best_future, _best_deadline, summary_content,
+                                              custom_instructions, phase_reason), turn3]
         deferred_system = os.environ.get("VLM_DEFERRED_SYSTEM", "0") == "1"
         ref_blocks, ref_intro = _maybe_fetch_reference_blocks(image_file)
         try:
@@ -452,6 +533,7 @@ def component_analysis(
                 deferred_system=deferred_system,
                 reference_blocks=ref_blocks,
                 reference_intro=ref_intro,
+                use_cache=use_cache,
             )
         finally:
             from . import visualrag_client as _vrag
@@ -468,6 +550,7 @@ def component_analysis(
 
     # analysis is guaranteed to be str when error is None
     assert analysis is not None, "Analysis should not be None when error is None"
+    _best_info = _join_best_round(_best_future, _best_deadline)
     
     require = '''
 
@@ -496,8 +579,7 @@ def component_analysis(
         print(f"Warning: Failed to save analysis to file: {e}")
         output_file = None
 
-    if _best_info is not None:
-        _brr.attach_analysis_to_best(image_file, analysis)
+    _attach_analysis(_best_future, _best_info, image_file, analysis)
 
 
     result = {
@@ -17,9 +17,22 @@ from astropy.stats import sigma_clipped_stats
 import datetime
 import glob
 
+from .archive import (
+    archive_copy,
+    compress_fits_for_archive,
+    archive_dedup_outputs_enabled,
+    dedupe_run_dir,
+    gc_object_store,
+    object_store_dir,
+    record_round,
+    summarize_compression,
+)
 from .extract_summary_galfit import extract_summary_from_galfit
+from .fits_io import as_image, image_dtype, read_fits_array, read_fits_region
 from .parse_feedme import parse_feedme, parse_components
+from .psf_prep import prepare_config_psfs, psf_trim_fraction, summarize_trims
 from .render_original import render_asinh_panel, draw_re_ellipses, effective_re
+from .runtime_model import RuntimeRecorder, galfit_job_features
 from .sb_profile import render_sb_profile
 
 # Residual-zoom panel geometry (mirrors v2 layout in rerender_comparisons.py)
@@ -27,16 +40,25 @@ ZOOM_HALF_MIN_PX = 12       # 放大框半宽下限，防止 Re 过小时框退
 ZOOM_RE_FACTOR = 2.5        # 半宽 = 2.5×Re，即全宽 5×Re
 ZOOM_SIGMA_RANGE = 10       # 放大图色标 ±10σ，与主残差图一致
 CENTER_CLUSTER_PX = 3.0     # 距场心同一目标簇的容差：同心多成分(盘+核+棒)归为一簇
+REFF_BIN_PX = 0.25          # observed_reff 增长曲线的半径分箱宽度 [pix]
 
 
 def observed_reff(data: np.ndarray, mask: np.ndarray,
-                  ixc: float, iyc: float) -> float:
+                  ixc: float, iyc: float,
+                  bin_width: float = REFF_BIN_PX) -> float:
     """原图实测圆形半光半径 R_e,obs [pix]（掩膜内、去天光）。
 
     作为放大框尺寸的稳健基准：不依赖任一成分的拟合 Re，规避
     PSF(Re=0)/坍缩 bulge 把框压到下限，也与成分标签解耦。
     半光半径由「以拟合中心为圆心的圆形通量增长曲线」取半光得到；
     返回 0.0 表示无法测定（像素不足/总通量非正），调用方据此回落。
+
+    增长曲线用 ``np.bincount`` 按半径分箱（箱宽 ``bin_width`` pix）累加，
+    再在半光所在箱内线性插值，替代全像素 argsort（O(N log N)）；
+    半径由广播的一维坐标生成，不再构造 ``np.indices`` 全尺寸网格。
+    与逐像素排序的结果相差不超过一个箱宽（默认 0.25 pix）。
+    float32 输入（``IMAGE_PRECISION=float32``）不做整幅提升：``np.bincount``
+    以 float64 累加权重，总通量与增长曲线保持双精度。
     """
     good = np.isfinite(data) & (mask == 0)
     if int(good.sum()) < 50:
@@ -45,43 +67,19 @@ def observed_reff(data: np.ndarray, mask: np.ndarray,
         sky = float(sigma_clipped_stats(data[good])[1])  # (mean, median, std)
     except Exception:
         return 0.0
-    sci = np.where(good, data - sky, 0.0)
-    yy, xx = np.indices(sci.shape)
-    r = np.sqrt((xx - ixc) ** 2 + (yy - iyc) ** 2)
-    rg, sg = r[good], sci[good]
-    order = np.argsort(rg)
-    rg, sg = rg[order], sg[order]
-    cum = np.cumsum(sg)
+    ny, nx = data.shape
+    dx2 = (np.arange(nx, dtype=np.float64) - ixc) ** 2
+    dy2 = (np.arange(ny, dtype=np.float64) - iyc) ** 2
+    rg = np.sqrt((dy2[:, None] + dx2[None, :])[good])
+    sg = data[good] - sky
+    idx = (rg / bin_width).astype(np.intp)
+    flux = np.bincount(idx, weights=sg)
+    cum = np.concatenate(([0.0], np.cumsum(flux)))
     total = cum[-1]
     if not np.isfinite(total) or total <= 0:
         return 0.0
-    return float(np.interp(total / 2.0, cum, rg))
-
-
-def _crop_to_fit_region(full_data: np.ndarray, fit_region: tuple[int, int, int, int] | None,
-                        target_shape: tuple[int, ...]) -> np.ndarray:
-    """Crop full-frame data to match GALFIT output using the fitting region from feedme.
-
-    Args:
-        full_data: Full-frame image array.
-        fit_region: (xmin, xmax, ymin, ymax) in 1-indexed pixels from feedme H) parameter,
-                    or None to fall back to center crop.
-        target_shape: Expected output shape (ny, nx) to crop to.
-
-    Returns:
-        Cropped array matching target_shape.
-    """
-    if fit_region is not None:
-        xmin, xmax, ymin, ymax = fit_region
-        # Convert 1-indexed feedme coords to 0-indexed Python slice
-        cropped = full_data[ymin - 1:ymax, xmin - 1:xmax]
-        if cropped.shape == target_shape:
-            return cropped
-        # Fall through to center crop if shape doesn't match (shouldn't happen)
-    # Fallback: center crop
-    dy, dx = (full_data.shape[0] - target_shape[0]) // 2, \
-             (full_data.shape[1] - target_shape[1]) // 2
-    return full_data[dy:dy + target_shape[0], dx:dx + target_shape[1]]
+    edges = np.arange(cum.size, dtype=np.float64) * bin_width
+    return float(np.interp(total / 2.0, cum, edges))
 
 
 def _generate_subcomps(param_file: str, working_dir: str) -> tuple[list, list] | None:
@@ -130,7 +128,7 @@ def _generate_subcomps(param_file: str, working_dir: str) -> tuple[list, list] |
                 obj = hdul[i].header.get("OBJECT", f"Component {i-1}")
                 if obj.lower() not in known_components:
                     continue
-                comp_images.append(hdul[i].data.astype(np.float64))
+                comp_images.append(read_fits_array(subcomps_path, i, hdul=hdul).astype(image_dtype()))
                 comp_types.append(obj.lower())
 
         return (comp_images, comp_types) if comp_images else None
@@ -181,14 +179,15 @@ def create_comparison_png(
             model_data = None
             residual_data = None
 
-            for hdu in hdul:
+            # 数据经进程级数组缓存读取（只读），重复渲染同一输出不再重复解码
+            for idx, hdu in enumerate(hdul):
                 object_type = hdu.header.get("OBJECT", "")
                 if object_type.find("[") != -1 and original_data is None:
-                    original_data = hdu.data
+                    original_data = read_fits_array(fits_file, idx, hdul=hdul)
                 elif object_type.find("model") != -1:
-                    model_data = hdu.data
+                    model_data = read_fits_array(fits_file, idx, hdul=hdul)
                 elif object_type.find("residual") != -1:
-                    residual_data = hdu.data
+                    residual_data = read_fits_array(fits_file, idx, hdul=hdul)
 
             if original_data is None:
                 print(f"[create_comparison_png] No original data HDU found in {fits_file}")
@@ -197,28 +196,25 @@ def create_comparison_png(
         print(f"[create_comparison_png] Failed to read FITS file {fits_file}: {e}")
         return None, None
 
+    # IMAGE_PRECISION=float32 时图像与派生缓冲保持 float32
+    original_data, model_data, residual_data = (
+        as_image(original_data), as_image(model_data), as_image(residual_data))
+
     # ── Phase 2: Load optional data (failure = degrade gracefully) ──
-    mask = np.zeros(original_data.shape, dtype=float)
+    mask = np.zeros(original_data.shape, dtype=image_dtype())
     if mask_file and os.path.exists(mask_file):
         try:
-            mask_full = fits.getdata(mask_file)
-            if mask_full.shape != original_data.shape:
-                mask = _crop_to_fit_region(mask_full, fit_region, original_data.shape)
-            else:
-                mask = mask_full
-            mask = np.where(np.array(mask, dtype=float) > 0, 1.0, 0.0)
+            # 只读 H) 区（memmap 视图 / 压缩图按 section 解码），形状不符时居中裁剪
+            mask = read_fits_region(mask_file, fit_region, target_shape=original_data.shape)
+            mask = (np.asarray(mask, dtype=float) > 0).astype(image_dtype())
         except Exception as e:
             print(f"[create_comparison_png] Failed to load mask {mask_file}, degrading to no-mask: {e}")
-            mask = np.zeros(original_data.shape, dtype=float)
+            mask = np.zeros(original_data.shape, dtype=image_dtype())
 
     sigma_data = None
     if sigma_file and os.path.exists(sigma_file):
         try:
-            sigma_full = fits.getdata(sigma_file)
-            if sigma_full.shape != original_data.shape:
-                sigma_data = _crop_to_fit_region(sigma_full, fit_region, original_data.shape)
-            else:
-                sigma_data = sigma_full
+            sigma_data = as_image(read_fits_region(sigma_file, fit_region, target_shape=original_data.shape))
         except Exception as e:
             print(f"[create_comparison_png] Failed to load sigma {sigma_file}, degrading to no-sigma: {e}")
 
@@ -300,10 +296,10 @@ def create_comparison_png(
             resid_display = residual_data.copy()
             resid_display[~np.isfinite(resid_display)] = 0
             bg_std = orig_info.get("std", 1.0) or 1.0
-            resid_norm = resid_display / bg_std
+            resid_norm = resid_display / float(bg_std)
             resid_norm[mask > 0] = 0
 
-        mask_overlay = np.zeros((*mask.shape, 4))
+        mask_overlay = np.zeros((*mask.shape, 4), dtype=image_dtype())
         mask_overlay[mask > 0] = [1, 1, 1, 0.7]
 
         # === Row 1, Col 0: Residual (FULL FIELD, ±10σ) ===
@@ -456,13 +452,15 @@ def create_comparison_png(
 
 async def run_galfit(
     config_file: Annotated[str, "absolute path to the GALFIT configuration file"],
-    options: Annotated[List[str], "options that control how galfit runs"] = []
+    options: Annotated[List[str], "options that control how galfit runs"] = [],
+    timeout_sec: Annotated[int | None, "timeout in seconds; default is estimated from past runs (300 s without history)"] = None,
+    psf_ee: Annotated[float | None, "trim the PSF to this encircled-energy fraction before fitting (e.g. 0.995); default PSF_TRIM_EE or off"] = None,
 ) -> dict[str, Any]:
     """Execute GALFIT single-band fitting with the given configuration file.
 
     **Execution Process:**
     1. Parses the GALFIT feedme configuration file to extract file paths and fitting region
-    2. Executes GALFIT as a subprocess with 5-minute timeout protection
+    2. Executes GALFIT as a subprocess with timeout protection (adaptive, see runtime_model)
     3. Generates a 2×3 comparison image: Row 0 = DATA×2 | MODEL, Row 1 = RESIDUAL | RESIDUAL ZOOM | 1D SB Profile
     4. Extracts fitting parameters and statistics to JSON summary
     5. Archives all output files to a timestamped directory with config backup
@@ -473,6 +471,10 @@ async def run_galfit(
       - Relative paths in config are resolved relative to config file location
     - options (List[str], optional): GALFIT command-line options
       - Example: ["-o"] for overwrite mode, ["-v"] for verbose output
+    - timeout_sec (int, optional): Timeout in seconds; by default estimated from
+      the runtime history of similar fits (300 s until enough history exists)
+    - psf_ee (float, optional): Encircled-energy fraction for PSF trimming; GALFIT
+      then runs on a variant feedme whose D) points at the trimmed, cached PSF
 
     """
     galfit_bin = os.getenv("GALFIT_BIN", "galfit")
@@ -488,149 +490,218 @@ async def run_galfit(
     # Use config file directory as working directory so fit.log is created there
     working_dir = os.path.dirname(os.path.abspath(config_file))
 
+    # Optional PSF trimming: run GALFIT on a variant feedme pointing at the trimmed PSF
+    psf_trim, trimmed_config = None, None
+    trim_fraction = psf_trim_fraction(psf_ee)
+    if trim_fraction:
+        stem, ext = os.path.splitext(os.path.basename(config_file))
+        try:
+            trimmed_config, trims = prepare_config_psfs(
+                config_file, trim_fraction, os.path.join(working_dir, f"{stem}_psftrim{ext}"))
+            psf_trim = summarize_trims(trims)
+        except Exception as e:  # noqa: BLE001
+            print(f"[run_galfit] PSF trimming skipped: {e}")
+        if trimmed_config:
+            command = [galfit_bin] + options + [trimmed_config]
+
+    # 成功时 _psftrim 变体随归档移入 ar_dir；超时 / 失败时在 finally 中删除，
+    # 不在配置目录留下多余的 *.feedme（validate_config_tree 会扫描它们）
     try:
-        proc = subprocess.run(
-            command,
-            cwd=working_dir,
-            capture_output=True,
-            text=True,
-            check=False,
-            timeout=300,  # 5 minute timeout
+        runtime = RuntimeRecorder("galfit", galfit_job_features(trimmed_config or config_file), timeout=timeout_sec,
+                                  config_file=config_file)
+        try:
+            proc = subprocess.run(
+                command,
+                cwd=working_dir,
+                capture_output=True,
+                text=True,
+                check=False,
+                timeout=runtime.timeout_s,
+            )
+        except subprocess.TimeoutExpired:
+            return {
+                "status": "failure",
+                "error": f"GALFIT execution timed out after {runtime.timeout_s} seconds",
+                "runtime": runtime.done("timeout"),
+            }
+        except FileNotFoundError:
+            return {
+                "status": "failure",
+                "error": "GALFIT executable not found. Please ensure GALFIT is installed.",
+            }
+        runtime_info = runtime.done("success" if proc.returncode == 0 else "failure")
+
+        # Combine stdout and stderr
+        full_output = proc.stdout + proc.stderr
+
+        if proc.returncode != 0:
+            return {
+                "status": "failure",
+                "error": f"GALFIT failed with return code {proc.returncode}",
+                "log": full_output,
+                "runtime": runtime_info,
+            }
+
+        # Get output file path from parsed config
+        output_file = config_paths.get("output", "")
+        if not output_file:
+            return {
+                "status": "failure",
+                "error": "Could not find output file path in config",
+            }
+
+        # Check if output file exists
+        if not os.path.exists(output_file):
+            return {
+                "status": "failure",
+                "error": f"GALFIT output file not created: {output_file}",
+                "log": full_output,
+            }
+
+        # Identify the latest galfit.[0-9]* file for parameter extraction
+        matched_galfit_files = glob.glob(os.path.join(working_dir, "galfit.[0-9]*"))
+        latest_galfit = "galfit.01"
+        param_file_for_plot = config_file # Fallback
+        if matched_galfit_files:
+            latest_galfit = max(matched_galfit_files, key=lambda f: int(f.rsplit(".", 1)[-1]))
+            param_file_for_plot = latest_galfit
+
+        # Create comparison PNG with sigma and mask if available
+        sigma_file = config_paths.get("sigma") or None
+        mask_file = config_paths.get("mask") or None
+        fit_region = config_paths.get("fit_region")
+
+        # Generate subcomps for SB profile component curves
+        comp_data = _generate_subcomps(latest_galfit, working_dir) if matched_galfit_files else None
+        comp_images = comp_data[0] if comp_data else None
+        comp_types = comp_data[1] if comp_data else None
+
+        # Use latest_galfit (fitted parameters) for component parameters in plot
+        comparison_png_path, statistics_1d = create_comparison_png(output_file, sigma_file, mask_file, fit_region,
+                                                    param_file=param_file_for_plot,
+                                                    comp_images=comp_images, comp_types=comp_types)
+
+        # Identify constraint file
+        constraint_file = config_paths.get("constraint") or None
+
+        # Extract summary information
+        # fit.log 以 GALFIT 实际运行的 feedme（PSF 裁剪时为 _psftrim 变体）为块键
+        summary, fit_stats = extract_summary_from_galfit(output_file, trimmed_config or config_file,
+                                                         statistics_1d=statistics_1d,
+                                                         constraint_file=constraint_file)
+
+        # Cleanup the workspace
+        ws_dir = os.path.dirname(output_file)
+        ar_dir = os.path.join(ws_dir, "archives", "%s.%s" % (datetime.datetime.now().strftime("%Y%m%dT%H%M%S"), hashlib.md5(config_file.encode("utf-8")).hexdigest()[:8]))
+        os.makedirs(ar_dir, exist_ok=True)
+        # Save stdout+stderr to file for diagnose
+        console_log_path = os.path.join(ar_dir, "console.log")
+        with open(console_log_path, "w", encoding="utf-8") as f:
+            f.write(full_output)
+        fit_log_path = os.path.join(working_dir, "fit.log")
+        if os.path.exists(fit_log_path):
+            shutil.move(fit_log_path, ar_dir)
+        if os.path.exists(output_file):        
+            shutil.move(output_file, ar_dir)
+            output_file = os.path.join(ar_dir, os.path.basename(output_file))
+        if comparison_png_path:
+            shutil.move(comparison_png_path, ar_dir)
+            comparison_png_path = os.path.join(ar_dir, os.path.basename(comparison_png_path))
+        if summary:
+            shutil.move(summary, ar_dir)
+            summary = os.path.join(ar_dir, os.path.basename(summary))    
+
+        # Archived inputs (recurring feedme / constraints) are copied through the
+        # content-addressed store: byte-identical files from earlier rounds become
+        # read-only hardlinks instead of new copies. The working files stay untouched.
+        store_dir = object_store_dir(os.path.dirname(ar_dir))
+
+        # Archive constraint file if referenced in config
+        if constraint_file and os.path.exists(constraint_file):
+            archive_copy(constraint_file, ar_dir, store_dir)
+
+        if matched_galfit_files:
+            archive_copy(latest_galfit, ar_dir, store_dir)
+        archive_copy(config_file, ar_dir, store_dir)
+        if trimmed_config and os.path.exists(trimmed_config):
+            shutil.move(trimmed_config, ar_dir)
+        # Archive subcomps FITS if it was generated
+        subcomps_file = os.path.join(working_dir, "subcomps.fits")
+        if os.path.exists(subcomps_file):
+            shutil.move(subcomps_file, ar_dir)
+
+        # Optional tile-compressed archival FITS (ARCHIVE_FITS_COMPRESSION=lossless|quantized)
+        archive_compression = summarize_compression([
+            compress_fits_for_archive(output_file),
+            compress_fits_for_archive(os.path.join(ar_dir, "subcomps.fits")),
+        ])
+        if archive_dedup_outputs_enabled():
+            dedupe_run_dir(ar_dir, store_dir)
+        gc_object_store(store_dir)
+
+        # Append this round to the galaxy's archive index (listing without globbing archives/*)
+        try:
+            components = [{"type": c["type"]} for c in parse_components(param_file_for_plot)]
+        except Exception:  # noqa: BLE001
+            components = []
+        record_round(
+            ws_dir, "galfit", ar_dir,
+            files={
+                "config": os.path.join(ar_dir, os.path.basename(config_file)),
+                "output_param": os.path.join(ar_dir, os.path.basename(latest_galfit)) if matched_galfit_files else None,
+                "fits": output_file,
+                "image": comparison_png_path,
+                "summary": summary,
+                "console_log": console_log_path,
+            },
+            chi2_nu=fit_stats.get("chi2_nu"),
+            bic=fit_stats.get("bic"),
+            components=components,
+            metadata={"psf_trim": psf_trim} if psf_trim else None,
         )
-    except subprocess.TimeoutExpired:
-        return {
-            "status": "failure",
-            "error": "GALFIT execution timed out after 5 minutes",
-        }
-    except FileNotFoundError:
-        return {
-            "status": "failure",
-            "error": "GALFIT executable not found. Please ensure GALFIT is installed.",
-        }
-
-    # Combine stdout and stderr
-    full_output = proc.stdout + proc.stderr
-
-    if proc.returncode != 0:
-        return {
-            "status": "failure",
-            "error": f"GALFIT failed with return code {proc.returncode}",
-            "log": full_output,
-        }
 
-    # Get output file path from parsed config
-    output_file = config_paths.get("output", "")
-    if not output_file:
-        return {
-            "status": "failure",
-            "error": "Could not find output file path in config",
-        }
-
-    # Check if output file exists
-    if not os.path.exists(output_file):
-        return {
-            "status": "failure",
-            "error": f"GALFIT output file not created: {output_file}",
-            "log": full_output,
+        stats_lines = ""
+
+        chisq1d_nu = fit_stats.get("chisq1d_nu")
+        bic1d = fit_stats.get("bic1d")
+        chi2_nu = fit_stats.get("chi2_nu")
+        bic = fit_stats.get("bic")
+        sky_value = fit_stats.get("sky_value")
+
+        if chisq1d_nu is not None:
+            stats_lines += f"-2D χ²/ν (reduced chi-squared): {chi2_nu:.6f}\n"
+            stats_lines += f"-1D χ²/ν (reduced chi-squared): {chisq1d_nu:.6f}\n"
+        if bic1d is not None:
+            stats_lines += f"-1D BIC: {bic1d:.4f}\n"
+        if sky_value is not None:
+            stats_lines += f"-1D Sky Background: {sky_value:.6f}\n"
+
+        message = (
+            "GALFIT completed successfully.\n"
+            f"{stats_lines}"
+            "- input_param_file: the input feedme configuration file used for this run.\n"
+            "- output_param_file: the latest GALFIT output parameter file.\n"
+            "- optimized_fits_file: FITS file with original, model, and residual image extensions.\n"
+            "- image_file: 2×3 PNG (DATA LOW/HIGH DR | MODEL // RESIDUAL | RESIDUAL ZOOM | 1D SB profile).\n"
+            "- summary_file: Markdown file containing fitted parameters, chi-squared statistics, BIC, and observation metadata.\n"
+            "- console_log_file: GALFIT console log from this run.\n"
+        )
+        result = {
+            "status": "success",
+            "message": message,
+            "input_param_file": config_file,
+            "output_param_file": latest_galfit,  
+            "optimized_fits_file": output_file,      
+            "image_file": comparison_png_path,
+            "summary_file": summary,
+            "console_log_file": console_log_path,
+            "runtime": runtime_info,
         }
-
-    # Identify the latest galfit.[0-9]* file for parameter extraction
-    matched_galfit_files = glob.glob(os.path.join(working_dir, "galfit.[0-9]*"))
-    latest_galfit = "galfit.01"
-    param_file_for_plot = config_file # Fallback
-    if matched_galfit_files:
-        latest_galfit = max(matched_galfit_files, key=lambda f: int(f.rsplit(".", 1)[-1]))
-        param_file_for_plot = latest_galfit
-
-    # Create comparison PNG with sigma and mask if available
-    sigma_file = config_paths.get("sigma") or None
-    mask_file = config_paths.get("mask") or None
-    fit_region = config_paths.get("fit_region")
-
-    # Generate subcomps for SB profile component curves
-    comp_data = _generate_subcomps(latest_galfit, working_dir) if matched_galfit_files else None
-    comp_images = comp_data[0] if comp_data else None
-    comp_types = comp_data[1] if comp_data else None
-
-    # Use latest_galfit (fitted parameters) for component parameters in plot
-    comparison_png_path, statistics_1d = create_comparison_png(output_file, sigma_file, mask_file, fit_region,
-                                                param_file=param_file_for_plot,
-                                                comp_images=comp_images, comp_types=comp_types)
-
-    # Identify constraint file
-    constraint_file = config_paths.get("constraint") or None
-
-    # Extract summary information
-    summary, fit_stats = extract_summary_from_galfit(output_file, config_file,
-                                                     statistics_1d=statistics_1d,
-                                                     constraint_file=constraint_file)
-
-    # Cleanup the workspace
-    ws_dir = os.path.dirname(output_file)
-    ar_dir = os.path.join(ws_dir, "archives", "%s.%s" % (datetime.datetime.now().strftime("%Y%m%dT%H%M%S"), hashlib.md5(config_file.encode("utf-8")).hexdigest()[:8]))
-    os.makedirs(ar_dir, exist_ok=True)
-    # Save stdout+stderr to file for diagnose
-    console_log_path = os.path.join(ar_dir, "console.log")
-    with open(console_log_path, "w", encoding="utf-8") as f:
-        f.write(full_output)
-    fit_log_path = os.path.join(working_dir, "fit.log")
-    if os.path.exists(fit_log_path):
-        shutil.move(fit_log_path, ar_dir)
-    if os.path.exists(output_file):        
-        shutil.move(output_file, ar_dir)
-        output_file = os.path.join(ar_dir, os.path.basename(output_file))
-    if comparison_png_path:
-        shutil.move(comparison_png_path, ar_dir)
-        comparison_png_path = os.path.join(ar_dir, os.path.basename(comparison_png_path))
-    if summary:
-        shutil.move(summary, ar_dir)
-        summary = os.path.join(ar_dir, os.path.basename(summary))    
-
-    # Archive constraint file if referenced in config
-    if constraint_file and os.path.exists(constraint_file):
-        shutil.copy(constraint_file, ar_dir)
-
-    if matched_galfit_files:
-        shutil.copy(latest_galfit, ar_dir)
-    shutil.copy(config_file, ar_dir)
-    # Archive subcomps FITS if it was generated
-    subcomps_file = os.path.join(working_dir, "subcomps.fits")
-    if os.path.exists(subcomps_file):
-        shutil.move(subcomps_file, ar_dir)
-
-    stats_lines = ""
-
-    chisq1d_nu = fit_stats.get("chisq1d_nu")
-    bic1d = fit_stats.get("bic1d")
-    chi2_nu = fit_stats.get("chi2_nu")
-    bic = fit_stats.get("bic")
-    sky_value = fit_stats.get("sky_value")
-
-    if chisq1d_nu is not None:
-        stats_lines += f"-2D χ²/ν (reduced chi-squared): {chi2_nu:.6f}\n"
-        stats_lines += f"-1D χ²/ν (reduced chi-squared): {chisq1d_nu:.6f}\n"
-    if bic1d is not None:
-        stats_lines += f"-1D BIC: {bic1d:.4f}\n"
-    if sky_value is not None:
-        stats_lines += f"-1D Sky Background: {sky_value:.6f}\n"
-
-    message = (
-        "GALFIT completed successfully.\n"
-        f"{stats_lines}"
-        "- input_param_file: the input feedme configuration file used for this run.\n"
-        "- output_param_file: the latest GALFIT output parameter file.\n"
-        "- optimized_fits_file: FITS file with original, model, and residual image extensions.\n"
-        "- image_file: 2×3 PNG (DATA LOW/HIGH DR | MODEL // RESIDUAL | RESIDUAL ZOOM | 1D SB profile).\n"
-        "- summary_file: Markdown file containing fitted parameters, chi-squared statistics, BIC, and observation metadata.\n"
-        "- console_log_file: GALFIT console log from this run.\n"
-    )
-    return {
-        "status": "success",
-        "message": message,
-        "input_param_file": config_file,
-        "output_param_file": latest_galfit,  
-        "optimized_fits_file": output_file,      
-        "image_file": comparison_png_path,
-        "summary_file": summary,
-        "console_log_file": console_log_path,
-    }
+        if psf_trim:
+            result["psf_trim"] = psf_trim
+        if archive_compression:
+            result["archive_compression"] = archive_compression
+        return result
+    finally:
+        if trimmed_config and os.path.exists(trimmed_config):
+            os.unlink(trimmed_config)
@@ -16,14 +16,29 @@ from matplotlib.gridspec import GridSpec, GridSpecFromSubplotSpec
 from astropy.io import fits
 from typing import Any, Annotated, List, Dict, Tuple
 
+from .archive import (
+    archive_dedup_outputs_enabled,
+    compress_fits_for_archive,
+    dedupe_run_dir,
+    gc_object_store,
+    object_store_dir,
+    record_round,
+    summarize_compression,
+)
+from .fits_io import as_image, image_dtype, read_fits_array
+from .galfits_checkpoint import find_resumable_workplace, run_checkpointed
+from .gssummary import summary_stats
 from .pix2radec import suppress_stdout_stderr
+from .psf_prep import prepare_config_psfs, psf_trim_fraction, summarize_trims
+from .runtime_model import RuntimeRecorder, galfits_job_features
 from .render_original import render_asinh_panel
 from .sb_profile import render_sb_profile
 from .parse_lyric import (
     parse_image_infos_from_lyric,
     parse_region_info_from_lyric,
     extract_component_attributes,
-    generate_subcomps
+    generate_subcomps,
+    parse_component_types,
 )
 
 WORKFLOW_OUTPUT_DIR_RE = re.compile(r"^\d{8}_\d{6}_.+(?:_iter\d+)?$")
@@ -103,50 +118,10 @@ def _build_galfits_command(config_file: str, workplace: str, saveimgs: bool) ->
 def _parse_gssummary(summary_path: str) -> dict[str, Any]:
     """Parse a .gssummary file and extract key statistics.
 
-    Returns a dict with reduced_chisq, bic, per_band_chisq, and parameter values.
+    Returns a dict with reduced_chisq, bic, per_band_chisq, and parameter values
+    (read from the shared memoized parser, see ``gssummary.load_gssummary``).
     """
-    if not summary_path or not os.path.exists(summary_path):
-        return {}
-
-    with open(summary_path) as f:
-        content = f.read()
-
-    result: dict[str, Any] = {
-        "reduced_chisq": None,
-        "bic": None,
-        "per_band_chisq": {},
-        "parameters": {},
-    }
-
-    # Global reduced chi-squared
-    m = re.search(r"reduced\s+chi.*?[:\s]+([\d.]+)", content, re.IGNORECASE)
-    if m:
-        result["reduced_chisq"] = float(m.group(1))
-
-    # BIC
-    m = re.search(r"BIC\s*[:\s]+([\d.eE+-]+)", content, re.IGNORECASE)
-    if m:
-        result["bic"] = float(m.group(1))
-
-    # Per-band chi-squared (look for patterns like "band_xxx chisq: 1.23" or in tables)
-    for m in re.finditer(r"(band\s*\w+|f\d+w)\s*.*?(?:reduced\s+)?chi.*?[:\s]+([\d.]+)", content, re.IGNORECASE):
-        band_name = m.group(1).strip()
-        result["per_band_chisq"][band_name] = float(m.group(2))
-
-    # Free parameters (tab-separated name-value lines)
-    for line in content.splitlines():
-        line = line.strip()
-        if not line or line.startswith("#"):
-            continue
-        parts = line.split()
-        if len(parts) == 2:
-            name, value = parts
-            try:
-                result["parameters"][name] = float(value)
-            except ValueError:
-                pass
-
-    return result
+    return summary_stats(summary_path)
 
 def create_perband_comparison_png(
     lyric_file: str,
@@ -181,13 +156,13 @@ def create_perband_comparison_png(
             if len(hdul) != 5:
                 pngs[band] = "comparison png not created: expected 5 HDUs in result fits file, found %d" % len(hdul)
                 continue
-            original_data = hdul[4].data
-            model_data = hdul[3].data
-            sigma_data = hdul[2].data
-            residual_data = hdul[0].data
-            mask_data = hdul[1].data
+            original_data = as_image(read_fits_array(result_fits_file, 4, hdul=hdul))
+            model_data = as_image(read_fits_array(result_fits_file, 3, hdul=hdul))
+            sigma_data = as_image(read_fits_array(result_fits_file, 2, hdul=hdul))
+            residual_data = as_image(read_fits_array(result_fits_file, 0, hdul=hdul))
+            mask_data = read_fits_array(result_fits_file, 1, hdul=hdul)
             if mask_data is None:
-                mask_data = np.zeros_like(original_data, dtype=float)
+                mask_data = np.zeros_like(original_data, dtype=image_dtype())
             mask = np.where(mask_data > 0, 1, 0)
 
         components = extract_component_attributes(
@@ -301,7 +276,7 @@ def create_perband_comparison_png(
 
             # Normalize by background std from original image (significance map)
             bg_std = orig_info.get("std", 1.0)
-            resid_norm = resid_display / bg_std if bg_std > 0 else resid_display
+            resid_norm = resid_display / float(bg_std) if bg_std > 0 else resid_display
             # Set masked pixels to 0 before normalization
             if mask is not None:
                 resid_norm[mask > 0] = 0
@@ -318,7 +293,7 @@ def create_perband_comparison_png(
 
             # Overlay mask on residual (Opaque White)
             if mask is not None:
-                mask_overlay = np.zeros((*mask.shape, 4))
+                mask_overlay = np.zeros((*mask.shape, 4), dtype=image_dtype())
                 mask_overlay[mask > 0] = [1, 1, 1, 0.7]
                 ax3.imshow(mask_overlay, origin="lower", extent=plot_extent, interpolation='nearest')
 
@@ -418,13 +393,13 @@ def create_multiband_comparison_png(
         with fits.open(result_fits_file) as hdul:
             if len(hdul) != 5:
                 continue
-            original_data = hdul[4].data
-            model_data = hdul[3].data
-            sigma_data = hdul[2].data
-            residual_data = hdul[0].data
-            mask_data = hdul[1].data
+            original_data = as_image(read_fits_array(result_fits_file, 4, hdul=hdul))
+            model_data = as_image(read_fits_array(result_fits_file, 3, hdul=hdul))
+            sigma_data = as_image(read_fits_array(result_fits_file, 2, hdul=hdul))
+            residual_data = as_image(read_fits_array(result_fits_file, 0, hdul=hdul))
+            mask_data = read_fits_array(result_fits_file, 1, hdul=hdul)
             if mask_data is None:
-                mask_data = np.zeros_like(original_data, dtype=float)
+                mask_data = np.zeros_like(original_data, dtype=image_dtype())
             mask = np.where(mask_data > 0, 1, 0)
 
         components = extract_component_attributes(
@@ -564,7 +539,7 @@ def create_multiband_comparison_png(
             resid_display[~np.isfinite(resid_display)] = 0
 
             bg_std = orig_info.get("std", 1.0)
-            resid_norm = resid_display / bg_std if bg_std > 0 else resid_display
+            resid_norm = resid_display / float(bg_std) if bg_std > 0 else resid_display
             if mask is not None:
                 resid_norm[mask > 0] = 0
             plot_extent = None
@@ -578,7 +553,7 @@ def create_multiband_comparison_png(
                 interpolation='nearest', aspect='auto')
 
             if mask is not None:
-                mask_overlay = np.zeros((*mask.shape, 4))
+                mask_overlay = np.zeros((*mask.shape, 4), dtype=image_dtype())
                 mask_overlay[mask > 0] = [1, 1, 1, 0.7]
                 ax3.imshow(mask_overlay, origin='lower',
                            extent=plot_extent, interpolation='nearest')
@@ -653,14 +628,25 @@ def create_multiband_comparison_png(
 
 async def run_galfits(
     config_file: Annotated[str, "the path to the GalfitS (.lyric) configuration file"],
-    timeout_sec: Annotated[int, "timeout in seconds"] = 3600,
+    timeout_sec: Annotated[int | None, "timeout in seconds; default is estimated from past runs (3600 s without history)"] = None,
     extra_args: Annotated[list[str] | None, "extra GalfitS CLI args (e.g. ['--fit_method','optimizer','--num_steps','200'])"] = None,
     read_summary: Annotated[str | None, "path to previous .gssummary to carry forward best-fit parameters"] = None,
     prior_file: Annotated[str | None, "path to .prior file for mass/size constraints"] = None,
+    resume: Annotated[bool, "continue an interrupted run of this config from its last checkpoint"] = False,
+    checkpoint_every: Annotated[int | None, "opt-in: run in chunks of N optimizer steps, checkpointing each (needs --num_steps in extra_args); each chunk restarts GalfitS, resetting optimizer state and repeating load/trace, so the fit differs from an unchunked run"] = None,
+    psf_ee: Annotated[float | None, "trim each band's PSF to this encircled-energy fraction before fitting (e.g. 0.995); default PSF_TRIM_EE or off"] = None,
 ) -> dict[str, Any]:
     """Execute GalfitS (multi-band) with the given config file.
 
     Runs GalfitS as a subprocess and returns discovered artifacts (summary + PNGs) and logs.
+    With ``checkpoint_every`` the fit runs in chunks and each chunk's summary is
+    checkpointed to ``<workplace>/checkpoint/``; ``resume=True`` reuses the newest
+    unfinished run dir of the same config and continues from that checkpoint.
+    Chunking is opt-in: every chunk is a new GalfitS process, so Adam moments and
+    any LR schedule reset at each boundary and the data load / JAX trace repeat,
+    changing the fit trajectory and adding per-chunk overhead even without a resume.
+    With ``psf_ee`` the band PSFs are trimmed by encircled energy and GalfitS runs on
+    a ``_psftrim_<name>.lyric`` variant in the workplace.
     """
 
     if not config_file or not os.path.exists(config_file):
@@ -696,13 +682,31 @@ async def run_galfits(
             }
     else:
         galaxy_dir = config_dir
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        workplace_dir = os.path.join(galaxy_dir, "output", f"{timestamp}_{config_basename}")
-        os.makedirs(workplace_dir, exist_ok=True)
-        shutil.copy(config_file, workplace_dir)
+        resume_dir = find_resumable_workplace(galaxy_dir, config_file) if resume else None
+        if resume_dir:
+            workplace_dir = resume_dir
+        else:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            workplace_dir = os.path.join(galaxy_dir, "output", f"{timestamp}_{config_basename}")
+            os.makedirs(workplace_dir, exist_ok=True)
+            # plain copy: GalfitS runs on (and may rewrite) this lyric, so it must not share an inode
+            shutil.copy(config_file, workplace_dir)
         work_cwd = galaxy_dir
 
-    cmd = _build_galfits_command(config_file=config_file, workplace=workplace_dir, saveimgs=True)
+    # Optional PSF trimming: GalfitS runs on a lyric variant whose Ix4) point at trimmed PSFs
+    psf_trim, run_config = None, config_file
+    trim_fraction = psf_trim_fraction(psf_ee)
+    if trim_fraction:
+        try:
+            trimmed_lyric, trims = prepare_config_psfs(
+                config_file, trim_fraction,
+                os.path.join(workplace_dir, f"_psftrim_{os.path.basename(config_file)}"))
+            psf_trim = summarize_trims(trims)
+            run_config = trimmed_lyric or config_file
+        except Exception as e:  # noqa: BLE001
+            print(f"[run_galfits] PSF trimming skipped: {e}")
+
+    cmd = _build_galfits_command(config_file=run_config, workplace=workplace_dir, saveimgs=True)
 
     # Pass --readsummary through as-is. Caveat: GalfitS uses astropy.ascii.read
     # which only parses the `# free parameters:` section, so parameters that
@@ -719,20 +723,20 @@ async def run_galfits(
     if prior_file:
         cmd.extend(["--prior", os.path.abspath(prior_file)])
 
+    features = galfits_job_features(run_config, extra_args)
+    runtime = RuntimeRecorder("galfits", features, timeout=timeout_sec, config_file=config_file)
     try:
-        proc = subprocess.run(
+        proc = run_checkpointed(
             cmd,
-            capture_output=True,
-            text=True,
-            check=False,
-            timeout=timeout_sec,
+            config_file=config_file,
+            workplace=workplace_dir,
             cwd=work_cwd,
+            timeout_sec=runtime.timeout_s,
+            checkpoint_every=checkpoint_every,
+            resume=resume,
         )
     except subprocess.TimeoutExpired:
-        return {
-            "status": "failure",
-            "error": f"GalfitS execution timed out after {timeout_sec} seconds",
-        }
+        proc = None
     except FileNotFoundError:
         return {
             "status": "failure",
@@ -740,12 +744,33 @@ async def run_galfits(
             "command": cmd,
         }
 
+    if proc is not None and proc.resumed_from and proc.total_steps:
+        # 续跑只执行了剩余步数
+        features = {**features, "num_steps": proc.total_steps - proc.resumed_from}
+    if proc is None or proc.timed_out:
+        result = {
+            "status": "failure",
+            "error": f"GalfitS execution timed out after {runtime.timeout_s} seconds",
+            "runtime": runtime.done("timeout", features),
+        }
+        if proc is not None and proc.steps_done:
+            with open(os.path.join(workplace_dir, "run.log"), "a", encoding="utf-8") as f:
+                f.write((proc.stdout or "") + (proc.stderr or ""))
+            result["workplace"] = workplace_dir
+            result["checkpoint"] = proc.info()
+            result["error"] += (f"; checkpoint at step {proc.steps_done}/{proc.total_steps}, "
+                                "rerun with resume=True to continue")
+        return result
+
+    runtime_info = runtime.done("success" if proc.returncode == 0 else "failure", features) \
+        if proc.chunks else None
     log = (proc.stdout or "") + (proc.stderr or "")
 
-    # Save log to workplace (both success and failure)
+    # Save log to workplace (both success and failure); a resumed run appends
     log_path = os.path.join(workplace_dir, "run.log")
-    with open(log_path, "w", encoding="utf-8") as f:
-        f.write(log)
+    if proc.chunks:
+        with open(log_path, "a" if proc.resumed_from is not None else "w", encoding="utf-8") as f:
+            f.write(log)
 
     # Discover common outputs (even on non-zero returncode,
     # GalfitS may have produced valid result files before exiting)
@@ -773,11 +798,46 @@ async def run_galfits(
     comparison_png = None
     if result_fits and summary_files:
         comparison_png, component_attr_file = create_multiband_comparison_png(
-            lyric_file=os.path.join(workplace_dir, os.path.basename(config_file)),
+            lyric_file=os.path.join(workplace_dir, os.path.basename(run_config)),
             gssummary_file=summary_files[0],
             result_fits_file_list=result_fits,
         )
 
+    # Optional tile-compressed archival FITS (after the comparison PNG has been rendered).
+    # HDU 1/2/4 = mask/sigma/original stay lossless; HDU 0 (residual, primary) is kept as-is.
+    archive_compression = summarize_compression([
+        compress_fits_for_archive(f, keep_lossless=(1, 2, 4)) for f in result_fits
+    ])
+    store_dir = object_store_dir(os.path.dirname(workplace_dir))
+    if archive_dedup_outputs_enabled():
+        dedupe_run_dir(workplace_dir, store_dir)
+    gc_object_store(store_dir)
+
+    # Append this round to the galaxy's archive index (listing without globbing output/*)
+    summary_stats = _parse_gssummary(summary_files[0]) if summary_files else {}
+    archived_lyric = os.path.join(workplace_dir, os.path.basename(config_file))
+    try:
+        components = [{"name": name, "type": ptype}
+                      for name, ptype in parse_component_types(archived_lyric).items()]
+    except Exception:  # noqa: BLE001
+        components = []
+    if summary_files or result_fits:
+        record_round(
+            galaxy_dir, "galfits", workplace_dir,
+            files={
+                "config": archived_lyric,
+                "summary": summary_files[0] if summary_files else None,
+                "image": comparison_png,
+                "fits": result_fits[0] if result_fits else None,
+                "log": log_path,
+            },
+            chi2_nu=summary_stats.get("reduced_chisq"),
+            bic=summary_stats.get("bic"),
+            components=components,
+            status="success" if proc.returncode == 0 else "failure",
+            metadata={"psf_trim": psf_trim} if psf_trim else None,
+        )
+
     if proc.returncode != 0:
         has_results = bool(summary_files and result_fits)
         result = {
@@ -787,23 +847,22 @@ async def run_galfits(
             "command": cmd,
             "log": log,
             "log_path": log_path,
+            "runtime": runtime_info,
+            "psf_trim": psf_trim,
         }
         if has_results:
             result["summary_files"] = summary_files
             result["result_fits"] = result_fits
             result["comparison_png"] = comparison_png
             result["component_attr_file"] = component_attr_file
-            result["reduced_chisq"] = _parse_gssummary(summary_files[0]).get("reduced_chisq") if summary_files else None
+            result["reduced_chisq"] = summary_stats.get("reduced_chisq")
         return result
 
     # Additional output files from GalfitS
     constrain_files = sorted(glob(os.path.join(workplace_dir, "*.constrain")))
     params_files = sorted(glob(os.path.join(workplace_dir, "*.params")))
 
-    # Parse gssummary for structured statistics
-    summary_stats = _parse_gssummary(summary_files[0]) if summary_files else {}
-
-    return {
+    result = {
         "status": "success",
         "message": f"GalfitS completed successfully for {config_file}. Output files:\n"
         f"- summary_files : .gssummary files contain fitting parameters, χ² statistics, and model components for all bands\n"
@@ -823,15 +882,23 @@ async def run_galfits(
         "constrain_files": constrain_files,
         "params_files": params_files,
         "log_path": log_path,
+        "runtime": runtime_info,
         "reduced_chisq": summary_stats.get("reduced_chisq"),
         "bic": summary_stats.get("bic"),
         "per_band_chisq": summary_stats.get("per_band_chisq", {}),
         "parameters": summary_stats.get("parameters", {}),
     }
+    if proc.chunks > 1 or proc.resumed_from is not None:
+        result["checkpoint"] = proc.info()
+    if psf_trim:
+        result["psf_trim"] = psf_trim
+    if archive_compression:
+        result["archive_compression"] = archive_compression
+    return result
 
 async def run_galfits_image_fitting(
     config_file: Annotated[str, "the path to the GalfitS (.lyric) configuration file"],
-    timeout_sec: Annotated[int, "timeout in seconds"] = 3600,
+    timeout_sec: Annotated[int | None, "timeout in seconds; default is estimated from past runs (3600 s without history)"] = None,
     extra_args: Annotated[list[str] | None, "extra GalfitS CLI args (e.g. ['--fit_method','optimizer','--num_steps','200'])"] = None,
 ) -> dict[str, Any]:
     """Execute GalfitS (multi-band) with the given config file for image fitting.
@@ -887,7 +954,7 @@ async def run_galfits_sed_fitting(
 
 async def run_galfits_image_sed_fitting(
     config_file: Annotated[str, "the path to the GalfitS (.lyric) configuration file"],
-    timeout_sec: Annotated[int, "timeout in seconds"] = 3600,
+    timeout_sec: Annotated[int | None, "timeout in seconds; default is estimated from past runs (3600 s without history)"] = None,
     extra_args: Annotated[list[str] | None, "extra GalfitS CLI args (e.g. ['--fit_method','optimizer','--num_steps','200'])"] = None,
 ) -> dict[str, Any]:
     """Execute GalfitS (multi-band) with the given config file for combined image and sed fitting.
@@ -0,0 +1,436 @@
+"""runtime_model — 拟合作业的运行耗时历史、代价模型与自适应超时。
+
+固定超时（``run_galfit`` 300 s、``run_galfits`` 3600 s、``ImageFitting`` 1800 s）对小作业
+太宽（卡死时白等整段预算），对大的多波段拟合又太紧（收敛前被杀）。这里：
+
+- ``galfit_job_features`` / ``galfits_job_features`` 从配置文件取作业规模：拟合区域像素数
+  （H) / 各波段 Ix8 裁剪区）、卷积面积（GALFIT I) 卷积盒；GalfitS 为裁剪区 + PSF）、PSF 像素数、组件数、自由参数数、
+  波段数与 ``--num_steps``。FITS 只读 header（``fits_io.fits_metadata``）。
+- ``record_runtime`` 每次运行后向历史文件（``RUNTIME_HISTORY_FILE``，默认
+  ``~/.cache/galaxy_morphology_mcp/runtime_history.jsonl``）追加一行：工具、特征、墙钟时间、状态。
+  历史文件只增量读取新追加的行；某工具的记录超过 2 × ``HISTORY_WINDOW`` 条时，文件被
+  压缩为每个工具最近 ``HISTORY_WINDOW`` 条。
+- ``fit_cost_model`` 对成功作业做 log(墙钟) 的岭回归（特征取 log1p / 计数），每个工具
+  一个模型，按历史文件 mtime+size 记忆；残差标准差给出不确定度。
+- ``estimate_runtime`` 返回 ETA 与超时：``exp(预测 + 3σ) × 1.5``，夹在
+  [``MIN_TIMEOUT_S``, 8 × 默认超时] 之间；样本不足 ``MIN_SAMPLES`` 时退回默认超时。
+
+超时的作业（``status="timeout"``）不参与回归，而是作为删失下界：特征相近的作业曾在
+墙钟 t 时被杀，则超时至少取 ``CENSORED_TIMEOUT_FACTOR × t``（同样不超过 8 × 默认超时），
+模型与默认超时都受此约束。调用方显式传入超时时不做自适应；
+``RUNTIME_HISTORY=0`` 关闭记录与自适应，恢复固定超时。
+"""
+
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Annotated, Any, Optional
+
+import numpy as np
+
+from .atomic_io import match_target_mode
+
+DEFAULT_TIMEOUTS = {"galfit": 300, "galfits": 3600}
+FEATURE_NAMES = ("pixels", "conv_pixels", "psf_pixels", "n_components", "n_free", "n_bands", "num_steps")
+_LOG_FEATURES = {"pixels", "conv_pixels", "psf_pixels", "num_steps"}
+_SKY_RE = re.compile(r"^\s*0\)\s+sky\b", re.MULTILINE)
+
+MIN_SAMPLES = 10
+HISTORY_WINDOW = 2000         # 只用最近的记录拟合，适应硬件 / 版本变化
+RIDGE_LAMBDA = 1e-2
+TIMEOUT_SIGMAS = 3.0
+TIMEOUT_SAFETY = 1.5
+MIN_TIMEOUT_S = 30
+MAX_TIMEOUT_FACTOR = 8
+CENSORED_TIMEOUT_FACTOR = 2   # 超时记录是下界：同类作业的超时至少取其墙钟的 2 倍
+SIMILAR_SIZE_FACTOR = 2.0     # "特征相近"：规模类特征相差不超过 2 倍，计数类相差不超过 2
+SIMILAR_COUNT_DELTA = 2
+
+
+def runtime_history_enabled() -> bool:
+    return os.environ.get("RUNTIME_HISTORY", "1") == "1"
+
+
+def history_path() -> str:
+    return os.environ.get("RUNTIME_HISTORY_FILE") or os.path.join(
+        os.path.expanduser("~"), ".cache", "galaxy_morphology_mcp", "runtime_history.jsonl")
+
+
+# ── job features ──────────────────────────────────────────────────────────────
+
+def _empty_features() -> dict[str, float]:
+    return {name: 0 for name in FEATURE_NAMES}
+
+
+def _num_steps(extra_args) -> int:
+    args = [str(a) for a in (extra_args or [])]
+    for i, arg in enumerate(args):
+        value = args[i + 1] if arg == "--num_steps" and i + 1 < len(args) else (
+            arg.split("=", 1)[1] if arg.startswith("--num_steps=") else None)
+        if value is not None and value.isdigit():
+            return int(value)
+    return 0
+
+
+def _psf_shape(path: Optional[str], ext: int = 0) -> tuple[int, int]:
+    from .fits_io import fits_metadata
+
+    if not path or not os.path.isfile(path):
+        return (0, 0)
+    try:
+        shape = fits_metadata(path, ext)["shape"]
+    except Exception:  # noqa: BLE001
+        return (0, 0)
+    return (int(shape[-2]), int(shape[-1])) if len(shape) >= 2 else (0, 0)
+
+
+def _feedme_free_params(text: str) -> int:
+    """Count free-parameter flags (``1``) in the component blocks of a GALFIT feedme."""
+    n_free, comp_type = 0, None
+    for line in text.splitlines():
+        body = line.split("#", 1)[0].strip()
+        if body.startswith("0)"):
+            comp_type = body[2:].strip().lower()
+            continue
+        if comp_type is None or ")" not in body:
+            continue
+        key, _, rest = body.partition(")")
+        key, tokens = key.strip(), rest.split()
+        if key == "Z" or not tokens:
+            continue
+        # 位置 1) x y 与 Fourier 模 Fn) amp phase 各两个值；sky 的 1) 只有背景值
+        n_values = 2 if (key == "1" and comp_type != "sky") or key.startswith("F") else 1
+        n_free += sum(1 for t in tokens[n_values:2 * n_values] if t == "1")
+    return n_free
+
+
+def galfit_job_features(config_file: str) -> dict[str, float]:
+    """Size features of a GALFIT feedme (single band)."""
+    from .parse_feedme import load_feedme
+
+    features = _empty_features()
+    features["n_bands"] = 1
+    try:
+        doc = load_feedme(config_file)
+    except Exception:  # noqa: BLE001
+        return features
+    region = doc.paths.get("fit_region")
+    if region:
+        xmin, xmax, ymin, ymax = region
+        features["pixels"] = max(xmax - xmin + 1, 0) * max(ymax - ymin + 1, 0)
+    conv = doc.header.get("I", "").split()
+    if len(conv) >= 2 and conv[0].isdigit() and conv[1].isdigit():
+        features["conv_pixels"] = int(conv[0]) * int(conv[1])
+    psf_ny, psf_nx = _psf_shape(doc.paths.get("psf"))
+    features["psf_pixels"] = psf_ny * psf_nx
+    features["n_components"] = len(doc.components) + len(_SKY_RE.findall(doc.text))
+    features["n_free"] = _feedme_free_params(doc.text)
+    return features
+
+
+def _lyric_free_params(doc) -> int:
+    n_free = 0
+    for line in doc.entries():
+        if line.family not in ("P", "N", "G", "F") or not line.label:
+            continue
+        try:
+            value = line.value
+        except Exception:  # noqa: BLE001
+            continue
+        if isinstance(value, list) and len(value) == 5 and value[-1] == 1:
+            n_free += 1
+        elif isinstance(value, list) and value and all(isinstance(v, list) and len(v) == 5 for v in value):
+            n_free += sum(1 for v in value if v[-1] == 1)
+    return n_free
+
+
+def galfits_job_features(config_file: str, extra_args=None) -> dict[str, float]:
+    """Size features of a GalfitS lyric (summed over bands) plus ``--num_steps``."""
+    from .lyric_document import load_lyric
+    from .parse_lyric import parse_image_infos_from_lyric
+
+    features = _empty_features()
+    features["num_steps"] = _num_steps(extra_args)
+    try:
+        doc = load_lyric(config_file)
+    except Exception:  # noqa: BLE001
+        return features
+    features["n_components"] = sum(len(doc.labels(f)) for f in ("P", "N", "F"))
+    features["n_free"] = _lyric_free_params(doc)
+    try:
+        infos = parse_image_infos_from_lyric(config_file)
+    except Exception:  # noqa: BLE001
+        features["n_bands"] = len(doc.labels("I"))
+        return features
+    features["n_bands"] = len(infos)
+    for info in infos:
+        width = height = 0
+        if info.fitting_region:
+            xmin, xmax, ymin, ymax = info.fitting_region
+            width, height = max(xmax - xmin, 0), max(ymax - ymin, 0)
+            features["pixels"] += width * height
+        psf = info.psf if isinstance(info.psf, (list, tuple)) else [info.psf, 0]
+        psf_ny, psf_nx = _psf_shape(psf[0], int(psf[1] or 0))
+        features["psf_pixels"] += psf_ny * psf_nx
+        # GalfitS 对整块裁剪区做 FFT 卷积：卷积尺寸为 裁剪区 + PSF - 1
+        if width and height:
+            features["conv_pixels"] += (width + psf_nx - 1) * (height + psf_ny - 1)
+    return features
+
+
+# ── history ───────────────────────────────────────────────────────────────────
+
+_HISTORY_LOCK = threading.Lock()
+_HISTORY = {"path": None, "offset": 0, "records": []}
+
+
+def _write_history(path: str, records: list[dict]) -> None:
+    fd, tmp = tempfile.mkstemp(prefix=".runtime_history.", suffix=".tmp", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for rec in records:
+                f.write(json.dumps(rec) + "\n")
+        match_target_mode(tmp, path)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def _trim_history(records: list[dict]) -> list[dict]:
+    """每个工具只保留最近 ``HISTORY_WINDOW`` 条，保持原顺序。"""
+    kept, seen = [], {}
+    for rec in reversed(records):
+        tool = rec.get("tool")
+        if seen.get(tool, 0) < HISTORY_WINDOW:
+            seen[tool] = seen.get(tool, 0) + 1
+            kept.append(rec)
+    return kept[::-1]
+
+
+def _history_records() -> list[dict]:
+    """历史记录（调用方持有 ``_HISTORY_LOCK``）：只读取上次之后新追加的行。"""
+    path = history_path()
+    if _HISTORY["path"] != path:
+        _HISTORY.update(path=path, offset=0, records=[])
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        _HISTORY.update(offset=0, records=[])
+        return _HISTORY["records"]
+    if size < _HISTORY["offset"]:        # 被其他进程压缩过：从头重读
+        _HISTORY.update(offset=0, records=[])
+    if size == _HISTORY["offset"]:
+        return _HISTORY["records"]
+    try:
+        with open(path, "rb") as f:
+            f.seek(_HISTORY["offset"])
+            chunk = f.read()
+    except OSError as e:
+        print(f"[runtime_model] cannot read runtime history {path}: {e}")
+        return _HISTORY["records"]
+    complete = chunk[:chunk.rfind(b"\n") + 1]     # 末尾未写完的行留到下次
+    for line in complete.splitlines():
+        try:
+            _HISTORY["records"].append(json.loads(line))
+        except ValueError:
+            continue
+    _HISTORY["offset"] += len(complete)
+
+    counts: dict = {}
+    for rec in _HISTORY["records"]:
+        counts[rec.get("tool")] = counts.get(rec.get("tool"), 0) + 1
+    if counts and max(counts.values()) > 2 * HISTORY_WINDOW:
+        trimmed = _trim_history(_HISTORY["records"])
+        try:
+            _write_history(path, trimmed)
+            _HISTORY.update(offset=os.path.getsize(path), records=trimmed)
+        except OSError as e:
+            print(f"[runtime_model] cannot trim runtime history {path}: {e}")
+    return _HISTORY["records"]
+
+
+def record_runtime(tool: str, features: dict, wall_s: float, status: str = "success",
+                   config_file: Optional[str] = None) -> None:
+    """Append one run to the history file; never raises."""
+    if not runtime_history_enabled():
+        return
+    path = history_path()
+    record = {
+        "tool": tool,
+        "features": {k: features.get(k, 0) for k in FEATURE_NAMES},
+        "wall_s": round(float(wall_s), 3),
+        "status": status,
+        "config": config_file,
+        "time": datetime.now().isoformat(timespec="seconds"),
+    }
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with _HISTORY_LOCK, open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError as e:
+        print(f"[runtime_model] cannot record runtime to {path}: {e}")
+
+
+def load_history(tool: Optional[str] = None) -> list[dict]:
+    with _HISTORY_LOCK:
+        records = _history_records()
+        return [r for r in records if tool is None or r.get("tool") == tool]
+
+
+# ── cost model ────────────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class CostModel:
+    tool: str
+    coef: tuple          # intercept first, then FEATURE_NAMES order
+    sigma: float         # residual std of log(wall_s)
+    samples: int
+
+    def predict_log(self, features: dict) -> float:
+        return float(np.dot(self.coef, _design_row(features)))
+
+
+def _design_row(features: dict) -> np.ndarray:
+    row = [1.0]
+    for name in FEATURE_NAMES:
+        value = float(features.get(name, 0) or 0)
+        row.append(math.log1p(max(value, 0.0)) if name in _LOG_FEATURES else value)
+    return np.asarray(row)
+
+
+_MODEL_LOCK = threading.Lock()
+_MODELS: dict[str, tuple] = {}     # tool -> (history stamp, model)
+
+
+def fit_cost_model(tool: str) -> Optional[CostModel]:
+    """Ridge fit of log(wall_s) on the job features of successful runs; None if too few."""
+    path = history_path()
+    try:
+        st = os.stat(path)
+        stamp = (path, st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+    with _MODEL_LOCK:
+        cached = _MODELS.get(tool)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+    runs = [r for r in load_history(tool) if r.get("status") == "success" and r.get("wall_s", 0) > 0]
+    runs = runs[-HISTORY_WINDOW:]
+    model = None
+    if len(runs) >= MIN_SAMPLES:
+        X = np.stack([_design_row(r.get("features", {})) for r in runs])
+        y = np.log([r["wall_s"] for r in runs])
+        penalty = RIDGE_LAMBDA * np.eye(X.shape[1])
+        penalty[0, 0] = 0.0     # 不惩罚截距
+        coef = np.linalg.solve(X.T @ X + penalty, X.T @ y)
+        resid = y - X @ coef
+        dof = max(len(runs) - X.shape[1], 1)
+        sigma = float(np.sqrt(np.sum(resid ** 2) / dof))
+        model = CostModel(tool=tool, coef=tuple(float(c) for c in coef), sigma=sigma, samples=len(runs))
+    with _MODEL_LOCK:
+        _MODELS[tool] = (stamp, model)
+    return model
+
+
+def clear_cost_models() -> None:
+    with _MODEL_LOCK:
+        _MODELS.clear()
+    with _HISTORY_LOCK:
+        _HISTORY.update(path=None, offset=0, records=[])
+
+
+def _similar(a: dict, b: dict) -> bool:
+    for name in FEATURE_NAMES:
+        x, y = float(a.get(name, 0) or 0), float(b.get(name, 0) or 0)
+        if name in _LOG_FEATURES:
+            if max(x, y) > SIMILAR_SIZE_FACTOR * max(min(x, y), 1.0):
+                return False
+        elif abs(x - y) > SIMILAR_COUNT_DELTA:
+            return False
+    return True
+
+
+def censored_timeout_floor(tool: str, features: dict) -> tuple[float, int]:
+    """Lower bound on the timeout from timed-out runs of similar jobs: ``(floor_s, n_timeouts)``."""
+    walls = [float(r.get("wall_s", 0) or 0) for r in load_history(tool)
+             if r.get("status") == "timeout" and _similar(features, r.get("features", {}))]
+    if not walls:
+        return 0.0, 0
+    return CENSORED_TIMEOUT_FACTOR * max(walls), len(walls)
+
+
+def estimate_runtime(tool: str, features: dict, default_timeout: Optional[float] = None) -> dict[str, Any]:
+    """ETA and adaptive timeout for one job.
+
+    Returns ``{"eta_s", "timeout_s", "source", "samples", "sigma", "censored"}``; ``source``
+    is ``"model"`` or ``"default"`` (history disabled or fewer than ``MIN_SAMPLES`` runs).
+    ``censored`` counts timed-out runs of similar jobs; the timeout is at least
+    ``CENSORED_TIMEOUT_FACTOR`` × their longest wall time.
+    """
+    default_timeout = default_timeout or DEFAULT_TIMEOUTS.get(tool, 3600)
+    if not runtime_history_enabled():
+        return {"eta_s": None, "timeout_s": int(default_timeout), "source": "default",
+                "samples": 0, "sigma": None, "censored": 0}
+    model = fit_cost_model(tool)
+    floor, censored = censored_timeout_floor(tool, features)
+    ceiling = MAX_TIMEOUT_FACTOR * default_timeout
+    if model is None:
+        timeout = min(max(default_timeout, floor), ceiling)
+        return {"eta_s": None, "timeout_s": int(math.ceil(timeout)), "source": "default",
+                "samples": 0, "sigma": None, "censored": censored}
+    log_eta = model.predict_log(features)
+    eta = math.exp(log_eta)
+    timeout = math.exp(log_eta + TIMEOUT_SIGMAS * model.sigma) * TIMEOUT_SAFETY
+    timeout = min(max(timeout, MIN_TIMEOUT_S, floor), ceiling)
+    return {"eta_s": round(eta, 1), "timeout_s": int(math.ceil(timeout)), "source": "model",
+            "samples": model.samples, "sigma": round(model.sigma, 4), "censored": censored}
+
+
+class RuntimeRecorder:
+    """Context helper: estimate before a run, record wall time after it.
+
+    ``timeout_s`` is the explicit ``timeout`` if given, else the adaptive estimate.
+    """
+
+    def __init__(self, tool: str, features: dict, timeout: Optional[float] = None,
+                 default_timeout: Optional[float] = None, config_file: Optional[str] = None):
+        self.tool, self.features, self.config_file = tool, features, config_file
+        self.estimate = estimate_runtime(tool, features, default_timeout)
+        if timeout:
+            self.estimate = {**self.estimate, "timeout_s": int(timeout), "source": "explicit"}
+        self.timeout_s = self.estimate["timeout_s"]
+        self._start = time.monotonic()
+
+    def done(self, status: str, features: Optional[dict] = None) -> dict:
+        wall = time.monotonic() - self._start
+        record_runtime(self.tool, features or self.features, wall, status, self.config_file)
+        return {**self.estimate, "wall_s": round(wall, 3)}
+
+
+def estimate_fit_runtime(
+    config_file: Annotated[str, "path to a GALFIT feedme or GalfitS .lyric configuration file"],
+    extra_args: Annotated[list[str] | None, "extra GalfitS CLI args (e.g. ['--num_steps','200'])"] = None,
+) -> dict[str, Any]:
+    """Estimate wall time (ETA) and an adaptive timeout for a fitting job from past run history.
+
+    The job size (fit pixels, convolution box, PSF size, components, free parameters,
+    bands, steps) is read from the config; the estimate comes from a cost model fitted
+    to previous runs of the same tool.
+    """
+    if not config_file or not os.path.isfile(config_file):
+        return {"status": "failure", "error": f"Config file not found: {config_file}"}
+    if config_file.endswith(".lyric"):
+        tool, features = "galfits", galfits_job_features(config_file, extra_args)
+    else:
+        tool, features = "galfit", galfit_job_features(config_file)
+    return {"status": "success", "tool": tool, "features": features,
+            **estimate_runtime(tool, features)}
@@ -11,6 +11,10 @@ import matplotlib.pyplot as plt
 from matplotlib.patches import Ellipse as EllipsePatch
 from matplotlib.colors import Normalize
 
+from .fits_io import image_dtype
+from .image_moments import positive_moments
+from .parse_feedme import DEFAULT_PLTSCALE, DEFAULT_ZEROPOINT, load_feedme
+
 try:
     from photutils.isophote import EllipseSample, Ellipse
     from photutils.isophote.geometry import EllipseGeometry
@@ -24,18 +28,11 @@ DEFAULT_COLORS = ['#1f77b4', '#2ca02c', '#ff7f0e', '#d62728',
 integrmode = 'nearest_neighbor'
 def parse_photometry_params(param_file: str) -> tuple[float, float]:
     """Parse zeropoint (J) and plate scale (K) from a GALFIT parameter file."""
-    zeropoint, pltscale = 21.097, 0.750
     try:
-        with open(param_file) as f:
-            for line in f:
-                s = line.strip()
-                if s.startswith("J)"):
-                    zeropoint = float(s.split()[1])
-                elif s.startswith("K)"):
-                    pltscale = float(s.split()[1])
+        doc = load_feedme(param_file)
     except Exception:
-        pass
-    return zeropoint, pltscale
+        return DEFAULT_ZEROPOINT, DEFAULT_PLTSCALE
+    return doc.zeropoint, doc.pltscale
 
 def determine_center(image, mask=None):
     """确定拟合中心
@@ -82,9 +79,7 @@ def get_initial_params(image, mask=None):
 
     # Find peak in central region
     if mask is not None and np.any(mask > 0):
-        masked = image.copy()
-        masked[mask > 0] = -np.inf
-        central_masked = masked[y_start:y_end, x_start:x_end]
+        central_masked = np.where(mask[y_start:y_end, x_start:x_end] > 0, -np.inf, central_region)
         peak_local_y, peak_local_x = np.unravel_index(np.argmax(central_masked), central_masked.shape)
     else:
         peak_local_y, peak_local_x = np.unravel_index(np.argmax(central_region), central_region.shape)
@@ -95,27 +90,18 @@ def get_initial_params(image, mask=None):
     cx, cy = float(peak_x), float(peak_y)
     # cx, cy = determine_center(image)
 
-    # 用二阶矩估计 ellipticity 和 PA
-    positive = image > 0
-    if mask is not None:
-        positive &= ~mask
-
-    if np.sum(positive) < 10:
+    # 用二阶矩估计 ellipticity 和 PA（按行块流式累加，不构造整幅坐标网格）
+    mom = positive_moments(image, mask, center=(cx, cy))
+    if mom["n"] < 10:
         return cx, cy, 0.2, 0.0, max(3, min(nx, ny) // 6)
 
-    values = np.where(positive, image, 0)
-    total = values.sum()
+    total = mom["total"]
     if total <= 0:
         return cx, cy, 0.2, 0.0, max(3, min(nx, ny) // 6)
 
-    yy, xx = np.indices(image.shape)
-    dx = xx - cx
-    dy = yy - cy
-    w = values / total
-
-    x2 = np.sum(w * dx * dx)
-    y2 = np.sum(w * dy * dy)
-    xy = np.sum(w * dx * dy)
+    x2 = mom["sxx"] / total
+    y2 = mom["syy"] / total
+    xy = mom["sxy"] / total
 
     # 主轴方向
     theta = 0.5 * np.arctan2(2 * xy, x2 - y2)
@@ -277,10 +263,11 @@ def extract_profile(image_data, geometry, x_offset=0, y_offset=0, mask=None):
                 continue
             intensities = s[2]
             if len(intensities) > 0:
-                med = np.mean(intensities)
+                # float64 累加：float32 图像（IMAGE_PRECISION=float32）下轮廓均值仍为双精度
+                med = np.mean(intensities, dtype=np.float64)
                 sma_arr.append(sma)
                 intensity_arr.append(med)
-                intensity_err_arr.append(np.std(intensities)/np.sqrt(len(intensities)))
+                intensity_err_arr.append(np.std(intensities, dtype=np.float64)/np.sqrt(len(intensities)))
         except Exception:
             continue
     return np.array(sma_arr), np.array(intensity_arr), np.array(intensity_err_arr)
@@ -434,7 +421,7 @@ def render_sb_profile(ax_main, ax_resid, original_data, sigma_data, model_data,
 
     # Component profiles (image-based from GALFIT subcomps)
     if comp_images and comp_types:
-        comp_fluxes = [np.nansum(img) for img in comp_images]
+        comp_fluxes = [np.nansum(img, dtype=np.float64) for img in comp_images]
         total_model_flux = np.sum(comp_fluxes)
         comp_fractions = [f / total_model_flux if total_model_flux > 0 else 0
                           for f in comp_fluxes]
@@ -544,7 +531,7 @@ def render_isophote_panel(ax, image_data, isolist=None, mask=None,
 
     # Mask overlay (same style as first column)
     if mask is not None and np.any(mask > 0):
-        mask_overlay = np.zeros((*mask.shape, 4))
+        mask_overlay = np.zeros((*mask.shape, 4), dtype=image_dtype())
         mask_overlay[mask > 0] = [0, 0, 0, 0.7]
         ax.imshow(mask_overlay, origin='lower')
 
@@ -0,0 +1,296 @@
+"""validate_configs — 目录树级别的 lyric / feedme 批量校验（进程池并行）。
+
+巡天开跑前需要检查成千上万份配置；逐个调用 ``check_lyric_file`` 太慢，feedme 也没有
+对应的校验器。``validate_config_tree`` 递归扫描目录，对每个文件：
+
+- ``*.lyric``：``check_lyric_file``（``LYRIC_SECTION_SCHEMA`` 等全部静态规则），再检查
+  各波段 ``Ix1/Ix3/Ix4/Ix6)`` 引用的 FITS 是否存在，sigma / mask 与输入图像形状一致；
+- ``*.feedme`` / ``galfit.NN``：``parse_feedme`` + ``parse_components``，检查 A)/C)/D)/F)/G)
+  引用的文件、至少一个非 sky 组件、H) 拟合区间合法且落在输入图像内；
+
+FITS 只读 header（``fits_io.fits_metadata``），不解码像素。文件分发到进程池并行校验，
+结果写成机器可读的 JSON 报告（逐文件状态、错误、FITS 形状与耗时）。
+"""
+
+import concurrent.futures
+import datetime
+import fnmatch
+import json
+import os
+import re
+import tempfile
+import time
+from typing import Annotated, Any, Optional
+
+from .atomic_io import match_target_mode
+from .fits_io import fits_metadata
+from .lyric_document import load_lyric
+from .modify_lyric import check_lyric_file
+from .parse_feedme import parse_components, parse_feedme
+
+REPORT_VERSION = 1
+DEFAULT_REPORT_NAME = "config_validation.json"
+LYRIC_PATTERNS = ("*.lyric",)
+FEEDME_PATTERNS = ("*.feedme", "*galfit.[0-9][0-9]")
+# 少于该数量时直接在当前进程校验，避免进程池启动开销
+INLINE_THRESHOLD = 8
+MAX_REPORTED_INVALID = 20
+
+# lyric 图像段：索引 -> 角色（Ix1 image, Ix3 sigma, Ix4 psf, Ix6 mask）
+_LYRIC_FITS_ROLES = {1: "image", 3: "sigma", 4: "psf", 6: "mask"}
+_NO_IMAGE = {"", "noimg", "none"}
+_FITS_EXT_RE = re.compile(r"^(.*?)\[(\d+)\]$")
+
+
+def _config_kind(name: str) -> Optional[str]:
+    if any(fnmatch.fnmatch(name, p) for p in LYRIC_PATTERNS):
+        return "lyric"
+    if any(fnmatch.fnmatch(name, p) for p in FEEDME_PATTERNS):
+        return "feedme"
+    return None
+
+
+def discover_configs(root: str) -> list[tuple[str, str]]:
+    """Walk ``root`` and return sorted ``(path, kind)`` pairs; hidden directories are skipped."""
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+        for name in sorted(filenames):
+            kind = _config_kind(name)
+            if kind is not None:
+                found.append((os.path.join(dirpath, name), kind))
+    return found
+
+
+def _fits_shape(path: str, ext: int, role: str, errors: list, fits_info: list) -> Optional[tuple]:
+    """Header-only shape of ``path[ext]``; records a problem in ``errors`` if unavailable."""
+    if not os.path.isfile(path):
+        errors.append(f"{role} file not found: {path}")
+        return None
+    try:
+        shape = tuple(fits_metadata(path, ext)["shape"])
+    except Exception as e:
+        errors.append(f"{role} FITS header unreadable ({path}[{ext}]): {e}")
+        return None
+    fits_info.append({"role": role, "path": path, "ext": ext, "shape": list(shape)})
+    if len(shape) < 2:
+        errors.append(f"{role} FITS {path}[{ext}] is not an image (shape {shape})")
+        return None
+    return shape[-2:]
+
+
+def _lyric_fits_refs(lyric_file: str) -> dict[str, dict[str, tuple[str, int]]]:
+    """``{label: {role: (abs_path, ext)}}`` for the image sections of a lyric file."""
+    config_dir = os.path.dirname(os.path.abspath(lyric_file))
+    refs: dict[str, dict[str, tuple[str, int]]] = {}
+    for line in load_lyric(lyric_file).entries():
+        role = _LYRIC_FITS_ROLES.get(line.index) if line.family == "I" and line.label else None
+        if role is None:
+            continue
+        parts = [p.strip() for p in line.value_str.strip("[]").split(",")]
+        if not parts or parts[0].lower() in _NO_IMAGE:
+            continue
+        try:
+            ext = int(parts[1]) if len(parts) > 1 and parts[1] else 0
+        except ValueError:
+            ext = 0
+        path = parts[0] if os.path.isabs(parts[0]) else os.path.normpath(os.path.join(config_dir, parts[0]))
+        refs.setdefault(line.label, {})[role] = (path, ext)
+    return refs
+
+
+def _validate_lyric(path: str, check_fits: bool) -> dict[str, Any]:
+    errors: list[str] = []
+    fits_info: list[dict] = []
+
+    result = check_lyric_file(path)
+    if result["status"] != "success":
+        bullets = result["message"].split("\n  - ")
+        errors.extend(bullets[1:] if len(bullets) > 1 else [result["message"]])
+        if not os.path.isfile(path):
+            return {"errors": errors, "warnings": [], "fits": fits_info}
+
+    if check_fits:
+        for label, roles in sorted(_lyric_fits_refs(path).items()):
+            if "image" not in roles:
+                errors.append(f"I{label}1) input image is missing")
+            shapes = {role: _fits_shape(p, ext, f"I{label} {role}", errors, fits_info)
+                      for role, (p, ext) in roles.items()}
+            ref = shapes.get("image")
+            for role in ("sigma", "mask"):
+                if ref is not None and shapes.get(role) is not None and shapes[role] != ref:
+                    errors.append(f"I{label} {role} shape {shapes[role]} does not match image shape {ref}")
+    return {"errors": errors, "warnings": [], "fits": fits_info}
+
+
+def _split_ext(path: str) -> tuple[str, int]:
+    m = _FITS_EXT_RE.match(path)
+    return (m.group(1), int(m.group(2))) if m else (path, 0)
+
+
+def _validate_feedme(path: str, check_fits: bool) -> dict[str, Any]:
+    errors: list[str] = []
+    warnings: list[str] = []
+    fits_info: list[dict] = []
+
+    try:
+        paths = parse_feedme(path)
+        components = parse_components(path)
+    except Exception as e:
+        return {"errors": [f"cannot parse feedme: {e}"], "warnings": [], "fits": fits_info}
+
+    if not paths["input"]:
+        errors.append("A) input image is missing")
+    if not paths["output"]:
+        errors.append("B) output image block is missing")
+    if not components:
+        errors.append("no fit components (only sky or none)")
+
+    region = paths["fit_region"]
+    if region is None:
+        warnings.append("H) fitting region missing; GALFIT will fit the whole image")
+    else:
+        xmin, xmax, ymin, ymax = region
+        if xmin < 1 or ymin < 1 or xmin >= xmax or ymin >= ymax:
+            errors.append(f"H) invalid fitting region {region}")
+            region = None
+
+    if check_fits:
+        ref = None
+        if paths["input"]:
+            ref = _fits_shape(*_split_ext(paths["input"]), "A) input", errors, fits_info)
+        for key, role in (("sigma", "C) sigma"), ("mask", "F) mask")):
+            value = paths[key]
+            if not value:
+                continue
+            if not value.lower().endswith((".fits", ".fit", ".fits.gz", "]")):
+                # F) 也可以是 ASCII 坐标列表：只检查存在性
+                if not os.path.isfile(value):
+                    errors.append(f"{role} file not found: {value}")
+                continue
+            shape = _fits_shape(*_split_ext(value), role, errors, fits_info)
+            if ref is not None and shape is not None and shape != ref:
+                errors.append(f"{role} shape {shape} does not match input shape {ref}")
+        if paths["psf"]:
+            _fits_shape(*_split_ext(paths["psf"]), "D) psf", errors, fits_info)
+        if paths["constraint"] and not os.path.isfile(paths["constraint"]):
+            errors.append(f"G) constraint file not found: {paths['constraint']}")
+        if ref is not None and region is not None:
+            ny, nx = ref
+            if region[1] > nx or region[3] > ny:
+                errors.append(f"H) fitting region {region} exceeds input image ({nx} x {ny})")
+
+    return {"errors": errors, "warnings": warnings, "fits": fits_info}
+
+
+def _validate_one(item: tuple[str, str, bool]) -> dict[str, Any]:
+    """Process-pool worker: validate one config file and time it."""
+    path, kind, check_fits = item
+    t0 = time.perf_counter()
+    try:
+        if kind == "lyric":
+            result = _validate_lyric(path, check_fits)
+        else:
+            result = _validate_feedme(path, check_fits)
+    except Exception as e:
+        result = {"errors": [f"validator crashed: {type(e).__name__}: {e}"], "warnings": [], "fits": []}
+    return {
+        "path": path,
+        "kind": kind,
+        "status": "invalid" if result["errors"] else "valid",
+        **result,
+        "elapsed_s": round(time.perf_counter() - t0, 6),
+    }
+
+
+def _write_json_atomic(path: str, data: dict) -> None:
+    dirname = os.path.dirname(os.path.abspath(path))
+    os.makedirs(dirname, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=dirname, prefix=".validation_", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        match_target_mode(tmp, path)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def validate_config_tree(
+    root_dir: Annotated[str, "Directory to scan recursively for *.lyric, *.feedme and galfit.NN files"],
+    report_file: Annotated[Optional[str], "Path of the JSON report. Defaults to <root_dir>/config_validation.json"] = None,
+    max_workers: Annotated[Optional[int], "Number of worker processes (default: CPU count; 1 = run in-process)"] = None,
+    check_fits: Annotated[bool, "Also verify referenced FITS files exist and have matching shapes (header-only)"] = True,
+) -> dict:
+    """
+    Validate every GalfitS lyric and GALFIT feedme file under a directory tree in parallel.
+
+    Lyric files go through check_lyric_file (section schema, 5-tuples, identifiers, ...);
+    feedme files through parse_feedme/parse_components (paths, components, H) region).
+    Referenced FITS files are checked for existence and consistent shapes using headers only.
+    A machine-readable JSON report with per-file results and timings is written to report_file.
+
+    Returns:
+        dict: status, report_file, summary counts/timings, and the first invalid files with their errors.
+    """
+    if not os.path.isdir(root_dir):
+        return {"status": "failure", "error": f"Directory not found: {root_dir}"}
+
+    root_dir = os.path.abspath(root_dir)
+    report_file = report_file or os.path.join(root_dir, DEFAULT_REPORT_NAME)
+    t0 = time.perf_counter()
+    configs = discover_configs(root_dir)
+    discover_s = time.perf_counter() - t0
+
+    workers = max(1, max_workers or os.cpu_count() or 1)
+    items = [(path, kind, check_fits) for path, kind in configs]
+    if workers == 1 or len(items) < INLINE_THRESHOLD:
+        workers = 1
+        files = [_validate_one(item) for item in items]
+    else:
+        workers = min(workers, len(items))
+        chunksize = max(1, len(items) // (workers * 4))
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            files = list(pool.map(_validate_one, items, chunksize=chunksize))
+    wall_s = time.perf_counter() - t0
+
+    by_kind: dict[str, dict[str, int]] = {}
+    for entry in files:
+        counts = by_kind.setdefault(entry["kind"], {"total": 0, "valid": 0, "invalid": 0})
+        counts["total"] += 1
+        counts[entry["status"]] += 1
+    invalid = [entry for entry in files if entry["status"] == "invalid"]
+    summary = {
+        "total": len(files),
+        "valid": len(files) - len(invalid),
+        "invalid": len(invalid),
+        "by_kind": by_kind,
+        "workers": workers,
+        "discover_s": round(discover_s, 6),
+        "wall_s": round(wall_s, 6),
+        "cpu_s": round(sum(entry["elapsed_s"] for entry in files), 6),
+    }
+    report = {
+        "version": REPORT_VERSION,
+        "root": root_dir,
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "check_fits": check_fits,
+        "summary": summary,
+        "files": files,
+    }
+    try:
+        _write_json_atomic(report_file, report)
+    except OSError as e:
+        return {"status": "failure", "error": f"Write report error: {e}", "summary": summary}
+
+    print(f"[validate_configs] {summary['valid']}/{summary['total']} valid in {wall_s:.2f}s "
+          f"({workers} worker(s)) -> {report_file}")
+    return {
+        "status": "success",
+        "report_file": report_file,
+        "summary": summary,
+        "invalid": [{"path": e["path"], "kind": e["kind"], "errors": e["errors"]}
+                    for e in invalid[:MAX_REPORTED_INVALID]],
+    }
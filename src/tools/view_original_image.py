@@ -10,6 +10,7 @@ def view_original_image(
     image_file: Annotated[str, "Path to the galaxy image file [png/jpg] to be classified"],
     source_id: Annotated[str, "Identifier for the source/galaxy in the image"] = "",
     custom_instructions: Annotated[str, "Optional custom instructions to guide the VLM classification"] = "",
+    use_cache: Annotated[bool, "Reuse cached VLM responses for identical requests; False forces fresh calls"] = True,
 ) -> dict[str, Any]:
     """
     Analyze an original galaxy image to extract galaxy morphological classification
@@ -31,6 +32,7 @@ def view_original_image(
                          Supports common image formats (PNG, JPG).
         source_id (str): Identifier for the source/galaxy. Default is empty string.
         custom_instructions (str): Optional custom instructions to guide the VLM classification.
+        use_cache (bool): If False, bypass the VLM response cache (the fresh response is still stored). Default is True.
 
     Returns:
         dict[str, Any]: A dictionary containing the classification results:
@@ -83,7 +85,8 @@ def view_original_image(
         additional_content=additional_content,
         system_message=system_message,
         max_tokens=9600,
-        temperature=0.2
+        temperature=0.2,
+        use_cache=use_cache
     )
 
     if error or not classification:
@@ -9,6 +9,24 @@ import pytest
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
 
+@pytest.fixture(autouse=True)
+def _isolated_runtime_history(tmp_path, monkeypatch):
+    """Keep fit runtime records written by tests out of the user's history file."""
+    monkeypatch.setenv("RUNTIME_HISTORY_FILE", str(tmp_path / "runtime_history.jsonl"))
+
+
+@pytest.fixture(autouse=True)
+def _no_fits_meta_persistence(monkeypatch):
+    """Tests opt in to the persistent FITS metadata index explicitly (see test_fits_io)."""
+    monkeypatch.setenv("FITS_META_PERSIST", "0")
+
+
+@pytest.fixture(autouse=True)
+def _isolated_llm_cache(tmp_path, monkeypatch):
+    """Keep LLM responses cached by tests out of the user's response cache."""
+    monkeypatch.setenv("LLM_CACHE_DIR", str(tmp_path / "llm_responses"))
+
+
 @pytest.fixture
 def test_data_dir():
     """Path to the tests/test_data/ directory."""
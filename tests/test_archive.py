@@ -0,0 +1,186 @@
+import os
+
+import numpy as np
+import pytest
+from astropy.io import fits
+
+from tools import archive
+from tools.fits_io import read_fits_array
+
+
+def _galfit_cube(path, seed=0):
+    """GALFIT-style output: empty primary + original/model/residual extensions."""
+    rng = np.random.default_rng(seed)
+    yy, xx = np.indices((128, 128))
+    model = (200.0 * np.exp(-np.hypot(xx - 64, yy - 64) / 10.0)).astype(np.float32)
+    original = model + rng.normal(0.0, 1.0, model.shape).astype(np.float32)
+    hdus = [fits.PrimaryHDU()]
+    for obj, data in (("in.fits[1:128,1:128]", original), ("model", model),
+                      ("residual map", original - model)):
+        hdu = fits.ImageHDU(data)
+        hdu.header["OBJECT"] = obj
+        hdus.append(hdu)
+    fits.HDUList(hdus).writeto(path)
+    return original, model
+
+
+def test_compression_off_by_default(tmp_path, monkeypatch):
+    monkeypatch.delenv("ARCHIVE_FITS_COMPRESSION", raising=False)
+    path = tmp_path / "out.fits"
+    _galfit_cube(path)
+    assert archive.compress_fits_for_archive(str(path)) is None
+
+
+def test_lossless_compression_roundtrip(tmp_path):
+    path = tmp_path / "out.fits"
+    original, model = _galfit_cube(path)
+
+    stats = archive.compress_fits_for_archive(str(path), mode="lossless")
+    assert stats["bytes_out"] < stats["bytes_in"]
+    assert stats["ratio"] > 1 and stats["seconds"] >= 0
+
+    with fits.open(path) as hdul:
+        assert [type(h).__name__ for h in hdul] == [
+            "PrimaryHDU", "CompImageHDU", "CompImageHDU", "CompImageHDU"]
+        assert hdul[2].header["OBJECT"] == "model"
+    np.testing.assert_array_equal(read_fits_array(str(path), 1), original)
+    np.testing.assert_array_equal(read_fits_array(str(path), 2), model)
+
+
+def test_quantized_keeps_original_lossless(tmp_path):
+    path = tmp_path / "out.fits"
+    original, model = _galfit_cube(path)
+
+    stats = archive.compress_fits_for_archive(str(path), mode="quantized", quantize_level=16)
+    assert stats["ratio"] > 1
+    np.testing.assert_array_equal(fits.getdata(path, 1), original)
+    resid = fits.getdata(path, 3)
+    # 量化步长 ~ σ/16，对 σ≈1 的残差误差远小于噪声
+    assert np.max(np.abs(resid - (original - model))) < 0.2
+    assert archive.summarize_compression([stats, None])["bytes_in"] == stats["bytes_in"]
+
+
+def test_dedup_shares_identical_round_files(tmp_path, monkeypatch):
+    monkeypatch.delenv("ARCHIVE_DEDUP", raising=False)
+    store = archive.object_store_dir(str(tmp_path))
+    rounds = []
+    for name in ("r1", "r2"):
+        run_dir = tmp_path / name
+        run_dir.mkdir()
+        _galfit_cube(run_dir / "out.fits", seed=0)
+        rounds.append(run_dir)
+
+    first = archive.dedupe_run_dir(str(rounds[0]), store)
+    second = archive.dedupe_run_dir(str(rounds[1]), store)
+    assert first == {"files": 1, "reused": 0, "bytes_reused": 0}
+    assert second["reused"] == 1 and second["bytes_reused"] > 0
+    assert (rounds[0] / "out.fits").samefile(rounds[1] / "out.fits")
+
+    # 内容不同的新一轮不会被合并
+    (tmp_path / "r3").mkdir()
+    _galfit_cube(tmp_path / "r3" / "out.fits", seed=1)
+    assert archive.dedupe_run_dir(str(tmp_path / "r3"), store)["reused"] == 0
+
+
+def test_archive_copy_links_unchanged_inputs(tmp_path, monkeypatch):
+    monkeypatch.delenv("ARCHIVE_DEDUP", raising=False)
+    store = archive.object_store_dir(str(tmp_path / "archives"))
+    src = tmp_path / "galfit.feedme"
+    src.write_text("A) in.fits\n")
+    for name in ("r1", "r2"):
+        (tmp_path / "archives" / name).mkdir(parents=True)
+        archive.archive_copy(str(src), str(tmp_path / "archives" / name), store)
+
+    a = tmp_path / "archives" / "r1" / "galfit.feedme"
+    b = tmp_path / "archives" / "r2" / "galfit.feedme"
+    assert a.samefile(b) and not a.samefile(src)
+    assert b.read_text() == "A) in.fits\n"
+    # 共享对象只读，工作文件本身保持可写
+    assert not a.stat().st_mode & 0o222
+    assert src.stat().st_mode & 0o200
+
+
+def test_gc_object_store_drops_unreferenced_objects(tmp_path, monkeypatch):
+    monkeypatch.delenv("ARCHIVE_DEDUP", raising=False)
+    store = archive.object_store_dir(str(tmp_path / "archives"))
+    for name, text in (("r1", "A) one.fits\n"), ("r2", "A) two.fits\n")):
+        src = tmp_path / "galfit.feedme"
+        src.write_text(text)
+        (tmp_path / "archives" / name).mkdir(parents=True)
+        archive.archive_copy(str(src), str(tmp_path / "archives" / name), store)
+
+    assert archive.gc_object_store(store) == {"removed": 0, "bytes_freed": 0}
+    os.remove(tmp_path / "archives" / "r1" / "galfit.feedme")
+    stats = archive.gc_object_store(store)
+    assert stats["removed"] == 1 and stats["bytes_freed"] == len("A) one.fits\n")
+    objects = [f for _, _, files in os.walk(store) for f in files]
+    assert len(objects) == 1
+    assert archive.gc_object_store(str(tmp_path / "missing")) is None
+
+
+def test_output_dedup_is_opt_in(monkeypatch):
+    monkeypatch.delenv("ARCHIVE_DEDUP", raising=False)
+    monkeypatch.delenv("ARCHIVE_DEDUP_OUTPUTS", raising=False)
+    assert not archive.archive_dedup_outputs_enabled()
+    monkeypatch.setenv("ARCHIVE_DEDUP_OUTPUTS", "1")
+    assert archive.archive_dedup_outputs_enabled()
+
+
+def test_archive_copy_plain_when_dedup_disabled(tmp_path, monkeypatch):
+    monkeypatch.setenv("ARCHIVE_DEDUP", "0")
+    store = archive.object_store_dir(str(tmp_path))
+    src = tmp_path / "galfit.feedme"
+    src.write_text("A) in.fits\n")
+    for name in ("r1", "r2"):
+        (tmp_path / name).mkdir()
+        archive.archive_copy(str(src), str(tmp_path / name), store)
+
+    assert not (tmp_path / "r1" / "galfit.feedme").samefile(tmp_path / "r2" / "galfit.feedme")
+    assert not (tmp_path / ".objects").exists()
+    assert archive.dedupe_run_dir(str(tmp_path / "r1"), store) is None
+
+
+def test_round_index_lists_without_walking(tmp_path, monkeypatch):
+    monkeypatch.delenv("ARCHIVE_INDEX", raising=False)
+    galaxy = str(tmp_path)
+    for label, chi2, bic in (("r1", 1.8, 900.0), ("r2", 1.2, 850.0), ("r3", None, None)):
+        archive.record_round(galaxy, "galfit", str(tmp_path / "archives" / label),
+                             files={"summary": str(tmp_path / label / "s.md"), "image": None},
+                             chi2_nu=chi2, bic=bic, components=[{"type": "sersic"}])
+    archive.record_round(galaxy, "galfits", str(tmp_path / "output" / "r4"),
+                         chi2_nu=0.9, status="failure")
+
+    # 索引之外没有任何轮次目录：列表完全来自 .archive_index.jsonl
+    assert not (tmp_path / "archives").exists()
+    labels = [r["round_label"] for r in archive.list_rounds(galaxy)]
+    assert labels == ["r1", "r2", "r3"]
+    best = archive.list_rounds(galaxy, sort_by="chi2_nu", limit=1)[0]
+    assert best["round_label"] == "r2" and best["components"] == [{"type": "sersic"}]
+    assert "image" not in best["files"]
+    assert [r["round_label"] for r in archive.list_rounds(galaxy, sort_by="bic", descending=True)] == ["r1", "r2", "r3"]
+    assert [r["round_label"] for r in archive.list_rounds(galaxy, status=None, max_chi2_nu=1.0)] == ["r4"]
+
+    res = archive.list_archived_rounds(galaxy, tool="galfits", include_failed=True)
+    assert res["status"] == "success" and res["count"] == 1
+    assert archive.list_archived_rounds(galaxy, sort_by="mtime")["status"] == "failure"
+
+
+def test_round_index_reads_appends_incrementally(tmp_path):
+    galaxy = str(tmp_path)
+    archive.record_round(galaxy, "galfit", str(tmp_path / "r1"), chi2_nu=1.0)
+    assert len(archive.load_round_index(galaxy)) == 1
+
+    # 末尾未写完的半行被跳过，补全后再读到
+    path = archive.archive_index_path(galaxy)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"schema_version": 1, "round_label": "r2"')
+    assert len(archive.load_round_index(galaxy)) == 1
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(', "status": "success"}\n')
+    assert [r["round_label"] for r in archive.load_round_index(galaxy)] == ["r1", "r2"]
+
+
+def test_round_index_disabled(tmp_path, monkeypatch):
+    monkeypatch.setenv("ARCHIVE_INDEX", "0")
+    assert archive.record_round(str(tmp_path), "galfit", str(tmp_path / "r1")) is None
+    assert archive.list_rounds(str(tmp_path)) == []
@@ -0,0 +1,33 @@
+import os
+import stat
+
+import pytest
+
+from tools import atomic_io
+
+
+def test_default_file_mode_never_touches_the_process_umask(monkeypatch):
+    umask = os.umask(0o027)
+    try:
+        def forbidden(*a):
+            raise AssertionError("os.umask called at runtime")
+
+        monkeypatch.setattr(atomic_io.os, "umask", forbidden)
+        if atomic_io._umask_from_proc() is None:
+            pytest.skip("no /proc/self/status on this platform")
+        assert atomic_io.default_file_mode() == 0o640
+    finally:
+        monkeypatch.undo()
+        os.umask(umask)
+
+
+def test_match_target_mode_copies_existing_mode(tmp_path):
+    target = tmp_path / "cfg.feedme"
+    target.write_text("A) img.fits\n")
+    os.chmod(target, 0o664)
+    tmp = tmp_path / ".cfg_x.tmp"
+    tmp.write_text("A) new.fits\n")
+    os.chmod(tmp, 0o600)
+
+    atomic_io.match_target_mode(str(tmp), str(target))
+    assert stat.S_IMODE(os.stat(tmp).st_mode) == 0o664
@@ -1,18 +1,22 @@
 import numpy as np
+from astropy.io import fits
 
 from tools import bar_lopsidedness_detection as mod
 
 
-def test_apply_fit_region_uses_feedme_one_indexed_inclusive_bounds():
-    image = np.arange(25).reshape(5, 5)
-    mask = image % 2 == 0
+def test_read_image_and_mask_uses_feedme_one_indexed_inclusive_bounds(tmp_path):
+    image = np.arange(25, dtype=np.float64).reshape(5, 5)
+    mask = (image % 2 == 0).astype(np.int16)
+    fits.writeto(tmp_path / "img.fits", image)
+    fits.writeto(tmp_path / "mask.fits", mask)
 
-    cropped_image, cropped_mask = mod._apply_fit_region(
-        image, mask, (1, 3, 2, 4), one_indexed_inclusive=True
+    cropped_image, cropped_mask = mod._read_image_and_mask(
+        str(tmp_path / "img.fits"), str(tmp_path / "mask.fits"), (1, 3, 2, 4),
+        one_indexed_inclusive=True,
     )
 
     np.testing.assert_array_equal(cropped_image, image[1:4, 0:3])
-    np.testing.assert_array_equal(cropped_mask, mask[1:4, 0:3])
+    np.testing.assert_array_equal(cropped_mask, mask[1:4, 0:3] > 0)
 
 
 def test_isophote_table_entry_handles_empty_step2_csv(tmp_path, monkeypatch):
@@ -0,0 +1,73 @@
+import os
+
+from tools import extract_summary_galfit as esg
+
+SEP = "-" * 77 + "\n"
+
+
+def _run_block(feedme, chi2nu):
+    return (
+        "\n"
+        f"Init. par. file : {feedme}\n"
+        "Restart file    : galfit.01\n"
+        "\n"
+        " sersic    : (  199.86,   200.61)   26.25      2.79    0.50    0.30     5.26\n"
+        "             (    0.12,     0.20)    0.06      0.31    0.48    0.09     5.78\n"
+        f" Chi^2 = 1593.91249,  ndof = 8175\n"
+        f" Chi^2/nu = {chi2nu}\n"
+        "\n"
+    )
+
+
+def _append(path, text):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_index_matches_full_scan_and_grows_incrementally(tmp_path, monkeypatch):
+    log = tmp_path / "fit.log"
+    _append(log, SEP + _run_block("a.feedme", 0.5) + SEP + _run_block("b.feedme", 0.4) + SEP)
+
+    assert [b["key"] for b in esg.index_fit_log(str(log))] == ["a.feedme", "b.feedme"]
+    assert "Chi^2/nu = 0.4" in esg.fit_log_block(str(log))
+    assert "Chi^2/nu = 0.5" in esg.fit_log_block(str(log), 0)
+
+    # 追加未闭合的块：尚不计入；闭合后只扫描新追加的字节
+    _append(log, _run_block("a.feedme", 0.3))
+    assert len(esg.index_fit_log(str(log))) == 2
+    _append(log, SEP)
+
+    seeks = []
+    real_open = open
+
+    def spying_open(file, mode="r", *args, **kwargs):
+        fh = real_open(file, mode, *args, **kwargs)
+        real_seek = fh.seek
+        fh.seek = lambda off, *a: seeks.append(off) or real_seek(off, *a)
+        return fh
+
+    size_before = os.path.getsize(log) - len((_run_block("a.feedme", 0.3) + SEP).encode())
+    monkeypatch.setattr("builtins.open", spying_open)
+    blocks = esg.index_fit_log(str(log))
+    monkeypatch.undo()
+
+    # 只从上次扫描的偏移处开始读
+    assert seeks and min(seeks) >= size_before
+    assert [b["key"] for b in blocks] == ["a.feedme", "b.feedme", "a.feedme"]
+    text = esg.fit_log_block(str(log), key="/some/dir/a.feedme")
+    assert "Chi^2/nu = 0.3" in text
+    assert esg.extract_galfit_fit_log(str(log)) == {
+        "a.feedme": text, "b.feedme": esg.fit_log_block(str(log), 1)}
+    assert esg.parse_fit_log(str(tmp_path))["statistics"]["chi2_nu"] == 0.3
+
+
+def test_index_rebuilt_when_log_replaced(tmp_path):
+    log = tmp_path / "fit.log"
+    _append(log, SEP + _run_block("a.feedme", 0.5) + SEP)
+    assert len(esg.index_fit_log(str(log))) == 1
+
+    os.remove(log)
+    _append(log, _run_block("c.feedme", 0.2) + SEP)
+    assert [b["key"] for b in esg.index_fit_log(str(log))] == ["c.feedme"]
+    assert esg.fit_log_block(str(log), 5) is None
+    assert esg.fit_log_block(str(tmp_path / "missing.log")) is None
@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+import pytest
+from astropy.io import fits
+
+from tools.fit_region import encircled_energy_radius, propose_fit_region
+from tools.fits_io import clear_fits_cache
+from tools.parse_feedme import clear_feedme_cache, parse_feedme
+
+FEEDME = """A) img.fits        # Input data image
+B) out.fits        # Output data image block
+C) none        # Sigma image
+D) psf.fits        # PSF image
+F) none        # Bad pixel mask
+G) none        # Constraints
+H) 1 400 1 400        # Image region to fit
+I) 200 200        # Size of the convolution box
+J) 25.0        # Zeropoint
+K) 0.03 0.03        # Plate scale
+
+ 0) sersic
+ 1) 201 201 1 1
+ 3) 18.0 1
+ 4) 6.0 1
+ 5) 1.0 1
+ 9) 1.0 1
+10) 0 1
+ 0) sky
+ 1) 0.0 1
+"""
+
+
+def _gaussian(shape, center, sigma):
+    y, x = np.indices(shape, dtype=np.float64)
+    return np.exp(-((x - center[0]) ** 2 + (y - center[1]) ** 2) / (2 * sigma ** 2))
+
+
+@pytest.fixture(autouse=True)
+def _fresh():
+    clear_feedme_cache()
+    clear_fits_cache()
+
+
+def test_encircled_energy_radius_of_gaussian():
+    psf = _gaussian((101, 101), (50, 50), 3.0)
+    # 2D Gaussian: EE(r) = 1 - exp(-r^2 / 2 sigma^2)
+    expected = 3.0 * np.sqrt(-2 * np.log(1 - 0.995))
+    assert encircled_energy_radius(psf, 0.995) == pytest.approx(expected, abs=0.5)
+
+
+def test_propose_fit_region_and_variant(tmp_path):
+    rng = np.random.default_rng(1)
+    galaxy = 200.0 * np.exp(-np.hypot(*(np.indices((400, 400)) - 200.0)) / 6.0)
+    fits.PrimaryHDU((galaxy + rng.normal(0, 1.0, galaxy.shape)).astype(np.float32)).writeto(tmp_path / "img.fits")
+    fits.PrimaryHDU(_gaussian((101, 101), (50, 50), 2.0).astype(np.float32)).writeto(tmp_path / "psf.fits")
+    feedme = tmp_path / "gal.feedme"
+    feedme.write_text(FEEDME)
+
+    result = propose_fit_region(str(feedme), write_variant=True)
+    assert result["status"] == "success"
+    xmin, xmax, ymin, ymax = result["proposed"]["fit_region"]
+    assert xmin < 201 < xmax and ymin < 201 < ymax
+    assert 40 < xmax - xmin < 200
+    bx, by = result["proposed"]["conv_box"]
+    assert bx <= xmax - xmin + 1 and 20 < bx < 200
+    assert result["measurements"]["psf_ee_radius"] == pytest.approx(2.0 * 3.255, abs=0.5)
+    assert result["predicted_speedup"] > 4
+    assert result["speedup_basis"] == "pixel_cost_proxy"
+
+    variant = result["variant_file"]
+    assert variant.endswith("gal_fast.feedme")
+    assert parse_feedme(variant)["fit_region"] == tuple(result["proposed"]["fit_region"])
+    original, written = feedme.read_text().splitlines(), open(variant).read().splitlines()
+    changed = [a for a, b in zip(original, written) if a != b]
+    assert [line[:2] for line in changed] == ["H)", "I)"]
+    assert f"I) {bx} {by}" in written[7]
+    # 原子写：不留临时文件，mkstemp 的 0600 不会落到变体上
+    assert not list(tmp_path.glob(".cfg_*"))
+    assert os.stat(variant).st_mode & 0o044
@@ -0,0 +1,246 @@
+import numpy as np
+import pytest
+from astropy.io import fits
+
+from tools.fits_io import as_image, fits_image_shape, image_dtype, read_fits_region
+
+
+@pytest.fixture
+def image():
+    return np.arange(120 * 90, dtype=np.float32).reshape(120, 90)
+
+
+def test_uncompressed_region_reads_window_and_caches_it(tmp_path, image):
+    from tools import fits_io
+
+    fits_io.clear_fits_cache()
+    path = tmp_path / "img.fits"
+    fits.writeto(path, image)
+
+    # H) 11 40 21 60 (1-indexed inclusive)
+    section = read_fits_region(str(path), (11, 40, 21, 60))
+    np.testing.assert_array_equal(section, image[20:60, 10:40])
+    assert section.base is None or section.base.nbytes == section.nbytes  # 只复制窗口，不是整幅图
+    assert fits_image_shape(str(path)) == image.shape
+    # 同一区域再次读取命中缓存；其他区域不互相挤出
+    assert read_fits_region(str(path), (11, 40, 21, 60)) is section
+    read_fits_region(str(path), (1, 5, 1, 5))
+    assert read_fits_region(str(path), (11, 40, 21, 60)) is section
+    stats = fits_io.fits_cache_stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 2, 2)
+    fits_io.clear_fits_cache()
+
+
+def test_tile_compressed_region_uses_section(tmp_path, image):
+    path = tmp_path / "img_comp.fits"
+    fits.HDUList([
+        fits.PrimaryHDU(),
+        fits.CompImageHDU(image.astype(np.int32), compression_type="GZIP_2"),
+    ]).writeto(path)
+
+    section = read_fits_region(str(path), (0, 30, 5, 25), one_indexed_inclusive=False)
+    np.testing.assert_array_equal(section, image[5:25, 0:30])
+    assert fits_image_shape(str(path)) == image.shape
+
+
+def test_target_shape_matches_crop_fallbacks(tmp_path, image):
+    path = tmp_path / "img.fits"
+    fits.writeto(path, image)
+
+    # 整幅图已是目标形状：不裁剪
+    full = read_fits_region(str(path), (11, 40, 21, 60), target_shape=image.shape)
+    assert full.shape == image.shape
+    # H) 区与目标形状不符：居中裁剪
+    center = read_fits_region(str(path), (1, 5, 1, 5), target_shape=(100, 80))
+    np.testing.assert_array_equal(center, image[10:110, 5:85])
+
+
+@pytest.mark.parametrize("cache_mb", ["1024", "0"])
+def test_region_reads_are_read_only_on_every_path(tmp_path, image, monkeypatch, cache_mb):
+    from tools import fits_io
+
+    monkeypatch.setenv("FITS_CACHE_MAX_MB", cache_mb)
+    fits_io.clear_fits_cache()
+    plain = tmp_path / "img.fits"
+    fits.writeto(plain, image)
+    comp = tmp_path / "img_comp.fits"
+    fits.HDUList([
+        fits.PrimaryHDU(),
+        fits.CompImageHDU(image.astype(np.int32), compression_type="GZIP_2"),
+    ]).writeto(comp)
+
+    reads = [
+        read_fits_region(str(plain), (11, 40, 21, 60)),            # 未压缩窗口
+        read_fits_region(str(comp), (11, 40, 21, 60)),             # section 解码
+        read_fits_region(str(plain)),                              # 整幅图
+        read_fits_region(str(plain), (1, 5, 1, 5)),                # 整幅缓存切片
+        read_fits_region(str(plain), (11, 40, 21, 60), target_shape=image.shape),
+    ]
+    for arr in reads:
+        assert not arr.flags.writeable
+        with pytest.raises(ValueError):
+            arr[0, 0] = -1
+    fits_io.clear_fits_cache()
+
+
+def _wcs_header(cd=True):
+    h = fits.Header()
+    h["CTYPE1"], h["CTYPE2"] = "RA---TAN", "DEC--TAN"
+    h["CRVAL1"], h["CRVAL2"] = 150.0, 2.0
+    h["CRPIX1"], h["CRPIX2"] = 45.0, 60.0
+    if cd:
+        h["CD1_1"], h["CD1_2"] = -1.0e-5, 2.0e-6
+        h["CD2_1"], h["CD2_2"] = 2.0e-6, 1.0e-5
+    else:
+        h["CDELT1"], h["CDELT2"] = -8.3e-6, 8.3e-6
+        h["PC1_1"], h["PC2_1"] = 0.96, 0.28
+    return h
+
+
+@pytest.mark.parametrize("cd", [True, False])
+def test_fits_metadata_matches_wcs_pixscale(tmp_path, image, cd):
+    from astropy.wcs import WCS
+    from astropy.wcs.utils import proj_plane_pixel_scales
+
+    from tools import fits_io
+
+    path = tmp_path / "wcs.fits"
+    fits.writeto(path, image, header=_wcs_header(cd))
+
+    meta = fits_io.fits_metadata(str(path))
+    assert meta["shape"] == image.shape
+    expected = proj_plane_pixel_scales(WCS(fits.getheader(path)))[0] * 3600.
+    np.testing.assert_allclose(meta["pixscale"], expected, rtol=1e-12)
+
+
+def test_fits_metadata_index_avoids_reopening(tmp_path, image, monkeypatch):
+    import json
+
+    from tools import fits_io
+
+    index_file = tmp_path / "cache" / "fits_meta.jsonl"
+    monkeypatch.setenv("FITS_META_PERSIST", "1")
+    monkeypatch.setenv("FITS_META_FILE", str(index_file))
+    monkeypatch.setattr(fits_io, "_META", {})
+    monkeypatch.setattr(fits_io, "_INDEX", {"path": None, "offset": 0, "lines": 0, "entries": {}})
+
+    path = tmp_path / "data" / "wcs.fits"
+    path.parent.mkdir()
+    header = _wcs_header()
+    header["HISTORY"] = "x" * 60
+    header["OBSERVER"] = "someone"
+    fits.writeto(path, image, header=header)
+    first = fits_io.fits_metadata(str(path))
+    # 索引在用户缓存目录，数据目录不留文件；只存 WCS 关键字
+    assert sorted(p.name for p in path.parent.iterdir()) == ["wcs.fits"]
+    (stored,) = [json.loads(line) for line in index_file.read_text().splitlines()]
+    assert "CTYPE1" in stored["wcs"] and "OBSERVER" not in stored["wcs"] and "HISTORY" not in stored["wcs"]
+
+    # 新进程：内存缓存为空，只靠持久化索引，不得再打开 FITS
+    monkeypatch.setattr(fits_io, "_META", {})
+    monkeypatch.setattr(fits_io, "_WCS", {})
+    monkeypatch.setattr(fits_io, "_INDEX", {"path": None, "offset": 0, "lines": 0, "entries": {}})
+
+    def _no_open(*args, **kwargs):
+        raise AssertionError("FITS file should not be opened")
+
+    with monkeypatch.context() as m:
+        m.setattr(fits_io.fits, "open", _no_open)
+        again = fits_io.fits_metadata(str(path))
+        assert again["shape"] == first["shape"]
+        assert again["pixscale"] == first["pixscale"]
+        assert fits_io.fits_wcs(str(path)).wcs.ctype[0] == "RA---TAN"
+
+    # 文件变化（mtime/size）后索引失效；新条目以追加方式写入
+    fits.writeto(path, image[:50], header=_wcs_header(), overwrite=True)
+    assert fits_io.fits_metadata(str(path))["shape"] == (50, image.shape[1])
+    assert len(index_file.read_text().splitlines()) == 2
+
+
+def test_fits_metadata_index_compaction(tmp_path, image, monkeypatch):
+    from tools import fits_io
+
+    index_file = tmp_path / "fits_meta.jsonl"
+    monkeypatch.setenv("FITS_META_PERSIST", "1")
+    monkeypatch.setenv("FITS_META_FILE", str(index_file))
+    monkeypatch.setattr(fits_io, "META_COMPACT_MIN_LINES", 4)
+    monkeypatch.setattr(fits_io, "_INDEX", {"path": None, "offset": 0, "lines": 0, "entries": {}})
+
+    path = tmp_path / "img.fits"
+    for n in range(10, 16):
+        fits.writeto(path, image[:n], header=_wcs_header(), overwrite=True)
+        monkeypatch.setattr(fits_io, "_META", {})
+        assert fits_io.fits_metadata(str(path))["shape"][0] == n
+    with fits_io._META_LOCK:
+        entries = fits_io._index_entries()
+    assert len(entries) == 1
+    assert len(index_file.read_text().splitlines()) <= 4
+
+
+def test_read_fits_array_lru_cache(tmp_path, image, monkeypatch):
+    from tools import fits_io
+
+    fits_io.clear_fits_cache()
+    a, b = tmp_path / "a.fits", tmp_path / "b.fits"
+    fits.writeto(a, image)
+    fits.writeto(b, image * 2)
+
+    arr = fits_io.read_fits_array(str(a))
+    assert not arr.flags.writeable
+    with pytest.raises(ValueError):
+        arr[0, 0] = 1.0
+    assert fits_io.read_fits_array(str(a)) is arr
+    # 已缓存时区域读取直接切片缓存数组
+    section = fits_io.read_fits_region(str(a), (1, 10, 1, 5))
+    assert np.shares_memory(section, arr)
+
+    stats = fits_io.fits_cache_stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 1, 1)
+    assert stats["hit_rate"] == pytest.approx(2 / 3, abs=1e-4)
+
+    # 容量只够一幅图：读入第二幅时淘汰最久未用的第一幅
+    monkeypatch.setenv("FITS_CACHE_MAX_MB", str(image.nbytes * 1.5 / 1024 / 1024))
+    fits_io.read_fits_array(str(b))
+    stats = fits_io.fits_cache_stats()
+    assert stats["entries"] == 1 and stats["evictions"] == 1
+    assert stats["bytes"] == image.nbytes
+
+    # 文件改写后（mtime/size 变化）不会命中旧数据
+    fits.writeto(b, image[:10], overwrite=True)
+    assert fits_io.read_fits_array(str(b)).shape == (10, image.shape[1])
+    fits_io.clear_fits_cache()
+
+
+def test_read_fits_array_decodes_from_open_hdulist(tmp_path, image, monkeypatch):
+    from tools import fits_io
+
+    fits_io.clear_fits_cache()
+    path = tmp_path / "cube.fits"
+    fits.HDUList([fits.PrimaryHDU(image), fits.ImageHDU(image * 2), fits.ImageHDU(image * 3)]).writeto(path)
+    opens = []
+    real_open = fits.open
+    monkeypatch.setattr(fits_io.fits, "open", lambda *a, **k: opens.append(a[0]) or real_open(*a, **k))
+
+    with fits.open(str(path)) as hdul:
+        arrays = [fits_io.read_fits_array(str(path), idx, hdul=hdul) for idx in range(len(hdul))]
+    assert len(opens) == 1
+    for factor, arr in zip((1, 2, 3), arrays):
+        np.testing.assert_array_equal(arr, image * factor)
+        assert not arr.flags.writeable
+    assert fits_io.read_fits_array(str(path), 2) is arrays[2]
+    fits_io.clear_fits_cache()
+
+
+def test_image_precision_setting(monkeypatch):
+    big_endian = np.arange(12, dtype=">f8").reshape(3, 4)
+
+    monkeypatch.delenv("IMAGE_PRECISION", raising=False)
+    assert image_dtype() is np.float64
+    assert as_image(big_endian) is big_endian
+
+    monkeypatch.setenv("IMAGE_PRECISION", "float32")
+    assert image_dtype() is np.float32
+    out = as_image(big_endian)
+    assert out.dtype == np.float32 and out.dtype.isnative
+    np.testing.assert_array_equal(out, big_endian)
+    assert as_image(out) is out and as_image(None) is None
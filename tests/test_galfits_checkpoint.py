@@ -0,0 +1,146 @@
+import asyncio
+import json
+import subprocess
+from pathlib import Path
+from unittest.mock import patch
+
+from tools import galfits_checkpoint
+from tools.galfits_checkpoint import load_checkpoint, run_checkpointed
+from tools.run_galfits import run_galfits
+
+
+def _opt(cmd, name):
+    return cmd[cmd.index(name) + 1] if name in cmd else None
+
+
+class _FakeGalfits:
+    """Fake GalfitS CLI: writes a summary whose value is the number of steps run so far."""
+
+    def __init__(self, fail_on_call=None):
+        self.calls = []
+        self.fail_on_call = fail_on_call
+
+    def __call__(self, cmd, **kwargs):
+        self.calls.append(cmd)
+        if self.fail_on_call == len(self.calls):
+            raise subprocess.TimeoutExpired(cmd, kwargs["timeout"])
+        start = 0
+        if _opt(cmd, "--readsummary"):
+            start = int(Path(_opt(cmd, "--readsummary")).read_text().split()[-1])
+        steps = int(_opt(cmd, "--num_steps") or 0)
+        workplace = Path(_opt(cmd, "--workplace"))
+        targ = Path(_opt(cmd, "--config")).read_text().split()[1]
+        (workplace / f"{targ}.gssummary").write_text(f"# free parameters\nsteps {start + steps}\n")
+        return subprocess.CompletedProcess(cmd, 0, stdout=f"ran {steps}\n", stderr="")
+
+
+def _config(tmp_path):
+    config = tmp_path / "gal.lyric"
+    config.write_text("R1) gal\n")
+    return str(config)
+
+
+def test_chunks_and_checkpoints(tmp_path, monkeypatch):
+    config = _config(tmp_path)
+    fake = _FakeGalfits()
+    monkeypatch.setattr(galfits_checkpoint.subprocess, "run", fake)
+    cmd = ["galfits", "--config", config, "--workplace", str(tmp_path), "--num_steps", "250"]
+
+    run = run_checkpointed(cmd, config, str(tmp_path), str(tmp_path), 60, checkpoint_every=100)
+
+    assert run.returncode == 0 and run.chunks == 3 and run.steps_done == 250
+    assert [_opt(c, "--num_steps") for c in fake.calls] == ["100", "100", "50"]
+    assert _opt(fake.calls[0], "--readsummary") is None
+    assert _opt(fake.calls[2], "--readsummary") == str(tmp_path / "checkpoint" / "gal.gssummary")
+    state = load_checkpoint(str(tmp_path))
+    assert state["complete"] and state["steps_done"] == 250
+    assert (tmp_path / "gal.gssummary").read_text().endswith("steps 250\n")
+
+
+def test_unchunked_run_keeps_command(tmp_path, monkeypatch):
+    config = _config(tmp_path)
+    fake = _FakeGalfits()
+    monkeypatch.setattr(galfits_checkpoint.subprocess, "run", fake)
+    cmd = ["galfits", "--config", config, "--workplace", str(tmp_path), "--num_steps", "250"]
+
+    run = run_checkpointed(cmd, config, str(tmp_path), str(tmp_path), 60)
+
+    assert fake.calls == [cmd] and run.returncode == 0
+    assert load_checkpoint(str(tmp_path)) is None
+
+
+def test_run_galfits_resumes_after_timeout(tmp_path):
+    galaxy_dir = tmp_path / "obj1"
+    galaxy_dir.mkdir()
+    config = galaxy_dir / "obj1.lyric"
+    config.write_text("R1) obj1\n")
+    args = ["--num_steps", "300"]
+
+    first = _FakeGalfits(fail_on_call=2)
+    with patch("tools.run_galfits.subprocess.run", side_effect=first):
+        result = asyncio.run(run_galfits(str(config), extra_args=args, checkpoint_every=100))
+    assert result["status"] == "failure"
+    assert "resume=True" in result["error"]
+    assert result["checkpoint"]["steps_done"] == 100
+    workplace = Path(result["workplace"])
+
+    second = _FakeGalfits()
+    with patch("tools.run_galfits.subprocess.run", side_effect=second):
+        result = asyncio.run(run_galfits(str(config), extra_args=args, checkpoint_every=100, resume=True))
+    assert result["status"] == "success"
+    assert Path(result["workplace"]) == workplace
+    assert result["checkpoint"] == {"chunks": 2, "steps_done": 300, "total_steps": 300, "resumed_from": 100}
+    assert [_opt(c, "--num_steps") for c in second.calls] == ["100", "100"]
+    assert (workplace / "obj1.gssummary").read_text().endswith("steps 300\n")
+    assert sorted(p.name for p in (galaxy_dir / "output").iterdir() if not p.name.startswith(".")) == [workplace.name]
+
+    state = json.loads((workplace / "checkpoint" / "state.json").read_text())
+    assert state["complete"] is True
+
+
+def test_resume_ignores_checkpoint_of_changed_config(tmp_path, monkeypatch):
+    config = _config(tmp_path)
+    fake = _FakeGalfits()
+    monkeypatch.setattr(galfits_checkpoint.subprocess, "run", fake)
+    cmd = ["galfits", "--config", config, "--workplace", str(tmp_path), "--num_steps", "200"]
+    galfits_checkpoint.save_checkpoint(str(tmp_path), None, "stale", 100, 200, False)
+
+    run = run_checkpointed(cmd, config, str(tmp_path), str(tmp_path), 60, checkpoint_every=200, resume=True)
+
+    assert run.resumed_from is None and run.steps_done == 200
+    assert _opt(fake.calls[0], "--readsummary") is None
+
+
+def test_chunked_run_with_read_summary_passes_one_flag(tmp_path, monkeypatch):
+    config = _config(tmp_path)
+    (tmp_path / "prior.gssummary").write_text("# free parameters\nsteps 1000\n")
+    fake = _FakeGalfits()
+    monkeypatch.setattr(galfits_checkpoint.subprocess, "run", fake)
+    cmd = ["galfits", "--config", config, "--workplace", str(tmp_path), "--num_steps", "200",
+           "--readsummary", str(tmp_path / "prior.gssummary")]
+
+    run = run_checkpointed(cmd, config, str(tmp_path), str(tmp_path), 60, checkpoint_every=100)
+
+    assert run.steps_done == 200
+    assert [c.count("--readsummary") for c in fake.calls] == [1, 1]
+    assert _opt(fake.calls[0], "--readsummary") == str(tmp_path / "prior.gssummary")
+    assert _opt(fake.calls[1], "--readsummary") == str(tmp_path / "checkpoint" / "gal.gssummary")
+    assert (tmp_path / "gal.gssummary").read_text().endswith("steps 1200\n")
+
+
+def test_checkpoint_uses_target_summary_not_newest(tmp_path, monkeypatch):
+    config = _config(tmp_path)
+    fake = _FakeGalfits()
+
+    def run_and_touch_other(cmd, **kwargs):
+        result = fake(cmd, **kwargs)
+        (tmp_path / "other.gssummary").write_text("# free parameters\nsteps -1\n")
+        return result
+
+    monkeypatch.setattr(galfits_checkpoint.subprocess, "run", run_and_touch_other)
+    cmd = ["galfits", "--config", config, "--workplace", str(tmp_path), "--num_steps", "200"]
+    run_checkpointed(cmd, config, str(tmp_path), str(tmp_path), 60, checkpoint_every=100)
+
+    state = load_checkpoint(str(tmp_path))
+    assert state["summary"] == str(tmp_path / "checkpoint" / "gal.gssummary")
+    assert (tmp_path / "gal.gssummary").read_text().endswith("steps 200\n")
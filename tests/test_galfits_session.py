@@ -0,0 +1,141 @@
+import os
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+from tools import galfits_session
+from tools.galfits_session import clear_fitter_sessions, get_fitter_session
+from tools.gssummary import clear_gssummary_cache
+from tools.lyric_document import clear_lyric_cache
+
+LYRIC = """R1) gal
+R2) [150.1, 2.2]
+R3) 0.5
+Ia1) [img.fits,0]
+Ia3) [sigma.fits,0]
+Ia4) [psf.fits,0]
+Ia6) [Noimg,0]
+"""
+
+
+class _Param:
+    def __init__(self, value):
+        self.value = value
+
+
+class _FakeFitter:
+    def __init__(self):
+        self.lmParameters = {"bulge_Re": _Param(1.0), "bulge_n": _Param(4.0)}
+        self.model_builds = 0
+
+    def loose_fix_pars(self):
+        pass
+
+    def cal_model_image(self):
+        self.model_builds += 1
+
+
+@pytest.fixture
+def fake_gsutils(monkeypatch):
+    calls = []
+
+    def read_config_file(config, workplace, priorpath=None):
+        calls.append(config)
+        return _FakeFitter(), "gal", None
+
+    galfits = types.ModuleType("galfits")
+    galfits.gsutils = types.SimpleNamespace(read_config_file=read_config_file)
+    monkeypatch.setitem(sys.modules, "galfits", galfits)
+    clear_fitter_sessions()
+    clear_lyric_cache()
+    clear_gssummary_cache()
+    yield calls
+    clear_fitter_sessions()
+
+
+def _bump(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+def _run_dir(tmp_path):
+    for name in ("img.fits", "sigma.fits", "psf.fits"):
+        (tmp_path / name).write_bytes(b"x")
+    lyric = tmp_path / "gal.lyric"
+    lyric.write_text(LYRIC)
+    return str(lyric)
+
+
+def test_session_shared_until_inputs_change(tmp_path, fake_gsutils):
+    lyric = _run_dir(tmp_path)
+    first = get_fitter_session(lyric, str(tmp_path))
+    assert get_fitter_session(lyric, str(tmp_path)) is first
+    assert len(fake_gsutils) == 1
+    assert galfits_session.lyric_input_files(lyric) == sorted(
+        str(tmp_path / n) for n in ("img.fits", "psf.fits", "sigma.fits"))
+
+    _bump(tmp_path / "psf.fits")
+    second = get_fitter_session(lyric, str(tmp_path))
+    assert second is not first
+    assert len(fake_gsutils) == 2
+
+    _bump(lyric)
+    assert get_fitter_session(lyric, str(tmp_path)) is not second
+    assert len(galfits_session._SESSIONS) == 1
+
+
+def test_apply_summary_once_and_reset_between_summaries(tmp_path, fake_gsutils):
+    lyric = _run_dir(tmp_path)
+    summary = tmp_path / "gal.gssummary"
+    summary.write_text("# free parameters\nbulge_Re 2.5 0.1\nbulge_n nan nan\n")
+    session = get_fitter_session(lyric, str(tmp_path))
+    fitter = session.fitter
+
+    assert session.apply_summary(str(tmp_path / "missing.gssummary")) is False
+    assert fitter.model_builds == 0
+
+    assert session.apply_summary(str(summary)) is True
+    assert session.apply_summary(str(summary)) is True
+    assert fitter.model_builds == 1
+    assert fitter.lmParameters["bulge_Re"].value == 2.5
+    assert fitter.lmParameters["bulge_n"].value == 4.0   # nan skipped
+
+    summary.write_text("# free parameters\nbulge_n 3.0 0.1\n")
+    _bump(summary)
+    session.apply_summary(str(summary))
+    assert fitter.model_builds == 2
+    assert fitter.lmParameters["bulge_Re"].value == 1.0  # restored initial value
+    assert fitter.lmParameters["bulge_n"].value == 3.0
+
+
+def test_session_cache_can_be_disabled(tmp_path, fake_gsutils, monkeypatch):
+    monkeypatch.setenv("GALFITS_SESSION_CACHE", "0")
+    lyric = _run_dir(tmp_path)
+    assert get_fitter_session(lyric, str(tmp_path)) is not get_fitter_session(lyric, str(tmp_path))
+    assert len(fake_gsutils) == 2
+
+
+def test_using_summary_holds_lock_for_the_whole_read(tmp_path, fake_gsutils):
+    lyric = _run_dir(tmp_path)
+    a, b = tmp_path / "a.gssummary", tmp_path / "b.gssummary"
+    a.write_text("# free parameters\nbulge_Re 2.0 0.1\n")
+    b.write_text("# free parameters\nbulge_Re 3.0 0.1\n")
+    session = get_fitter_session(lyric, str(tmp_path))
+    seen = []
+
+    def read(summary, expected):
+        for _ in range(50):
+            with session.using_summary(str(summary)) as fitter:
+                first = fitter.lmParameters["bulge_Re"].value
+                time.sleep(0)
+                seen.append(first == fitter.lmParameters["bulge_Re"].value == expected)
+
+    threads = [threading.Thread(target=read, args=args) for args in ((a, 2.0), (b, 3.0))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(seen) == 100 and all(seen)
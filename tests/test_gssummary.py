@@ -0,0 +1,110 @@
+import math
+import os
+
+import pytest
+
+from tools import gssummary, parse_lyric, run_galfits
+from tools.gssummary import clear_gssummary_cache, load_gssummary, parse_gssummary_text
+
+SAMPLE = """\
+# config file: /data/gal/gal.lyric
+# reduced chi^2: 1.234
+# BIC: 5678.9
+#########################################
+# free parameters
+pname best_value err_low err_high
+bulge_xcen 0.12 0.01 0.02
+bulge_Re 1.5 0.1 0.1
+bulge_n 3.2 0.3 0.4
+disk_Re 4.0 0.2 0.2
+logM_bulge 10.1 0.05 0.05
+Mag_bulge_f150w 21.3 0.02 0.02
+Mag_bulge_f444w 20.1 0.02 0.02
+Mag_disk_f150w nan nan nan
+#########################################
+# fixed parameters
+# pname best_value
+disk_ang 30.0
+disk_label sersic
+"""
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    clear_gssummary_cache()
+    yield
+    clear_gssummary_cache()
+
+
+def test_parse_sections_stats_and_rows():
+    s = parse_gssummary_text(SAMPLE)
+    assert s.config_file == "/data/gal/gal.lyric"
+    assert s.reduced_chisq == pytest.approx(1.234)
+    assert s.bic == pytest.approx(5678.9)
+    assert s.columns == ("pname", "best_value", "err_low", "err_high")
+
+    names = [p.name for p in s.params]
+    assert "pname" not in names
+    assert s.values["bulge_Re"] == 1.5
+    assert s.values["disk_ang"] == 30.0
+    assert "disk_label" not in s.values
+    assert math.isnan(s.values["Mag_disk_f150w"])
+    assert s.errors("bulge_n") == (0.3, 0.4)
+
+    # ascii.read 等价：只取 free 段
+    assert [p.name for p in s.fit_rows()] == names[:8]
+    assert {p.section for p in s.params} == {"free", "fixed"}
+
+    assert s.component_names == ["bulge", "disk"]
+    assert s.component_params("bulge")["n"] == 3.2
+    assert s.mag("bulge", "f444w") == 20.1
+    assert s.mag("bulge") == 21.3
+    assert s.mag("bulge", "f200w") is None
+
+
+def test_load_gssummary_memoized_until_file_changes(tmp_path):
+    path = tmp_path / "gal.gssummary"
+    path.write_text(SAMPLE, encoding="utf-8")
+
+    first = load_gssummary(str(path))
+    assert load_gssummary(str(path)) is first
+
+    path.write_text(SAMPLE.replace("bulge_Re 1.5", "bulge_Re 2.5"), encoding="utf-8")
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    second = load_gssummary(str(path))
+    assert second is not first
+    assert second.values["bulge_Re"] == 2.5
+
+
+def test_consumers_share_one_parse(tmp_path, monkeypatch):
+    path = tmp_path / "gal.gssummary"
+    path.write_text(SAMPLE, encoding="utf-8")
+
+    calls = []
+    real = gssummary.parse_gssummary_text
+
+    def counting(text, path=None):
+        calls.append(path)
+        return real(text, path)
+
+    monkeypatch.setattr(gssummary, "parse_gssummary_text", counting)
+    monkeypatch.setattr(parse_lyric, "extract_fits_metadata",
+                        lambda *a, **k: ((100, 100), 0.03, 50.0, 50.0, 0.0, None))
+
+    stats = run_galfits._parse_gssummary(str(path))
+    params, config_file = parse_lyric.parse_gssummary(str(path))
+    comps = parse_lyric.extract_component_attributes(
+        str(path), fits_file="unused.fits", band="f150w")
+
+    assert len(calls) == 1
+    assert stats["reduced_chisq"] == pytest.approx(1.234)
+    assert stats["bic"] == pytest.approx(5678.9)
+    assert stats["parameters"]["bulge_Re"] == 1.5
+    assert params["disk_Re"] == 4.0
+    assert config_file == "/data/gal/gal.lyric"
+    assert [c["name"] for c in comps] == ["bulge", "disk"]
+
+
+def test_summary_stats_missing_file(tmp_path):
+    assert run_galfits._parse_gssummary(str(tmp_path / "missing.gssummary")) == {}
@@ -0,0 +1,66 @@
+import numpy as np
+
+from tools import bar_lopsidedness_core as core
+from tools import sb_profile
+from tools.image_moments import positive_moments
+
+
+def _galaxy(shape=(203, 187), xc=93.4, yc=101.2, q=0.55, pa=0.6, seed=1):
+    rng = np.random.default_rng(seed)
+    yy, xx = np.indices(shape)
+    dx, dy = xx - xc, yy - yc
+    u = dx * np.cos(pa) + dy * np.sin(pa)
+    v = -dx * np.sin(pa) + dy * np.cos(pa)
+    r = np.hypot(u, v / q)
+    return 50.0 * np.exp(-r / 12.0) + rng.normal(0.0, 0.3, shape)
+
+
+def _full_grid_moments(image, mask, cx, cy):
+    """Reference: the former whole-image np.indices formulation."""
+    positive = image > 0
+    if mask is not None:
+        positive &= ~mask
+    values = np.where(positive, image, 0)
+    total = values.sum()
+    yy, xx = np.indices(image.shape)
+    w = values / total
+    dx, dy = xx - cx, yy - cy
+    return (int(np.sum(positive)), total,
+            (xx * values).sum() / total, (yy * values).sum() / total,
+            np.sum(w * dx * dx), np.sum(w * dy * dy), np.sum(w * dx * dy))
+
+
+def test_positive_moments_match_full_grid():
+    image = _galaxy()
+    mask = np.zeros(image.shape, dtype=bool)
+    mask[20:40, 30:70] = True
+    n, total, cx, cy, x2, y2, xy = _full_grid_moments(image, mask, 92.0, 100.0)
+
+    mom = positive_moments(image, mask, center=(92.0, 100.0), block_rows=17)
+    assert mom["n"] == n
+    np.testing.assert_allclose(mom["total"], total, rtol=1e-12)
+    np.testing.assert_allclose(mom["sx"] / mom["total"], cx, rtol=1e-12)
+    np.testing.assert_allclose(mom["sy"] / mom["total"], cy, rtol=1e-12)
+    np.testing.assert_allclose(
+        [mom["sxx"] / total, mom["syy"] / total, mom["sxy"] / total],
+        [x2, y2, xy], rtol=1e-10)
+
+
+def test_get_initial_params_matches_full_grid():
+    image = _galaxy()
+    mask = np.zeros(image.shape, dtype=bool)
+    mask[150:170, 10:40] = True
+
+    cx, cy, eps, theta, _ = core.get_initial_params(image, mask)
+    _, _, rcx, rcy, x2, y2, xy = _full_grid_moments(image, mask, 0.0, 0.0)
+    np.testing.assert_allclose([cx, cy], [rcx, rcy], rtol=1e-12)
+    _, _, _, _, x2, y2, xy = _full_grid_moments(image, mask, cx, cy)
+    np.testing.assert_allclose(theta, 0.5 * np.arctan2(2 * xy, x2 - y2), rtol=1e-10)
+
+    # sb_profile 以 MaskedArray 调用；行块大小不影响结果
+    ma = np.ma.MaskedArray(image, mask=mask)
+    ref = sb_profile.get_initial_params(ma)
+    mom_small = positive_moments(ma, None, center=ref[:2], block_rows=3)
+    mom_big = positive_moments(ma, None, center=ref[:2], block_rows=10000)
+    for key in ("n", "total", "sxx", "syy", "sxy"):
+        np.testing.assert_allclose(mom_small[key], mom_big[key], rtol=1e-12)
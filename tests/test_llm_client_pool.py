@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from llms import client_pool
+from llms.client_pool import clear_client_pool, get_openai_client, get_pooled_client, run_on_llm_loop
+
+
+def _response(text="ok"):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))], usage=None)
+
+
+class _FakeAsyncClient:
+    """Stands in for AsyncOpenAI; records peak in-flight requests and the loop used."""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.loops = set()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, **params):
+        self.loops.add(id(asyncio.get_running_loop()))
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.05)
+        self.active -= 1
+        return _response(params["model"])
+
+
+@pytest.fixture(autouse=True)
+def _fresh_pool():
+    clear_client_pool()
+    yield
+    clear_client_pool()
+
+
+def test_clients_shared_per_key(monkeypatch):
+    built = []
+    monkeypatch.setattr(client_pool, "_new_async_openai",
+                        lambda *a: built.append(a) or _FakeAsyncClient())
+
+    a = get_openai_client("sk-1", "https://api.example/v1", "m1")
+    assert get_openai_client("sk-1", "https://api.example/v1", "m1") is a
+    assert get_openai_client("sk-2", "https://api.example/v1", "m1") is not a
+    assert get_openai_client("sk-1", "https://api.example/v1", "m2") is not a
+    assert len(built) == 3
+    assert "sk-1" not in repr(a.key)
+
+
+def test_concurrency_bounded_on_shared_loop(monkeypatch):
+    monkeypatch.setenv("LLM_MAX_CONCURRENCY", "2")
+    fake = _FakeAsyncClient()
+    monkeypatch.setattr(client_pool, "_new_async_openai", lambda *a: fake)
+    pooled = get_openai_client("sk", None, "m")
+
+    threads = [threading.Thread(target=pooled.create, kwargs={"model": "m", "messages": []}) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert fake.peak == 2
+    assert fake.loops == {id(client_pool.llm_loop())}
+
+
+def test_run_on_llm_loop_from_running_loop(monkeypatch):
+    monkeypatch.setattr(client_pool, "_new_async_openai", lambda *a: _FakeAsyncClient())
+    pooled = get_openai_client("sk", None, "m")
+
+    async def caller():
+        # sync code called from inside another event loop (e.g. an MCP tool handler)
+        return pooled.create(model="m", messages=[]).choices[0].message.content
+
+    assert asyncio.run(caller()) == "m"
+    with pytest.raises(TimeoutError):
+        run_on_llm_loop(asyncio.sleep(1), timeout=0.01)
+
+
+def test_sync_provider_uses_factory_and_thread_limit(monkeypatch):
+    monkeypatch.setenv("LLM_MAX_CONCURRENCY", "1")
+    state = {"active": 0, "peak": 0}
+
+    def create(**params):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        time.sleep(0.02)
+        state["active"] -= 1
+        return _response()
+
+    pooled = get_pooled_client("glm", "key", None, "glm-4v",
+                               factory=lambda: SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+    assert not pooled.is_async
+    threads = [threading.Thread(target=pooled.create, kwargs={"model": "glm-4v"}) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert state["peak"] == 1
+    with pytest.raises(ValueError):
+        get_pooled_client("glm", "other", None, "glm-4v")
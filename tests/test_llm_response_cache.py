@@ -0,0 +1,146 @@
+import base64
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from llms import OpenAILLM, response_cache
+from llms.client_pool import clear_client_pool
+from tools import openai_analysis
+
+
+def _image_url(data: bytes) -> str:
+    return "data:image/png;base64," + base64.b64encode(data).decode()
+
+
+def _messages(image: bytes, prompt: str = "describe"):
+    return [{"role": "system", "content": "expert"},
+            {"role": "user", "content": [{"type": "text", "text": prompt},
+                                         {"type": "image_url", "image_url": {"url": _image_url(image)}}]}]
+
+
+class _FakePooled:
+    """PooledClient stand-in counting real API calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def _response(self, params):
+        self.calls += 1
+        usage = SimpleNamespace(prompt_tokens=10, completion_tokens=5, total_tokens=15)
+        text = f"answer {self.calls} to {len(params['messages'])} messages"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))], usage=usage)
+
+    def create(self, **params):
+        return self._response(params)
+
+    async def acreate(self, **params):
+        return self._response(params)
+
+
+@pytest.fixture(autouse=True)
+def _fresh():
+    response_cache.reset_cache_stats()
+    clear_client_pool()
+    yield
+    clear_client_pool()
+
+
+def test_request_key_components():
+    base = response_cache.request_key("m", _messages(b"png-1"), temperature=0.3, max_tokens=100)
+    assert base == response_cache.request_key("m", _messages(b"png-1"), max_tokens=100, temperature=0.3)
+    assert base != response_cache.request_key("m", _messages(b"png-2"), temperature=0.3, max_tokens=100)
+    assert base != response_cache.request_key("m", _messages(b"png-1", "other"), temperature=0.3, max_tokens=100)
+    assert base != response_cache.request_key("m2", _messages(b"png-1"), temperature=0.3, max_tokens=100)
+    assert base != response_cache.request_key("m", _messages(b"png-1"), temperature=0.7, max_tokens=100)
+    # 同名模型在不同 provider / 端点上是不同的请求
+    assert base != response_cache.request_key("m", _messages(b"png-1"), provider="glm",
+                                              temperature=0.3, max_tokens=100)
+    assert base != response_cache.request_key("m", _messages(b"png-1"), base_url="http://localhost:8000/v1",
+                                              temperature=0.3, max_tokens=100)
+
+
+def test_ttl_bypass_and_stats(monkeypatch):
+    key = response_cache.request_key("m", _messages(b"x"))
+    assert response_cache.lookup(key) is None
+    response_cache.store(key, "hello", {"prompt_tokens": 1}, "m")
+    assert response_cache.lookup(key)["content"] == "hello"
+    assert response_cache.lookup(key, use_cache=False) is None
+
+    monkeypatch.setenv("LLM_CACHE_TTL_S", "60")
+    monkeypatch.setattr(response_cache.time, "time", lambda: time.monotonic() + 1e10)
+    assert response_cache.lookup(key) is None
+
+    stats = response_cache.cache_stats()
+    assert (stats["hits"], stats["misses"], stats["expired"], stats["bypassed"], stats["stores"]) == (1, 2, 1, 1, 1)
+    assert stats["hit_rate"] == pytest.approx(1 / 3, abs=1e-3)
+
+    monkeypatch.setenv("LLM_CACHE", "0")
+    response_cache.store(response_cache.request_key("m", []), "never")
+    assert response_cache.clear_response_cache() == 1
+
+
+def test_llm_client_replays_from_cache(monkeypatch):
+    fake = _FakePooled()
+    monkeypatch.setattr("llms.openai_llm.get_openai_client", lambda *a, **k: fake)
+    client = OpenAILLM({"api_key": "sk-test", "model": "m"})
+    image = base64.b64encode(b"img").decode()
+
+    first = client.chat_with_image(image, [{"type": "text", "text": "hi"}], "sys")
+    second = client.chat_with_image(image, [{"type": "text", "text": "hi"}], "sys")
+    assert fake.calls == 1
+    assert not first["cached"] and second["cached"]
+    assert second["content"] == first["content"] and second["usage"] == first["usage"]
+
+    third = client.chat_with_image(image, [{"type": "text", "text": "hi"}], "sys",
+                                   use_cache=False)
+    assert fake.calls == 2 and not third["cached"]
+
+
+def test_openai_analysis_replay_costs_nothing(tmp_path, monkeypatch):
+    image = tmp_path / "cmp.png"
+    image.write_bytes(b"\x89PNG fake bytes")
+    fake = _FakePooled()
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(openai_analysis, "get_openai_client", lambda *a, **k: fake)
+
+    first = openai_analysis.run_openai_analysis("sys", ["turn 1", "turn 2"], str(image))
+    replay = openai_analysis.run_openai_analysis("sys", ["turn 1", "turn 2"], str(image))
+    assert fake.calls == 2
+    assert replay[0] == first[0]
+    assert first[3]["cached_turns"] == 0 and replay[3]["cached_turns"] == 2
+
+    image.write_bytes(b"\x89PNG other bytes")
+    openai_analysis.run_openai_analysis("sys", ["turn 1", "turn 2"], str(image))
+    assert fake.calls == 4
+
+
+def test_prune_removes_expired_entries(monkeypatch):
+    old, new = response_cache.request_key("m", _messages(b"old")), response_cache.request_key("m", _messages(b"new"))
+    response_cache.store(old, "stale")
+    response_cache.store(new, "fresh")
+    past = time.time() - 100
+    os.utime(response_cache._entry_path(old), (past, past))
+
+    monkeypatch.setenv("LLM_CACHE_TTL_S", "0")
+    assert response_cache.prune_response_cache() == 0
+    monkeypatch.setenv("LLM_CACHE_TTL_S", "60")
+    assert response_cache.prune_response_cache() == 1
+    assert not os.path.exists(response_cache._entry_path(old))
+    assert response_cache.lookup(new)["content"] == "fresh"
+
+
+def test_store_prunes_once_per_interval(monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_TTL_S", "60")
+    key = response_cache.request_key("m", _messages(b"old"))
+    response_cache.store(key, "stale")
+    past = time.time() - 100
+    os.utime(response_cache._entry_path(key), (past, past))
+
+    # 标记文件刚写过：间隔内不再清扫
+    response_cache.store(response_cache.request_key("m", _messages(b"a")), "a")
+    assert os.path.exists(response_cache._entry_path(key))
+    monkeypatch.setenv("LLM_CACHE_PRUNE_INTERVAL_S", "0")
+    response_cache.store(response_cache.request_key("m", _messages(b"b")), "b")
+    assert not os.path.exists(response_cache._entry_path(key))
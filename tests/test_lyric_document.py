@@ -0,0 +1,140 @@
+import os
+
+import pytest
+
+from tools import lyric_document
+from tools.lyric_document import clear_lyric_cache, load_lyric, parse_lyric_text
+from tools.modify_lyric import check_lyric_file
+from tools.parse_lyric import parse_component_types, parse_region_info_from_lyric
+
+SAMPLE = """# Region information
+R1) gal1
+R2) [150.1, 2.2]   # sky coordinate
+R3) 0.5
+
+# Image A
+Ia1) [img_a.fits,0]
+Ia2) f150w
+Ia3) [img_a.fits,2]
+Ia14) [[0,-5,5,0.1,0],[0,-5,5,0.1,0]]
+Ia15) 0
+
+# Profile A
+Pa1) bulge
+Pa2) sersic
+Pa3) [0,-0.3,0.3,0.1,1]   # x-center
+Pb1) disk
+Pb2) expdisk
+"""
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    clear_lyric_cache()
+    yield
+    clear_lyric_cache()
+
+
+def _write(tmp_path, text, name="gal.lyric"):
+    path = tmp_path / name
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+    return str(path)
+
+
+@pytest.mark.parametrize("text", [SAMPLE, SAMPLE.replace("\n", "\r\n"), "R1) a\nR3) 0.1", ""])
+def test_round_trip_is_lossless(text):
+    assert parse_lyric_text(text).to_text() == text
+
+
+def test_sections_and_values():
+    doc = parse_lyric_text(SAMPLE)
+    assert doc.get("R2") == [150.1, 2.2]
+    assert doc.get("R3)") == 0.5
+    assert doc.get("Pa2") == "sersic"
+    assert doc.raw("Ia1") == "[img_a.fits,0]"
+    assert doc.labels("P") == ["a", "b"]
+    assert sorted(doc.block("I", "a")) == [1, 2, 3, 14, 15]
+    assert doc.label_of("P", "disk") == "b"
+    assert doc.label_of("P", "bar") is None
+
+
+def test_set_keeps_prefix_and_comment_and_inserts_into_block():
+    doc = parse_lyric_text(SAMPLE)
+    doc.set("Pa3", [0.1, -0.3, 0.3, 0.1, 0])
+    doc.set("Ia15", 1)
+    doc.set("Pa4", "[0,-0.3,0.3,0.1,1]")
+    text = doc.to_text()
+
+    assert "Pa3) [0.1, -0.3, 0.3, 0.1, 0]   # x-center\n" in text
+    assert "Ia15) 1\n" in text
+    assert "Pa3) [0.1, -0.3, 0.3, 0.1, 0]   # x-center\nPa4) [0,-0.3,0.3,0.1,1]\nPb1) disk\n" in text
+    # untouched lines are byte-identical
+    assert text.replace("Pa4) [0,-0.3,0.3,0.1,1]\n", "").replace("Ia15) 1", "Ia15) 0") \
+        .replace("Pa3) [0.1, -0.3, 0.3, 0.1, 0]", "Pa3) [0,-0.3,0.3,0.1,1]") == SAMPLE
+
+    assert doc.delete("Pb2") == 1
+    assert "Pb2" not in doc
+
+
+def test_load_lyric_memoized_and_read_only(tmp_path):
+    path = _write(tmp_path, SAMPLE)
+    doc = load_lyric(path)
+    assert load_lyric(path) is doc
+    with pytest.raises(RuntimeError):
+        doc.set("R3", 1.0)
+
+    edited = doc.copy()
+    edited.set("R3", 1.0)
+    assert doc.get("R3") == 0.5
+    edited.save()
+
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    reloaded = load_lyric(path)
+    assert reloaded is not doc
+    assert reloaded.get("R3") == 1.0
+
+
+def test_save_keeps_file_mode(tmp_path):
+    path = _write(tmp_path, SAMPLE)
+    os.chmod(path, 0o664)
+    doc = load_lyric(path).copy()
+    doc.set("R3", 1.0)
+    doc.save()
+    assert os.stat(path).st_mode & 0o777 == 0o664
+
+    umask = os.umask(0o022)
+    try:
+        new = doc.save(str(tmp_path / "new.lyric"))
+    finally:
+        os.umask(umask)
+    assert os.stat(new).st_mode & 0o777 == 0o644
+
+
+def test_consumers_share_one_parse(tmp_path, monkeypatch):
+    path = _write(tmp_path, SAMPLE)
+    calls = []
+    real = lyric_document.parse_lyric_text
+
+    def counting(text, path=None):
+        calls.append(path)
+        return real(text, path)
+
+    monkeypatch.setattr(lyric_document, "parse_lyric_text", counting)
+
+    assert check_lyric_file(path)["status"] == "success"
+    region = parse_region_info_from_lyric(path)
+    types = parse_component_types(path)
+
+    assert len(calls) == 1
+    assert (region.object, region.ra, region.dec, region.red_shift) == ("gal1", 150.1, 2.2, 0.5)
+    assert types == {"bulge": "sersic", "disk": "expdisk"}
+
+
+def test_check_lyric_file_reports_line_errors(tmp_path):
+    path = _write(tmp_path, SAMPLE + "Pc3) [0,-0.3,0.3,0.1,1]\nno separator\n")
+    result = check_lyric_file(path)
+    assert result["status"] == "failure"
+    assert "Line 19: Pc3) sits inside P-component 'b'" in result["message"]
+    assert "Line 20: missing ')' separator: 'no separator'" in result["message"]
@@ -5,7 +5,7 @@ from pathlib import Path
 
 import pytest
 
-from tools.parse_feedme import parse_feedme, parse_components
+from tools.parse_feedme import load_feedme, parse_components, parse_feedme, parse_feedme_text
 
 
 @pytest.fixture
@@ -102,3 +102,42 @@ class TestParseComponents:
         assert comps_in[1]["type"] == "expdisk"
         assert comps_in[2]["type"] == "ferrer"
         assert comps_in[3]["type"] == "psf"
+
+
+class TestFeedmeDocument:
+    """Tests for the memoized load_feedme() document model."""
+
+    def test_header_and_photometry(self, ngc1097_galfit_params):
+        from tools.sb_profile import parse_photometry_params
+
+        doc = load_feedme(ngc1097_galfit_params)
+        assert doc.header["H"].split() == ["37", "1467", "25", "1455"]
+        assert (doc.zeropoint, doc.pltscale) == parse_photometry_params(ngc1097_galfit_params)
+        assert [c["type"] for c in doc.components] == ["sersic", "expdisk", "ferrer", "psf"]
+
+    def test_memoized_until_file_changes(self, ngc1097_feedme, tmp_path):
+        feedme = tmp_path / "g.feedme"
+        feedme.write_text(Path(ngc1097_feedme).read_text())
+        doc = load_feedme(str(feedme))
+        assert load_feedme(str(feedme)) is doc
+
+        # 调用方修改返回值不会污染缓存
+        parse_components(str(feedme))[0]["x"] = -1.0
+        parse_feedme(str(feedme))["input"] = ""
+        assert doc.components[0]["x"] != -1.0 and doc.paths["input"]
+
+        feedme.write_text(doc.to_text({"J": "25.0"}))
+        os.utime(feedme, ns=(1, 1))
+        assert load_feedme(str(feedme)).zeropoint == 25.0
+
+    def test_to_text_roundtrip(self, ngc1097_feedme):
+        doc = load_feedme(ngc1097_feedme)
+        assert doc.to_text() == Path(ngc1097_feedme).read_text()
+
+        text = doc.to_text({"H": "1 100 1 100"})
+        new = parse_feedme_text(text, ngc1097_feedme)
+        assert new.paths["fit_region"] == (1, 100, 1, 100)
+        assert new.components == doc.components
+        assert "# Image region to fit" in text
+        with pytest.raises(KeyError):
+            doc.to_text({"Q": "1"})
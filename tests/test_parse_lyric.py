@@ -0,0 +1,42 @@
+import types
+
+import numpy as np
+import pytest
+
+from tools import parse_lyric
+from tools.galfits_session import FitterSession
+
+
+def test_conv_fft_shape_covers_full_linear_convolution():
+    for image_shape, psf_shape in [((37, 50), (11, 11)), ((20, 31), (25, 25))]:
+        fft_shape = parse_lyric._conv_fft_shape(image_shape, psf_shape)
+        assert all(f >= n + p - 1 for f, n, p in zip(fft_shape, image_shape, psf_shape))
+
+
+def test_batched_band_render_matches_per_component_loop(monkeypatch):
+    pytest.importorskip("jax")
+    jnp = parse_lyric.jnp
+    rng = np.random.default_rng(3)
+
+    comps = ["bulge", "disk", "bar"]
+    gm = types.SimpleNamespace(name="gal", mass_map={
+        k: jnp.asarray(rng.random((48, 52)), dtype=jnp.float32) for k in comps})
+    psf = rng.random((13, 11)).astype(np.float32)
+    im = types.SimpleNamespace(cut_image=np.zeros((40, 45)), PSF=psf / psf.sum(),
+                               phys_to_counts_rate=3.5)
+    pardict = {"logNorm_bulge_f150w": -1.0, "logNorm_disk_f150w": -0.5}
+    comp_keys = [(gm, k) for k in comps]
+    scale0 = 0.8
+    scale = jnp.array([scale0, scale0], dtype=jnp.float32)
+    trans = jnp.array([1.3, -0.7], dtype=jnp.float32)
+    session = FitterSession(key=(), fitter=None, targ=None, fs=None)
+
+    ref = parse_lyric._render_band_loop(im, comp_keys, pardict, "f150w", scale0, scale, trans)
+    out = parse_lyric._render_band_batched(session, 0, im, comp_keys, pardict, "f150w", scale0, scale, trans)
+    assert len(session.psf_ffts) == 1
+    parse_lyric._render_band_batched(session, 0, im, comp_keys, pardict, "f150w", scale0, scale, trans)
+    assert len(session.psf_ffts) == 1
+
+    for a, b in zip(out, ref):
+        assert a.shape == b.shape == im.cut_image.shape
+        np.testing.assert_allclose(a, b, rtol=1e-4, atol=1e-5 * np.abs(b).max())
@@ -0,0 +1,59 @@
+import numpy as np
+from astropy.io import fits
+from astropy.wcs import WCS
+
+from tools.parse_lyric import pixel2arcsec_offset, pixel2arcsec_offset_batch
+from tools.pix2radec import pix2radec, pix2radec_batch, re_arcsec2pix, re_arcsec2pix_batch
+
+
+def _write_wcs_image(path, cdelt):
+    h = fits.Header()
+    h["CTYPE1"], h["CTYPE2"] = "RA---TAN", "DEC--TAN"
+    h["CRVAL1"], h["CRVAL2"] = 14.13899, -0.36266
+    h["CRPIX1"], h["CRPIX2"] = 50.0, 50.0
+    h["CD1_1"], h["CD1_2"] = -cdelt, 0.0
+    h["CD2_1"], h["CD2_2"] = 0.0, cdelt
+    fits.writeto(path, np.zeros((100, 100), dtype=np.float32), header=h)
+
+
+def test_pix2radec_batch_matches_scalar(tmp_path):
+    img = tmp_path / "f115w.fits"
+    _write_wcs_image(img, 8.3e-6)
+    xs, ys = [10.0, 50.5, 77.25], [3.0, 50.0, 91.5]
+
+    ras, decs = pix2radec_batch(xs, ys, str(img))
+    for x, y, ra, dec in zip(xs, ys, ras, decs):
+        np.testing.assert_allclose((ra, dec), pix2radec(x, y, str(img)), rtol=0, atol=1e-12)
+
+
+def test_re_arcsec2pix_batch_matches_scalar(tmp_path):
+    a, b = tmp_path / "f115w.fits", tmp_path / "f277w.fits"
+    _write_wcs_image(a, 8.3e-6)
+    _write_wcs_image(b, 1.75e-5)
+    files = [str(a), str(b)]
+
+    table = re_arcsec2pix_batch([0.1, 0.3, 1.2], files)
+    for j, re_as in enumerate([0.1, 0.3, 1.2]):
+        np.testing.assert_allclose([row[j] for row in table], re_arcsec2pix(re_as, files))
+
+
+def test_pixel2arcsec_offset_batch_matches_scalar(tmp_path):
+    _write_wcs_image(tmp_path / "f115w.fits", 8.3e-6)
+    lyric = tmp_path / "obj.lyric"
+    lyric.write_text(
+        "R1) J0056-0021\n"
+        "R2) [14.13899,-0.36266]\n"
+        "Ia1) [./f115w.fits,0]\n"
+        "Ia2) nircam_f115w\n"
+        "Ia8) 0.5\n",
+        encoding="utf-8",
+    )
+    xs, ys = [40.0, 50.0, 61.5], [45.0, 50.0, 58.0]
+
+    ra_off, dec_off = pixel2arcsec_offset_batch(xs, ys, str(lyric), "nircam_f115w", origin=0)
+    for x, y, r, d in zip(xs, ys, ra_off, dec_off):
+        np.testing.assert_allclose(
+            (r, d), pixel2arcsec_offset(x, y, str(lyric), "nircam_f115w", origin=0), atol=1e-12)
+    # CRPIX (1-based 50,50) == galaxy center → zero offset
+    assert np.allclose(pixel2arcsec_offset(50.0, 50.0, str(lyric), "nircam_f115w"), 0.0, atol=1e-6)
+    assert isinstance(pixel2arcsec_offset_batch([1.0], [1.0], str(lyric), "nope"), dict)
@@ -0,0 +1,108 @@
+import copy
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from llms.client_pool import clear_client_pool
+from tools import modify_lyric as ml
+from tools import openai_analysis
+from tools.residual_analysis import _system_message
+
+
+class _RecordingPooled:
+    """PooledClient stand-in that records requests and reports prefix-cached tokens."""
+
+    def __init__(self, cached_tokens=0):
+        self.requests = []
+        self.cached_tokens = cached_tokens
+
+    def _response(self, params):
+        self.requests.append(copy.deepcopy(params))
+        usage = SimpleNamespace(prompt_tokens=1000, completion_tokens=10, total_tokens=1010,
+                                prompt_tokens_details=SimpleNamespace(cached_tokens=self.cached_tokens))
+        content = "```lyric\nR1) gal\n```"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=usage)
+
+    def create(self, **params):
+        return self._response(params)
+
+    async def acreate(self, **params):
+        return self._response(params)
+
+
+@pytest.fixture(autouse=True)
+def _fresh():
+    clear_client_pool()
+    yield
+    clear_client_pool()
+
+
+def _prefix(messages):
+    """Serialized messages up to (excluding) the first image block."""
+    out = []
+    for msg in messages:
+        content = msg["content"]
+        if isinstance(content, str):
+            out.append(content)
+            continue
+        for block in content:
+            if block["type"] == "image_url":
+                return json.dumps(out, ensure_ascii=False)
+            out.append(block["text"])
+    return json.dumps(out, ensure_ascii=False)
+
+
+def test_turn1_static_text_precedes_images(tmp_path, monkeypatch):
+    a, b, ref = tmp_path / "a.png", tmp_path / "b.png", tmp_path / "ref.png"
+    a.write_bytes(b"a")
+    b.write_bytes(b"b")
+    ref.write_bytes(b"r")
+
+    msg_a = openai_analysis._build_interleaved_image_message("look", str(a), [{"image": str(ref), "caption": "c"}], "intro")
+    msg_b = openai_analysis._build_image_message("look", str(b))
+    assert msg_a["content"][0] == {"type": "text", "text": "look"}
+    assert msg_a["content"][-1]["type"] == "image_url"
+    assert msg_b["content"][0]["type"] == "text" and msg_b["content"][-1]["type"] == "image_url"
+
+    monkeypatch.setenv("VLM_STATIC_PREFIX", "0")
+    legacy = openai_analysis._build_interleaved_image_message("look", str(a), [{"image": str(ref), "caption": "c"}], "intro")
+    assert legacy["content"][0] == {"type": "text", "text": "intro"}
+    assert legacy["content"][-1] == {"type": "text", "text": "look"}
+
+
+def test_analysis_shares_prefix_and_records_cached_tokens(tmp_path, monkeypatch):
+    fake = _RecordingPooled(cached_tokens=800)
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("LLM_CACHE", "0")
+    monkeypatch.setattr(openai_analysis, "get_openai_client", lambda *a, **k: fake)
+
+    system = _system_message(galfits=False)
+    assert system is _system_message(galfits=False)
+    for name in ("g1.png", "g2.png"):
+        (tmp_path / name).write_bytes(name.encode())
+        _, _, err, timing = openai_analysis.run_openai_analysis(system, ["phase 1", "phase 2"], str(tmp_path / name))
+        assert err is None
+        assert timing["cached_prompt_tokens"] == 1600 and timing["turns"][0]["cached_tokens"] == 800
+
+    first_turns = [r["messages"] for r in fake.requests if len(r["messages"]) == 2]
+    assert len(first_turns) == 2
+    assert _prefix(first_turns[0]) == _prefix(first_turns[1])
+    assert "phase 1" in _prefix(first_turns[0])
+
+
+def test_modify_lyric_static_system_then_variable_task(tmp_path, monkeypatch):
+    fake = _RecordingPooled()
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("LLM_CACHE", "0")
+    monkeypatch.setattr("llms.openai_llm.get_openai_client", lambda *a, **k: fake)
+    for name in ("a", "b"):
+        (tmp_path / f"{name}.lyric").write_text(f"R1) {name}\n")
+        result = ml.modify_lyric(str(tmp_path / f"{name}.lyric"), f"rename to {name}", str(tmp_path / f"{name}_new.lyric"))
+        assert result["status"] == "success"
+
+    sys_a, sys_b = (r["messages"][0] for r in fake.requests)
+    assert sys_a["role"] == "system" and sys_a == sys_b
+    assert "5-tuple parameter specification" in sys_a["content"]
+    user = fake.requests[0]["messages"][1]["content"]
+    assert "R1) a" in user and "rename to a" in user and "lyric configuration template" not in user
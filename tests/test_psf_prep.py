@@ -0,0 +1,170 @@
+import asyncio
+import json
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from astropy.io import fits
+
+from tools.lyric_document import clear_lyric_cache, load_lyric
+from tools.parse_feedme import clear_feedme_cache, parse_feedme
+from tools.psf_prep import prepare_psf, trim_psf
+from tools.run_galfit import run_galfit
+from tools.run_galfits import run_galfits
+
+FEEDME = """A) img.fits        # Input data image
+B) out.fits        # Output data image block
+C) none        # Sigma image
+D) psf.fits        # PSF image
+F) none        # Bad pixel mask
+G) none        # Constraints
+H) 1 50 1 50        # Image region to fit
+J) 25.0        # Zeropoint
+K) 0.03 0.03        # Plate scale
+
+ 0) sersic
+ 1) 25 25 1 1
+ 3) 18.0 1
+"""
+
+LYRIC = """R1) gal
+R2) [150.1, 2.2]
+R3) 0.5
+Ia1) [img.fits,0]
+Ia2) f150w
+Ia4) [psf.fits,0]
+Ia6) [Noimg,0]
+"""
+
+
+@pytest.fixture(autouse=True)
+def _fresh():
+    clear_feedme_cache()
+    clear_lyric_cache()
+
+
+def _psf(path, size=101, sigma=2.0, offset=0):
+    y, x = np.indices((size, size), dtype=np.float64)
+    c = size // 2 + offset
+    fits.PrimaryHDU((5.0 * np.exp(-((x - c) ** 2 + (y - c) ** 2) / (2 * sigma ** 2))).astype(np.float32)).writeto(path)
+
+
+def test_trim_psf_centered_normalized_and_cached(tmp_path):
+    _psf(tmp_path / "psf.fits")
+    first = trim_psf(str(tmp_path / "psf.fits"), 0, 0.995)
+    assert first["trimmed"] and not first["cached"]
+    ny, nx = first["shape"]
+    assert ny == nx and ny % 2 == 1 and ny < 101
+    assert first["ee_radius"] == pytest.approx(2.0 * 3.255, abs=0.5)
+
+    data = fits.getdata(first["path"])
+    assert data.sum() == pytest.approx(1.0, rel=1e-5)
+    assert np.unravel_index(np.argmax(data), data.shape) == (ny // 2, nx // 2)
+    assert fits.getheader(first["path"])["PSFORIG"] == "101x101"
+
+    second = trim_psf(str(tmp_path / "psf.fits"), 0, 0.995)
+    assert second["cached"] and second["path"] == first["path"] and second["shape"] == first["shape"]
+
+
+def test_trim_psf_keeps_small_psf(tmp_path):
+    _psf(tmp_path / "psf.fits", size=11, sigma=3.0)
+    result = trim_psf(str(tmp_path / "psf.fits"), None, 0.995)
+    assert not result["trimmed"] and result["path"] == str(tmp_path / "psf.fits")
+
+
+def test_trim_psf_keeps_psf_whose_peak_is_near_the_edge(tmp_path):
+    # 峰值离边缘 2 像素：收缩后的 5x5 远小于 r_EE，能量不足时沿用原 PSF
+    _psf(tmp_path / "psf.fits", size=41, sigma=3.0, offset=-18)
+    result = trim_psf(str(tmp_path / "psf.fits"), 0, 0.995)
+    assert not result["trimmed"] and result["path"] == str(tmp_path / "psf.fits")
+    assert result["shape"] == [41, 41]
+    assert not (tmp_path / ".psf_trimmed").exists()
+
+
+def test_prepare_psf_feedme_and_lyric_variants(tmp_path):
+    _psf(tmp_path / "psf.fits")
+    (tmp_path / "gal.feedme").write_text(FEEDME)
+    (tmp_path / "gal.lyric").write_text(LYRIC)
+
+    feedme = prepare_psf(str(tmp_path / "gal.feedme"))
+    assert feedme["status"] == "success"
+    assert feedme["variant_file"] == str(tmp_path / "gal_psftrim.feedme")
+    assert parse_feedme(feedme["variant_file"])["psf"] == feedme["psf_trim"][0]["path"]
+
+    lyric = prepare_psf(str(tmp_path / "gal.lyric"))
+    doc = load_lyric(lyric["variant_file"])
+    assert doc.raw("Ia4") == f"[{lyric['psf_trim'][0]['path']},0]"
+    assert doc.raw("Ia1") == "[img.fits,0]"
+    # 临时文件的 0600 不会泄漏到生成的变体与裁剪 PSF 上
+    for path in (feedme["variant_file"], lyric["variant_file"], lyric["psf_trim"][0]["path"]):
+        assert os.stat(path).st_mode & 0o044
+
+
+def test_run_galfits_uses_trimmed_lyric_and_records_trim(tmp_path):
+    galaxy_dir = tmp_path / "gal"
+    galaxy_dir.mkdir()
+    _psf(galaxy_dir / "psf.fits")
+    config = galaxy_dir / "gal.lyric"
+    config.write_text(LYRIC)
+
+    def fake_run(cmd, **kwargs):
+        run_config = Path(cmd[cmd.index("--config") + 1])
+        assert run_config.name == "_psftrim_gal.lyric"
+        assert ".psf_trimmed" in run_config.read_text()
+        workplace = Path(cmd[cmd.index("--workplace") + 1])
+        (workplace / "gal.gssummary").write_text("# free parameters\n")
+        return type("Proc", (), {"returncode": 0, "stdout": "ok", "stderr": ""})()
+
+    with patch("tools.run_galfits.subprocess.run", side_effect=fake_run):
+        result = asyncio.run(run_galfits(str(config), psf_ee=0.995))
+
+    assert result["status"] == "success"
+    assert result["psf_trim"][0]["trimmed"] and result["psf_trim"][0]["original_shape"] == [101, 101]
+    index = [json.loads(line) for line in (galaxy_dir / ".archive_index.jsonl").read_text().splitlines()]
+    assert index[-1]["psf_trim"] == result["psf_trim"]
+
+
+def _fake_galfit(returncode=0):
+    def fake_run(cmd, cwd=None, **kwargs):
+        run_config = Path(cmd[-1])
+        assert run_config.name == "gal_psftrim.feedme"
+        sep = "-" * 60
+        (Path(cwd) / "fit.log").write_text(
+            f"\n{sep}\n\nInit. par. file : {run_config.name}\nChi^2/nu = 1.05\n\n{sep}\n")
+        if returncode == 0:
+            model = fits.ImageHDU(np.zeros((50, 50), dtype=np.float32))
+            model.header.update(OBJECT="model", CHISQ=2500.0, NDOF=2400, NFREE=7, NFIX=0, CHI2NU=1.05)
+            original = fits.ImageHDU(np.ones((50, 50), dtype=np.float32))
+            original.header["OBJECT"] = "img.fits[1:50,1:50]"
+            fits.HDUList([fits.PrimaryHDU(), original, model,
+                          fits.ImageHDU(np.ones((50, 50), dtype=np.float32))]).writeto(Path(cwd) / "out.fits")
+        return type("Proc", (), {"returncode": returncode, "stdout": "ok", "stderr": ""})()
+    return fake_run
+
+
+def test_run_galfit_trimmed_run_keeps_fit_log_in_summary(tmp_path):
+    _psf(tmp_path / "psf.fits")
+    (tmp_path / "gal.feedme").write_text(FEEDME.replace("B) out.fits", f"B) {tmp_path / 'out.fits'}"))
+
+    with patch("tools.run_galfit.subprocess.run", side_effect=_fake_galfit()):
+        result = asyncio.run(run_galfit(str(tmp_path / "gal.feedme"), psf_ee=0.995))
+
+    assert result["status"] == "success" and result["psf_trim"][0]["trimmed"]
+    summary = Path(result["summary_file"]).read_text()
+    assert "## Fit log Content" in summary and "Init. par. file : gal_psftrim.feedme" in summary
+    # 变体随归档移走，配置目录只剩原 feedme
+    assert not (tmp_path / "gal_psftrim.feedme").exists()
+    assert (Path(result["summary_file"]).parent / "gal_psftrim.feedme").exists()
+
+
+def test_run_galfit_failed_trimmed_run_removes_variant(tmp_path):
+    _psf(tmp_path / "psf.fits")
+    (tmp_path / "gal.feedme").write_text(FEEDME)
+
+    with patch("tools.run_galfit.subprocess.run", side_effect=_fake_galfit(returncode=1)):
+        result = asyncio.run(run_galfit(str(tmp_path / "gal.feedme"), psf_ee=0.995))
+
+    assert result["status"] == "failure"
+    assert sorted(p.name for p in tmp_path.glob("*.feedme")) == ["gal.feedme"]
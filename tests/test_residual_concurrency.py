@@ -0,0 +1,145 @@
+import copy
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from llms.client_pool import clear_client_pool
+from tools import best_round_registry as brr
+from tools import openai_analysis, residual_analysis
+
+# imported lazily (and slowly) by run_openai_analysis on first use; load it up front
+pytest.importorskip("openai")
+
+CONCLUSION = "REGRESSION: restore the bar component"
+
+
+class _FakePooled:
+    def __init__(self, comparison_done: threading.Event):
+        self.comparison_done = comparison_done
+        self.requests = []
+
+    async def acreate(self, **params):
+        # turn 1 must be sent before the (slow) comparison has finished
+        self.requests.append((copy.deepcopy(params["messages"]), self.comparison_done.is_set()))
+        usage = SimpleNamespace(prompt_tokens=1, completion_tokens=1, total_tokens=2)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f"turn {len(self.requests)}"))],
+                               usage=usage)
+
+
+@pytest.fixture(autouse=True)
+def _fresh():
+    clear_client_pool()
+    yield
+    clear_client_pool()
+
+
+def _setup(tmp_path, monkeypatch, comparison):
+    done = threading.Event()
+    fake = _FakePooled(done)
+
+    def slow_update(image_path, summary_path, lyric_file=None, use_cache=True):
+        time.sleep(0.3)
+        done.set()
+        return comparison()
+
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("LLM_CACHE", "0")
+    monkeypatch.setattr(openai_analysis, "get_openai_client", lambda *a, **k: fake)
+    monkeypatch.setattr(brr, "update_best_round_for_call", slow_update)
+    monkeypatch.setattr(brr, "attach_analysis_to_best", lambda *a: None)
+    monkeypatch.setattr(residual_analysis, "_maybe_fetch_reference_blocks", lambda f: (None, None))
+    (tmp_path / "cmp.png").write_bytes(b"png")
+    (tmp_path / "fit.summary").write_text("chi2 1.2\n")
+    return fake
+
+
+def _text(messages):
+    parts = []
+    for m in messages:
+        if isinstance(m["content"], str):
+            parts.append(m["content"])
+        else:
+            parts.extend(b["text"] for b in m["content"] if b["type"] == "text")
+    return "\n".join(parts)
+
+
+def test_comparison_overlaps_turn1_and_feeds_turn2(tmp_path, monkeypatch):
+    fake = _setup(tmp_path, monkeypatch, lambda: {
+        "status": "RETAINED", "best_round": 2, "best_round_label": "iter2",
+        "verdict": "HISTORICAL_BETTER", "comparison_text": None, "comparison_conclusion": CONCLUSION})
+
+    result = residual_analysis.component_analysis(str(tmp_path / "cmp.png"), str(tmp_path / "fit.summary"))
+
+    assert result["status"] == "success"
+    assert [overlapped for _, overlapped in fake.requests] == [False, True, True]
+    assert CONCLUSION not in _text(fake.requests[0][0])
+    assert CONCLUSION in _text(fake.requests[1][0])
+    assert "round 2（iter2）" in result["best_round_judge"]
+
+
+def test_comparison_failure_keeps_analysis(tmp_path, monkeypatch):
+    def boom():
+        raise RuntimeError("registry unavailable")
+
+    _setup(tmp_path, monkeypatch, boom)
+    result = residual_analysis.component_analysis(str(tmp_path / "cmp.png"), str(tmp_path / "fit.summary"))
+    assert result["status"] == "success" and "turn 3" in result["analysis"]
+    assert "ERROR" in result["best_round_judge"]
+
+
+def test_slow_comparison_does_not_block_analysis(tmp_path, monkeypatch):
+    monkeypatch.setenv("BEST_ROUND_JOIN_TIMEOUT_S", "0.05")
+    fake = _setup(tmp_path, monkeypatch, lambda: {
+        "status": "RETAINED", "best_round": 2, "best_round_label": "iter2",
+        "verdict": "HISTORICAL_BETTER", "comparison_text": None, "comparison_conclusion": CONCLUSION})
+
+    start = time.monotonic()
+    result = residual_analysis.component_analysis(str(tmp_path / "cmp.png"), str(tmp_path / "fit.summary"))
+    assert time.monotonic() - start < 0.3
+    assert result["status"] == "success" and "turn 3" in result["analysis"]
+    assert "PENDING" in result["best_round_judge"]
+    assert CONCLUSION not in _text(fake.requests[1][0])
+
+
+def test_pending_comparison_attaches_analysis_when_it_finishes(tmp_path, monkeypatch):
+    monkeypatch.setenv("BEST_ROUND_JOIN_TIMEOUT_S", "0.05")
+    _setup(tmp_path, monkeypatch, lambda: {
+        "status": "UPDATED", "best_round": 3, "best_round_label": "iter3",
+        "verdict": "CURRENT_BETTER", "comparison_text": None})
+    attached = threading.Event()
+    calls = []
+
+    def record(image_path, analysis_md):
+        # 其他用例遗留的后台对比也可能在此回调，只记录本用例的图像
+        if image_path == str(tmp_path / "cmp.png"):
+            calls.append(analysis_md)
+            attached.set()
+
+    monkeypatch.setattr(brr, "attach_analysis_to_best", record)
+
+    result = residual_analysis.component_analysis(str(tmp_path / "cmp.png"), str(tmp_path / "fit.summary"))
+    assert "PENDING" in result["best_round_judge"] and not calls
+    # 对比在后台完成后才挂接分析
+    assert attached.wait(2.0)
+    assert len(calls) == 1 and calls[0].endswith("turn 3")
+
+
+def test_failed_comparison_skips_attach(tmp_path, monkeypatch):
+    def boom():
+        raise RuntimeError("registry unavailable")
+
+    _setup(tmp_path, monkeypatch, boom)
+    calls = []
+    monkeypatch.setattr(brr, "attach_analysis_to_best", lambda image_path, md: calls.append(image_path))
+    result = residual_analysis.component_analysis(str(tmp_path / "cmp.png"), str(tmp_path / "fit.summary"))
+    assert "ERROR" in result["best_round_judge"]
+    assert str(tmp_path / "cmp.png") not in calls
+
+
+def test_inline_mode_returns_completed_future(monkeypatch):
+    monkeypatch.setenv("BEST_ROUND_CONCURRENT", "0")
+    monkeypatch.setattr(brr, "update_best_round_for_call", lambda *a, **k: {"status": "INITIALIZED", **k})
+    future = brr.start_best_round_update("img.png", None, use_cache=False)
+    assert future.done() and future.result() == {"status": "INITIALIZED", "use_cache": False}
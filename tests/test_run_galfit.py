@@ -7,7 +7,7 @@ import pytest
 from astropy.io import fits
 from scipy.ndimage import gaussian_filter
 
-from tools.run_galfit import create_comparison_png
+from tools.run_galfit import create_comparison_png, observed_reff
 
 # Fit region from NGC1097.feedme: H) 37 1467 25 1455 (1-indexed)
 FIT_REGION = (37, 1467, 25, 1455)
@@ -163,3 +163,52 @@ class TestCreateComparisonPng:
         )
         assert png is not None
         assert os.path.exists(png)
+
+
+def _observed_reff_sorted(data, mask, ixc, iyc):
+    """Reference per-pixel argsort growth curve (pre-bincount implementation)."""
+    from astropy.stats import sigma_clipped_stats
+
+    good = np.isfinite(data) & (mask == 0)
+    sky = float(sigma_clipped_stats(data[good])[1])
+    sci = np.where(good, data - sky, 0.0)
+    yy, xx = np.indices(sci.shape)
+    r = np.sqrt((xx - ixc) ** 2 + (yy - iyc) ** 2)
+    rg, sg = r[good], sci[good]
+    order = np.argsort(rg)
+    cum = np.cumsum(sg[order])
+    return float(np.interp(cum[-1] / 2.0, cum, rg[order]))
+
+
+class TestObservedReff:
+    """observed_reff (bincount growth curve) vs. the argsort reference."""
+
+    @staticmethod
+    def _galaxy(shape=(301, 281), xc=140.3, yc=150.7, re=18.0, seed=0):
+        rng = np.random.default_rng(seed)
+        yy, xx = np.indices(shape)
+        r = np.hypot(xx - xc, yy - yc)
+        img = 100.0 * np.exp(-1.678 * (r / re - 1.0)) + 5.0
+        img += rng.normal(0.0, 0.5, shape)
+        mask = np.zeros(shape, dtype=np.int16)
+        mask[10:40, 200:240] = 1
+        return img, mask, xc, yc
+
+    def test_matches_sorted_reference(self):
+        img, mask, xc, yc = self._galaxy()
+        ref = _observed_reff_sorted(img, mask, xc, yc)
+        got = observed_reff(img, mask, xc, yc)
+        assert got > 0
+        assert abs(got - ref) <= 0.25
+
+    def test_nan_pixels_and_small_input(self):
+        img, mask, xc, yc = self._galaxy()
+        img[:5, :] = np.nan
+        assert abs(observed_reff(img, mask, xc, yc)
+                   - _observed_reff_sorted(img, mask, xc, yc)) <= 0.25
+        assert observed_reff(img[:5, :5], mask[:5, :5], 2, 2) == 0.0
+
+    def test_float32_matches_float64(self):
+        img, mask, xc, yc = self._galaxy()
+        got32 = observed_reff(img.astype(np.float32), mask, xc, yc)
+        assert abs(got32 - observed_reff(img, mask, xc, yc)) <= 0.25
@@ -0,0 +1,138 @@
+import json
+
+import numpy as np
+import pytest
+from astropy.io import fits
+
+from tools import runtime_model
+from tools.parse_feedme import clear_feedme_cache
+from tools.runtime_model import (
+    RuntimeRecorder,
+    clear_cost_models,
+    estimate_fit_runtime,
+    estimate_runtime,
+    galfit_job_features,
+    record_runtime,
+)
+
+FEEDME = """A) img.fits        # Input data image
+B) out.fits        # Output data image block
+C) none        # Sigma image
+D) psf.fits        # PSF image
+F) none        # Bad pixel mask
+G) none        # Constraints
+H) 1 100 1 50        # Image region to fit
+I) 40 30        # Size of the convolution box
+J) 25.0        # Zeropoint
+K) 0.03 0.03        # Plate scale
+
+ 0) sersic
+ 1) 20 20 1 1
+ 3) 18.0 1
+ 4) 4.0 1
+ 5) 2.0 0
+ 9) 0.8 1
+10) 30 1
+ 0) sky
+ 1) 0.0 1
+ 2) 0.0 0
+"""
+
+
+@pytest.fixture(autouse=True)
+def _fresh():
+    clear_cost_models()
+    clear_feedme_cache()
+    yield
+    clear_cost_models()
+
+
+def test_galfit_job_features(tmp_path):
+    fits.PrimaryHDU(np.zeros((11, 13), dtype=np.float32)).writeto(tmp_path / "psf.fits")
+    feedme = tmp_path / "gal.feedme"
+    feedme.write_text(FEEDME)
+
+    features = galfit_job_features(str(feedme))
+    assert features == {"pixels": 5000, "conv_pixels": 1200, "psf_pixels": 143, "n_components": 2,
+                        "n_free": 7, "n_bands": 1, "num_steps": 0}
+
+    result = estimate_fit_runtime(str(feedme))
+    assert result["status"] == "success" and result["tool"] == "galfit"
+    assert (result["source"], result["timeout_s"], result["eta_s"]) == ("default", 300, None)
+
+
+def test_cost_model_learns_scaling(monkeypatch):
+    monkeypatch.setattr(runtime_model, "MIN_SAMPLES", 6)
+    rng = np.random.default_rng(0)
+    for _ in range(30):
+        pixels = int(rng.integers(1_000, 200_000))
+        n_free = int(rng.integers(3, 30))
+        wall = 1e-3 * pixels * (1 + 0.1 * n_free) * float(np.exp(rng.normal(0, 0.05)))
+        record_runtime("galfit", {"pixels": pixels, "n_free": n_free, "n_bands": 1}, wall)
+    record_runtime("galfit", {"pixels": 10}, 999, status="timeout")
+
+    small = estimate_runtime("galfit", {"pixels": 2_000, "n_free": 5, "n_bands": 1})
+    large = estimate_runtime("galfit", {"pixels": 150_000, "n_free": 25, "n_bands": 1})
+    assert small["source"] == "model" and small["samples"] == 30
+    assert small["eta_s"] == pytest.approx(1e-3 * 2_000 * 1.5, rel=0.3)
+    assert large["eta_s"] == pytest.approx(1e-3 * 150_000 * 3.5, rel=0.3)
+    assert runtime_model.MIN_TIMEOUT_S <= small["timeout_s"] < large["timeout_s"] <= 8 * 300
+    assert small["timeout_s"] > small["eta_s"]
+
+
+def test_recorder_explicit_timeout_and_disable(monkeypatch):
+    recorder = RuntimeRecorder("galfits", {"pixels": 100}, timeout=42)
+    assert recorder.timeout_s == 42
+    info = recorder.done("success")
+    assert info["source"] == "explicit" and info["wall_s"] >= 0
+    with open(runtime_model.history_path()) as f:
+        records = [json.loads(line) for line in f]
+    assert [(r["tool"], r["status"], r["features"]["pixels"]) for r in records] == [("galfits", "success", 100)]
+
+    monkeypatch.setenv("RUNTIME_HISTORY", "0")
+    RuntimeRecorder("galfits", {"pixels": 100}).done("success")
+    assert len(runtime_model.load_history()) == 1
+    assert estimate_runtime("galfits", {"pixels": 100})["timeout_s"] == 3600
+
+
+def test_timeouts_are_censored_lower_bounds(monkeypatch):
+    monkeypatch.setattr(runtime_model, "MIN_SAMPLES", 6)
+    job = {"pixels": 40_000, "n_free": 10, "n_bands": 1}
+    record_runtime("galfit", job, 300, status="timeout")
+    # 历史不足：默认超时之后被杀过的同类作业不再用同一个超时
+    assert estimate_runtime("galfit", job) == {"eta_s": None, "timeout_s": 600, "source": "default",
+                                               "samples": 0, "sigma": None, "censored": 1}
+    for _ in range(10):
+        record_runtime("galfit", job, 5.0)
+    est = estimate_runtime("galfit", job)
+    assert est["source"] == "model" and est["eta_s"] == pytest.approx(5.0, rel=0.1)
+    assert est["timeout_s"] == 600 and est["censored"] == 1
+    # 规模相差很大的作业不受影响
+    assert estimate_runtime("galfit", {**job, "pixels": 400_000})["censored"] == 0
+
+
+def test_cost_models_cached_per_tool(monkeypatch):
+    monkeypatch.setattr(runtime_model, "MIN_SAMPLES", 3)
+    for _ in range(3):
+        record_runtime("galfit", {"pixels": 100}, 2.0)
+        record_runtime("galfits", {"pixels": 100}, 20.0)
+    galfit = runtime_model.fit_cost_model("galfit")
+    galfits = runtime_model.fit_cost_model("galfits")
+    assert runtime_model.fit_cost_model("galfit") is galfit
+    assert runtime_model.fit_cost_model("galfits") is galfits
+
+
+def test_history_file_trimmed_to_window(monkeypatch):
+    monkeypatch.setattr(runtime_model, "HISTORY_WINDOW", 5)
+    for i in range(11):
+        record_runtime("galfit", {"pixels": i}, 1.0)
+    record_runtime("galfits", {"pixels": 1}, 1.0)
+    assert len(runtime_model.load_history("galfit")) == 5
+    with open(runtime_model.history_path()) as f:
+        records = [json.loads(line) for line in f]
+    assert [r["features"]["pixels"] for r in records if r["tool"] == "galfit"] == [6, 7, 8, 9, 10]
+    assert [r["tool"] for r in records].count("galfits") == 1
+
+    # 增量读取：新追加的行无需整文件重读
+    record_runtime("galfit", {"pixels": 11}, 1.0)
+    assert [r["features"]["pixels"] for r in runtime_model.load_history("galfit")][-1] == 11
@@ -0,0 +1,117 @@
+import json
+import os
+
+import numpy as np
+import pytest
+from astropy.io import fits
+
+from tools import validate_configs
+from tools.lyric_document import clear_lyric_cache
+from tools.parse_feedme import clear_feedme_cache
+from tools.validate_configs import discover_configs, validate_config_tree
+
+LYRIC = """R1) gal
+R2) [150.1, 2.2]
+R3) 0.5
+Ia1) [img.fits,0]
+Ia2) f150w
+Ia3) [{sigma},0]
+Ia4) [psf.fits,0]
+Ia6) [Noimg,0]
+Pa1) bulge
+Pa2) sersic
+Pa3) [0,-0.3,0.3,0.1,1]
+"""
+
+FEEDME = """A) img.fits        # Input data image
+B) out.fits        # Output data image block
+C) {sigma}        # Sigma image
+D) psf.fits        # PSF image
+F) none        # Bad pixel mask
+G) none        # Constraints
+H) {region}        # Image region to fit
+J) 25.0        # Zeropoint
+K) 0.03 0.03        # Plate scale
+
+ 0) sersic
+ 1) 20 20 1 1
+ 3) 18.0 1
+ 4) 4.0 1
+ 5) 2.0 1
+ 9) 0.8 1
+10) 30 1
+ 0) sky
+ 1) 0.0 1
+"""
+
+
+@pytest.fixture(autouse=True)
+def _fresh_caches():
+    clear_lyric_cache()
+    clear_feedme_cache()
+    yield
+    clear_lyric_cache()
+    clear_feedme_cache()
+
+
+def _fits(path, shape):
+    fits.PrimaryHDU(np.zeros(shape, dtype=np.float32)).writeto(path)
+
+
+def _tree(tmp_path):
+    good, bad = tmp_path / "good", tmp_path / "bad"
+    for d in (good, bad):
+        d.mkdir()
+        _fits(d / "img.fits", (40, 50))
+        _fits(d / "small.fits", (30, 30))
+        _fits(d / "psf.fits", (11, 11))
+    (good / "gal.lyric").write_text(LYRIC.format(sigma="img.fits"))
+    (good / "gal.feedme").write_text(FEEDME.format(sigma="img.fits", region="1 50 1 40"))
+    (bad / "gal.lyric").write_text(LYRIC.format(sigma="small.fits") + "Pa4) [5,0,1,0.1,1]\n")
+    (bad / "galfit.01").write_text(FEEDME.format(sigma="missing.fits", region="1 60 1 40"))
+    (tmp_path / ".objects").mkdir()
+    (tmp_path / ".objects" / "x.lyric").write_text("junk\n")
+    return good, bad
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_validate_config_tree_report(tmp_path, monkeypatch, workers):
+    monkeypatch.setattr(validate_configs, "INLINE_THRESHOLD", 0)
+    good, bad = _tree(tmp_path)
+
+    result = validate_config_tree(str(tmp_path), max_workers=workers)
+    assert result["status"] == "success"
+    summary = result["summary"]
+    assert (summary["total"], summary["valid"], summary["invalid"]) == (4, 2, 2)
+    assert summary["workers"] == workers
+    assert summary["by_kind"]["feedme"] == {"total": 2, "valid": 1, "invalid": 1}
+
+    with open(result["report_file"]) as f:
+        report = json.load(f)
+    files = {entry["path"]: entry for entry in report["files"]}
+    assert report["summary"] == summary
+    assert all(entry["elapsed_s"] >= 0 for entry in report["files"])
+
+    assert files[str(good / "gal.lyric")]["status"] == "valid"
+    shapes = {f["role"]: f["shape"] for f in files[str(good / "gal.lyric")]["fits"]}
+    assert shapes == {"Ia image": [40, 50], "Ia sigma": [40, 50], "Ia psf": [11, 11]}
+
+    bad_lyric = " | ".join(files[str(bad / "gal.lyric")]["errors"])
+    assert "Pa4) init 5 outside [0, 1]" in bad_lyric
+    assert "Ia sigma shape (30, 30) does not match image shape (40, 50)" in bad_lyric
+
+    bad_feedme = " | ".join(files[str(bad / "galfit.01")]["errors"])
+    assert "C) sigma file not found" in bad_feedme
+    assert "exceeds input image (50 x 40)" in bad_feedme
+
+
+def test_discover_skips_hidden_dirs_and_other_files(tmp_path):
+    _tree(tmp_path)
+    (tmp_path / "notes.txt").write_text("x")
+    kinds = [(os.path.relpath(p, tmp_path), k) for p, k in discover_configs(str(tmp_path))]
+    assert kinds == [("bad/gal.lyric", "lyric"), ("bad/galfit.01", "feedme"),
+                     ("good/gal.feedme", "feedme"), ("good/gal.lyric", "lyric")]
+
+
+def test_missing_root(tmp_path):
+    assert validate_config_tree(str(tmp_path / "nope"))["status"] == "failure"